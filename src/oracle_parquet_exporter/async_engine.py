@@ -0,0 +1,314 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, List, Optional
+
+import oracledb
+import pyarrow
+
+from .large_objects import has_streamed_columns
+from .memory import TaskBatches
+from .metrics import STAGE_FETCH, STAGE_WRITE, TableMetrics
+from .sinks import create_directory
+from .sorting import CLUSTER_METHOD_LOCAL
+
+if TYPE_CHECKING:
+    from .main import OracleParquetExporter, TableExportTask
+
+# Constants
+ENGINE_SYNC: str = "sync"
+ENGINE_ASYNC: str = "async"
+ENGINES: List[str] = [ENGINE_SYNC, ENGINE_ASYNC]
+DEFAULT_ASYNC_CONCURRENCY: int = 16
+
+
+class AsyncExportEngine:
+    """Exports tables with the asyncio API of oracledb - keeping the fetches of up to concurrency tables (or chunks) in
+       flight at once, over a pool of as many connections, while the part files are written on a thread pool.  When a
+       schema has thousands of small tables, the run time is mostly round trip latency - which one event loop overlaps
+       without a thread per table.  A table's next batch is fetched while its previous one is written.
+
+       The tables and their columns are loaded up front with the catalog's few bulk dictionary queries (and any chunks
+       or incremental ranges are planned) on one synchronous connection.  Tasks whose rows can not be fetched as data
+       frames - tables with LOB/LONG columns (read row-wise), or ones sorted locally - are exported by the synchronous
+       code path on that connection, one at a time, on the thread pool.
+
+       With a memory limit, each fetched batch is counted by the memory accountant - and a task waits for memory (on
+       the thread pool, after flushing its writer) before its next fetch, as the synchronous tasks do.
+
+       oracledb only supports asyncio in thin mode - so the Oracle Client libraries are not loaded for this engine."""
+
+    def __init__(self,
+                 exporter: "OracleParquetExporter",
+                 concurrency: int = DEFAULT_ASYNC_CONCURRENCY
+                 ):
+        self.exporter = exporter
+        self.concurrency = concurrency
+
+        self.synchronous_task_count: int = 0
+
+    def run(self):
+        asyncio.run(self.export_tables())
+
+    async def export_tables(self):
+        exporter = self.exporter
+        with exporter.get_db_connection() as connection:
+            # Every session reads as of this SCN - so the export is consistent across them
+            scn = exporter.get_export_scn(connection=connection,
+                                          required=True
+                                          )
+            exporter.logger.info(msg=f"Exporting with the {ENGINE_ASYNC} engine - with concurrency: {self.concurrency}"
+                                     f" - as of SCN: {scn}")
+
+            tasks = []
+            for schema in exporter.schemas:
+                for table_name in exporter.get_tables(connection=connection,
+                                                      schema=schema
+                                                      ):
+                    tasks.extend(exporter.get_table_export_tasks(connection=connection,
+                                                                 schema=schema,
+                                                                 table_name=table_name,
+                                                                 scn=scn
+                                                                 ))
+
+            # Longest first - so that no long table is left to run on alone at the end
+            export_plan = exporter.get_export_plan(connection=connection)
+            tasks.sort(key=lambda task: export_plan.get_estimated_seconds(schema=task.schema,
+                                                                          table_name=task.table_name
+                                                                          ),
+                       reverse=True
+                       )
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+            synchronous_lock = asyncio.Lock()
+            with ThreadPoolExecutor(max_workers=self.concurrency,
+                                    thread_name_prefix="export_writer"
+                                    ) as executor:
+                async with exporter.get_async_db_pool() as pool:
+                    futures = [asyncio.ensure_future(self.export_table_task(pool=pool,
+                                                                            connection=connection,
+                                                                            task=task,
+                                                                            scn=scn,
+                                                                            executor=executor,
+                                                                            semaphore=semaphore,
+                                                                            synchronous_lock=synchronous_lock
+                                                                            ))
+                               for task in tasks]
+                    try:
+                        await asyncio.gather(*futures)
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+
+        if self.synchronous_task_count:
+            exporter.logger.info(msg=f"Exported: {self.synchronous_task_count:,} task(s) synchronously - tables with"
+                                     f" LOB/LONG columns, or sorted locally")
+
+    async def export_table_task(self,
+                                pool: oracledb.AsyncConnectionPool,
+                                connection: oracledb.Connection,
+                                task: "TableExportTask",
+                                scn: int,
+                                executor: ThreadPoolExecutor,
+                                semaphore: asyncio.Semaphore,
+                                synchronous_lock: asyncio.Lock
+                                ):
+        exporter = self.exporter
+        loop = asyncio.get_running_loop()
+        export_query = exporter.get_export_query(connection=connection,
+                                                 schema=task.schema,
+                                                 table_name=task.table_name,
+                                                 scn=scn,
+                                                 chunk=task.chunk,
+                                                 incremental_range=task.incremental_range
+                                                 )
+        columns = exporter.get_export_table(connection=connection,
+                                            schema=task.schema,
+                                            table_name=task.table_name
+                                            ).supported_columns
+        if export_query is not None and (has_streamed_columns(columns=columns)
+                                         or export_query.cluster_method == CLUSTER_METHOD_LOCAL):
+            # The lock is taken first - so that the tasks queued for the synchronous connection hold no slots
+            async with synchronous_lock, semaphore:
+                self.synchronous_task_count += 1
+                await loop.run_in_executor(executor, partial(exporter.export_table_task,
+                                                             connection=connection,
+                                                             task=task,
+                                                             scn=scn
+                                                             ))
+            return
+
+        async with semaphore:
+            if export_query is None:
+                exporter.logger.warning(f"Table: {task.schema}.{task.table_name} has no eligible export columns, skipping.")
+            else:
+                async with pool.acquire() as async_connection:
+                    await self.export_table(async_connection=async_connection,
+                                            connection=connection,
+                                            task=task,
+                                            scn=scn,
+                                            sql=export_query.sql,
+                                            bind_vars=export_query.bind_vars,
+                                            executor=executor
+                                            )
+
+            await loop.run_in_executor(executor, partial(exporter.complete_table_export_task,
+                                                         task=task,
+                                                         scn=scn
+                                                         ))
+
+    async def export_table(self,
+                           async_connection: oracledb.AsyncConnection,
+                           connection: oracledb.Connection,
+                           task: "TableExportTask",
+                           scn: int,
+                           sql: str,
+                           bind_vars: dict,
+                           executor: ThreadPoolExecutor
+                           ):
+        exporter = self.exporter
+        loop = asyncio.get_running_loop()
+        schema, table_name = task.schema, task.table_name
+        output_path_prefix = exporter.get_table_output_path(schema=schema,
+                                                            table_name=table_name
+                                                            ).as_posix()
+        table_metrics = exporter.run_metrics.start_table(schema=schema,
+                                                         table_name=table_name,
+                                                         chunk_number=task.chunk.chunk_number if task.chunk is not None else None
+                                                         )
+        chunk_text = f" (chunk {task.chunk.chunk_number + 1} of {task.chunk.chunk_count})" if task.chunk is not None else ""
+        exporter.logger.info(msg=f"Exporting table: {schema}.{table_name}{chunk_text} - SQL: {sql}{f' - SCN: {scn}' if 'scn' in bind_vars else ''}")
+        create_directory(filesystem=exporter.output_filesystem,
+                         path=output_path_prefix
+                         )
+
+        column_types = exporter.get_column_arrow_types(connection=connection,
+                                                       schema=schema,
+                                                       table_name=table_name
+                                                       )
+        batch_sizer = exporter.get_batch_sizer(connection=connection,
+                                               schema=schema,
+                                               table_name=table_name
+                                               )
+        table_config = exporter.get_table_config(schema=schema,
+                                                 table_name=table_name
+                                                 )
+        batch_size = exporter.memory_accountant.get_batch_size(batch_size=batch_sizer.batch_size if batch_sizer
+                                                               else table_config.batch_size or exporter.batch_size)
+        table_metrics.batch_size = batch_size
+
+        part_writer = exporter.create_table_part_writer(schema=schema,
+                                                        table_name=table_name,
+                                                        output_path_prefix=output_path_prefix,
+                                                        file_numbers=task.file_numbers,
+                                                        on_file_committed=lambda file_name, row_count: exporter.run_manifest.record_file(
+                                                            schema=schema,
+                                                            table_name=table_name,
+                                                            chunk=task.chunk,
+                                                            file_name=file_name,
+                                                            row_count=row_count
+                                                        ),
+                                                        sort_keys=exporter.get_sort_keys(schema=schema,
+                                                                                         table_name=table_name
+                                                                                         )
+                                                        )
+        memory_accountant = exporter.memory_accountant
+        task_batches = TaskBatches()
+        pending_write: Optional[asyncio.Future] = None
+        try:
+            await self.wait_for_memory(executor=executor,
+                                       part_writer=part_writer,
+                                       task_batches=task_batches
+                                       )
+            fetch_start_time = time.perf_counter()
+            # The driver sizes its fetch array (and prefetch) to match the batch size
+            async for odf in async_connection.fetch_df_batches(statement=sql,
+                                                               parameters=bind_vars,
+                                                               size=batch_size
+                                                               ):
+                fetch_seconds = time.perf_counter() - fetch_start_time
+                table_metrics.add_stage_seconds(stage=STAGE_FETCH,
+                                                seconds=fetch_seconds
+                                                )
+                pyarrow_table = exporter.convert_arrow_batch(odf=odf,
+                                                             column_types=column_types,
+                                                             table_metrics=table_metrics,
+                                                             batch_sizer=batch_sizer,
+                                                             fetch_seconds=fetch_seconds
+                                                             )
+                if memory_accountant.is_enabled:
+                    pyarrow_table = memory_accountant.track(pyarrow_table=pyarrow_table,
+                                                            task_batches=task_batches
+                                                            )
+                table_metrics.record_batch()
+                # The part writer is not thread-safe - so one batch of a table is written at a time
+                if pending_write:
+                    await pending_write
+                pending_write = loop.run_in_executor(executor, partial(self.write_batch,
+                                                                       part_writer=part_writer,
+                                                                       table_metrics=table_metrics,
+                                                                       pyarrow_table=pyarrow_table
+                                                                       ))
+                del odf, pyarrow_table
+                if memory_accountant.is_over_limit:
+                    # The writer is flushed while waiting - so its write must be done first
+                    await pending_write
+                    pending_write = None
+                    await self.wait_for_memory(executor=executor,
+                                               part_writer=part_writer,
+                                               task_batches=task_batches
+                                               )
+                fetch_start_time = time.perf_counter()
+
+            if pending_write:
+                await pending_write
+            await loop.run_in_executor(executor, partial(self.close_part_writer,
+                                                         part_writer=part_writer,
+                                                         table_metrics=table_metrics
+                                                         ))
+        except BaseException as e:
+            if pending_write and not pending_write.done():
+                await asyncio.wait([pending_write])
+            await loop.run_in_executor(executor, partial(part_writer.__exit__, type(e), e, e.__traceback__))
+            raise
+
+        table_metrics.complete(part_writer=part_writer)
+        exporter.collect_file_metadata(part_writer=part_writer)
+        exporter.logger.info(f"Wrote {part_writer.rows_written:,} row(s) to {output_path_prefix} - table: {schema}.{table_name}{chunk_text}"
+                             f" - {len(part_writer.file_names):,} file(s), {part_writer.row_groups_written:,} row group(s),"
+                             f" {part_writer.compressed_bytes_written:,} compressed byte(s)"
+                             f" (compression ratio: {part_writer.compression_ratio_estimator.ratio:.3f})")
+
+    async def wait_for_memory(self,
+                              executor: ThreadPoolExecutor,
+                              part_writer,
+                              task_batches: TaskBatches
+                              ):
+        """Waits (on the thread pool) for memory before the next fetch of a task - flushing its writer first"""
+        memory_accountant = self.exporter.memory_accountant
+        if memory_accountant.is_over_limit:
+            await asyncio.get_running_loop().run_in_executor(executor, partial(memory_accountant.wait_for_memory,
+                                                                               on_pressure=part_writer.flush,
+                                                                               task_batches=task_batches
+                                                                               ))
+
+    def write_batch(self,
+                    part_writer,
+                    table_metrics: TableMetrics,
+                    pyarrow_table: pyarrow.Table
+                    ):
+        with table_metrics.time_stage(stage=STAGE_WRITE):
+            part_writer.write(pyarrow_table=pyarrow_table)
+            if self.exporter.memory_accountant.is_over_limit:
+                # Write out the buffered rows as a (smaller) row group - freeing the batches they hold
+                part_writer.flush()
+        self.exporter.run_metrics.sample_memory()
+
+    @staticmethod
+    def close_part_writer(part_writer,
+                          table_metrics: TableMetrics
+                          ):
+        with table_metrics.time_stage(stage=STAGE_WRITE):
+            part_writer.close()
@@ -0,0 +1,99 @@
+import pyarrow
+import threading
+from typing import Optional
+
+from .catalog import TableMetadata
+from .type_mapping import get_arrow_type
+
+# Constants
+DEFAULT_BATCH_BYTES_TARGET: int = 64 * 1024 * 1024  # 64MB of Arrow data per fetched batch
+MIN_ADAPTIVE_BATCH_SIZE: int = 1_000
+MAX_ADAPTIVE_BATCH_SIZE: int = 1_000_000
+MAX_BATCH_FETCH_SECONDS: float = 10.0  # Slower fetches are shrunk - so the writer is not left idle waiting on one batch
+MAX_BATCH_SIZE_GROWTH_FACTOR: float = 2.0  # Per observed batch - so one unrepresentative batch cannot blow up the next query
+OBSERVED_ROW_BYTES_WEIGHT: float = 0.5  # The weight of each new observation in the moving average of the bytes per row
+VARIABLE_WIDTH_OFFSET_BYTES: int = 4  # The Arrow offset of each value of a (non-large) string/binary column
+FALLBACK_FIXED_WIDTH_BYTES: int = 8  # For columns of an inferred type - i.e. an unconstrained NUMBER, fetched as a double
+
+
+def is_variable_width(arrow_type: pyarrow.DataType) -> bool:
+    return (pyarrow.types.is_string(arrow_type) or pyarrow.types.is_large_string(arrow_type)
+            or pyarrow.types.is_binary(arrow_type) or pyarrow.types.is_large_binary(arrow_type))
+
+
+def estimate_row_bytes(table: TableMetadata) -> int:
+    """Estimates the Arrow size of a fetched row of the table.  Fixed-width columns are sized by their Arrow type.  The
+       variable-width values are sized by the table's AVG_ROW_LEN (an over-estimate - it also counts the stored
+       bytes of the fixed-width columns) or, for a table without statistics, by half the declared column lengths."""
+    fixed_width_bytes = 0
+    variable_width_bytes = 0
+    variable_width_column_count = 0
+    for column in table.supported_columns:
+        arrow_type = get_arrow_type(column=column)
+        if arrow_type is None:
+            fixed_width_bytes += FALLBACK_FIXED_WIDTH_BYTES
+        elif pyarrow.types.is_dictionary(arrow_type) or is_variable_width(arrow_type=arrow_type):
+            # Dictionary-encoded strings are fetched as plain strings
+            variable_width_column_count += 1
+            variable_width_bytes += (column.data_length or 0) // 2
+        else:
+            fixed_width_bytes += arrow_type.byte_width
+
+    if table.avg_row_len:
+        variable_width_bytes = table.avg_row_len if variable_width_column_count else 0
+
+    return max(fixed_width_bytes + variable_width_bytes + VARIABLE_WIDTH_OFFSET_BYTES * variable_width_column_count, 1)
+
+
+class AdaptiveBatchSizer:
+    """Sizes the fetched batches of a table to hold about batch_bytes_target bytes of Arrow data each.  The first size
+       is estimated from the table's statistics and column types - it is then refined from the batches actually fetched,
+       by their Arrow size and (for slow fetches) their latency.
+
+       The driver fixes the batch size of a query when it is executed - so a refined size applies from the table's next
+       query on (i.e. its remaining chunks).  A table exported in one query is fetched at its estimated size throughout
+       - only chunked tables adapt during their export.  Thread-safe - the chunks of a table share one sizer."""
+
+    def __init__(self,
+                 table: TableMetadata,
+                 batch_bytes_target: int = DEFAULT_BATCH_BYTES_TARGET,
+                 max_batch_fetch_seconds: float = MAX_BATCH_FETCH_SECONDS
+                 ):
+        self.batch_bytes_target = batch_bytes_target
+        self.max_batch_fetch_seconds = max_batch_fetch_seconds
+        self.estimated_row_bytes: int = estimate_row_bytes(table=table)
+        self.row_bytes: float = self.estimated_row_bytes
+        self.rows_per_second: Optional[float] = None
+        self.batches_observed: int = 0
+        self._lock = threading.Lock()
+        self.batch_size: int = self.get_batch_size()
+
+    def get_batch_size(self) -> int:
+        batch_size = self.batch_bytes_target / self.row_bytes
+        if self.rows_per_second:
+            batch_size = min(batch_size, self.rows_per_second * self.max_batch_fetch_seconds)
+        return int(min(max(batch_size, MIN_ADAPTIVE_BATCH_SIZE), MAX_ADAPTIVE_BATCH_SIZE))
+
+    def record_batch(self,
+                     row_count: int,
+                     byte_count: int,
+                     fetch_seconds: float
+                     ):
+        if row_count == 0:
+            return
+
+        with self._lock:
+            observed_row_bytes = byte_count / row_count
+            if self.batches_observed == 0:
+                # The first observation replaces the estimate - it is the better guess
+                self.row_bytes = observed_row_bytes
+            else:
+                self.row_bytes += OBSERVED_ROW_BYTES_WEIGHT * (observed_row_bytes - self.row_bytes)
+            self.row_bytes = max(self.row_bytes, 1.0)
+
+            # Only slow fetches cap the batch size - once capped, every fetch updates the rate (so the cap can lift)
+            if fetch_seconds > 0 and (fetch_seconds > self.max_batch_fetch_seconds or self.rows_per_second is not None):
+                self.rows_per_second = row_count / fetch_seconds
+            self.batches_observed += 1
+
+            self.batch_size = min(self.get_batch_size(), int(self.batch_size * MAX_BATCH_SIZE_GROWTH_FACTOR))
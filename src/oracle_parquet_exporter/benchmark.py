@@ -0,0 +1,783 @@
+import asyncio
+import click
+import datetime
+import itertools
+import json
+import logging
+import pyarrow
+import random
+import re
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional, Tuple
+
+from .async_engine import DEFAULT_ASYNC_CONCURRENCY, ENGINE_SYNC, ENGINES
+from .batch_sizing import DEFAULT_BATCH_BYTES_TARGET
+from .catalog import ColumnMetadata
+from .main import DEFAULT_PARALLELISM, DEFAULT_PARQUET_MAX_FILE_SIZE, NO_ROW_LIMIT, OracleParquetExporter
+from .memory import NO_MEMORY_LIMIT
+from .pipeline import NO_PIPELINE
+from .writer import DEFAULT_PARQUET_ROW_GROUP_SIZE
+
+# Constants
+SYNTHETIC_SCHEMA: str = "BENCHMARK"
+SYNTHETIC_SCN: int = 1
+SYNTHETIC_VALUE_POOL_SIZE: int = 65_536  # Distinct rows generated per column - batches are (zero-copy) slices of the pool
+SYNTHETIC_CATEGORY_COUNT: int = 16
+SYNTHETIC_STRING_LENGTH: int = 24
+SYNTHETIC_BLOCK_SIZE: int = 8192
+SYNTHETIC_EPOCH: datetime.datetime = datetime.datetime(2020, 1, 1)
+KEY_COLUMN_NAME: str = "ID"
+DEFAULT_ROW_COUNT: int = 1_000_000
+DEFAULT_TABLE_COUNT: int = 1
+DEFAULT_COLUMN_COUNT: int = 8
+DEFAULT_BATCH_SIZE: int = 100_000
+DEFAULT_REPEAT_COUNT: int = 3
+MEGABYTE: int = 1_000_000
+
+
+@dataclass
+class SyntheticColumnKind:
+    """A kind of synthetic column - the Oracle column it stands in for, and the Arrow values the driver fetches for it"""
+    data_type: str
+    data_length: int
+    data_precision: Optional[int]
+    data_scale: Optional[int]
+    num_distinct: Optional[int]
+    make_values: Callable[[random.Random, int], pyarrow.Array]
+
+
+COLUMN_KINDS: Dict[str, SyntheticColumnKind] = {
+    "integer": SyntheticColumnKind(data_type="NUMBER", data_length=22, data_precision=18, data_scale=0, num_distinct=None,
+                                   make_values=lambda rng, size: pyarrow.array([rng.randrange(10 ** 12) for _ in range(size)],
+                                                                               pyarrow.int64())),
+    "decimal": SyntheticColumnKind(data_type="NUMBER", data_length=22, data_precision=12, data_scale=2, num_distinct=None,
+                                   make_values=lambda rng, size: pyarrow.array([rng.randrange(10 ** 8) / 100 for _ in range(size)],
+                                                                               pyarrow.float64())),
+    "float": SyntheticColumnKind(data_type="BINARY_DOUBLE", data_length=8, data_precision=None, data_scale=None, num_distinct=None,
+                                 make_values=lambda rng, size: pyarrow.array([rng.gauss(0, 1_000) for _ in range(size)],
+                                                                             pyarrow.float64())),
+    "string": SyntheticColumnKind(data_type="VARCHAR2", data_length=SYNTHETIC_STRING_LENGTH, data_precision=None, data_scale=None,
+                                  num_distinct=None,
+                                  make_values=lambda rng, size: pyarrow.array([f"{rng.getrandbits(64):016x}-{rng.getrandbits(24):06x}"
+                                                                               for _ in range(size)], pyarrow.string())),
+    "category": SyntheticColumnKind(data_type="VARCHAR2", data_length=SYNTHETIC_STRING_LENGTH, data_precision=None, data_scale=None,
+                                    num_distinct=SYNTHETIC_CATEGORY_COUNT,
+                                    make_values=lambda rng, size: pyarrow.array([f"category_{rng.randrange(SYNTHETIC_CATEGORY_COUNT)}"
+                                                                                 for _ in range(size)], pyarrow.string())),
+    "date": SyntheticColumnKind(data_type="DATE", data_length=7, data_precision=None, data_scale=None, num_distinct=None,
+                                make_values=lambda rng, size: pyarrow.array([SYNTHETIC_EPOCH + datetime.timedelta(seconds=rng.randrange(10 ** 8))
+                                                                             for _ in range(size)], pyarrow.timestamp("s"))),
+    "timestamp": SyntheticColumnKind(data_type="TIMESTAMP(6)", data_length=11, data_precision=None, data_scale=6, num_distinct=None,
+                                     make_values=lambda rng, size: pyarrow.array([SYNTHETIC_EPOCH + datetime.timedelta(microseconds=rng.randrange(10 ** 14))
+                                                                                  for _ in range(size)], pyarrow.timestamp("us")))
+}
+DEFAULT_COLUMN_KINDS: List[str] = ["integer", "decimal", "string", "category", "date", "float", "timestamp"]
+
+
+@dataclass
+class SyntheticTable:
+    """A synthetic table - a sequential ID key column, followed by column_count columns of the given kinds (cycled)"""
+    table_name: str
+    row_count: int
+    column_count: int = DEFAULT_COLUMN_COUNT
+    column_kinds: List[str] = field(default_factory=lambda: list(DEFAULT_COLUMN_KINDS))
+
+    def __post_init__(self):
+        for column_kind in self.column_kinds:
+            if column_kind not in COLUMN_KINDS:
+                raise ValueError(f"Invalid column kind: '{column_kind}' - expected one of: {list(COLUMN_KINDS)}")
+
+    @property
+    def columns(self) -> List[Tuple[str, str]]:
+        """The (column name, column kind) of each column - after the key column"""
+        return [(f"{column_kind.upper()}_{i}", column_kind)
+                for i, column_kind in zip(range(1, self.column_count + 1), itertools.cycle(self.column_kinds))]
+
+    @property
+    def avg_row_len(self) -> int:
+        return 8 + sum(COLUMN_KINDS[column_kind].data_length for _, column_kind in self.columns)
+
+    @property
+    def segment_bytes(self) -> int:
+        return self.row_count * self.avg_row_len
+
+    def get_column_metadata(self) -> List[ColumnMetadata]:
+        column_metadata = [ColumnMetadata(column_name=KEY_COLUMN_NAME, data_type="NUMBER", data_length=22,
+                                          data_precision=18, data_scale=0, nullable=False, num_distinct=self.row_count)]
+        for column_name, column_kind in self.columns:
+            kind = COLUMN_KINDS[column_kind]
+            column_metadata.append(ColumnMetadata(column_name=column_name,
+                                                  data_type=kind.data_type,
+                                                  data_length=kind.data_length,
+                                                  data_precision=kind.data_precision,
+                                                  data_scale=kind.data_scale,
+                                                  num_distinct=kind.num_distinct
+                                                  ))
+        return column_metadata
+
+
+class SyntheticDataFrame:
+    """Stands in for the data frame batches of Connection.fetch_df_batches()"""
+
+    def __init__(self, pyarrow_table: pyarrow.Table):
+        self._pyarrow_table = pyarrow_table
+
+    def column_arrays(self) -> List[pyarrow.Array]:
+        return [column.combine_chunks() for column in self._pyarrow_table.columns]
+
+    def column_names(self) -> List[str]:
+        return self._pyarrow_table.column_names
+
+
+class SyntheticCursor:
+    """Stands in for an oracledb cursor - answering the dictionary queries the exporter issues from the synthetic tables"""
+
+    def __init__(self, connection: "SyntheticConnection"):
+        self.connection = connection
+        self.arraysize = None
+        self.prefetchrows = None
+        self._rows: List[tuple] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, statement: str, parameters: Optional[Dict[str, Any]] = None, **keyword_parameters):
+        bind_vars = dict(parameters or {}, **keyword_parameters)
+        normalized_statement = " ".join(statement.lower().split())
+        if "get_system_change_number" in normalized_statement:
+            self._rows = [(SYNTHETIC_SCN,)]
+        elif "from dba_segments" in normalized_statement:
+            self._rows = [(SYNTHETIC_SCHEMA, table.table_name, table.segment_bytes)
+                          for table in self.connection.get_tables(bind_vars=bind_vars)]
+        elif "from all_tables" in normalized_statement:
+            self._rows = [(SYNTHETIC_SCHEMA, table.table_name, SYNTHETIC_EPOCH, table.row_count,
+                           table.segment_bytes // SYNTHETIC_BLOCK_SIZE, table.avg_row_len, SYNTHETIC_EPOCH, "NO")
+                          for table in self.connection.get_tables(bind_vars=bind_vars)]
+        elif "from all_tab_columns" in normalized_statement:
+            self._rows = [(SYNTHETIC_SCHEMA, table.table_name, column.column_name, column.data_type, column.data_length,
+                           column.data_precision, column.data_scale, "Y" if column.nullable else "N", column.num_distinct)
+                          for table in self.connection.get_tables(bind_vars=bind_vars)
+                          for column in table.get_column_metadata()]
+        elif normalized_statement.startswith("select min("):
+            # Numeric key chunking (by the ID column) - ROWID chunking finds no extents, so leaves tables whole
+            table = self.connection.get_table(statement=statement)
+            self._rows = [(0, table.row_count - 1) if table.row_count else (None, None)]
+        else:
+            self._rows = []
+
+    def fetchone(self) -> Optional[tuple]:
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self) -> List[tuple]:
+        return self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class SyntheticConnection:
+    """Stands in for an oracledb connection (and its pool) - serving synthetic tables of generated Arrow batches, so
+       that the exporter can be driven - and benchmarked - without a database.
+
+       Each column's values are generated once (a pool of SYNTHETIC_VALUE_POOL_SIZE random values), and every batch is
+       a zero-copy slice of the pools - so generating the data costs next to nothing next to exporting it.  The batch
+       latency simulates the round trip (and server time) of each fetch."""
+
+    def __init__(self,
+                 tables: List[SyntheticTable],
+                 batch_latency: float = 0.0,
+                 seed: int = 0
+                 ):
+        self.tables = {table.table_name: table for table in tables}
+        self.batch_latency = batch_latency
+        self.seed = seed
+        self._value_pools: Dict[Tuple[str, str], pyarrow.Array] = {}
+        self._lock = threading.Lock()
+        self.fetch_count: int = 0
+        self.fetches_in_flight: int = 0
+        self.max_fetches_in_flight: int = 0
+
+    def cursor(self) -> SyntheticCursor:
+        return SyntheticCursor(connection=self)
+
+    def close(self):
+        pass
+
+    @contextmanager
+    def acquire(self) -> Generator["SyntheticConnection", None, None]:
+        yield self
+
+    def get_tables(self, bind_vars: Dict[str, Any]) -> List[SyntheticTable]:
+        schemas = [value for name, value in bind_vars.items() if name.startswith("schema_")]
+        include_pattern = bind_vars.get("table_name_include_pattern", ".*")
+        exclude_pattern = bind_vars.get("table_name_exclude_pattern")
+        return [table for table_name, table in sorted(self.tables.items())
+                if SYNTHETIC_SCHEMA in schemas
+                and re.search(include_pattern, table_name)
+                and not (exclude_pattern and re.search(exclude_pattern, table_name))]
+
+    def get_table(self, statement: str) -> SyntheticTable:
+        table_match = re.search(rf'FROM "{SYNTHETIC_SCHEMA}"\."(\w+)"', statement)
+        if not table_match or table_match.group(1) not in self.tables:
+            raise ValueError(f"Statement does not query a synthetic table: {statement}")
+        return self.tables[table_match.group(1)]
+
+    def get_value_pool(self,
+                       table_name: str,
+                       column_name: str,
+                       column_kind: str
+                       ) -> pyarrow.Array:
+        with self._lock:
+            value_pool = self._value_pools.get((table_name, column_name))
+            if value_pool is None:
+                rng = random.Random(f"{self.seed}.{table_name}.{column_name}")
+                value_pool = COLUMN_KINDS[column_kind].make_values(rng, SYNTHETIC_VALUE_POOL_SIZE)
+                self._value_pools[(table_name, column_name)] = value_pool
+            return value_pool
+
+    def generate_value_pools(self):
+        """Generates the values of every column up front - so that the first benchmark case does not pay for it"""
+        for table in self.tables.values():
+            for column_name, column_kind in table.columns:
+                self.get_value_pool(table_name=table.table_name,
+                                    column_name=column_name,
+                                    column_kind=column_kind
+                                    )
+
+    def get_id_range(self,
+                     statement: str,
+                     parameters: Dict[str, Any],
+                     table: SyntheticTable
+                     ) -> Tuple[int, int]:
+        """Returns the [low, high) range of IDs that the statement's chunk predicate and row limit select"""
+        low_id = max(int(parameters.get("chunk_low_value", 0)), 0)
+        high_id = table.row_count
+        if "chunk_high_value" in parameters:
+            high_id = min(int(parameters["chunk_high_value"]), high_id)
+        fetch_first_match = re.search(r"FETCH FIRST (\d+) ROWS ONLY", statement)
+        if fetch_first_match:
+            high_id = min(high_id, low_id + int(fetch_first_match.group(1)))
+        return low_id, max(high_id, low_id)
+
+    def make_batch(self,
+                   table: SyntheticTable,
+                   start_id: int,
+                   row_count: int
+                   ) -> pyarrow.Table:
+        arrays = [pyarrow.array(range(start_id, start_id + row_count), pyarrow.int64())]
+        names = [KEY_COLUMN_NAME]
+        for column_name, column_kind in table.columns:
+            value_pool = self.get_value_pool(table_name=table.table_name,
+                                             column_name=column_name,
+                                             column_kind=column_kind
+                                             )
+            # Slices that wrap around the end of the pool are stitched together from its pieces
+            slices = []
+            offset = start_id % SYNTHETIC_VALUE_POOL_SIZE
+            remaining = row_count
+            while remaining > 0:
+                length = min(remaining, SYNTHETIC_VALUE_POOL_SIZE - offset)
+                slices.append(value_pool.slice(offset, length))
+                remaining -= length
+                offset = 0
+            arrays.append(pyarrow.chunked_array(slices, type=value_pool.type))
+            names.append(column_name)
+        return pyarrow.Table.from_arrays(arrays=arrays, names=names)
+
+    @staticmethod
+    def get_selected_columns(statement: str) -> List[Tuple[str, str, bool]]:
+        """Returns the (column name, column alias, whether it is fetched as text) of each column in the statement's
+           select list"""
+        selected_columns = []
+        # The arguments of TO_CHAR (the literals after its column) are not select items of their own
+        for select_item in re.split(r", (?!')", statement.split(" FROM ")[0].removeprefix("SELECT ")):
+            column_names = re.findall(r'"(\w+)"', select_item)
+            selected_columns.append((column_names[0], column_names[-1], select_item.startswith("TO_CHAR(")))
+        return selected_columns
+
+    @contextmanager
+    def track_fetch(self) -> Generator[None, None, None]:
+        with self._lock:
+            self.fetches_in_flight += 1
+            self.max_fetches_in_flight = max(self.max_fetches_in_flight, self.fetches_in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.fetches_in_flight -= 1
+
+    def fetch_df_batches(self,
+                         statement: str,
+                         parameters: Optional[Dict[str, Any]] = None,
+                         size: int = DEFAULT_BATCH_SIZE
+                         ) -> Generator[SyntheticDataFrame, None, None]:
+        with self.track_fetch():
+            for odf in self.make_df_batches(statement=statement,
+                                            parameters=parameters,
+                                            size=size
+                                            ):
+                if self.batch_latency:
+                    time.sleep(self.batch_latency)
+                yield odf
+
+    def make_df_batches(self,
+                        statement: str,
+                        parameters: Optional[Dict[str, Any]] = None,
+                        size: int = DEFAULT_BATCH_SIZE
+                        ) -> Generator[SyntheticDataFrame, None, None]:
+        table = self.get_table(statement=statement)
+        low_id, high_id = self.get_id_range(statement=statement,
+                                            parameters=parameters or {},
+                                            table=table
+                                            )
+        selected_columns = self.get_selected_columns(statement=statement)
+        for start_id in range(low_id, high_id, size):
+            with self._lock:
+                self.fetch_count += 1
+            pyarrow_table = self.make_batch(table=table,
+                                            start_id=start_id,
+                                            row_count=min(size, high_id - start_id)
+                                            )
+            # The driver returns the columns as selected - named by their column alias (i.e. lowercased), if any
+            pyarrow_table = pyarrow_table.select([column_name for column_name, _, _ in selected_columns])
+            for i, (_, _, is_text) in enumerate(selected_columns):
+                if is_text:
+                    pyarrow_table = pyarrow_table.set_column(i, pyarrow_table.field(i).name, pyarrow_table.column(i).cast(pyarrow.string()))
+            yield SyntheticDataFrame(pyarrow_table=pyarrow_table.rename_columns([column_alias for _, column_alias, _ in selected_columns]))
+
+
+class SyntheticAsyncConnection:
+    """Stands in for an oracledb AsyncConnection (and its AsyncConnectionPool) - serving the synthetic tables of a
+       synthetic connection.  The batch latency is awaited - so other fetches proceed meanwhile."""
+
+    def __init__(self, connection: SyntheticConnection):
+        self.connection = connection
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncGenerator["SyntheticAsyncConnection", None]:
+        yield self
+
+    async def fetch_df_batches(self,
+                               statement: str,
+                               parameters: Optional[Dict[str, Any]] = None,
+                               size: int = DEFAULT_BATCH_SIZE
+                               ) -> AsyncGenerator[SyntheticDataFrame, None]:
+        with self.connection.track_fetch():
+            for odf in self.connection.make_df_batches(statement=statement,
+                                                       parameters=parameters,
+                                                       size=size
+                                                       ):
+                if self.connection.batch_latency:
+                    await asyncio.sleep(self.connection.batch_latency)
+                yield odf
+
+
+class BenchmarkExporter(OracleParquetExporter):
+    """An exporter that reads from a synthetic connection instead of a database"""
+
+    def __init__(self,
+                 connection: SyntheticConnection,
+                 **kwargs
+                 ):
+        self.synthetic_connection = connection
+        super().__init__(username="benchmark",
+                         password="benchmark",
+                         hostname="localhost",
+                         service_name="benchmark",
+                         port=1521,
+                         schemas=[SYNTHETIC_SCHEMA],
+                         **kwargs
+                         )
+
+    def init_oracle_client(self):
+        pass
+
+    @contextmanager
+    def get_db_connection(self) -> Generator[SyntheticConnection, None, None]:
+        yield self.synthetic_connection
+
+    @contextmanager
+    def get_db_pool(self) -> Generator[SyntheticConnection, None, None]:
+        yield self.synthetic_connection
+
+    @asynccontextmanager
+    async def get_async_db_pool(self) -> AsyncGenerator[SyntheticAsyncConnection, None]:
+        yield SyntheticAsyncConnection(connection=self.synthetic_connection)
+
+
+@dataclass
+class BenchmarkResult:
+    """The throughput of one benchmark case - the median over its repeats"""
+    settings: Dict[str, Any]
+    rows: int
+    uncompressed_bytes: int
+    compressed_bytes: int
+    files: int
+    elapsed_seconds: float
+    elapsed_seconds_per_repeat: List[float]
+    stage_seconds: Dict[str, float]
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @property
+    def uncompressed_megabytes_per_second(self) -> float:
+        return self.uncompressed_bytes / MEGABYTE / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @property
+    def compressed_megabytes_per_second(self) -> float:
+        return self.compressed_bytes / MEGABYTE / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self),
+                    rows_per_second=self.rows_per_second,
+                    uncompressed_megabytes_per_second=self.uncompressed_megabytes_per_second,
+                    compressed_megabytes_per_second=self.compressed_megabytes_per_second
+                    )
+
+
+def get_benchmark_cases(sweep: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Returns the exporter settings of every combination of the swept values"""
+    setting_names = list(sweep)
+    return [dict(zip(setting_names, setting_values)) for setting_values in itertools.product(*sweep.values())]
+
+
+def run_benchmark_case(connection: SyntheticConnection,
+                       settings: Dict[str, Any],
+                       output_directory: str,
+                       repeat_count: int = DEFAULT_REPEAT_COUNT,
+                       logger: Optional[logging.Logger] = None
+                       ) -> BenchmarkResult:
+    """Exports the synthetic tables repeat_count times with the given exporter settings"""
+    exporter_settings = dict(table_name_include_pattern=".*",
+                             table_name_exclude_pattern=None,
+                             overwrite=True,
+                             row_limit=NO_ROW_LIMIT,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=False,
+                             compression_method="zstd",
+                             batch_size=DEFAULT_BATCH_SIZE,
+                             parquet_max_file_size=DEFAULT_PARQUET_MAX_FILE_SIZE
+                             )
+    exporter_settings.update(settings)
+    if exporter_settings.get("table_chunk_count", 1) > 1:
+        exporter_settings.setdefault("table_chunk_keys", [f"{table_name}={KEY_COLUMN_NAME}" for table_name in connection.tables])
+
+    run_metrics = []
+    for _ in range(repeat_count):
+        benchmark_exporter = BenchmarkExporter(connection=connection,
+                                               output_directory=output_directory,
+                                               logger=logger or logging.getLogger(__name__),
+                                               **exporter_settings
+                                               )
+        benchmark_exporter.export_tables()
+        run_metrics.append(benchmark_exporter.run_metrics)
+
+    median_run_metrics = sorted(run_metrics, key=lambda metrics: metrics.elapsed_seconds)[len(run_metrics) // 2]
+    totals = median_run_metrics.get_totals()
+    return BenchmarkResult(settings=settings,
+                           rows=totals["rows"],
+                           uncompressed_bytes=totals["uncompressed_bytes"],
+                           compressed_bytes=totals["compressed_bytes"],
+                           files=totals["files"],
+                           elapsed_seconds=median_run_metrics.elapsed_seconds,
+                           elapsed_seconds_per_repeat=[metrics.elapsed_seconds for metrics in run_metrics],
+                           stage_seconds=totals["stage_seconds"]
+                           )
+
+
+def run_benchmark(tables: List[SyntheticTable],
+                  sweep: Dict[str, List[Any]],
+                  batch_latency: float = 0.0,
+                  repeat_count: int = DEFAULT_REPEAT_COUNT,
+                  output_directory: Optional[str] = None,
+                  on_result: Optional[Callable[[BenchmarkResult], None]] = None,
+                  logger: Optional[logging.Logger] = None
+                  ) -> List[BenchmarkResult]:
+    """Runs every combination of the swept exporter settings (i.e. {"batch_size": [10_000, 100_000], ...}) against the
+       synthetic tables - the output of each case replaces that of the previous one"""
+    connection = SyntheticConnection(tables=tables,
+                                     batch_latency=batch_latency
+                                     )
+    connection.generate_value_pools()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="oracle_parquet_exporter_benchmark_") as temporary_directory:
+        for settings in get_benchmark_cases(sweep=sweep):
+            result = run_benchmark_case(connection=connection,
+                                        settings=settings,
+                                        output_directory=output_directory or Path(temporary_directory, "output").as_posix(),
+                                        repeat_count=repeat_count,
+                                        logger=logger
+                                        )
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    return results
+
+
+def format_result(result: BenchmarkResult) -> str:
+    settings_text = ", ".join(f"{name}={value}" for name, value in result.settings.items())
+    return (f"{settings_text}: {result.rows_per_second:,.0f} rows/sec, {result.uncompressed_megabytes_per_second:,.1f} MB/sec"
+            f" (uncompressed), {result.compressed_megabytes_per_second:,.1f} MB/sec (compressed) - {result.rows:,} row(s),"
+            f" {result.files:,} file(s) in {result.elapsed_seconds:.3f} seconds"
+            f" (fetch: {result.stage_seconds['fetch']:.3f}, convert: {result.stage_seconds['convert']:.3f},"
+            f" write: {result.stage_seconds['write']:.3f})")
+
+
+@click.command()
+@click.option(
+    "--row-count",
+    type=int,
+    default=DEFAULT_ROW_COUNT,
+    show_default=True,
+    required=True,
+    help="The number of rows in each synthetic table."
+)
+@click.option(
+    "--table-count",
+    type=int,
+    default=DEFAULT_TABLE_COUNT,
+    show_default=True,
+    required=True,
+    help="The number of synthetic tables to export."
+)
+@click.option(
+    "--column-count",
+    type=int,
+    default=DEFAULT_COLUMN_COUNT,
+    show_default=True,
+    required=True,
+    help="The number of columns in each synthetic table - besides the ID key column."
+)
+@click.option(
+    "--column-kind",
+    type=click.Choice(list(COLUMN_KINDS)),
+    default=DEFAULT_COLUMN_KINDS,
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The kinds of column to generate (cycled through for the column count), may be specified more than once."
+)
+@click.option(
+    "--batch-latency",
+    type=float,
+    default=0.0,
+    show_default=True,
+    required=True,
+    help="The simulated latency (in seconds) of each batch fetch - i.e. the network round trip and server time."
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=[DEFAULT_BATCH_SIZE],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The batch size to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--compression-method",
+    type=click.Choice(["none", "snappy", "gzip", "zstd"]),
+    default=["zstd"],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The compression method to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--parquet-max-file-size",
+    type=int,
+    default=[DEFAULT_PARQUET_MAX_FILE_SIZE],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The parquet file size target to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--parquet-row-group-size",
+    type=int,
+    default=[DEFAULT_PARQUET_ROW_GROUP_SIZE],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The parquet row group size to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--parallelism",
+    type=int,
+    default=[DEFAULT_PARALLELISM],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The parallelism to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--table-chunk-count",
+    type=int,
+    default=[1],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The number of chunks to split each table into (by its ID column) to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--pipeline-queue-depth",
+    type=int,
+    default=[NO_PIPELINE],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The pipeline queue depth to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--writer-policy-auto/--no-writer-policy-auto",
+    type=bool,
+    default=False,
+    show_default=True,
+    required=True,
+    help="Controls whether to benchmark with automatically chosen column encodings."
+)
+@click.option(
+    "--adaptive-batch-size/--no-adaptive-batch-size",
+    type=bool,
+    default=False,
+    show_default=True,
+    required=True,
+    help="Controls whether to benchmark with adaptive batch sizing (in place of --batch-size)."
+)
+@click.option(
+    "--batch-bytes-target",
+    type=int,
+    default=[DEFAULT_BATCH_BYTES_TARGET],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The adaptive batch bytes target to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--memory-limit",
+    type=int,
+    default=[NO_MEMORY_LIMIT],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The memory limit to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--engine",
+    type=click.Choice(ENGINES, case_sensitive=False),
+    default=[ENGINE_SYNC],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The export engine to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--async-concurrency",
+    type=int,
+    default=[DEFAULT_ASYNC_CONCURRENCY],
+    show_default=True,
+    required=True,
+    multiple=True,
+    help="The async engine's concurrency to benchmark, may be specified more than once (to sweep it)."
+)
+@click.option(
+    "--repeat-count",
+    type=int,
+    default=DEFAULT_REPEAT_COUNT,
+    show_default=True,
+    required=True,
+    help="The number of times to run each case - the median elapsed time is reported."
+)
+@click.option(
+    "--output-directory",
+    type=str,
+    default=None,
+    required=False,
+    help="The directory to export to (replaced by every case).  Defaults to a temporary directory - removed afterwards."
+)
+@click.option(
+    "--results-file",
+    type=str,
+    default=None,
+    required=False,
+    help="A JSON file to write the results to - i.e. to compare against a later baseline."
+)
+def click_benchmark(row_count: int,
+                    table_count: int,
+                    column_count: int,
+                    column_kind: List[str],
+                    batch_latency: float,
+                    batch_size: List[int],
+                    compression_method: List[str],
+                    parquet_max_file_size: List[int],
+                    parquet_row_group_size: List[int],
+                    parallelism: List[int],
+                    table_chunk_count: List[int],
+                    pipeline_queue_depth: List[int],
+                    writer_policy_auto: bool,
+                    adaptive_batch_size: bool,
+                    batch_bytes_target: List[int],
+                    memory_limit: List[int],
+                    engine: List[str],
+                    async_concurrency: List[int],
+                    repeat_count: int,
+                    output_directory: Optional[str],
+                    results_file: Optional[str]
+                    ):
+    """Benchmarks the export throughput against synthetic tables - without a database"""
+    tables = [SyntheticTable(table_name=f"TABLE_{table_number}",
+                             row_count=row_count,
+                             column_count=column_count,
+                             column_kinds=list(column_kind)
+                             )
+              for table_number in range(1, table_count + 1)]
+    sweep = dict(batch_size=batch_size,
+                 compression_method=compression_method,
+                 parquet_max_file_size=parquet_max_file_size,
+                 parquet_row_group_size=parquet_row_group_size,
+                 parallelism=parallelism,
+                 table_chunk_count=table_chunk_count,
+                 pipeline_queue_depth=pipeline_queue_depth,
+                 writer_policy_auto=[writer_policy_auto],
+                 adaptive_batch_size=[adaptive_batch_size],
+                 memory_limit=memory_limit,
+                 engine=[engine_name.lower() for engine_name in engine],
+                 async_concurrency=async_concurrency
+                 )
+    if adaptive_batch_size:
+        # The batch size is chosen by the exporter - the byte target is swept instead
+        del sweep["batch_size"]
+        sweep["batch_bytes_target"] = batch_bytes_target
+
+    # The exporter's own progress logging would swamp the results
+    benchmark_logger = logging.getLogger(__name__)
+    benchmark_logger.setLevel(level=logging.WARNING)
+
+    results = run_benchmark(tables=tables,
+                            sweep={name: list(values) for name, values in sweep.items()},
+                            batch_latency=batch_latency,
+                            repeat_count=repeat_count,
+                            output_directory=output_directory,
+                            on_result=lambda result: click.echo(format_result(result=result)),
+                            logger=benchmark_logger
+                            )
+
+    if results_file:
+        Path(results_file).write_text(json.dumps([result.to_dict() for result in results], indent=2))
+        click.echo(f"Wrote the results to: {results_file}")
+
+
+if __name__ == "__main__":
+    click_benchmark()
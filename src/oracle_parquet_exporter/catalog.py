@@ -0,0 +1,275 @@
+import datetime
+import oracledb
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .serialization import read_json_file, write_json_file_atomically
+
+# Constants
+CATALOG_CACHE_VERSION: int = 2
+CATALOG_FETCH_SIZE: int = 10_000  # Rows per round trip for the bulk dictionary queries
+UNSUPPORTED_DATA_TYPES: Tuple[str, ...] = ('BFILE', 'UNDEFINED', 'UROWID')
+
+
+@dataclass
+class ColumnMetadata:
+    column_name: str
+    data_type: str
+    data_length: Optional[int] = None
+    data_precision: Optional[int] = None
+    data_scale: Optional[int] = None
+    nullable: bool = True
+    num_distinct: Optional[int] = None
+
+    @property
+    def is_supported(self) -> bool:
+        return self.data_type not in UNSUPPORTED_DATA_TYPES
+
+
+@dataclass
+class TableMetadata:
+    """A table's columns (in column order) and optimizer statistics - as loaded from the data dictionary"""
+    schema: str
+    table_name: str
+    last_ddl_time: Optional[datetime.datetime] = None
+    num_rows: Optional[int] = None
+    blocks: Optional[int] = None
+    avg_row_len: Optional[int] = None
+    last_analyzed: Optional[datetime.datetime] = None
+    partitioned: bool = False
+    segment_bytes: Optional[int] = None  # Allocated - summed over its (sub)partitions
+    columns: List[ColumnMetadata] = field(default_factory=list)
+
+    @property
+    def supported_columns(self) -> List[ColumnMetadata]:
+        return [column for column in self.columns if column.is_supported]
+
+
+def get_in_list_bind_vars(name: str,
+                          values: List[str]
+                          ) -> Tuple[str, Dict[str, str]]:
+    """Returns the SQL and bind variables for an IN list - i.e. (":schema_0, :schema_1", {"schema_0": ..., ...})"""
+    bind_vars = {f"{name}_{i}": value for i, value in enumerate(values)}
+    return ", ".join(f":{bind_name}" for bind_name in bind_vars), bind_vars
+
+
+class Catalog:
+    """The tables and columns of the exported schemas - loaded with a few bulk dictionary queries (rather than one
+       query per schema and per table), and served from memory for the rest of the run.
+
+       Column definitions can be cached in a JSON file between runs.  A cached table is re-used as long as its
+       LAST_DDL_TIME is unchanged, so repeat runs only query ALL_TAB_COLUMNS for the schemas with altered tables
+       (the table list and statistics are always loaded fresh - they are also what the cache is validated against)."""
+
+    def __init__(self, cache_file: Optional[str] = None):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self._tables: Dict[Tuple[str, str], TableMetadata] = {}
+        self.is_loaded: bool = False
+        self.cached_table_count: int = 0
+        self.loaded_table_count: int = 0
+
+    def get_tables(self, schema: str) -> List[str]:
+        return [table_name for table_schema, table_name in self._tables if table_schema == schema]
+
+    def get_table(self,
+                  schema: str,
+                  table_name: str
+                  ) -> Optional[TableMetadata]:
+        return self._tables.get((schema, table_name))
+
+    def load(self,
+             connection: oracledb.Connection,
+             schemas: List[str],
+             table_name_include_pattern: str,
+             table_name_exclude_pattern: Optional[str] = None
+             ):
+        filter_sql, bind_vars = self._get_filter_sql(schemas=schemas,
+                                                     table_name_include_pattern=table_name_include_pattern,
+                                                     table_name_exclude_pattern=table_name_exclude_pattern,
+                                                     table_alias="t"
+                                                     )
+        self._tables = {(table.schema, table.table_name): table
+                        for table in self._load_tables(connection=connection,
+                                                       filter_sql=filter_sql,
+                                                       bind_vars=bind_vars
+                                                       )}
+        for table_key, segment_bytes in self._load_segment_bytes(connection=connection,
+                                                                 filter_sql=filter_sql,
+                                                                 bind_vars=bind_vars
+                                                                 ).items():
+            if table_key in self._tables:
+                self._tables[table_key].segment_bytes = segment_bytes
+
+        cached_tables = self._read_cache()
+        stale_tables = set()
+        for table_key, table in self._tables.items():
+            cached_table = cached_tables.get(f"{table.schema}.{table.table_name}")
+            if cached_table and cached_table["last_ddl_time"] == (table.last_ddl_time.isoformat() if table.last_ddl_time else None):
+                table.columns = [ColumnMetadata(**column) for column in cached_table["columns"]]
+                self.cached_table_count += 1
+            else:
+                stale_tables.add(table_key)
+
+        if stale_tables:
+            filter_sql, bind_vars = self._get_filter_sql(schemas=sorted({schema for schema, _ in stale_tables}),
+                                                         table_name_include_pattern=table_name_include_pattern,
+                                                         table_name_exclude_pattern=table_name_exclude_pattern
+                                                         )
+            for table_key, columns in self._load_columns(connection=connection,
+                                                         filter_sql=filter_sql,
+                                                         bind_vars=bind_vars
+                                                         ).items():
+                if table_key in stale_tables:
+                    self._tables[table_key].columns = columns
+                    self.loaded_table_count += 1
+
+            self._write_cache()
+
+        self.is_loaded = True
+
+    @staticmethod
+    def _get_filter_sql(schemas: List[str],
+                        table_name_include_pattern: str,
+                        table_name_exclude_pattern: Optional[str],
+                        table_alias: Optional[str] = None
+                        ) -> Tuple[str, Dict[str, str]]:
+        column_prefix = f"{table_alias}." if table_alias else ""
+        schema_list_sql, bind_vars = get_in_list_bind_vars(name="schema", values=schemas)
+        filter_sql = (f"{column_prefix}owner IN ({schema_list_sql})"
+                      f" AND REGEXP_LIKE({column_prefix}table_name, :table_name_include_pattern)")
+        bind_vars["table_name_include_pattern"] = table_name_include_pattern
+        if table_name_exclude_pattern:
+            filter_sql += f" AND NOT REGEXP_LIKE({column_prefix}table_name, :table_name_exclude_pattern)"
+            bind_vars["table_name_exclude_pattern"] = table_name_exclude_pattern
+        return filter_sql, bind_vars
+
+    @staticmethod
+    def _load_tables(connection: oracledb.Connection,
+                     filter_sql: str,
+                     bind_vars: Dict[str, str]
+                     ) -> List[TableMetadata]:
+        sql = f"""SELECT t.owner
+                       , t.table_name
+                       , o.last_ddl_time
+                       , t.num_rows
+                       , t.blocks
+                       , t.avg_row_len
+                       , t.last_analyzed
+                       , t.partitioned
+                    FROM all_tables t
+                    JOIN all_objects o
+                      ON o.owner = t.owner
+                     AND o.object_name = t.table_name
+                     AND o.object_type = 'TABLE'
+                   WHERE t.external = 'NO'
+                     AND t.temporary = 'N'
+                     AND {filter_sql}
+                   ORDER BY t.owner ASC, t.table_name ASC
+              """
+
+        with connection.cursor() as cursor:
+            cursor.arraysize = CATALOG_FETCH_SIZE
+            cursor.prefetchrows = CATALOG_FETCH_SIZE
+            cursor.execute(statement=sql, parameters=bind_vars)
+            return [TableMetadata(schema=owner,
+                                  table_name=table_name,
+                                  last_ddl_time=last_ddl_time,
+                                  num_rows=num_rows,
+                                  blocks=blocks,
+                                  avg_row_len=avg_row_len,
+                                  last_analyzed=last_analyzed,
+                                  partitioned=(partitioned or "").strip() == "YES"
+                                  )
+                    for owner, table_name, last_ddl_time, num_rows, blocks, avg_row_len, last_analyzed, partitioned in cursor]
+
+    @staticmethod
+    def _load_segment_bytes(connection: oracledb.Connection,
+                            filter_sql: str,
+                            bind_vars: Dict[str, str]
+                            ) -> Dict[Tuple[str, str], int]:
+        """The allocated bytes of each table's segments - or none without access to DBA_SEGMENTS (there is no
+           ALL_SEGMENTS view), in which case the BLOCKS statistic is all there is to size the tables by"""
+        sql = f"""SELECT t.owner
+                       , t.table_name
+                       , SUM(s.bytes)
+                    FROM (SELECT s.owner
+                               , s.segment_name AS table_name
+                               , s.bytes
+                            FROM dba_segments s
+                           WHERE s.segment_type IN ('TABLE', 'TABLE PARTITION', 'TABLE SUBPARTITION')
+                         ) s
+                    JOIN all_tables t
+                      ON t.owner = s.owner
+                     AND t.table_name = s.table_name
+                   WHERE {filter_sql}
+                   GROUP BY t.owner, t.table_name
+              """
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.arraysize = CATALOG_FETCH_SIZE
+                cursor.prefetchrows = CATALOG_FETCH_SIZE
+                cursor.execute(statement=sql, parameters=bind_vars)
+                return {(owner, table_name): segment_bytes for owner, table_name, segment_bytes in cursor}
+        except oracledb.DatabaseError:
+            return {}
+
+    @staticmethod
+    def _load_columns(connection: oracledb.Connection,
+                      filter_sql: str,
+                      bind_vars: Dict[str, str]
+                      ) -> Dict[Tuple[str, str], List[ColumnMetadata]]:
+        sql = f"""SELECT owner
+                       , table_name
+                       , column_name
+                       , data_type
+                       , data_length
+                       , data_precision
+                       , data_scale
+                       , nullable
+                       , num_distinct
+                    FROM all_tab_columns
+                   WHERE {filter_sql}
+                   ORDER BY owner ASC, table_name ASC, column_id ASC
+              """
+
+        table_columns: Dict[Tuple[str, str], List[ColumnMetadata]] = {}
+        with connection.cursor() as cursor:
+            cursor.arraysize = CATALOG_FETCH_SIZE
+            cursor.prefetchrows = CATALOG_FETCH_SIZE
+            cursor.execute(statement=sql, parameters=bind_vars)
+            for owner, table_name, column_name, data_type, data_length, data_precision, data_scale, nullable, num_distinct in cursor:
+                table_columns.setdefault((owner, table_name), []).append(
+                    ColumnMetadata(column_name=column_name,
+                                   data_type=data_type,
+                                   data_length=data_length,
+                                   data_precision=data_precision,
+                                   data_scale=data_scale,
+                                   nullable=nullable != "N",
+                                   num_distinct=num_distinct
+                                   ))
+
+        return table_columns
+
+    def _read_cache(self) -> Dict[str, Any]:
+        if not self.cache_file or not self.cache_file.exists():
+            return {}
+        cache = read_json_file(file_path=self.cache_file)
+        if cache.get("version") != CATALOG_CACHE_VERSION:
+            return {}
+        return cache.get("tables", {})
+
+    def _write_cache(self):
+        if not self.cache_file:
+            return
+        # Merge into the existing cache - so that runs over different schemas/tables share it
+        cached_tables = self._read_cache()
+        for table in self._tables.values():
+            cached_tables[f"{table.schema}.{table.table_name}"] = dict(
+                last_ddl_time=table.last_ddl_time.isoformat() if table.last_ddl_time else None,
+                columns=[asdict(column) for column in table.columns]
+            )
+        write_json_file_atomically(file_path=self.cache_file,
+                                   contents=dict(version=CATALOG_CACHE_VERSION, tables=cached_tables)
+                                   )
@@ -0,0 +1,135 @@
+import oracledb
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Constants
+NO_CHUNKING: int = 1
+ROWID_CHUNK_MAX_ROW_NUMBER: int = 32767
+
+
+@dataclass
+class TableChunk:
+    """A slice of a table - expressed as a SQL predicate (with bind variables) to append to the export query"""
+    chunk_number: int
+    chunk_count: int
+    predicate: str
+    bind_vars: Dict[str, object] = field(default_factory=dict)
+
+
+def get_rowid_chunks(connection: oracledb.Connection,
+                     schema: str,
+                     table_name: str,
+                     chunk_count: int
+                     ) -> List[TableChunk]:
+    """Splits a table into (at most) chunk_count ROWID ranges of roughly equal block counts - using DBA_EXTENTS
+       in the same fashion as DBMS_PARALLEL_EXECUTE.CREATE_CHUNKS_BY_ROWID.  A range never spans segments, so
+       partitioned tables may yield a few more chunks than requested."""
+    sql = f"""SELECT ROWIDTOCHAR(DBMS_ROWID.ROWID_CREATE(1, data_object_id,
+                             MIN(relative_fno) KEEP (DENSE_RANK FIRST ORDER BY relative_fno, block_id),
+                             MIN(block_id) KEEP (DENSE_RANK FIRST ORDER BY relative_fno, block_id),
+                             0)) AS start_rowid,
+                     ROWIDTOCHAR(DBMS_ROWID.ROWID_CREATE(1, data_object_id,
+                             MAX(relative_fno) KEEP (DENSE_RANK LAST ORDER BY relative_fno, block_id),
+                             MAX(block_id + blocks - 1) KEEP (DENSE_RANK LAST ORDER BY relative_fno, block_id),
+                             {ROWID_CHUNK_MAX_ROW_NUMBER})) AS end_rowid
+                FROM (SELECT o.data_object_id
+                           , e.relative_fno
+                           , e.block_id
+                           , e.blocks
+                           , TRUNC((SUM(e.blocks) OVER (ORDER BY o.data_object_id, e.relative_fno, e.block_id) - 1)
+                                   * :chunk_count / SUM(e.blocks) OVER ()) AS chunk_id
+                        FROM dba_extents e
+                        JOIN all_objects o
+                          ON (    o.owner = e.owner
+                              AND o.object_name = e.segment_name
+                              AND NVL(o.subobject_name, '-') = NVL(e.partition_name, '-')
+                             )
+                       WHERE e.owner = :schema
+                         AND e.segment_name = :table_name
+                         AND e.segment_type IN ('TABLE', 'TABLE PARTITION', 'TABLE SUBPARTITION')
+                         AND o.object_type IN ('TABLE', 'TABLE PARTITION', 'TABLE SUBPARTITION')
+                     )
+               GROUP BY chunk_id, data_object_id
+               ORDER BY chunk_id, data_object_id
+          """
+
+    with connection.cursor() as cursor:
+        cursor.execute(statement=sql,
+                       schema=schema,
+                       table_name=table_name,
+                       chunk_count=chunk_count
+                       )
+        rowid_ranges = [(row[0], row[1]) for row in cursor]
+
+    return [TableChunk(chunk_number=chunk_number,
+                       chunk_count=len(rowid_ranges),
+                       predicate="ROWID BETWEEN CHARTOROWID(:chunk_start_rowid) AND CHARTOROWID(:chunk_end_rowid)",
+                       bind_vars=dict(chunk_start_rowid=start_rowid,
+                                      chunk_end_rowid=end_rowid
+                                      )
+                       )
+            for chunk_number, (start_rowid, end_rowid) in enumerate(rowid_ranges)]
+
+
+def get_numeric_key_chunks(connection: oracledb.Connection,
+                           schema: str,
+                           table_name: str,
+                           column_name: str,
+                           chunk_count: int,
+                           scn: Optional[int] = None
+                           ) -> List[TableChunk]:
+    """Splits a table into chunk_count equal-width ranges of a numeric key column - in the same fashion as
+       DBMS_PARALLEL_EXECUTE.CREATE_CHUNKS_BY_NUMBER_COL.  Rows with a NULL key are assigned to the last chunk."""
+    sql = f"SELECT MIN(\"{column_name}\"), MAX(\"{column_name}\") FROM \"{schema}\".\"{table_name}\""
+    bind_vars = {}
+    if scn is not None:
+        sql += " AS OF SCN :scn"
+        bind_vars["scn"] = scn
+
+    with connection.cursor() as cursor:
+        cursor.execute(statement=sql, parameters=bind_vars)
+        min_value, max_value = cursor.fetchone()
+
+    if min_value is None:
+        # Empty table (or all keys are NULL) - a single chunk covers it
+        return [TableChunk(chunk_number=0,
+                           chunk_count=1,
+                           predicate="1 = 1"
+                           )]
+
+    # Interior chunk boundaries - integer keys get integer boundaries
+    if isinstance(min_value, int) and isinstance(max_value, int):
+        boundaries = [min_value + (max_value - min_value) * i // chunk_count for i in range(1, chunk_count)]
+    else:
+        boundaries = [min_value + (max_value - min_value) * i / chunk_count for i in range(1, chunk_count)]
+    boundaries = sorted(set(boundary for boundary in boundaries if min_value < boundary <= max_value))
+
+    if not boundaries:
+        return [TableChunk(chunk_number=0,
+                           chunk_count=1,
+                           predicate="1 = 1"
+                           )]
+
+    # The first and last chunks are open-ended so that no row is missed - NULL keys go to the last chunk
+    quoted_column_name = f"\"{column_name}\""
+    chunk_count = len(boundaries) + 1
+    chunks = [TableChunk(chunk_number=0,
+                         chunk_count=chunk_count,
+                         predicate=f"{quoted_column_name} < :chunk_high_value",
+                         bind_vars=dict(chunk_high_value=boundaries[0])
+                         )]
+    for chunk_number in range(1, chunk_count - 1):
+        chunks.append(TableChunk(chunk_number=chunk_number,
+                                 chunk_count=chunk_count,
+                                 predicate=f"{quoted_column_name} >= :chunk_low_value AND {quoted_column_name} < :chunk_high_value",
+                                 bind_vars=dict(chunk_low_value=boundaries[chunk_number - 1],
+                                                chunk_high_value=boundaries[chunk_number]
+                                                )
+                                 ))
+    chunks.append(TableChunk(chunk_number=chunk_count - 1,
+                             chunk_count=chunk_count,
+                             predicate=f"({quoted_column_name} >= :chunk_low_value OR {quoted_column_name} IS NULL)",
+                             bind_vars=dict(chunk_low_value=boundaries[-1])
+                             ))
+
+    return chunks
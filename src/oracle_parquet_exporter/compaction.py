@@ -0,0 +1,173 @@
+import itertools
+import json
+import posixpath
+import pyarrow
+import pyarrow.fs
+import pyarrow.parquet as pq
+from typing import Dict, Iterable, List, Optional
+
+from .dataset_metadata import list_part_files, write_file
+from .sinks import path_exists
+from .sorting import SortKey
+from .writer import DEFAULT_PARQUET_ROW_GROUP_SIZE, ParquetPartWriter, get_next_file_number
+from .writer_policy import WriterPolicy
+
+# Constants
+COMPACTION_STAGING_DIRECTORY_NAME: str = "_compaction"
+COMPACTION_JOURNAL_FILE_NAME: str = "_compaction.json"
+DEFAULT_COMPACTION_MIN_FILE_SIZE_RATIO: float = 0.5
+
+
+class TableCompactor:
+    """Merges the undersized part files of a table - i.e. the tail file of each chunk, the files of small incremental
+       runs, or the (many) files of a sparse partition - into files of (roughly) max_file_size.  Each directory of the
+       table (the table's own, or one per partition) is compacted on its own, as its files share partition values.  Part
+       files of at least min_file_size_ratio * max_file_size are left alone, as are files whose schema differs from
+       the other undersized files of their directory (i.e. written before a column was added).
+
+       The input files are read a row group at a time and re-written through a part writer - so memory use is bounded
+       by the row group size, the files are encoded as the export encodes them, and the small row groups of small files
+       are coalesced into full ones.  (pyarrow can not copy a row group's encoded column chunks from one file to
+       another - so they are decoded, and re-encoded.)
+
+       The compacted files are written to a _compaction staging directory (ignored by readers), then swapped in: a
+       _compaction.json journal listing the inputs and outputs is written, the outputs are moved into place, the inputs
+       are deleted and the journal is removed.  A compaction interrupted before its journal was written is discarded -
+       and one interrupted after is completed - by the next compaction of the directory.  So once the journal is
+       written, a crash can not leave both the input files and the compacted files (i.e. duplicated rows) behind."""
+
+    def __init__(self,
+                 filesystem: pyarrow.fs.FileSystem,
+                 table_path: str,
+                 file_name_prefix: str,
+                 compression: str,
+                 max_file_size: int,
+                 row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE,
+                 min_file_size_ratio: float = DEFAULT_COMPACTION_MIN_FILE_SIZE_RATIO,
+                 writer_policy: Optional[WriterPolicy] = None,
+                 sort_keys: Optional[List[SortKey]] = None
+                 ):
+        self.filesystem = filesystem
+        self.table_path = table_path
+        self.file_name_prefix = file_name_prefix
+        self.compression = compression
+        self.max_file_size = max_file_size
+        self.row_group_size = row_group_size
+        self.min_file_size = int(max_file_size * min_file_size_ratio)
+        self.writer_policy = writer_policy
+        self.sort_keys = sort_keys
+
+        self._file_numbers = None
+
+        # The footers of the compacted files - for the table's consolidated _metadata file
+        self.file_metadata: Dict[str, pq.FileMetaData] = {}
+        self.removed_file_names: List[str] = []
+        self.directories_compacted: int = 0
+        self.bytes_compacted: int = 0
+
+    @property
+    def files_compacted(self) -> int:
+        return len(self.removed_file_names)
+
+    @property
+    def files_written(self) -> int:
+        return len(self.file_metadata)
+
+    def compact(self, directories: Optional[Iterable[str]] = None):
+        """Compacts the given directories of the table (i.e. the ones the last run wrote to) - or all of them"""
+        if directories is None:
+            directories = {posixpath.dirname(file_info.path) for file_info in list_part_files(filesystem=self.filesystem,
+                                                                                              table_path=self.table_path
+                                                                                              )}
+
+        for directory in sorted(directories):
+            self.recover(directory=directory)
+            undersized_files = [file_info for file_info in list_part_files(filesystem=self.filesystem,
+                                                                           table_path=directory
+                                                                           )
+                                if posixpath.dirname(file_info.path) == directory and file_info.size < self.min_file_size]
+            # Only files that share a schema can be merged
+            schema_files: Dict[pyarrow.Schema, List[pyarrow.fs.FileInfo]] = {}
+            for file_info in undersized_files:
+                schema = pq.read_schema(file_info.path, filesystem=self.filesystem)
+                schema_files.setdefault(schema, []).append(file_info)
+
+            input_files = max(schema_files.values(), key=len, default=[])
+            if len(input_files) > 1:
+                self.compact_files(directory=directory,
+                                   input_files=input_files
+                                   )
+
+    def compact_files(self,
+                      directory: str,
+                      input_files: List[pyarrow.fs.FileInfo]
+                      ):
+        staging_directory = f"{directory}/{COMPACTION_STAGING_DIRECTORY_NAME}"
+        if self._file_numbers is None:
+            # Shared by the table's directories - so that part file names stay unique across partitions
+            self._file_numbers = itertools.count(get_next_file_number(output_path_prefix=self.table_path,
+                                                                      file_name_prefix=self.file_name_prefix,
+                                                                      filesystem=self.filesystem
+                                                                      ))
+        with ParquetPartWriter(output_path_prefix=staging_directory,
+                               file_name_prefix=self.file_name_prefix,
+                               compression=self.compression,
+                               max_file_size=self.max_file_size,
+                               row_group_size=self.row_group_size,
+                               file_numbers=self._file_numbers,
+                               writer_policy=self.writer_policy,
+                               filesystem=self.filesystem,
+                               sort_keys=self.sort_keys
+                               ) as part_writer:
+            for file_info in input_files:
+                with self.filesystem.open_input_file(file_info.path) as source:
+                    parquet_file = pq.ParquetFile(source)
+                    for row_group_index in range(parquet_file.num_row_groups):
+                        part_writer.write(pyarrow_table=parquet_file.read_row_group(row_group_index))
+
+        output_file_names = [posixpath.basename(file_name) for file_name in part_writer.file_names]
+        self.write_journal(directory=directory,
+                           input_file_names=[posixpath.basename(file_info.path) for file_info in input_files],
+                           output_file_names=output_file_names
+                           )
+        self.recover(directory=directory)
+
+        for file_name in part_writer.file_names:
+            file_metadata = part_writer.file_metadata[file_name]
+            self.file_metadata[f"{directory}/{posixpath.basename(file_name)}"] = file_metadata
+        self.removed_file_names.extend(file_info.path for file_info in input_files)
+        self.directories_compacted += 1
+        self.bytes_compacted += sum(file_info.size for file_info in input_files)
+
+    def write_journal(self,
+                      directory: str,
+                      input_file_names: List[str],
+                      output_file_names: List[str]
+                      ):
+        contents = json.dumps(dict(input_file_names=input_file_names,
+                                   output_file_names=output_file_names
+                                   ), indent=2).encode()
+        write_file(filesystem=self.filesystem,
+                   path=f"{directory}/{COMPACTION_JOURNAL_FILE_NAME}",
+                   write=lambda sink: sink.write(contents)
+                   )
+
+    def recover(self, directory: str):
+        """Completes the swap of a directory's journaled compaction - and discards the staged files of one that was not
+           journaled"""
+        staging_directory = f"{directory}/{COMPACTION_STAGING_DIRECTORY_NAME}"
+        journal_file = f"{directory}/{COMPACTION_JOURNAL_FILE_NAME}"
+        if path_exists(filesystem=self.filesystem, path=journal_file):
+            with self.filesystem.open_input_stream(journal_file) as source:
+                journal = json.loads(source.read())
+
+            for file_name in journal["output_file_names"]:
+                if path_exists(filesystem=self.filesystem, path=f"{staging_directory}/{file_name}"):
+                    self.filesystem.move(f"{staging_directory}/{file_name}", f"{directory}/{file_name}")
+            for file_name in journal["input_file_names"]:
+                if path_exists(filesystem=self.filesystem, path=f"{directory}/{file_name}"):
+                    self.filesystem.delete_file(f"{directory}/{file_name}")
+            self.filesystem.delete_file(journal_file)
+
+        if path_exists(filesystem=self.filesystem, path=staging_directory):
+            self.filesystem.delete_dir(staging_directory)
@@ -0,0 +1,222 @@
+import json
+import posixpath
+import re
+import threading
+import pyarrow
+import pyarrow.fs
+import pyarrow.parquet as pq
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .run_manifest import get_timestamp
+from .serialization import serialize_value
+from .sinks import FILE_EXTENSIONS, OUTPUT_FORMAT_PARQUET, create_directory, is_local_filesystem, path_exists
+from .writer import TEMPORARY_FILE_SUFFIX
+
+# Constants
+METADATA_FILE_NAME: str = "_metadata"
+COMMON_METADATA_FILE_NAME: str = "_common_metadata"
+DATASET_MANIFEST_FILE_NAME: str = "_dataset_manifest.json"
+DATASET_MANIFEST_VERSION: int = 1
+PART_FILE_NUMBER_PATTERN = re.compile(r"_(\d+)\.[^./]+$")
+
+
+def get_part_file_sort_key(relative_path: str) -> Tuple[str, int, str]:
+    """Orders part files by directory, then by part number - so that <table>_10 follows <table>_9"""
+    match = PART_FILE_NUMBER_PATTERN.search(relative_path)
+    return posixpath.dirname(relative_path), int(match.group(1)) if match else -1, relative_path
+
+
+def list_part_files(filesystem: pyarrow.fs.FileSystem,
+                    table_path: str
+                    ) -> List[pyarrow.fs.FileInfo]:
+    """Lists the committed parquet part files of a table (including any partition directories) - with their sizes.
+       Like readers, it skips files and directories whose names start with _ or . (i.e. compaction staging directories)."""
+    part_files = [file_info for file_info in filesystem.get_file_info(pyarrow.fs.FileSelector(base_dir=table_path,
+                                                                                                allow_not_found=True,
+                                                                                                recursive=True
+                                                                                                ))
+                  if file_info.type == pyarrow.fs.FileType.File
+                  and file_info.base_name.endswith(f".{FILE_EXTENSIONS[OUTPUT_FORMAT_PARQUET]}")
+                  and not any(name.startswith(("_", "."))
+                              for name in posixpath.relpath(file_info.path, start=table_path).split("/"))]
+    return sorted(part_files, key=lambda file_info: get_part_file_sort_key(posixpath.relpath(file_info.path, start=table_path)))
+
+
+def serialize_statistic(value: Any) -> Optional[Dict[str, Any]]:
+    try:
+        return serialize_value(value=value)
+    except TypeError:
+        # i.e. binary values - which are left to the row group statistics of the _metadata file
+        return None
+
+
+def get_column_statistics(file_metadata: List[pq.FileMetaData]) -> Dict[str, Dict[str, Any]]:
+    """Combines the row group statistics of a table's part files into one null count, min and max per column.  A bound
+       is only reported if every row group holding non-null values has one."""
+    null_counts: Dict[str, Optional[int]] = {}
+    bounds: Dict[str, Optional[List[Any]]] = {}
+    for metadata in file_metadata:
+        for row_group_index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(row_group_index)
+            for column_index in range(row_group.num_columns):
+                column_chunk = row_group.column(column_index)
+                column_name = column_chunk.path_in_schema
+                statistics = column_chunk.statistics
+                null_counts.setdefault(column_name, 0)
+                bounds.setdefault(column_name, [])
+
+                has_null_count = statistics is not None and statistics.has_null_count
+                if null_counts[column_name] is not None:
+                    null_counts[column_name] = null_counts[column_name] + statistics.null_count if has_null_count else None
+
+                if has_null_count and statistics.null_count == row_group.num_rows:
+                    # All null - no bounds to combine
+                    continue
+                if statistics is None or not statistics.has_min_max:
+                    bounds[column_name] = None
+                elif bounds[column_name] is not None:
+                    bounds[column_name] = [min(bounds[column_name][0], statistics.min) if bounds[column_name] else statistics.min,
+                                           max(bounds[column_name][1], statistics.max) if bounds[column_name] else statistics.max]
+
+    return {column_name: dict(null_count=null_counts[column_name],
+                              min=serialize_statistic(value=bounds[column_name][0]) if bounds[column_name] else None,
+                              max=serialize_statistic(value=bounds[column_name][1]) if bounds[column_name] else None
+                              )
+            for column_name in null_counts}
+
+
+def write_file(filesystem: pyarrow.fs.FileSystem,
+               path: str,
+               write: Callable[[pyarrow.NativeFile], None]
+               ):
+    """Writes a file under a temporary name and moves it into place - on object stores an object only appears once its
+       upload completes, so it is written under its final name there"""
+    sink_path = f"{path}{TEMPORARY_FILE_SUFFIX}" if is_local_filesystem(filesystem=filesystem) else path
+    with filesystem.open_output_stream(sink_path) as sink:
+        write(sink)
+    if sink_path != path:
+        filesystem.move(sink_path, path)
+
+
+def write_table_metadata(filesystem: pyarrow.fs.FileSystem,
+                         table_path: str,
+                         file_metadata: Optional[Dict[str, pq.FileMetaData]] = None
+                         ) -> Dict[str, Any]:
+    """Writes the consolidated _metadata file of a table (the footers of all of its part files, with each row group
+       pointing at its file) and its _common_metadata file (the schema only) - so that a reader can plan a query
+       without opening every part file.  The footers the writers collected are used where given - the footers of part
+       files written by previous runs (i.e. incremental ones) are read.
+
+       Returns the table's dataset manifest entry - its part files with their row counts and sizes, and the combined
+       statistics of each column.  Part files that do not share one schema (i.e. a column was added between incremental
+       runs) can not be consolidated - the entry's metadata_file is None, and any previous _metadata file is removed."""
+    file_metadata = file_metadata or {}
+    files = []
+    table_file_metadata = []
+    for file_info in list_part_files(filesystem=filesystem,
+                                     table_path=table_path
+                                     ):
+        metadata = file_metadata.get(file_info.path)
+        if metadata is None:
+            metadata = pq.read_metadata(file_info.path, filesystem=filesystem)
+        relative_path = posixpath.relpath(file_info.path, start=table_path)
+        metadata.set_file_path(relative_path)
+        table_file_metadata.append(metadata)
+        files.append(dict(file_name=relative_path,
+                          row_count=metadata.num_rows,
+                          row_group_count=metadata.num_row_groups,
+                          size_bytes=file_info.size
+                          ))
+
+    consolidated = bool(table_file_metadata) and all(metadata.schema.equals(table_file_metadata[0].schema)
+                                                     for metadata in table_file_metadata[1:])
+    table_entry = dict(row_count=sum(file["row_count"] for file in files),
+                       size_bytes=sum(file["size_bytes"] for file in files),
+                       metadata_file=METADATA_FILE_NAME if consolidated else None,
+                       files=files,
+                       column_statistics=get_column_statistics(file_metadata=table_file_metadata)
+                       )
+    if not consolidated:
+        for file_name in (METADATA_FILE_NAME, COMMON_METADATA_FILE_NAME):
+            if path_exists(filesystem=filesystem, path=f"{table_path}/{file_name}"):
+                filesystem.delete_file(f"{table_path}/{file_name}")
+        return table_entry
+
+    consolidated_metadata = table_file_metadata[0]
+    for metadata in table_file_metadata[1:]:
+        consolidated_metadata.append_row_groups(metadata)
+
+    write_file(filesystem=filesystem,
+               path=f"{table_path}/{METADATA_FILE_NAME}",
+               write=consolidated_metadata.write_metadata_file
+               )
+    write_file(filesystem=filesystem,
+               path=f"{table_path}/{COMMON_METADATA_FILE_NAME}",
+               write=lambda sink: pq.write_metadata(schema=consolidated_metadata.schema.to_arrow_schema(), where=sink)
+               )
+    return table_entry
+
+
+class DatasetManifest:
+    """Lists the exported tables - each with its part files (row counts and sizes), the combined statistics of its
+       columns and the SCN it was exported as of - so that downstream readers can plan from (and exports can be
+       validated against Oracle row counts with) a single file.  Incremental and resumed runs update the entries of
+       the tables they export.  It is written next to the tables - through the output filesystem, so on an object
+       store too.  Updates are thread-safe, and the manifest is replaced atomically each time it is saved."""
+
+    def __init__(self,
+                 filesystem: pyarrow.fs.FileSystem,
+                 manifest_file: str
+                 ):
+        self.filesystem = filesystem
+        self.manifest_file = manifest_file
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, Any] = {}
+
+        if path_exists(filesystem=self.filesystem, path=self.manifest_file):
+            with self.filesystem.open_input_stream(self.manifest_file) as source:
+                self._manifest = json.loads(source.read())
+
+    @property
+    def tables(self) -> Dict[str, Dict[str, Any]]:
+        return self._manifest.get("tables", {})
+
+    def start_run(self, output_directory: str):
+        with self._lock:
+            self._manifest = dict(version=DATASET_MANIFEST_VERSION,
+                                  output_directory=output_directory,
+                                  scn=None,
+                                  updated_at=get_timestamp(),
+                                  tables={}
+                                  )
+            self._save()
+
+    def record_table(self,
+                     schema: str,
+                     table_name: str,
+                     table_path: str,
+                     scn: Optional[int],
+                     table_entry: Dict[str, Any]
+                     ):
+        with self._lock:
+            if not self._manifest:
+                self._manifest = dict(version=DATASET_MANIFEST_VERSION, tables={})
+            self._manifest["scn"] = scn
+            self._manifest["updated_at"] = get_timestamp()
+            self._manifest["tables"][f"{schema}.{table_name}"] = dict(schema=schema,
+                                                                      table_name=table_name,
+                                                                      path=table_path,
+                                                                      scn=scn,
+                                                                      exported_at=get_timestamp(),
+                                                                      **table_entry
+                                                                      )
+            self._save()
+
+    def _save(self):
+        create_directory(filesystem=self.filesystem,
+                         path=posixpath.dirname(self.manifest_file)
+                         )
+        write_file(filesystem=self.filesystem,
+                   path=self.manifest_file,
+                   write=lambda sink: sink.write(json.dumps(self._manifest, indent=2).encode())
+                   )
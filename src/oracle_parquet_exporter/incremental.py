@@ -0,0 +1,163 @@
+import datetime
+import oracledb
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .serialization import deserialize_value, read_json_file, serialize_value, write_json_file_atomically
+
+# Constants
+ORA_ROWSCN: str = "ORA_ROWSCN"
+DEFAULT_STATE_FILE_NAME: str = "_export_state.json"
+STATE_FILE_VERSION: int = 1
+
+
+@dataclass
+class IncrementalRange:
+    """The watermark range of rows to export from a table in this run - rows above the previous run's high-water mark,
+       up to (and including) this run's high-water mark"""
+    watermark_column: str
+    low_watermark: Optional[Any]
+    high_watermark: Any
+    modifications: Optional[Dict[str, Any]] = None
+
+    @property
+    def supports_flashback_query(self) -> bool:
+        # ORA_ROWSCN is not supported in flashback (AS OF SCN) queries - the upper bound predicate keeps the range
+        # consistent instead: row versions committed after the high-water mark are picked up by the next run
+        return self.watermark_column != ORA_ROWSCN
+
+    @property
+    def predicate(self) -> str:
+        column_sql = ORA_ROWSCN if self.watermark_column == ORA_ROWSCN else f"\"{self.watermark_column}\""
+        predicate = f"{column_sql} <= :high_watermark"
+        if self.low_watermark is not None:
+            predicate = f"{column_sql} > :low_watermark AND {predicate}"
+        return predicate
+
+    @property
+    def bind_vars(self) -> Dict[str, Any]:
+        bind_vars = dict(high_watermark=self.high_watermark)
+        if self.low_watermark is not None:
+            bind_vars["low_watermark"] = self.low_watermark
+        return bind_vars
+
+
+class ExportState:
+    """The persisted high-water marks of each table from previous (incremental) runs - stored as JSON.
+       Updates are thread-safe, and the file is replaced atomically each time it is saved."""
+
+    def __init__(self, state_file: str):
+        self.state_file = Path(state_file)
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Dict[str, Any]] = {}
+
+        if self.state_file.exists():
+            self._tables = read_json_file(file_path=self.state_file).get("tables", {})
+
+    @staticmethod
+    def get_table_key(schema: str,
+                      table_name: str
+                      ) -> str:
+        return f"{schema}.{table_name}"
+
+    @property
+    def exists(self) -> bool:
+        return self.state_file.exists()
+
+    def get_table_state(self,
+                        schema: str,
+                        table_name: str
+                        ) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._tables.get(self.get_table_key(schema=schema, table_name=table_name))
+
+    def get_high_watermark(self,
+                           schema: str,
+                           table_name: str,
+                           watermark_column: str
+                           ) -> Optional[Any]:
+        table_state = self.get_table_state(schema=schema, table_name=table_name)
+        # A changed watermark column invalidates the previous high-water mark
+        if not table_state or table_state.get("watermark_column") != watermark_column:
+            return None
+        return deserialize_value(serialized_value=table_state.get("high_watermark"))
+
+    def record_table_export(self,
+                            schema: str,
+                            table_name: str,
+                            incremental_range: IncrementalRange,
+                            scn: Optional[int]
+                            ):
+        with self._lock:
+            self._tables[self.get_table_key(schema=schema, table_name=table_name)] = dict(
+                watermark_column=incremental_range.watermark_column,
+                high_watermark=serialize_value(value=incremental_range.high_watermark),
+                modifications=incremental_range.modifications,
+                scn=scn,
+                exported_at=datetime.datetime.now(tz=datetime.timezone.utc).isoformat()
+            )
+            write_json_file_atomically(file_path=self.state_file,
+                                       contents=dict(version=STATE_FILE_VERSION, tables=self._tables)
+                                       )
+
+
+def get_max_watermark(connection: oracledb.Connection,
+                      schema: str,
+                      table_name: str,
+                      watermark_column: str,
+                      scn: Optional[int] = None
+                      ) -> Optional[Any]:
+    sql = f"SELECT MAX(\"{watermark_column}\") FROM \"{schema}\".\"{table_name}\""
+    bind_vars = {}
+    if scn is not None:
+        sql += " AS OF SCN :scn"
+        bind_vars["scn"] = scn
+
+    with connection.cursor() as cursor:
+        cursor.execute(statement=sql, parameters=bind_vars)
+        return cursor.fetchone()[0]
+
+
+def flush_database_monitoring_info(connection: oracledb.Connection):
+    """Flushes the in-memory DML monitoring counters to ALL_TAB_MODIFICATIONS - so that recent changes are visible"""
+    with connection.cursor() as cursor:
+        cursor.execute(statement="BEGIN DBMS_STATS.FLUSH_DATABASE_MONITORING_INFO; END;")
+
+
+def get_table_modifications(connection: oracledb.Connection,
+                            schema: str,
+                            table_name: str
+                            ) -> Optional[Dict[str, Any]]:
+    """Returns the DML monitoring counters of a table from ALL_TAB_MODIFICATIONS (None if there are none recorded).
+       Note: the counters are flushed from memory periodically, so recent changes may not be visible yet."""
+    sql = f"""SELECT SUM(inserts)
+                   , SUM(updates)
+                   , SUM(deletes)
+                   , MAX(truncated)
+                   , MAX(timestamp)
+                FROM all_tab_modifications
+               WHERE table_owner = :schema
+                 AND table_name = :table_name
+                 AND partition_name IS NULL
+              HAVING COUNT(*) > 0
+          """
+
+    with connection.cursor() as cursor:
+        cursor.execute(statement=sql,
+                       schema=schema,
+                       table_name=table_name
+                       )
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+
+    inserts, updates, deletes, truncated, timestamp = row
+    return dict(inserts=int(inserts or 0),
+                updates=int(updates or 0),
+                deletes=int(deletes or 0),
+                truncated=truncated,
+                timestamp=timestamp.isoformat() if timestamp else None
+                )
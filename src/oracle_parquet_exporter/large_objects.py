@@ -0,0 +1,220 @@
+import decimal
+import oracledb
+import pyarrow
+import pyarrow.fs
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from .catalog import ColumnMetadata
+from .sinks import create_directory
+from .type_mapping import DRIVER_INTEGER_MAX_DIGITS, STRING_DATA_TYPES, cast_column, get_arrow_type
+
+# Constants
+LOB_DATA_TYPES: Tuple[str, ...] = ("BLOB", "CLOB", "NCLOB")
+LONG_DATA_TYPES: Tuple[str, ...] = ("LONG", "LONG RAW")
+STREAMED_DATA_TYPES: Tuple[str, ...] = LOB_DATA_TYPES + LONG_DATA_TYPES
+DEFAULT_LOB_BATCH_MEMORY_LIMIT: int = 256_000_000  # 256MB
+LOB_READ_SIZE: int = 1_048_576  # Bytes (or characters) read from a LOB per round trip
+LOB_OVERFLOW_TRUNCATE: str = "truncate"
+LOB_OVERFLOW_SIDECAR: str = "sidecar"
+LOB_OVERFLOW_ACTIONS: Tuple[str, ...] = (LOB_OVERFLOW_TRUNCATE, LOB_OVERFLOW_SIDECAR)
+SIDECAR_DIRECTORY_NAME: str = "_lobs"
+SIDECAR_COLUMN_SUFFIX: str = "_SIDECAR_FILE"
+MICROSECONDS_PER_SECOND: int = 1_000_000
+
+
+@dataclass
+class LobOptions:
+    """How streamed (LOB and LONG) columns are fetched - batches are cut once the values read for them reach
+       batch_memory_limit bytes, and values longer than max_lob_size (bytes for binary, characters for text columns)
+       are either truncated or written to a sidecar file of their own"""
+    batch_memory_limit: int = DEFAULT_LOB_BATCH_MEMORY_LIMIT
+    max_lob_size: Optional[int] = None
+    overflow: str = LOB_OVERFLOW_TRUNCATE
+
+
+def has_streamed_columns(columns: List[ColumnMetadata]) -> bool:
+    return any(column.data_type in STREAMED_DATA_TYPES for column in columns)
+
+
+def get_select_expression(column: ColumnMetadata) -> str:
+    """Returns the select list expression for a column - intervals are fetched as a number of microseconds
+       (DAY TO SECOND) or months (YEAR TO MONTH), which the driver does not fetch into Arrow by itself"""
+    column_sql = f"\"{column.column_name}\""
+    if column.data_type.startswith("INTERVAL DAY"):
+        return (f"CAST(EXTRACT(DAY FROM {column_sql}) * {86_400 * MICROSECONDS_PER_SECOND}"
+                f" + EXTRACT(HOUR FROM {column_sql}) * {3_600 * MICROSECONDS_PER_SECOND}"
+                f" + EXTRACT(MINUTE FROM {column_sql}) * {60 * MICROSECONDS_PER_SECOND}"
+                f" + ROUND(EXTRACT(SECOND FROM {column_sql}) * {MICROSECONDS_PER_SECOND}) AS NUMBER(18))")
+    if column.data_type.startswith("INTERVAL YEAR"):
+        return f"CAST(EXTRACT(YEAR FROM {column_sql}) * 12 + EXTRACT(MONTH FROM {column_sql}) AS NUMBER(9))"
+    return column_sql
+
+
+def get_fetch_arrow_type(column: ColumnMetadata) -> pyarrow.DataType:
+    """The Arrow type of a column fetched row-wise that is not mapped to a type - the type the driver fetches it as
+       into data frames, so that tables with streamed columns are written as the others are"""
+    data_type = column.data_type
+    if data_type == "NUMBER":
+        if column.data_scale == 0 and (column.data_precision is None or column.data_precision <= DRIVER_INTEGER_MAX_DIGITS):
+            return pyarrow.int64()
+        return pyarrow.float64()
+    if data_type in STRING_DATA_TYPES:
+        return pyarrow.string()
+    # The driver fetches floats, dates, timestamps, LOB/LONG and RAW columns as their mapped types - and intervals are
+    # always cast
+    arrow_type = get_arrow_type(column=column)
+    if arrow_type is not None:
+        return arrow_type
+    if data_type.startswith("TIMESTAMP"):
+        return pyarrow.timestamp("us")
+    return pyarrow.string()
+
+
+def _fetch_numbers_as_decimals(cursor: oracledb.Cursor, metadata):
+    # Decimals keep the full precision of NUMBER values - they are cast to their mapped Arrow type per batch
+    if metadata.type_code is oracledb.DB_TYPE_NUMBER:
+        return cursor.var(decimal.Decimal, arraysize=cursor.arraysize)
+
+
+class StreamedValueReader:
+    """Reads the value of a streamed column - a LOB is read in LOB_READ_SIZE pieces, so that a value over the size
+       cutoff is never held in memory in full (it is truncated, or copied piece by piece to a sidecar file)"""
+
+    def __init__(self,
+                 lob_options: LobOptions,
+                 sidecar_path_prefix: str,
+                 file_name_prefix: str,
+                 filesystem: Optional[pyarrow.fs.FileSystem] = None
+                 ):
+        self.lob_options = lob_options
+        self.sidecar_path = f"{sidecar_path_prefix}/{SIDECAR_DIRECTORY_NAME}"
+        self.sidecar_path_prefix = sidecar_path_prefix
+        self.file_name_prefix = file_name_prefix
+        self.filesystem = filesystem or pyarrow.fs.LocalFileSystem()
+        self.values_truncated: int = 0
+        self.sidecar_files_written: int = 0
+
+    def _write_sidecar_file(self,
+                            column_name: str,
+                            pieces
+                            ) -> str:
+        create_directory(filesystem=self.filesystem,
+                         path=self.sidecar_path
+                         )
+        sidecar_file_name = f"{SIDECAR_DIRECTORY_NAME}/{self.file_name_prefix}_{column_name}_{uuid.uuid4().hex}.lob"
+        with self.filesystem.open_output_stream(f"{self.sidecar_path_prefix}/{sidecar_file_name}") as f:
+            for piece in pieces:
+                f.write(piece.encode("utf-8") if isinstance(piece, str) else piece)
+        self.sidecar_files_written += 1
+        return sidecar_file_name
+
+    def read(self,
+             column_name: str,
+             value: Any
+             ) -> Tuple[Any, Optional[str]]:
+        """Returns the value to export and the sidecar file it was written to (if any)"""
+        if value is None:
+            return None, None
+
+        max_lob_size = self.lob_options.max_lob_size
+        if isinstance(value, oracledb.LOB):
+            lob_size = value.size()
+            if max_lob_size is not None and lob_size > max_lob_size:
+                if self.lob_options.overflow == LOB_OVERFLOW_SIDECAR:
+                    return None, self._write_sidecar_file(column_name=column_name,
+                                                          pieces=read_lob_pieces(lob=value, size=lob_size)
+                                                          )
+                self.values_truncated += 1
+                lob_size = max_lob_size
+            empty_value = b"" if value.type is oracledb.DB_TYPE_BLOB else ""
+            return empty_value.join(read_lob_pieces(lob=value, size=lob_size)), None
+
+        # LONG and LONG RAW values can not be read piecewise - they are already fetched in full
+        if max_lob_size is not None and len(value) > max_lob_size:
+            if self.lob_options.overflow == LOB_OVERFLOW_SIDECAR:
+                return None, self._write_sidecar_file(column_name=column_name,
+                                                      pieces=[value]
+                                                      )
+            self.values_truncated += 1
+            return value[:max_lob_size], None
+        return value, None
+
+
+def read_lob_pieces(lob: oracledb.LOB,
+                    size: int
+                    ) -> Generator[Any, None, None]:
+    """Reads the first size bytes (or characters) of a LOB - in pieces of up to LOB_READ_SIZE"""
+    offset = 1  # LOB offsets are 1-based
+    while offset <= size:
+        piece = lob.read(offset, min(LOB_READ_SIZE, size - offset + 1))
+        if not piece:
+            return
+        yield piece
+        offset += len(piece)
+
+
+def get_value_size(value: Any) -> int:
+    # Characters are counted as bytes - an estimate for memory accounting purposes
+    return len(value) if isinstance(value, (str, bytes)) else 0
+
+
+def fetch_streamed_arrow_batches(connection: oracledb.Connection,
+                                 sql: str,
+                                 bind_vars: Dict[str, Any],
+                                 columns: List[ColumnMetadata],
+                                 column_names: List[str],
+                                 column_types: Optional[Dict[str, pyarrow.DataType]],
+                                 batch_size: int,
+                                 value_reader: StreamedValueReader,
+                                 lowercase: bool = False
+                                 ) -> Generator[pyarrow.Table, None, None]:
+    """Fetches a query with streamed (LOB/LONG) columns row-wise - yielding an Arrow table each time batch_size rows
+       have been fetched, or the streamed values read reach the batch memory limit (whichever comes first)"""
+    column_types = column_types or {}
+    arrow_types = [column_types.get(column_name, get_fetch_arrow_type(column=column))
+                   for column, column_name in zip(columns, column_names)]
+    streamed_columns = {i for i, column in enumerate(columns) if column.data_type in STREAMED_DATA_TYPES}
+    sidecar_columns = sorted(streamed_columns) if value_reader.lob_options.overflow == LOB_OVERFLOW_SIDECAR else []
+    sidecar_suffix = SIDECAR_COLUMN_SUFFIX.lower() if lowercase else SIDECAR_COLUMN_SUFFIX
+
+    def build_table(column_values: List[List[Any]],
+                    sidecar_values: Dict[int, List[Optional[str]]]
+                    ) -> pyarrow.Table:
+        arrays = [cast_column(column=pyarrow.chunked_array([pyarrow.array(values)]), arrow_type=arrow_type)
+                  for values, arrow_type in zip(column_values, arrow_types)]
+        names = list(column_names)
+        for i in sidecar_columns:
+            arrays.append(pyarrow.chunked_array([pyarrow.array(sidecar_values[i], pyarrow.string())]))
+            names.append(f"{column_names[i]}{sidecar_suffix}")
+        return pyarrow.Table.from_arrays(arrays=arrays, names=names)
+
+    with connection.cursor() as cursor:
+        cursor.arraysize = batch_size
+        cursor.outputtypehandler = _fetch_numbers_as_decimals
+        cursor.execute(statement=sql, parameters=bind_vars)
+
+        column_values: List[List[Any]] = [[] for _ in columns]
+        sidecar_values: Dict[int, List[Optional[str]]] = {i: [] for i in sidecar_columns}
+        row_count = 0
+        batch_bytes = 0
+        for row in cursor:
+            for i, value in enumerate(row):
+                if i in streamed_columns:
+                    value, sidecar_file = value_reader.read(column_name=column_names[i], value=value)
+                    batch_bytes += get_value_size(value=value)
+                    if i in sidecar_values:
+                        sidecar_values[i].append(sidecar_file)
+                column_values[i].append(value)
+            row_count += 1
+
+            if row_count >= batch_size or batch_bytes >= value_reader.lob_options.batch_memory_limit:
+                yield build_table(column_values=column_values, sidecar_values=sidecar_values)
+                column_values = [[] for _ in columns]
+                sidecar_values = {i: [] for i in sidecar_columns}
+                row_count = 0
+                batch_bytes = 0
+
+        if row_count:
+            yield build_table(column_values=column_values, sidecar_values=sidecar_values)
@@ -1,24 +1,62 @@
 import click
+import itertools
 import logging
 import oracledb
 import os
+import posixpath
 import pyarrow
 import pyarrow.parquet as pq
-import shutil
 import sys
+import threading
+import time
 from codetiming import Timer
-from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from dataclasses import dataclass, replace
 from dotenv import load_dotenv
 from pathlib import Path
-from typing import List, Generator
+from typing import Any, AsyncGenerator, Callable, Dict, Iterator, List, Generator, Optional
 
 from . import __version__ as app_version
+from .async_engine import DEFAULT_ASYNC_CONCURRENCY, ENGINE_ASYNC, ENGINE_SYNC, ENGINES, AsyncExportEngine
+from .batch_sizing import DEFAULT_BATCH_BYTES_TARGET, AdaptiveBatchSizer
+from .catalog import Catalog, TableMetadata
+from .dataset_metadata import DATASET_MANIFEST_FILE_NAME, DatasetManifest, write_table_metadata
+from .chunking import NO_CHUNKING, TableChunk, get_numeric_key_chunks, get_rowid_chunks
+from .compaction import DEFAULT_COMPACTION_MIN_FILE_SIZE_RATIO, TableCompactor
+from .incremental import (DEFAULT_STATE_FILE_NAME, ORA_ROWSCN, ExportState, IncrementalRange,
+                          flush_database_monitoring_info, get_max_watermark, get_table_modifications)
+from .large_objects import (DEFAULT_LOB_BATCH_MEMORY_LIMIT, LOB_OVERFLOW_ACTIONS, LOB_OVERFLOW_TRUNCATE, LobOptions,
+                            StreamedValueReader, fetch_streamed_arrow_batches, get_select_expression,
+                            has_streamed_columns)
+from .memory import NO_MEMORY_LIMIT, MemoryAccountant
+from .metrics import (RUN_REPORT_FILE_NAME, STAGE_CONVERT, STAGE_FETCH, STAGE_WRITE, STATUS_FAILED, STATUS_SUCCEEDED,
+                      RunMetrics, TableMetrics)
+from .partitioning import DEFAULT_MAX_OPEN_PARTITION_WRITERS, PartitionKey, PartitionedParquetWriter, parse_partition_keys
+from .pipeline import NO_PIPELINE, PipelinedIterator
+from .planning import ExportPlan, ThroughputModel, plan_table
+from .run_manifest import RUN_MANIFEST_FILE_NAME, RunManifest
+from .sorting import (CLUSTER_METHOD_AUTO, CLUSTER_METHOD_LOCAL, CLUSTER_METHOD_SERVER, CLUSTER_METHODS,
+                      DEFAULT_SERVER_SORT_MAX_BYTES, DEFAULT_SORT_MEMORY_LIMIT, ExternalSorter, SortKey, get_order_by_sql,
+                      parse_sort_keys)
+from .sinks import (OUTPUT_FORMAT_ARROW_STREAM, OUTPUT_FORMAT_PARQUET, OUTPUT_FORMATS, create_directory,
+                    get_arrow_ipc_compression, get_output_filesystem, is_local_filesystem, path_exists)
+from .table_config import TableConfig, TableConfigs
+from .table_options import get_table_option, parse_table_column_options
+from .type_mapping import (cast_table, get_column_arrow_types, get_text_select_expression, is_fetched_as_text,
+                           parse_column_type_overrides)
+from .work_queue import (DEFAULT_LEASE_DURATION, WORK_QUEUE_DIRECTORY_NAME, WORK_QUEUE_POLL_INTERVAL,
+                         WORK_QUEUE_ROLE_COORDINATOR, WORK_QUEUE_ROLE_WORKER, WORK_QUEUE_ROLES, Lease, LeaseRenewer,
+                         WorkQueue, WorkQueueTask, get_worker_id)
+from .writer import DEFAULT_PARQUET_ROW_GROUP_SIZE, create_part_writer, get_next_file_number, remove_temporary_files
+from .writer_policy import WriterPolicies
 
 # Constants
 TIMER_TEXT = "{name}: Elapsed time: {:.4f} seconds"
 DEFAULT_PORT: int = 1521
 NO_ROW_LIMIT: int = -1
 DEFAULT_PARQUET_MAX_FILE_SIZE: int = 200_000_000  # 200MB
+DEFAULT_PARALLELISM: int = 1
 
 # Setup logging
 logging.basicConfig(stream=sys.stdout)
@@ -28,6 +66,25 @@ logger = logging.getLogger()
 load_dotenv(dotenv_path=".env")
 
 
+@dataclass
+class ExportQuery:
+    """The query that exports a table (or a chunk of it) - and how its rows are clustered"""
+    sql: str
+    bind_vars: Dict[str, Any]
+    sort_keys: Optional[List[SortKey]] = None
+    cluster_method: Optional[str] = None
+
+
+@dataclass
+class TableExportTask:
+    """A unit of export work - a whole table, or one chunk of a table"""
+    schema: str
+    table_name: str
+    chunk: Optional[TableChunk] = None
+    file_numbers: Optional[Iterator[int]] = None
+    incremental_range: Optional[IncrementalRange] = None
+
+
 class OracleParquetExporter:
     def __init__(self,
                  username: str,
@@ -46,7 +103,49 @@ class OracleParquetExporter:
                  isolation_level: str,
                  lowercase_object_names: bool,
                  parquet_max_file_size: int,
-                 logger: logging.Logger
+                 logger: logging.Logger,
+                 parallelism: int = DEFAULT_PARALLELISM,
+                 table_chunk_count: int = NO_CHUNKING,
+                 table_chunk_keys: Optional[List[str]] = None,
+                 pipeline_queue_depth: int = NO_PIPELINE,
+                 parquet_row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE,
+                 incremental: bool = False,
+                 watermark_columns: Optional[List[str]] = None,
+                 state_file: Optional[str] = None,
+                 resume: bool = False,
+                 partition_by: Optional[List[str]] = None,
+                 max_open_partition_writers: int = DEFAULT_MAX_OPEN_PARTITION_WRITERS,
+                 catalog_cache_file: Optional[str] = None,
+                 type_mapping: bool = False,
+                 column_type: Optional[List[str]] = None,
+                 lob_batch_memory_limit: int = DEFAULT_LOB_BATCH_MEMORY_LIMIT,
+                 max_lob_size: Optional[int] = None,
+                 lob_overflow: str = LOB_OVERFLOW_TRUNCATE,
+                 writer_policy_file: Optional[str] = None,
+                 writer_policy_auto: bool = False,
+                 run_report_file: Optional[str] = None,
+                 prometheus_textfile: Optional[str] = None,
+                 adaptive_batch_size: bool = False,
+                 batch_bytes_target: int = DEFAULT_BATCH_BYTES_TARGET,
+                 memory_limit: int = NO_MEMORY_LIMIT,
+                 work_queue_role: Optional[str] = None,
+                 work_queue_directory: Optional[str] = None,
+                 worker_id: Optional[str] = None,
+                 lease_duration: int = DEFAULT_LEASE_DURATION,
+                 output_format: str = OUTPUT_FORMAT_PARQUET,
+                 metadata_directory: Optional[str] = None,
+                 dry_run: bool = False,
+                 calibration_run_report: Optional[List[str]] = None,
+                 table_config_file: Optional[str] = None,
+                 cluster_by: Optional[List[str]] = None,
+                 cluster_method: str = CLUSTER_METHOD_AUTO,
+                 server_sort_max_bytes: int = DEFAULT_SERVER_SORT_MAX_BYTES,
+                 sort_memory_limit: int = DEFAULT_SORT_MEMORY_LIMIT,
+                 sort_spill_directory: Optional[str] = None,
+                 dataset_metadata: bool = True,
+                 engine: str = ENGINE_SYNC,
+                 async_concurrency: int = DEFAULT_ASYNC_CONCURRENCY,
+                 compact: bool = False
                  ):
         self._username = username
         self._password = password
@@ -59,6 +158,11 @@ class OracleParquetExporter:
         self.table_name_include_pattern = table_name_include_pattern
         self.table_name_exclude_pattern = table_name_exclude_pattern
         self.output_directory = output_directory
+        self.output_format = output_format
+        self.output_filesystem, self.output_path = get_output_filesystem(output_directory=output_directory)
+        # The export's own files (i.e. the run manifest) are always local - next to the output, unless it is remote
+        self.metadata_directory = metadata_directory or (output_directory if is_local_filesystem(filesystem=self.output_filesystem)
+                                                         else Path.cwd().as_posix())
         self.overwrite = overwrite
         self.compression_method = compression_method
         self.batch_size = batch_size
@@ -67,7 +171,147 @@ class OracleParquetExporter:
         self.lowercase_object_names = lowercase_object_names
         self.parquet_max_file_size = parquet_max_file_size
         self.logger = logger
+        self.parallelism = parallelism
+
+        self.table_chunk_count = table_chunk_count
+        self.table_chunk_keys = parse_table_column_options(option_values=table_chunk_keys,
+                                                           option_name="table chunk key"
+                                                           )
+        self.pipeline_queue_depth = pipeline_queue_depth
+        self.parquet_row_group_size = parquet_row_group_size
+        self.incremental = incremental
+        self.watermark_columns = parse_table_column_options(option_values=watermark_columns,
+                                                            option_name="watermark column"
+                                                            )
+        self.export_state = None
+        if self.incremental:
+            self.export_state = ExportState(state_file=state_file or f"{self.metadata_directory}/{DEFAULT_STATE_FILE_NAME}")
+
+        self.resume = resume
+        self.run_manifest = RunManifest(manifest_file=f"{self.metadata_directory}/{RUN_MANIFEST_FILE_NAME}")
+        self.resuming = False
+
+        self.partition_by = {table_key: parse_partition_keys(partition_spec=partition_spec)
+                             for table_key, partition_spec in parse_table_column_options(option_values=partition_by,
+                                                                                         option_name="partition by"
+                                                                                         ).items()}
+        self.max_open_partition_writers = max_open_partition_writers
+        self.cluster_by = {table_key: parse_sort_keys(cluster_spec=cluster_spec)
+                           for table_key, cluster_spec in parse_table_column_options(option_values=cluster_by,
+                                                                                     option_name="cluster by"
+                                                                                     ).items()}
+        self.cluster_method = cluster_method
+        self.server_sort_max_bytes = server_sort_max_bytes
+        self.sort_memory_limit = sort_memory_limit
+        self.sort_spill_directory = sort_spill_directory
+        # Arrow IPC files have no footer statistics to consolidate
+        self.dataset_metadata = dataset_metadata and self.output_format == OUTPUT_FORMAT_PARQUET
+        self.compact = compact and self.output_format == OUTPUT_FORMAT_PARQUET
+        self.dataset_manifest = DatasetManifest(filesystem=self.output_filesystem,
+                                                manifest_file=f"{self.output_path}/{DATASET_MANIFEST_FILE_NAME}"
+                                                )
+        self._file_metadata: Dict[str, pq.FileMetaData] = {}
+        self.engine = engine
+        self.async_concurrency = async_concurrency
+
+        self.catalog = Catalog(cache_file=catalog_cache_file)
+        self.type_mapping = type_mapping
+        self.column_type_overrides = parse_column_type_overrides(option_values=column_type)
+        self.run_metrics = RunMetrics()
+
+        self.work_queue_role = work_queue_role
+        self.work_queue = None
+        if self.work_queue_role is not None:
+            self.work_queue = WorkQueue(directory=work_queue_directory or f"{self.metadata_directory}/{WORK_QUEUE_DIRECTORY_NAME}",
+                                        lease_duration=lease_duration
+                                        )
+        self.worker_id = worker_id or get_worker_id()
+
+        self.run_report_file = run_report_file or f"{self.metadata_directory}/{RUN_REPORT_FILE_NAME}"
+        if not run_report_file and self.work_queue_role == WORK_QUEUE_ROLE_WORKER:
+            # Workers share the output directory - so each one reports to its own file
+            self.run_report_file = (self.work_queue.directory / "reports" / f"{self.worker_id}.json").as_posix()
+        self.prometheus_textfile = prometheus_textfile
+        self.dry_run = dry_run
+        # Calibrated now - before overwriting the output directory removes the previous run's report
+        self.throughput_model = ThroughputModel.calibrate(run_report_files=calibration_run_report or [self.run_report_file])
+        self.writer_policies = WriterPolicies(policy_file=writer_policy_file,
+                                              auto=writer_policy_auto
+                                              )
+        self.table_configs = TableConfigs(config_file=table_config_file)
+        self.lob_options = LobOptions(batch_memory_limit=lob_batch_memory_limit,
+                                      max_lob_size=max_lob_size,
+                                      overflow=lob_overflow
+                                      )
+        self._catalog_lock = threading.Lock()
+        self.adaptive_batch_size = adaptive_batch_size
+        self.batch_bytes_target = batch_bytes_target
+        self._batch_sizers: Dict[tuple, AdaptiveBatchSizer] = {}
+        self._batch_sizers_lock = threading.Lock()
+        self.memory_accountant = MemoryAccountant(memory_limit=memory_limit)
+
+        self._task_lock = threading.Lock()
+        self._monitoring_info_flushed: bool = False
+        self._pending_task_counts = {}
+
+        if self.parallelism < 1:
+            raise ValueError(f"Parallelism must be at least 1, got: {self.parallelism}")
+        if self.table_chunk_count < 1:
+            raise ValueError(f"Table chunk count must be at least 1, got: {self.table_chunk_count}")
+        if lob_overflow not in LOB_OVERFLOW_ACTIONS:
+            raise ValueError(f"LOB overflow must be one of: {LOB_OVERFLOW_ACTIONS}, got: {lob_overflow}")
+        if max_open_partition_writers < 1:
+            raise ValueError(f"Max open partition writers must be at least 1, got: {max_open_partition_writers}")
+        if self.pipeline_queue_depth < 0:
+            raise ValueError(f"Pipeline queue depth must not be negative, got: {self.pipeline_queue_depth}")
+        if self.batch_bytes_target < 1:
+            raise ValueError(f"Batch bytes target must be at least 1, got: {self.batch_bytes_target}")
+        if self.work_queue_role is not None:
+            if self.work_queue_role not in WORK_QUEUE_ROLES:
+                raise ValueError(f"Work queue role must be one of: {WORK_QUEUE_ROLES}, got: {self.work_queue_role}")
+            if self.incremental or self.resume:
+                raise ValueError("A work queue export can not be incremental or resumed - an interrupted one is"
+                                 " continued by starting workers on its work queue again.")
+            if self.table_chunk_count > NO_CHUNKING:
+                self.logger.warning(msg="Work queue tasks are whole tables - tables will not be chunked.")
+                self.table_chunk_count = NO_CHUNKING
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Output format must be one of: {OUTPUT_FORMATS}, got: {self.output_format}")
+        if self.output_format != OUTPUT_FORMAT_PARQUET:
+            get_arrow_ipc_compression(compression=self.compression_method)
+            if writer_policy_file or writer_policy_auto:
+                self.logger.warning(msg=f"Parquet writer policies do not apply to the output format: {self.output_format} - they will be ignored.")
+        if self.output_format == OUTPUT_FORMAT_ARROW_STREAM:
+            # Tables are written to stdout one after another - as whole streams
+            if self.parallelism > 1 or self.partition_by or self.resume or self.work_queue_role is not None:
+                raise ValueError("The Arrow stream output format can not be used with parallelism, partitioning, resume or a work queue.")
+        if self.engine not in ENGINES:
+            raise ValueError(f"Engine must be one of: {ENGINES}, got: {self.engine}")
+        if self.engine == ENGINE_ASYNC:
+            if self.async_concurrency < 1:
+                raise ValueError(f"Async concurrency must be at least 1, got: {self.async_concurrency}")
+            if self.work_queue_role is not None or self.output_format == OUTPUT_FORMAT_ARROW_STREAM:
+                raise ValueError(f"The {ENGINE_ASYNC} engine can not be used with a work queue or the Arrow stream output format.")
+        if self.cluster_method not in CLUSTER_METHODS:
+            raise ValueError(f"Cluster method must be one of: {CLUSTER_METHODS}, got: {self.cluster_method}")
+        for table_config in self.table_configs.configs:
+            if table_config.compression and self.output_format != OUTPUT_FORMAT_PARQUET:
+                get_arrow_ipc_compression(compression=table_config.compression)
+        if not is_local_filesystem(filesystem=self.output_filesystem):
+            # Resuming and the work queue rename part files and directories - object stores can not do that cheaply
+            if self.resume or self.work_queue_role is not None:
+                raise ValueError(f"A resumable or work queue export requires a local (or shared) output directory, got: {self.output_directory}")
+        if self.table_chunk_count > NO_CHUNKING:
+            if self.parallelism == 1:
+                self.logger.warning(msg="Table chunking requires parallelism greater than 1 - tables will not be chunked.")
+            if self.row_limit != NO_ROW_LIMIT:
+                self.logger.warning(msg="Table chunking is not compatible with a row limit - tables will not be chunked.")
+
+        # oracledb only supports asyncio in thin mode - which loading the Oracle Client libraries (thick mode) rules out
+        if self.engine != ENGINE_ASYNC:
+            self.init_oracle_client()
 
+    def init_oracle_client(self):
         try:
             oracledb.init_oracle_client()
         except Exception as e:
@@ -84,183 +328,1348 @@ class OracleParquetExporter:
         finally:
             con.close()
 
+    @contextmanager
+    def get_db_pool(self) -> Generator[oracledb.ConnectionPool, None, None]:
+        pool = oracledb.create_pool(user=self._username,
+                                    password=self._password,
+                                    dsn=self._dsn,
+                                    min=1,
+                                    max=self.parallelism,
+                                    increment=1
+                                    )
+        try:
+            yield pool
+        finally:
+            pool.close(force=True)
+
+    @asynccontextmanager
+    async def get_async_db_pool(self) -> AsyncGenerator[oracledb.AsyncConnectionPool, None]:
+        pool = oracledb.create_pool_async(user=self._username,
+                                          password=self._password,
+                                          dsn=self._dsn,
+                                          min=1,
+                                          max=self.async_concurrency,
+                                          increment=1
+                                          )
+        try:
+            yield pool
+        finally:
+            await pool.close(force=True)
+
+    def get_current_scn(self,
+                        connection: oracledb.Connection
+                        ) -> int:
+        # Requires EXECUTE privilege on DBMS_FLASHBACK
+        with connection.cursor() as cursor:
+            cursor.execute(statement="SELECT DBMS_FLASHBACK.GET_SYSTEM_CHANGE_NUMBER FROM dual")
+            scn = cursor.fetchone()[0]
+
+        return int(scn)
+
+    def get_export_scn(self,
+                       connection: oracledb.Connection,
+                       required: bool
+                       ) -> Optional[int]:
+        if self.resuming:
+            if self.run_manifest.scn is not None:
+                return self.run_manifest.scn
+
+            self.logger.warning(msg="The interrupted run did not record an SCN - resuming as of a new SCN, so the remaining tables may not be consistent with the ones already exported.")
+            return self.get_current_scn(connection=connection)
+
+        scn = self.get_current_scn(connection=connection) if required else None
+        self.run_manifest.start_run(scn=scn)
+        return scn
+
+    def get_catalog(self,
+                    connection: oracledb.Connection
+                    ) -> Catalog:
+        with self._catalog_lock:
+            if not self.catalog.is_loaded:
+                with Timer(name=f"Loading the catalog - for schemas: {self.schemas}",
+                           text=TIMER_TEXT,
+                           initial_text=True,
+                           logger=self.logger.info
+                           ):
+                    self.catalog.load(connection=connection,
+                                      schemas=self.schemas,
+                                      table_name_include_pattern=self.table_name_include_pattern,
+                                      table_name_exclude_pattern=self.table_name_exclude_pattern
+                                      )
+                self.logger.info(msg=f"Catalog - columns of: {self.catalog.loaded_table_count:,} table(s) loaded from the"
+                                     f" data dictionary, {self.catalog.cached_table_count:,} table(s) from the cache")
+
+        return self.catalog
+
+    def get_table_config(self,
+                         schema: str,
+                         table_name: str
+                         ) -> TableConfig:
+        return self.table_configs.get_table_config(schema=schema,
+                                                   table_name=table_name
+                                                   )
+
+    def get_export_table(self,
+                         connection: oracledb.Connection,
+                         schema: str,
+                         table_name: str
+                         ) -> Optional[TableMetadata]:
+        """Returns the table as exported - with only the supported columns its table config selects"""
+        table = self.get_catalog(connection=connection).get_table(schema=schema,
+                                                                  table_name=table_name
+                                                                  )
+        if table is None:
+            return None
+
+        table_config = self.get_table_config(schema=schema,
+                                             table_name=table_name
+                                             )
+        return replace(table, columns=table_config.select_columns(columns=table.supported_columns))
+
     def get_columns(self,
                     connection: oracledb.Connection,
                     schema: str,
                     table_name: str
                     ):
-        sql = f"""SELECT column_name
-                    FROM all_tab_columns
-                   WHERE owner = :schema
-                     AND table_name = :table_name
-                     AND data_type NOT IN ('BLOB', 'BFILE', 'CLOB', 'UNDEFINED', 'UROWID', 'LONG', 'RAW') /* These types are un-supported */
-                     AND data_type NOT LIKE 'INTERVAL %'
-                   ORDER BY column_id ASC
-              """
-
-        with connection.cursor() as cursor:
-            cursor.execute(statement=sql,
-                           schema=schema,
-                           table_name=table_name
-                           )
-            column_list = [row[0] for row in cursor]
+        table = self.get_export_table(connection=connection,
+                                      schema=schema,
+                                      table_name=table_name
+                                      )
+        if table is None:
+            return []
 
-        return column_list
+        return [column.column_name for column in table.supported_columns]
 
     def get_column_sql(self,
                        connection: oracledb.Connection,
                        schema: str,
                        table_name: str
                        ) -> str:
-        column_list = self.get_columns(connection=connection,
-                                       schema=schema,
-                                       table_name=table_name
-                                       )
+        table = self.get_export_table(connection=connection,
+                                      schema=schema,
+                                      table_name=table_name
+                                      )
+        if table is None:
+            return ""
 
+        column_types = self.get_column_arrow_types(connection=connection,
+                                                   schema=schema,
+                                                   table_name=table_name
+                                                   )
         column_sql = ""
-        for column_name in column_list:
+        for column in table.supported_columns:
+            column_expression = get_select_expression(column=column)
+            if is_fetched_as_text(column=column,
+                                  arrow_type=column_types.get(column.column_name.lower() if self.lowercase_object_names
+                                                              else column.column_name)
+                                  ):
+                column_expression = get_text_select_expression(column_sql=column_expression)
             if self.lowercase_object_names:
-                column_sql += f", \"{column_name}\" AS \"{column_name.lower()}\""
+                column_sql += f", {column_expression} AS \"{column.column_name.lower()}\""
+            elif column_expression != f"\"{column.column_name}\"":
+                column_sql += f", {column_expression} AS \"{column.column_name}\""
             else:
-                column_sql += f", \"{column_name}\""
+                column_sql += f", {column_expression}"
 
         return column_sql.strip(", ")
 
-    def export_table(self,
-                     connection: oracledb.Connection,
-                     schema: str,
-                     table_name: str,
-                     output_path_prefix: str
-                     ):
+    def get_export_query(self,
+                         connection: oracledb.Connection,
+                         schema: str,
+                         table_name: str,
+                         scn: Optional[int] = None,
+                         chunk: Optional[TableChunk] = None,
+                         incremental_range: Optional[IncrementalRange] = None
+                         ) -> Optional[ExportQuery]:
+        """Returns the query that exports a table (or a chunk of it) - or None if it has no eligible export columns"""
         column_sql = self.get_column_sql(connection=connection,
                                          schema=schema,
                                          table_name=table_name
                                          )
-
         if column_sql == "":
-            self.logger.warning(f"Table: {schema}.{table_name} has no eligible export columns, skipping.")
-            return
+            return None
+
+        table_config = self.get_table_config(schema=schema,
+                                             table_name=table_name
+                                             )
+        sql = f"SELECT {column_sql} FROM \"{schema}\".\"{table_name}\"{table_config.sample_sql}"
+        bind_vars = {}
+        if scn is not None and (incremental_range is None or incremental_range.supports_flashback_query):
+            sql += " AS OF SCN :scn"
+            bind_vars["scn"] = scn
+
+        predicates = []
+        for table_filter in (chunk, incremental_range):
+            if table_filter is not None:
+                predicates.append(f"({table_filter.predicate})")
+                bind_vars.update(table_filter.bind_vars)
+        if table_config.where:
+            predicates.append(f"({table_config.where})")
+        if predicates:
+            sql += f" WHERE {' AND '.join(predicates)}"
+
+        sort_keys = self.get_sort_keys(schema=schema,
+                                       table_name=table_name
+                                       )
+        cluster_method = None
+        if sort_keys:
+            export_column_names = {column.column_name.upper(): column.column_name
+                                   for column in self.get_export_table(connection=connection,
+                                                                       schema=schema,
+                                                                       table_name=table_name
+                                                                       ).supported_columns}
+            for sort_key in sort_keys:
+                if sort_key.column_name.upper() not in export_column_names:
+                    raise ValueError(f"Cluster column: {sort_key.column_name} is not one of the exported columns of table: {schema}.{table_name}")
+            # Quoted in the ORDER BY - so spelled as in the catalog, not as given
+            sort_keys = [replace(sort_key, column_name=export_column_names[sort_key.column_name.upper()])
+                         for sort_key in sort_keys]
+            cluster_method = self.get_cluster_method(connection=connection,
+                                                     schema=schema,
+                                                     table_name=table_name
+                                                     )
+            if cluster_method == CLUSTER_METHOD_SERVER:
+                sql += get_order_by_sql(sort_keys=sort_keys,
+                                        table_name=table_name
+                                        )
 
-        sql = f"SELECT {column_sql} FROM \"{schema}\".\"{table_name}\""
         if self.row_limit != NO_ROW_LIMIT:
             sql += f" FETCH FIRST {self.row_limit} ROWS ONLY"
 
-        self.logger.info(msg=f"Exporting table: {schema}.{table_name} - SQL: {sql}")
+        return ExportQuery(sql=sql,
+                           bind_vars=bind_vars,
+                           sort_keys=sort_keys,
+                           cluster_method=cluster_method
+                           )
 
-        pq_writer = None
-        rows_exported = 0
+    def get_file_name_prefix(self, table_name: str) -> str:
+        return table_name.lower() if self.lowercase_object_names else table_name
+
+    def create_table_part_writer(self,
+                                 schema: str,
+                                 table_name: str,
+                                 output_path_prefix: str,
+                                 file_numbers: Optional[Iterator[int]] = None,
+                                 on_file_committed: Optional[Callable[[str, int], None]] = None,
+                                 sort_keys: Optional[List[SortKey]] = None
+                                 ):
+        """Returns the part writer of a table - a partitioned one, if the table has partition keys"""
+        file_name_prefix = self.get_file_name_prefix(table_name=table_name)
+        if file_numbers is None:
+            # Start after any existing part files - i.e. from a previous incremental run
+            file_numbers = itertools.count(get_next_file_number(output_path_prefix=output_path_prefix,
+                                                                file_name_prefix=file_name_prefix,
+                                                                filesystem=self.output_filesystem
+                                                                ))
+
+        table_config = self.get_table_config(schema=schema,
+                                             table_name=table_name
+                                             )
+        writer_policy = self.writer_policies.get_table_policy(schema=schema,
+                                                              table_name=table_name
+                                                              )
+        partition_keys = self.get_partition_keys(schema=schema,
+                                                 table_name=table_name
+                                                 )
+        if partition_keys:
+            return PartitionedParquetWriter(output_path_prefix=output_path_prefix,
+                                            file_name_prefix=file_name_prefix,
+                                            partition_keys=partition_keys,
+                                            compression=table_config.compression or self.compression_method,
+                                            max_file_size=self.parquet_max_file_size,
+                                            row_group_size=self.parquet_row_group_size,
+                                            file_numbers=file_numbers,
+                                            lowercase=self.lowercase_object_names,
+                                            max_open_writers=self.max_open_partition_writers,
+                                            on_file_committed=on_file_committed,
+                                            writer_policy=writer_policy,
+                                            output_format=self.output_format,
+                                            filesystem=self.output_filesystem,
+                                            sort_keys=sort_keys
+                                            )
 
-        Path(output_path_prefix).mkdir(parents=True, exist_ok=True)
-        file_number = 0
-        file_size = 0
-        for odf in connection.fetch_df_batches(statement=sql,
-                                               size=self.batch_size
-                                               ):
+        return create_part_writer(output_format=self.output_format,
+                                  output_path_prefix=output_path_prefix,
+                                  file_name_prefix=file_name_prefix,
+                                  compression=table_config.compression or self.compression_method,
+                                  max_file_size=self.parquet_max_file_size,
+                                  row_group_size=self.parquet_row_group_size,
+                                  file_numbers=file_numbers,
+                                  on_file_committed=on_file_committed,
+                                  writer_policy=writer_policy,
+                                  filesystem=self.output_filesystem,
+                                  sort_keys=sort_keys
+                                  )
+
+    def export_table(self,
+                     connection: oracledb.Connection,
+                     schema: str,
+                     table_name: str,
+                     output_path_prefix: str,
+                     scn: Optional[int] = None,
+                     chunk: Optional[TableChunk] = None,
+                     file_numbers: Optional[Iterator[int]] = None,
+                     incremental_range: Optional[IncrementalRange] = None,
+                     on_file_committed: Optional[Callable[[str, int], None]] = None
+                     ):
+        export_query = self.get_export_query(connection=connection,
+                                             schema=schema,
+                                             table_name=table_name,
+                                             scn=scn,
+                                             chunk=chunk,
+                                             incremental_range=incremental_range
+                                             )
+        if export_query is None:
+            self.logger.warning(f"Table: {schema}.{table_name} has no eligible export columns, skipping.")
+            return
+
+        sql, bind_vars = export_query.sql, export_query.bind_vars
+        sort_keys, cluster_method = export_query.sort_keys, export_query.cluster_method
+        table_config = self.get_table_config(schema=schema,
+                                             table_name=table_name
+                                             )
+        table_metrics = self.run_metrics.start_table(schema=schema,
+                                                     table_name=table_name,
+                                                     chunk_number=chunk.chunk_number if chunk is not None else None
+                                                     )
+
+        chunk_text = f" (chunk {chunk.chunk_number + 1} of {chunk.chunk_count})" if chunk is not None else ""
+        self.logger.info(msg=f"Exporting table: {schema}.{table_name}{chunk_text} - SQL: {sql}{f' - SCN: {scn}' if 'scn' in bind_vars else ''}")
+
+        if self.output_format != OUTPUT_FORMAT_ARROW_STREAM:
+            create_directory(filesystem=self.output_filesystem,
+                             path=output_path_prefix
+                             )
+
+        file_name_prefix = self.get_file_name_prefix(table_name=table_name)
+        column_types = self.get_column_arrow_types(connection=connection,
+                                                   schema=schema,
+                                                   table_name=table_name
+                                                   )
+        columns = self.get_export_table(connection=connection,
+                                        schema=schema,
+                                        table_name=table_name
+                                        ).supported_columns
+        batch_sizer = self.get_batch_sizer(connection=connection,
+                                           schema=schema,
+                                           table_name=table_name
+                                           )
+        batch_size = self.memory_accountant.get_batch_size(batch_size=batch_sizer.batch_size if batch_sizer
+                                                           else table_config.batch_size or self.batch_size)
+        table_metrics.batch_size = batch_size
+        if batch_sizer:
+            self.logger.info(msg=f"Table: {schema}.{table_name}{chunk_text} - adaptive batch size: {batch_size:,} row(s)"
+                                 f" (~{batch_sizer.row_bytes:,.0f} byte(s) per row - estimated: {batch_sizer.estimated_row_bytes:,})")
+
+        value_reader = None
+        if has_streamed_columns(columns=columns):
+            # LOB/LONG values can be arbitrarily large - so they are read row-wise, with a cap on the memory per batch
+            value_reader = StreamedValueReader(lob_options=self.lob_options,
+                                               sidecar_path_prefix=output_path_prefix,
+                                               file_name_prefix=file_name_prefix,
+                                               filesystem=self.output_filesystem
+                                               )
+            pyarrow_tables = table_metrics.time_iteration(stage=STAGE_FETCH, iterable=fetch_streamed_arrow_batches(
+                                                          connection=connection,
+                                                          sql=sql,
+                                                          bind_vars=bind_vars,
+                                                          columns=columns,
+                                                          column_names=[column.column_name.lower() if self.lowercase_object_names else column.column_name
+                                                                        for column in columns],
+                                                          column_types=column_types,
+                                                          batch_size=batch_size,
+                                                          value_reader=value_reader,
+                                                          lowercase=self.lowercase_object_names
+                                                          ))
+        else:
+            pyarrow_tables = self.fetch_arrow_batches(connection=connection,
+                                                      sql=sql,
+                                                      bind_vars=bind_vars,
+                                                      column_types=column_types,
+                                                      table_metrics=table_metrics,
+                                                      batch_size=batch_size,
+                                                      batch_sizer=batch_sizer
+                                                      )
+        sorter = None
+        if cluster_method == CLUSTER_METHOD_LOCAL:
+            # Too large to sort on the database - sorted here, spilling sorted runs to local disk
+            sorter = ExternalSorter(sort_keys=sort_keys,
+                                    memory_limit=self.sort_memory_limit,
+                                    spill_directory=self.sort_spill_directory
+                                    )
+            pyarrow_tables = sorter.sort(pyarrow_tables=pyarrow_tables)
+
+        partition_keys = self.get_partition_keys(schema=schema,
+                                                 table_name=table_name
+                                                 )
+        part_writer = self.create_table_part_writer(schema=schema,
+                                                    table_name=table_name,
+                                                    output_path_prefix=output_path_prefix,
+                                                    file_numbers=file_numbers,
+                                                    on_file_committed=on_file_committed,
+                                                    sort_keys=sort_keys
+                                                    )
+
+        pipeline = None
+        if self.pipeline_queue_depth != NO_PIPELINE:
+            # Fetch (and Arrow conversion) run on a background thread - overlapping with compression and writing.  The
+            # writer is not thread-safe - so under memory pressure it is flushed by the write stage, after each batch.
+            pipeline = PipelinedIterator(iterable=self.memory_accountant.throttle(iterable=pyarrow_tables),
+                                         queue_depth=self.pipeline_queue_depth,
+                                         name=f"{schema}.{table_name}"
+                                         )
+        else:
+            pyarrow_tables = self.memory_accountant.throttle(iterable=pyarrow_tables,
+                                                             on_pressure=part_writer.flush
+                                                             )
+
+        with sorter or nullcontext(), part_writer:
+            with pipeline or nullcontext(enter_result=pyarrow_tables) as pyarrow_tables:
+                for pyarrow_table in pyarrow_tables:
+                    table_metrics.record_batch()
+                    with table_metrics.time_stage(stage=STAGE_WRITE):
+                        part_writer.write(pyarrow_table=pyarrow_table)
+                        if self.memory_accountant.is_over_limit:
+                            # Write out the buffered rows as a (smaller) row group - freeing the batches they hold
+                            part_writer.flush()
+                    self.run_metrics.sample_memory()
+                    del pyarrow_table
+
+            with table_metrics.time_stage(stage=STAGE_WRITE):
+                part_writer.close()
+
+        table_metrics.complete(part_writer=part_writer,
+                               pipeline=pipeline
+                               )
+        self.collect_file_metadata(part_writer=part_writer)
+
+        if pipeline:
+            self.logger.info(msg=f"Pipeline stalls - table: {schema}.{table_name}{chunk_text} - "
+                                 f"fetch stage waited on a full queue for: {pipeline.producer_stall_seconds:.4f} seconds, "
+                                 f"write stage waited on an empty queue for: {pipeline.consumer_stall_seconds:.4f} seconds")
+
+        self.logger.info(f"Wrote {part_writer.rows_written:,} row(s) to {output_path_prefix} - table: {schema}.{table_name}{chunk_text}"
+                         f" - {len(part_writer.file_names):,} file(s), {part_writer.row_groups_written:,} row group(s),"
+                         f" {part_writer.compressed_bytes_written:,} compressed byte(s)"
+                         f" (compression ratio: {part_writer.compression_ratio_estimator.ratio:.3f})")
+        if value_reader:
+            self.logger.info(msg=f"Streamed LOB/LONG columns - table: {schema}.{table_name}{chunk_text} - {value_reader.values_truncated:,}"
+                                 f" value(s) truncated, {value_reader.sidecar_files_written:,} value(s) written to sidecar files")
+        if sort_keys:
+            sort_text = (f" - sorted locally in {len(sorter.run_files):,} spilled run(s) of: {sorter.bytes_spilled:,} byte(s)"
+                         if sorter else "")
+            self.logger.info(msg=f"Clustered table: {schema}.{table_name}{chunk_text} - by: {', '.join(sort_key.order_by_sql for sort_key in sort_keys)}"
+                                 f" - {cluster_method} sort{sort_text}")
+        if partition_keys:
+            self.logger.info(msg=f"Partitioned table: {schema}.{table_name}{chunk_text} - {part_writer.writers_evicted:,}"
+                                 f" partition writer(s) closed early to stay within the limit of: {self.max_open_partition_writers:,} open writer(s)")
+
+    def collect_file_metadata(self, part_writer):
+        if self.dataset_metadata or self.compact:
+            # Kept until the table is complete - for its compaction, and its consolidated _metadata file
+            with self._task_lock:
+                self._file_metadata.update(part_writer.file_metadata)
+
+    def get_batch_sizer(self,
+                        connection: oracledb.Connection,
+                        schema: str,
+                        table_name: str
+                        ) -> Optional[AdaptiveBatchSizer]:
+        if not self.adaptive_batch_size:
+            return None
+        if self.get_table_config(schema=schema,
+                                 table_name=table_name
+                                 ).batch_size is not None:
+            # A table's configured batch size is used as-is
+            return None
+
+        # One sizer per table - so that its later chunks are fetched with the size refined by the earlier ones
+        with self._batch_sizers_lock:
+            batch_sizer = self._batch_sizers.get((schema, table_name))
+            if batch_sizer is None:
+                table = self.get_export_table(connection=connection,
+                                              schema=schema,
+                                              table_name=table_name
+                                              )
+                batch_sizer = AdaptiveBatchSizer(table=table,
+                                                 batch_bytes_target=self.batch_bytes_target
+                                                 )
+                self._batch_sizers[(schema, table_name)] = batch_sizer
+
+        return batch_sizer
+
+    def get_partition_keys(self,
+                           schema: str,
+                           table_name: str
+                           ) -> Optional[List[PartitionKey]]:
+        return self.partition_by.get((schema, table_name), self.partition_by.get((None, table_name)))
+
+    def get_sort_keys(self,
+                      schema: str,
+                      table_name: str
+                      ) -> Optional[List[SortKey]]:
+        return self.cluster_by.get((schema, table_name), self.cluster_by.get((None, table_name)))
+
+    def get_cluster_method(self,
+                           connection: oracledb.Connection,
+                           schema: str,
+                           table_name: str
+                           ) -> str:
+        """Returns how to sort a clustered table - by the database (ORDER BY) if it is small enough, or locally"""
+        if self.cluster_method != CLUSTER_METHOD_AUTO:
+            return self.cluster_method
+
+        table_plan = plan_table(table=self.get_export_table(connection=connection,
+                                                            schema=schema,
+                                                            table_name=table_name
+                                                            ),
+                                throughput_model=self.throughput_model,
+                                max_file_size=self.parquet_max_file_size,
+                                row_limit=None if self.row_limit == NO_ROW_LIMIT else self.row_limit,
+                                sample_percent=self.get_table_config(schema=schema,
+                                                                     table_name=table_name
+                                                                     ).sample_percent
+                                )
+        return CLUSTER_METHOD_SERVER if table_plan.estimated_bytes <= self.server_sort_max_bytes else CLUSTER_METHOD_LOCAL
+
+    def get_column_arrow_types(self,
+                               connection: oracledb.Connection,
+                               schema: str,
+                               table_name: str
+                               ) -> Dict[str, pyarrow.DataType]:
+        table = self.get_export_table(connection=connection,
+                                      schema=schema,
+                                      table_name=table_name
+                                      )
+        return get_column_arrow_types(columns=table.supported_columns,
+                                      schema=schema,
+                                      table_name=table_name,
+                                      column_type_overrides=self.column_type_overrides,
+                                      lowercase=self.lowercase_object_names,
+                                      type_mapping=self.type_mapping
+                                      )
+
+    def fetch_arrow_batches(self,
+                            connection: oracledb.Connection,
+                            sql: str,
+                            bind_vars: dict,
+                            column_types: Optional[Dict[str, pyarrow.DataType]] = None,
+                            table_metrics: Optional[TableMetrics] = None,
+                            batch_size: Optional[int] = None,
+                            batch_sizer: Optional[AdaptiveBatchSizer] = None
+                            ) -> Generator[pyarrow.Table, None, None]:
+        # The driver sizes its fetch array (and prefetch) to match the batch size
+        odfs = connection.fetch_df_batches(statement=sql,
+                                           parameters=bind_vars,
+                                           size=batch_size or self.batch_size
+                                           )
+        if table_metrics:
+            odfs = table_metrics.time_iteration(iterable=odfs, stage=STAGE_FETCH)
+
+        fetch_start_time = time.perf_counter()
+        for odf in odfs:
+            pyarrow_table = self.convert_arrow_batch(odf=odf,
+                                                     column_types=column_types,
+                                                     table_metrics=table_metrics,
+                                                     batch_sizer=batch_sizer,
+                                                     fetch_seconds=time.perf_counter() - fetch_start_time
+                                                     )
+            yield pyarrow_table
+            # Hold no reference to the batch while fetching the next one - so it is freed once written
+            del odf, pyarrow_table
+            fetch_start_time = time.perf_counter()
+
+    @staticmethod
+    def convert_arrow_batch(odf,
+                            column_types: Optional[Dict[str, pyarrow.DataType]] = None,
+                            table_metrics: Optional[TableMetrics] = None,
+                            batch_sizer: Optional[AdaptiveBatchSizer] = None,
+                            fetch_seconds: float = 0.0
+                            ) -> pyarrow.Table:
+        with table_metrics.time_stage(stage=STAGE_CONVERT) if table_metrics else nullcontext():
             # Get a PyArrow table from the query results
             pyarrow_table = pyarrow.Table.from_arrays(
                 arrays=odf.column_arrays(), names=odf.column_names()
             )
-            rows_exported += pyarrow_table.num_rows
+            if batch_sizer:
+                # Observed as fetched - before any cast narrows the columns
+                batch_sizer.record_batch(row_count=pyarrow_table.num_rows,
+                                         byte_count=pyarrow_table.nbytes,
+                                         fetch_seconds=fetch_seconds
+                                         )
+            if column_types:
+                pyarrow_table = cast_table(pyarrow_table=pyarrow_table,
+                                           column_types=column_types
+                                           )
+        return pyarrow_table
+
+    def get_tables(self,
+                   connection: oracledb.Connection,
+                   schema: str
+                   ):
+        return self.get_catalog(connection=connection).get_tables(schema=schema)
+
+    def get_table_output_path(self,
+                              schema: str,
+                              table_name: str
+                              ) -> Path:
+        return Path(f"{self.output_path}/{schema.lower() if self.lowercase_object_names else schema}"
+                    f"/{table_name.lower() if self.lowercase_object_names else table_name}")
+
+    def prepare_output_directory(self):
+        if self.resume and self.run_manifest.exists and not self.run_manifest.is_complete:
+            self.logger.info(msg=f"Resuming the interrupted run recorded in: {self.run_manifest.manifest_file.as_posix()}")
+            self.resuming = True
+            return
+
+        if self.incremental and self.export_state.exists:
+            # Incremental runs add new part files next to the ones from previous runs
+            self.logger.info(msg=f"Incremental export - using state file: {self.export_state.state_file.as_posix()}")
+            create_directory(filesystem=self.output_filesystem,
+                             path=self.output_path
+                             )
+            return
+
+        if self.output_format == OUTPUT_FORMAT_ARROW_STREAM:
+            # The tables are written to stdout - not to the output directory
+            return
+
+        if path_exists(filesystem=self.output_filesystem,
+                       path=self.output_path
+                       ):
+            if self.overwrite:
+                self.output_filesystem.delete_dir_contents(self.output_path)
+            else:
+                raise RuntimeError(
+                    f"Directory: {self.output_directory} exists, aborting.")
 
-            if not pq_writer:
-                file_name = f"{output_path_prefix}/{table_name.lower() if self.lowercase_object_names else table_name}_{file_number}.parquet"
-                pq_writer = pq.ParquetWriter(where=file_name,
-                                             schema=pyarrow_table.schema,
-                                             compression=self.compression_method
+        if self.dataset_metadata and self.work_queue_role != WORK_QUEUE_ROLE_WORKER:
+            self.dataset_manifest.start_run(output_directory=self.output_directory)
+
+    def get_export_plan(self,
+                        connection: oracledb.Connection
+                        ) -> ExportPlan:
+        catalog = self.get_catalog(connection=connection)
+        # Chunking is decided per table when exporting - a table is assumed to split into all of its chunks
+        task_count = NO_CHUNKING
+        if self.table_chunk_count > NO_CHUNKING and self.parallelism > 1 and self.row_limit == NO_ROW_LIMIT:
+            task_count = self.table_chunk_count
+
+        return ExportPlan(throughput_model=self.throughput_model,
+                          parallelism=self.parallelism,
+                          tables=[plan_table(table=self.get_export_table(connection=connection,
+                                                                         schema=schema,
+                                                                         table_name=table_name
+                                                                         ),
+                                             throughput_model=self.throughput_model,
+                                             max_file_size=self.parquet_max_file_size,
+                                             task_count=task_count,
+                                             row_limit=None if self.row_limit == NO_ROW_LIMIT else self.row_limit,
+                                             sample_percent=self.get_table_config(schema=schema,
+                                                                                  table_name=table_name
+                                                                                  ).sample_percent
                                              )
+                                  for schema in self.schemas
+                                  for table_name in catalog.get_tables(schema=schema)]
+                          )
 
-            pq_writer.write_table(table=pyarrow_table)
+    def print_export_plan(self):
+        with self.get_db_connection() as connection:
+            export_plan = self.get_export_plan(connection=connection)
+        print(export_plan.format())
 
-            # Get the file size of the current parquet file
-            file_size += pyarrow_table.nbytes
+    def get_table_chunks(self,
+                         connection: oracledb.Connection,
+                         schema: str,
+                         table_name: str,
+                         scn: int
+                         ) -> List[Optional[TableChunk]]:
+        if self.table_chunk_count == NO_CHUNKING or self.parallelism == 1 or self.row_limit != NO_ROW_LIMIT:
+            return [None]
+        if self.get_sort_keys(schema=schema,
+                              table_name=table_name
+                              ):
+            # A clustered table is sorted as a whole - its chunks' files would each be sorted separately
+            return [None]
 
-            if file_size >= self.parquet_max_file_size:
-                if pq_writer:
-                    if pq_writer.is_open:
-                        pq_writer.close()
-                    file_size = 0
-                    file_number += 1
-                    pq_writer = None
+        chunk_key = get_table_option(table_options=self.table_chunk_keys,
+                                     schema=schema,
+                                     table_name=table_name
+                                     )
+        if chunk_key:
+            chunks = get_numeric_key_chunks(connection=connection,
+                                            schema=schema,
+                                            table_name=table_name,
+                                            column_name=chunk_key,
+                                            chunk_count=self.table_chunk_count,
+                                            scn=scn
+                                            )
+        else:
+            try:
+                chunks = get_rowid_chunks(connection=connection,
+                                          schema=schema,
+                                          table_name=table_name,
+                                          chunk_count=self.table_chunk_count
+                                          )
+            except oracledb.DatabaseError as e:
+                # i.e. ORA-00942 - without access to DBA_EXTENTS (SELECT_CATALOG_ROLE)
+                self.logger.warning(msg=f"Table: {schema}.{table_name} - can not be split into ROWID ranges (exported as a"
+                                        f" single unit) - error: {e}")
+                return [None]
 
-        if pq_writer:
-            if pq_writer.is_open:
-                pq_writer.close()
+        # Tables too small to split (or without a segment) are exported as a single unit
+        if len(chunks) <= 1:
+            return [None]
 
-        self.logger.info(f"Wrote {rows_exported:,} row(s) to {output_path_prefix} - table: {schema}.{table_name}")
+        self.logger.info(msg=f"Table: {schema}.{table_name} - split into {len(chunks)} chunk(s) by {f'key column: {chunk_key}' if chunk_key else 'ROWID range'}")
+        return chunks
 
-    def get_tables(self,
-                   connection: oracledb.Connection,
-                   schema: str
+    def get_incremental_range(self,
+                              connection: oracledb.Connection,
+                              schema: str,
+                              table_name: str,
+                              scn: int
+                              ) -> Optional[IncrementalRange]:
+        """Returns the watermark range of rows to export for a table - or None if the table can be skipped"""
+        watermark_column = get_table_option(table_options=self.watermark_columns,
+                                            schema=schema,
+                                            table_name=table_name,
+                                            default=ORA_ROWSCN
+                                            )
+        table_state = self.export_state.get_table_state(schema=schema,
+                                                        table_name=table_name
+                                                        )
+        low_watermark = self.export_state.get_high_watermark(schema=schema,
+                                                             table_name=table_name,
+                                                             watermark_column=watermark_column
+                                                             )
+
+        modifications = None
+        if watermark_column == ORA_ROWSCN:
+            # Without a watermark column - use the DML monitoring counters to detect unchanged tables
+            self.flush_database_monitoring_info(connection=connection)
+            modifications = get_table_modifications(connection=connection,
+                                                    schema=schema,
+                                                    table_name=table_name
+                                                    )
+            # No counters (i.e. reset by a statistics gather) - are no evidence that the table is unchanged
+            if (low_watermark is not None and modifications is not None
+                    and modifications == table_state.get("modifications")):
+                self.logger.info(msg=f"Table: {schema}.{table_name} - no modifications recorded in ALL_TAB_MODIFICATIONS since the last run, skipping.")
+                return None
+            high_watermark = scn
+        else:
+            high_watermark = get_max_watermark(connection=connection,
+                                               schema=schema,
+                                               table_name=table_name,
+                                               watermark_column=watermark_column,
+                                               scn=scn
+                                               )
+            if high_watermark is None:
+                self.logger.info(msg=f"Table: {schema}.{table_name} - has no watermark values in column: {watermark_column}, skipping.")
+                return None
+            if low_watermark is not None and high_watermark <= low_watermark:
+                self.logger.info(msg=f"Table: {schema}.{table_name} - max watermark: {high_watermark} is unchanged since the last run, skipping.")
+                return None
+
+        self.logger.info(msg=f"Table: {schema}.{table_name} - incremental export by: {watermark_column} - "
+                             f"{f'after: {low_watermark}' if low_watermark is not None else 'full (no previous high-water mark)'} up to: {high_watermark}")
+        return IncrementalRange(watermark_column=watermark_column,
+                                low_watermark=low_watermark,
+                                high_watermark=high_watermark,
+                                modifications=modifications
+                                )
+
+    def flush_database_monitoring_info(self, connection: oracledb.Connection):
+        """Flushes the DML monitoring counters (once per run) - before any are compared with the previous run's"""
+        with self._task_lock:
+            if self._monitoring_info_flushed:
+                return
+            self._monitoring_info_flushed = True
+
+        try:
+            flush_database_monitoring_info(connection=connection)
+        except oracledb.DatabaseError as e:
+            # i.e. without the ANALYZE ANY privilege - the counters are flushed by the database every few minutes
+            self.logger.warning(msg=f"Could not flush the DML monitoring info - recent changes may not be detected: {e}")
+
+    def get_table_export_tasks(self,
+                               connection: oracledb.Connection,
+                               schema: str,
+                               table_name: str,
+                               scn: Optional[int]
+                               ) -> List[TableExportTask]:
+        incremental_range = None
+        if self.incremental:
+            incremental_range = self.get_incremental_range(connection=connection,
+                                                           schema=schema,
+                                                           table_name=table_name,
+                                                           scn=scn
+                                                           )
+            if incremental_range is None:
+                return []
+
+        table_output_path = self.get_table_output_path(schema=schema,
+                                                       table_name=table_name
+                                                       ).as_posix()
+        chunks = None
+        if self.resuming:
+            if self.run_manifest.is_table_complete(schema=schema,
+                                                   table_name=table_name
+                                                   ):
+                self.logger.info(msg=f"Table: {schema}.{table_name} - was completed by the interrupted run, skipping.")
+                return []
+
+            # Part files that were not committed before the interruption are discarded
+            remove_temporary_files(output_path_prefix=table_output_path)
+            # Re-use the chunks the interrupted run split the table into (if it got that far)
+            chunks = self.run_manifest.get_table_chunks(schema=schema,
+                                                        table_name=table_name
+                                                        )
+
+        if chunks is None:
+            chunks = self.get_table_chunks(connection=connection,
+                                           schema=schema,
+                                           table_name=table_name,
+                                           scn=scn
+                                           )
+            self.run_manifest.start_table(schema=schema,
+                                          table_name=table_name,
+                                          chunks=chunks
+                                          )
+
+        # Chunks of the same table share a file number sequence - so their part files do not collide
+        file_numbers = itertools.count(get_next_file_number(
+            output_path_prefix=table_output_path,
+            file_name_prefix=table_name.lower() if self.lowercase_object_names else table_name,
+            filesystem=self.output_filesystem
+        ))
+        tasks = []
+        for chunk in chunks:
+            if self.run_manifest.is_task_complete(schema=schema,
+                                                  table_name=table_name,
+                                                  chunk=chunk
+                                                  ):
+                continue
+
+            # Oracle does not guarantee the row order of a scan - so an interrupted task is restarted from scratch
+            discarded_file_names = self.run_manifest.prepare_task(schema=schema,
+                                                                  table_name=table_name,
+                                                                  chunk=chunk
+                                                                  )
+            for file_name in discarded_file_names:
+                Path(file_name).unlink(missing_ok=True)
+            if discarded_file_names:
+                self.logger.info(msg=f"Table: {schema}.{table_name} - discarded: {len(discarded_file_names):,} part file(s)"
+                                     f" of the interrupted task, it is restarted")
+
+            tasks.append(TableExportTask(schema=schema,
+                                         table_name=table_name,
+                                         chunk=chunk,
+                                         file_numbers=file_numbers,
+                                         incremental_range=incremental_range
+                                         ))
+
+        with self._task_lock:
+            self._pending_task_counts[(schema, table_name)] = len(tasks)
+
+        if not tasks:
+            # Every task finished before the interruption - only the table completion was not recorded
+            self.complete_table_export(schema=schema,
+                                       table_name=table_name,
+                                       incremental_range=incremental_range,
+                                       scn=scn
+                                       )
+
+        return tasks
+
+    def complete_table_export(self,
+                              schema: str,
+                              table_name: str,
+                              incremental_range: Optional[IncrementalRange],
+                              scn: Optional[int]
+                              ):
+        # The whole table is exported - so its high-water mark can be advanced
+        if self.incremental:
+            self.export_state.record_table_export(schema=schema,
+                                                  table_name=table_name,
+                                                  incremental_range=incremental_range,
+                                                  scn=scn
+                                                  )
+
+        self.complete_table_output(schema=schema,
+                                   table_name=table_name,
+                                   table_output_path=self.get_table_output_path(schema=schema,
+                                                                                table_name=table_name
+                                                                                ).as_posix(),
+                                   scn=scn
+                                   )
+
+        self.run_manifest.complete_table(schema=schema,
+                                         table_name=table_name
+                                         )
+
+    def complete_table_output(self,
+                              schema: str,
+                              table_name: str,
+                              table_output_path: str,
+                              scn: Optional[int],
+                              record: bool = True
+                              ) -> Optional[Dict[str, Any]]:
+        """Compacts the part files of a complete table, and writes its consolidated metadata - if enabled, returning
+           the table's dataset manifest entry"""
+        with self._task_lock:
+            file_metadata = {file_name: self._file_metadata.pop(file_name) for file_name in list(self._file_metadata)
+                             if file_name.startswith(f"{table_output_path}/")}
+
+        if self.compact:
+            file_metadata = self.compact_table(schema=schema,
+                                               table_name=table_name,
+                                               table_output_path=table_output_path,
+                                               file_metadata=file_metadata
+                                               )
+        if not self.dataset_metadata:
+            return None
+        return self.write_table_metadata(schema=schema,
+                                         table_name=table_name,
+                                         table_output_path=table_output_path,
+                                         scn=scn,
+                                         file_metadata=file_metadata,
+                                         record=record
+                                         )
+
+    def compact_table(self,
+                      schema: str,
+                      table_name: str,
+                      table_output_path: str,
+                      file_metadata: Dict[str, pq.FileMetaData]
+                      ) -> Dict[str, pq.FileMetaData]:
+        """Merges the undersized part files of the directories this run wrote to (all of them, when resuming - the
+           interrupted run's files were not collected) - returning the footers of the table's part files as they are
+           after compaction"""
+        sort_keys = self.get_sort_keys(schema=schema,
+                                       table_name=table_name
+                                       )
+        if sort_keys and self.incremental:
+            # The files of separate runs are each sorted - but merged, they would not be
+            self.logger.info(msg=f"Clustered table: {schema}.{table_name} - is exported incrementally, its part files are not compacted.")
+            return file_metadata
+
+        table_config = self.get_table_config(schema=schema,
+                                             table_name=table_name
+                                             )
+        compactor = TableCompactor(filesystem=self.output_filesystem,
+                                   table_path=table_output_path,
+                                   file_name_prefix=self.get_file_name_prefix(table_name=table_name),
+                                   compression=table_config.compression or self.compression_method,
+                                   max_file_size=self.parquet_max_file_size,
+                                   row_group_size=self.parquet_row_group_size,
+                                   writer_policy=self.writer_policies.get_table_policy(schema=schema,
+                                                                                       table_name=table_name
+                                                                                       ),
+                                   sort_keys=sort_keys
+                                   )
+        compactor.compact(directories=None if self.resuming else {posixpath.dirname(file_name) for file_name in file_metadata})
+        if compactor.files_compacted:
+            self.logger.info(msg=f"Compacted table: {schema}.{table_name} - {compactor.files_compacted:,} undersized part file(s)"
+                                 f" ({compactor.bytes_compacted:,} byte(s)) into: {compactor.files_written:,} file(s), in:"
+                                 f" {compactor.directories_compacted:,} director(ies)")
+
+        removed_file_names = set(compactor.removed_file_names)
+        return {**{file_name: metadata for file_name, metadata in file_metadata.items() if file_name not in removed_file_names},
+                **compactor.file_metadata}
+
+    def write_table_metadata(self,
+                             schema: str,
+                             table_name: str,
+                             table_output_path: str,
+                             scn: Optional[int],
+                             file_metadata: Optional[Dict[str, pq.FileMetaData]] = None,
+                             record: bool = True
+                             ) -> Dict[str, Any]:
+        """Writes a complete table's consolidated _metadata and _common_metadata files - and records it in the dataset
+           manifest (unless it is exported by a work queue worker, which hands its entry to the coordinator instead).
+           Returns the table's dataset manifest entry."""
+        table_entry = write_table_metadata(filesystem=self.output_filesystem,
+                                           table_path=table_output_path,
+                                           file_metadata=file_metadata
+                                           )
+        if table_entry["files"] and table_entry["metadata_file"] is None:
+            self.logger.warning(msg=f"Table: {schema}.{table_name} - its part files do not share one schema (i.e. from"
+                                    f" previous incremental runs) - no consolidated _metadata file was written.")
+        else:
+            self.logger.info(msg=f"Wrote the consolidated metadata of table: {schema}.{table_name} - {len(table_entry['files']):,}"
+                                 f" part file(s), {table_entry['row_count']:,} row(s) - to: {table_output_path}")
+
+        if record:
+            self.dataset_manifest.record_table(schema=schema,
+                                               table_name=table_name,
+                                               table_path=os.path.relpath(table_output_path, start=self.output_path),
+                                               scn=scn,
+                                               table_entry=table_entry
+                                               )
+        return table_entry
+
+    def complete_table_export_task(self,
+                                   task: TableExportTask,
+                                   scn: Optional[int]
+                                   ):
+        self.run_manifest.complete_task(schema=task.schema,
+                                        table_name=task.table_name,
+                                        chunk=task.chunk
+                                        )
+
+        with self._task_lock:
+            self._pending_task_counts[(task.schema, task.table_name)] -= 1
+            if self._pending_task_counts[(task.schema, task.table_name)] > 0:
+                return
+
+        self.complete_table_export(schema=task.schema,
+                                   table_name=task.table_name,
+                                   incremental_range=task.incremental_range,
+                                   scn=scn
+                                   )
+
+    def export_table_task(self,
+                          connection: oracledb.Connection,
+                          task: TableExportTask,
+                          scn: Optional[int] = None
+                          ):
+        table_output_path = self.get_table_output_path(schema=task.schema,
+                                                       table_name=task.table_name
+                                                       )
+        chunk_text = f" (chunk {task.chunk.chunk_number + 1} of {task.chunk.chunk_count})" if task.chunk is not None else ""
+        with Timer(name=f"Exporting table: {task.schema}.{task.table_name}{chunk_text} - to path: {table_output_path}",
+                   text=TIMER_TEXT,
+                   initial_text=True,
+                   logger=self.logger.info
                    ):
-        sql = f"""SELECT table_name
-                    FROM all_tables
-                   WHERE owner = :schema
-                     AND external = 'NO'
-                     AND temporary = 'N'
-                     AND REGEXP_LIKE(table_name, :table_name_include_pattern)
-                  ORDER BY table_name ASC
-              """
-
-        additional_bind_vars = {}
-        if self.table_name_exclude_pattern:
-            sql += f"AND NOT REGEXP_LIKE(table_name, :table_name_exclude_pattern)\n"
-            additional_bind_vars["table_name_exclude_pattern"] = self.table_name_exclude_pattern
+            self.export_table(connection=connection,
+                              schema=task.schema,
+                              table_name=task.table_name,
+                              output_path_prefix=table_output_path.as_posix(),
+                              scn=scn,
+                              chunk=task.chunk,
+                              file_numbers=task.file_numbers,
+                              incremental_range=task.incremental_range,
+                              on_file_committed=lambda file_name, row_count: self.run_manifest.record_file(
+                                  schema=task.schema,
+                                  table_name=task.table_name,
+                                  chunk=task.chunk,
+                                  file_name=file_name,
+                                  row_count=row_count
+                              )
+                              )
 
-        with connection.cursor() as cursor:
-            cursor.execute(statement=sql,
-                           schema=schema,
-                           table_name_include_pattern=self.table_name_include_pattern,
-                           **additional_bind_vars
+        self.complete_table_export_task(task=task,
+                                        scn=scn
+                                        )
+
+    def export_table_task_from_pool(self,
+                                    pool: oracledb.ConnectionPool,
+                                    task: TableExportTask,
+                                    scn: int
+                                    ):
+        with pool.acquire() as connection:
+            self.export_table_task(connection=connection,
+                                   task=task,
+                                   scn=scn
+                                   )
+
+    def export_tables_parallel(self):
+        with self.get_db_pool() as pool:
+            with pool.acquire() as connection:
+                # Every worker reads as of this SCN - so the export is consistent across sessions
+                scn = self.get_export_scn(connection=connection,
+                                          required=True
+                                          )
+                self.logger.info(msg=f"Exporting with parallelism: {self.parallelism} - as of SCN: {scn}")
+
+                tasks = []
+                for schema in self.schemas:
+                    for table_name in self.get_tables(connection=connection,
+                                                      schema=schema
+                                                      ):
+                        tasks.extend(self.get_table_export_tasks(connection=connection,
+                                                                 schema=schema,
+                                                                 table_name=table_name,
+                                                                 scn=scn
+                                                                 ))
+
+                # Longest first - so that no long table is left to run on alone at the end (the sort is stable, so a
+                # table's chunks stay in order)
+                export_plan = self.get_export_plan(connection=connection)
+                tasks.sort(key=lambda task: export_plan.get_estimated_seconds(schema=task.schema,
+                                                                              table_name=task.table_name
+                                                                              ),
+                           reverse=True
                            )
-            object_list = [row[0] for row in cursor]
+                self.logger.info(msg=f"Estimated elapsed time: {export_plan.estimated_elapsed_seconds:,.1f} seconds"
+                                     f" - for {len(tasks):,} task(s), longest first")
 
-        return object_list
+            with ThreadPoolExecutor(max_workers=self.parallelism,
+                                    thread_name_prefix="export_worker"
+                                    ) as executor:
+                futures = [executor.submit(self.export_table_task_from_pool,
+                                           pool=pool,
+                                           task=task,
+                                           scn=scn
+                                           )
+                           for task in tasks]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
 
-    def export_tables(self):
+    def export_tables_serial(self):
         with self.get_db_connection() as connection:
             # Set the isolation level
             with connection.cursor() as cursor:
                 cursor.execute(statement=f"ALTER SESSION SET ISOLATION_LEVEL = {self.isolation_level}")
 
-            output_path = Path(self.output_directory)
-            if output_path.exists():
-                if self.overwrite:
-                    shutil.rmtree(path=output_path.as_posix())
-                    output_path.mkdir(parents=True)
-                else:
-                    raise RuntimeError(
-                        f"Directory: {output_path.as_posix()} exists, aborting.")
+            # Incremental and resumable exports read as of an SCN - which is also the high-water mark when tracking by ORA_ROWSCN
+            scn = self.get_export_scn(connection=connection,
+                                      required=self.incremental or self.resume
+                                      )
+            if scn is not None:
+                self.logger.info(msg=f"Exporting as of SCN: {scn}")
+
+            for schema in self.schemas:
+                with Timer(name=f"Exporting objects - for schema: {schema}",
+                           text=TIMER_TEXT,
+                           initial_text=True,
+                           logger=self.logger.info
+                           ):
+                    table_list = self.get_tables(connection=connection,
+                                                 schema=schema
+                                                 )
+                    for table_name in table_list:
+                        for task in self.get_table_export_tasks(connection=connection,
+                                                                schema=schema,
+                                                                table_name=table_name,
+                                                                scn=scn
+                                                                ):
+                            self.export_table_task(connection=connection,
+                                                   task=task,
+                                                   scn=scn
+                                                   )
+
+    def publish_work_queue(self):
+        if self.work_queue.exists:
+            # The work queue directory may be outside of the output directory
+            if not self.overwrite:
+                raise RuntimeError(f"Work queue: {self.work_queue.manifest_file.as_posix()} exists, aborting.")
+            self.work_queue.clear()
+
+        with self.get_db_connection() as connection:
+            # Every worker reads as of this SCN - so the export is consistent across workers (and hosts)
+            scn = self.get_current_scn(connection=connection)
+            # Workers claim the tables in the order listed - longest first
+            tasks = [WorkQueueTask(schema=table_plan.schema,
+                                   table_name=table_plan.table_name
+                                   )
+                     for table_plan in self.get_export_plan(connection=connection).tables]
+
+        self.work_queue.publish(scn=scn,
+                                schemas=self.schemas,
+                                table_name_include_pattern=self.table_name_include_pattern,
+                                table_name_exclude_pattern=self.table_name_exclude_pattern,
+                                tasks=tasks
+                                )
+        self.logger.info(msg=f"Published a work queue of: {len(tasks):,} table(s) - as of SCN: {scn}"
+                             f" - to: {self.work_queue.manifest_file.as_posix()}")
+
+    def record_work_queue_dataset_manifest(self):
+        """Waits for the workers to export every table of the work queue - then records the dataset manifest from the
+           entries they left in the tasks' done markers (the workers share the output directory, so none of them
+           writes the manifest itself)"""
+        self.logger.info(msg=f"Waiting for the workers to export: {len(self.work_queue.tasks):,} table(s) - to record the"
+                             f" dataset manifest")
+        self.work_queue.wait_until_complete()
+
+        for task in self.work_queue.tasks:
+            table_entry = self.work_queue.get_task_result(task=task).get("table_entry")
+            if table_entry is None:
+                continue
+            self.dataset_manifest.record_table(schema=task.schema,
+                                               table_name=task.table_name,
+                                               table_path=os.path.relpath(self.get_table_output_path(schema=task.schema,
+                                                                                                     table_name=task.table_name
+                                                                                                     ),
+                                                                          start=self.output_path
+                                                                          ),
+                                               scn=self.work_queue.scn,
+                                               table_entry=table_entry
+                                               )
+        self.logger.info(msg=f"Recorded the dataset manifest: {self.dataset_manifest.manifest_file}")
 
+    def export_tables_from_work_queue(self):
+        self.work_queue.load()
+        # Workers export the tables the coordinator listed - it decides the schemas and table name patterns
+        self.schemas = self.work_queue.schemas
+        self.table_name_include_pattern = self.work_queue.table_name_include_pattern
+        self.table_name_exclude_pattern = self.work_queue.table_name_exclude_pattern
+        self.logger.info(msg=f"Worker: {self.worker_id} - exporting from work queue: {self.work_queue.directory.as_posix()}"
+                             f" - with parallelism: {self.parallelism} - as of SCN: {self.work_queue.scn}")
+
+        stopped = threading.Event()
+        with self.get_db_pool() as pool:
+            with ThreadPoolExecutor(max_workers=self.parallelism,
+                                    thread_name_prefix="export_worker"
+                                    ) as executor:
+                futures = [executor.submit(self.export_work_queue_tasks,
+                                           pool=pool,
+                                           stopped=stopped
+                                           )
+                           for _ in range(self.parallelism)]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except BaseException:
+                    stopped.set()
+                    raise
+
+    def export_work_queue_tasks(self,
+                                pool: oracledb.ConnectionPool,
+                                stopped: threading.Event
+                                ):
+        while not stopped.is_set():
+            lease = self.work_queue.claim_next_task(worker_id=self.worker_id)
+            if lease is None:
+                if self.work_queue.is_complete:
+                    return
+                # The remaining tables are leased by other workers - wait in case a lease expires
+                stopped.wait(timeout=WORK_QUEUE_POLL_INTERVAL)
+                continue
+
+            with pool.acquire() as connection:
+                self.export_work_queue_task(connection=connection,
+                                            lease=lease
+                                            )
+
+    def export_work_queue_task(self,
+                               connection: oracledb.Connection,
+                               lease: Lease
+                               ):
+        task = lease.task
+        table_output_path = self.get_table_output_path(schema=task.schema,
+                                                       table_name=task.table_name
+                                                       )
+        # Each attempt writes to its own directory - moved into place only if it still holds the lease when done
+        attempt_output_path = self.work_queue.get_attempt_output_path(output_path=table_output_path,
+                                                                      lease=lease
+                                                                      )
+        self.logger.info(msg=f"Worker: {self.worker_id} - claimed table: {task.schema}.{task.table_name}"
+                             f" (lease generation: {lease.generation})")
+        with LeaseRenewer(work_queue=self.work_queue,
+                          lease=lease
+                          ):
+            try:
+                with Timer(name=f"Exporting table: {task.schema}.{task.table_name} - to path: {table_output_path}",
+                           text=TIMER_TEXT,
+                           initial_text=True,
+                           logger=self.logger.info
+                           ):
+                    self.export_table(connection=connection,
+                                      schema=task.schema,
+                                      table_name=task.table_name,
+                                      output_path_prefix=attempt_output_path.as_posix(),
+                                      scn=self.work_queue.scn
+                                      )
+                    # Moved into place with the part files - the _metadata file paths are relative to the table directory
+                    table_entry = self.complete_table_output(schema=task.schema,
+                                               table_name=task.table_name,
+                                               table_output_path=attempt_output_path.as_posix(),
+                                               scn=self.work_queue.scn,
+                                               record=False
+                                               )
+            except BaseException:
+                self.work_queue.release(lease=lease)
+                raise
+
+            # The coordinator records the dataset manifest from the done markers - once every table is done
+            completed = self.work_queue.complete(lease=lease,
+                                                 output_path=table_output_path,
+                                                 result=dict(table_entry=table_entry) if table_entry is not None else None
+                                                 )
+
+        if not completed:
+            self.logger.warning(msg=f"Worker: {self.worker_id} - lost the lease on table: {task.schema}.{task.table_name}"
+                                    f" to another worker (it was not renewed in time) - its output was discarded.")
+
+    def write_run_report(self):
+        self.run_metrics.write_report(report_file=self.run_report_file,
+                                      schemas=self.schemas,
+                                      scn=self.work_queue.scn if self.work_queue else self.run_manifest.scn,
+                                      parallelism=self.parallelism,
+                                      batch_size=self.batch_size,
+                                      adaptive_batch_size=self.adaptive_batch_size,
+                                      output_directory=self.output_directory,
+                                      memory=self.memory_accountant.to_dict()
+                                      )
+        self.logger.info(msg=f"Wrote the run report to: {self.run_report_file}")
+
+        if self.prometheus_textfile:
+            self.run_metrics.write_prometheus_textfile(textfile=self.prometheus_textfile)
+            self.logger.info(msg=f"Wrote the Prometheus metrics to: {self.prometheus_textfile}")
+
+    def export_tables(self):
+        if self.dry_run:
+            # Plans the export from the data dictionary - no rows are fetched, and nothing is written
+            self.print_export_plan()
+            return
+
+        # Workers share the output directory prepared by the coordinator
+        if self.work_queue_role != WORK_QUEUE_ROLE_WORKER:
+            self.prepare_output_directory()
+
+        try:
             with Timer(name=f"Exporting tables - for schemas: {self.schemas}",
                        text=TIMER_TEXT,
                        initial_text=True,
                        logger=self.logger.info
                        ):
-                for schema in self.schemas:
-                    with Timer(name=f"Exporting objects - for schema: {schema}",
-                               text=TIMER_TEXT,
-                               initial_text=True,
-                               logger=self.logger.info
-                               ):
-                        schema_output_path_prefix = Path(
-                            f"{self.output_directory}/{schema.lower() if self.lowercase_object_names else schema}")
+                if self.work_queue_role == WORK_QUEUE_ROLE_COORDINATOR:
+                    self.publish_work_queue()
+                    if self.dataset_metadata:
+                        self.record_work_queue_dataset_manifest()
+                elif self.work_queue_role == WORK_QUEUE_ROLE_WORKER:
+                    self.export_tables_from_work_queue()
+                elif self.engine == ENGINE_ASYNC:
+                    AsyncExportEngine(exporter=self,
+                                      concurrency=self.async_concurrency
+                                      ).run()
+                elif self.parallelism > 1:
+                    self.export_tables_parallel()
+                else:
+                    self.export_tables_serial()
 
-                        table_list = self.get_tables(connection=connection,
-                                                     schema=schema
-                                                     )
-                        for table_name in table_list:
-                            table_output_path = Path(
-                                f"{schema_output_path_prefix}/{table_name.lower() if self.lowercase_object_names else table_name}")
-                            with Timer(name=f"Exporting table: {schema}.{table_name} - to path: {table_output_path}",
-                                       text=TIMER_TEXT,
-                                       initial_text=True,
-                                       logger=self.logger.info
-                                       ):
-                                self.export_table(connection=connection,
-                                                  schema=schema,
-                                                  table_name=table_name,
-                                                  output_path_prefix=table_output_path
-                                                  )
+            if self.work_queue is None:
+                self.run_manifest.complete_run()
+        except BaseException:
+            self.run_metrics.complete(status=STATUS_FAILED)
+            raise
+        else:
+            self.run_metrics.complete(status=STATUS_SUCCEEDED)
+        finally:
+            self.log_memory_pressure()
+            self.write_run_report()
+
+    def log_memory_pressure(self):
+        memory_accountant = self.memory_accountant
+        if not memory_accountant.is_enabled:
+            return
+
+        msg = (f"Memory limit: {memory_accountant.memory_limit:,} byte(s) - hit {memory_accountant.limit_hit_count:,} time(s),"
+               f" fetches waited for memory for: {memory_accountant.wait_seconds:.4f} seconds,"
+               f" batch sizes halved: {memory_accountant.batch_size_shrinks:,} time(s)")
+        if memory_accountant.limit_hit_count:
+            self.logger.warning(msg=msg)
+        else:
+            self.logger.info(msg=msg)
 
 
 def exporter(version: bool,
@@ -280,12 +1689,59 @@ def exporter(version: bool,
              isolation_level: str,
              lowercase_object_names: bool,
              parquet_max_file_size: int,
-             log_level: str):
+             log_level: str,
+             parallelism: int = DEFAULT_PARALLELISM,
+             table_chunk_count: int = NO_CHUNKING,
+             table_chunk_key: Optional[List[str]] = None,
+             pipeline_queue_depth: int = NO_PIPELINE,
+             parquet_row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE,
+             incremental: bool = False,
+             watermark_column: Optional[List[str]] = None,
+             state_file: Optional[str] = None,
+             resume: bool = False,
+             partition_by: Optional[List[str]] = None,
+             max_open_partition_writers: int = DEFAULT_MAX_OPEN_PARTITION_WRITERS,
+             catalog_cache_file: Optional[str] = None,
+             type_mapping: bool = False,
+             column_type: Optional[List[str]] = None,
+             lob_batch_memory_limit: int = DEFAULT_LOB_BATCH_MEMORY_LIMIT,
+             max_lob_size: Optional[int] = None,
+             lob_overflow: str = LOB_OVERFLOW_TRUNCATE,
+             writer_policy_file: Optional[str] = None,
+             writer_policy_auto: bool = False,
+             run_report_file: Optional[str] = None,
+             prometheus_textfile: Optional[str] = None,
+             adaptive_batch_size: bool = False,
+             batch_bytes_target: int = DEFAULT_BATCH_BYTES_TARGET,
+             memory_limit: int = NO_MEMORY_LIMIT,
+             work_queue_role: Optional[str] = None,
+             work_queue_directory: Optional[str] = None,
+             worker_id: Optional[str] = None,
+             lease_duration: int = DEFAULT_LEASE_DURATION,
+             output_format: str = OUTPUT_FORMAT_PARQUET,
+             metadata_directory: Optional[str] = None,
+             dry_run: bool = False,
+             calibration_run_report: Optional[List[str]] = None,
+             table_config_file: Optional[str] = None,
+             cluster_by: Optional[List[str]] = None,
+             cluster_method: str = CLUSTER_METHOD_AUTO,
+             server_sort_max_bytes: int = DEFAULT_SERVER_SORT_MAX_BYTES,
+             sort_memory_limit: int = DEFAULT_SORT_MEMORY_LIMIT,
+             sort_spill_directory: Optional[str] = None,
+             dataset_metadata: bool = True,
+             engine: str = ENGINE_SYNC,
+             async_concurrency: int = DEFAULT_ASYNC_CONCURRENCY,
+             compact: bool = False):
     if version:
         print(f"GizmoData™ Oracle Parquet Exporter - version: {app_version}")
         return
 
     logger.setLevel(level=getattr(logging, log_level))
+    if output_format == OUTPUT_FORMAT_ARROW_STREAM:
+        # Stdout carries the Arrow stream - so the log goes to stderr
+        for handler in logger.handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stdout:
+                handler.setStream(stream=sys.stderr)
 
     logger.info(msg=f"Starting GizmoData™ Oracle Parquet Exporter application - version: {app_version}")
     arg_dict = locals()
@@ -308,7 +1764,49 @@ def exporter(version: bool,
                                                     isolation_level=isolation_level,
                                                     lowercase_object_names=lowercase_object_names,
                                                     parquet_max_file_size=parquet_max_file_size,
-                                                    logger=logger
+                                                    logger=logger,
+                                                    parallelism=parallelism,
+                                                    table_chunk_count=table_chunk_count,
+                                                    table_chunk_keys=table_chunk_key,
+                                                    pipeline_queue_depth=pipeline_queue_depth,
+                                                    parquet_row_group_size=parquet_row_group_size,
+                                                    incremental=incremental,
+                                                    watermark_columns=watermark_column,
+                                                    state_file=state_file,
+                                                    resume=resume,
+                                                    partition_by=partition_by,
+                                                    max_open_partition_writers=max_open_partition_writers,
+                                                    catalog_cache_file=catalog_cache_file,
+                                                    type_mapping=type_mapping,
+                                                    column_type=column_type,
+                                                    lob_batch_memory_limit=lob_batch_memory_limit,
+                                                    max_lob_size=max_lob_size,
+                                                    lob_overflow=lob_overflow,
+                                                    writer_policy_file=writer_policy_file,
+                                                    writer_policy_auto=writer_policy_auto,
+                                                    run_report_file=run_report_file,
+                                                    prometheus_textfile=prometheus_textfile,
+                                                    adaptive_batch_size=adaptive_batch_size,
+                                                    batch_bytes_target=batch_bytes_target,
+                                                    memory_limit=memory_limit,
+                                                    work_queue_role=work_queue_role,
+                                                    work_queue_directory=work_queue_directory,
+                                                    worker_id=worker_id,
+                                                    lease_duration=lease_duration,
+                                                    output_format=output_format,
+                                                    metadata_directory=metadata_directory,
+                                                    dry_run=dry_run,
+                                                    calibration_run_report=calibration_run_report,
+                                                    table_config_file=table_config_file,
+                                                    cluster_by=cluster_by,
+                                                    cluster_method=cluster_method,
+                                                    server_sort_max_bytes=server_sort_max_bytes,
+                                                    sort_memory_limit=sort_memory_limit,
+                                                    sort_spill_directory=sort_spill_directory,
+                                                    dataset_metadata=dataset_metadata,
+                                                    engine=engine,
+                                                    async_concurrency=async_concurrency,
+                                                    compact=compact
                                                     )
 
     oracle_parquet_exporter.export_tables()
@@ -393,7 +1891,7 @@ def exporter(version: bool,
     default=Path("output").as_posix(),
     show_default=True,
     required=True,
-    help="The path to the output directory - may be relative or absolute."
+    help="The path to the output directory - may be relative or absolute, or any filesystem URI supported by Arrow (i.e. s3://bucket/prefix?region=us-east-1, gs://bucket/prefix or hdfs://host:port/path) - files are streamed straight to object storage, with multipart uploads."
 )
 @click.option(
     "--overwrite/--no-overwrite",
@@ -449,9 +1947,17 @@ def exporter(version: bool,
     default=os.getenv("PARQUET_MAX_FILE_SIZE", DEFAULT_PARQUET_MAX_FILE_SIZE),
     show_default=True,
     required=True,
-    help=f"The maximum file size for the parquet files generated.  Defaults to environment variable: PARQUET_MAX_FILE_SIZE if set, otherwise: {DEFAULT_PARQUET_MAX_FILE_SIZE:,}."
-         "  Note: this is not the maximum size of the parquet file, but the maximum size of the file on disk.  The actual parquet file may be larger due to compression."
-         "  The file size is determined by the number of rows in the table and the batch size.  The file size is not guaranteed to be less than this value, but it will be close."
+    help=f"The target on-disk (compressed) size of the parquet files generated.  Defaults to environment variable: PARQUET_MAX_FILE_SIZE if set, otherwise: {DEFAULT_PARQUET_MAX_FILE_SIZE:,}."
+         "  Files are rolled over based upon the compressed bytes actually written, using a compression ratio learned from each table's data to predict the size of the next row group."
+         "  The file size is not guaranteed to be less than this value, but it will be close."
+)
+@click.option(
+    "--parquet-row-group-size",
+    type=click.IntRange(min=1),
+    default=int(os.getenv("PARQUET_ROW_GROUP_SIZE", DEFAULT_PARQUET_ROW_GROUP_SIZE)),
+    show_default=True,
+    required=True,
+    help=f"The target uncompressed (in-memory Arrow) size of each parquet row group, in bytes.  Fetched batches are coalesced into row groups of this size, independent of --batch-size.  Defaults to environment variable: PARQUET_ROW_GROUP_SIZE if set, otherwise: {DEFAULT_PARQUET_ROW_GROUP_SIZE:,}."
 )
 @click.option(
     "--log-level",
@@ -461,6 +1967,322 @@ def exporter(version: bool,
     required=True,
     help="The logging level to use for the application.  Defaults to environment variable: LOGGING_LEVEL if set, otherwise: 'INFO'."
 )
+@click.option(
+    "--parallelism",
+    type=click.IntRange(min=1),
+    default=int(os.getenv("PARALLELISM", DEFAULT_PARALLELISM)),
+    show_default=True,
+    required=True,
+    help=f"The number of tables to export concurrently.  Values greater than 1 use an Oracle connection pool, and every worker reads as of a single System Change Number (SCN) taken at startup (requires EXECUTE on DBMS_FLASHBACK).  Defaults to environment variable: PARALLELISM if set, otherwise: {DEFAULT_PARALLELISM}."
+)
+@click.option(
+    "--table-chunk-count",
+    type=click.IntRange(min=1),
+    default=int(os.getenv("TABLE_CHUNK_COUNT", NO_CHUNKING)),
+    show_default=True,
+    required=True,
+    help=f"The number of chunks to split each table into, so that a single large table is extracted by several workers at once (requires --parallelism greater than 1).  Tables are split into ROWID ranges using DBA_EXTENTS (requires SELECT on DBA_EXTENTS), or into ranges of a numeric key column - see: --table-chunk-key.  Each chunk writes its own part files.  Defaults to environment variable: TABLE_CHUNK_COUNT if set, otherwise: {NO_CHUNKING} - no chunking."
+)
+@click.option(
+    "--table-chunk-key",
+    type=str,
+    default=None,
+    required=False,
+    multiple=True,
+    help="A numeric key column to chunk a table by instead of ROWID ranges - in the form: [SCHEMA.]TABLE=COLUMN, may be specified more than once."
+)
+@click.option(
+    "--pipeline-queue-depth",
+    type=click.IntRange(min=0),
+    default=int(os.getenv("PIPELINE_QUEUE_DEPTH", NO_PIPELINE)),
+    show_default=True,
+    required=True,
+    help=f"The number of fetched batches to buffer between the Oracle fetch stage and the Parquet compression/write stage.  A value greater than 0 runs the two stages concurrently (pipelined) with backpressure, and logs how long each stage was stalled.  Defaults to environment variable: PIPELINE_QUEUE_DEPTH if set, otherwise: {NO_PIPELINE} - no pipelining."
+)
+@click.option(
+    "--incremental/--no-incremental",
+    type=bool,
+    default=False,
+    show_default=True,
+    required=True,
+    help="Controls whether to export only the rows added/changed since the previous run - tracked by a watermark column (see: --watermark-column) or by ORA_ROWSCN.  The high-water mark of each table is saved in a state file (see: --state-file), and new part files are written next to the existing ones.  Tables with no changes since the last run are skipped.  Note: deleted rows are not detected, and ORA_ROWSCN is tracked per block unless the table was created with ROWDEPENDENCIES."
+)
+@click.option(
+    "--watermark-column",
+    type=str,
+    default=None,
+    required=False,
+    multiple=True,
+    help="The watermark column (a timestamp or monotonically increasing key) to use for a table in incremental mode - in the form: [SCHEMA.]TABLE=COLUMN, may be specified more than once.  Tables without a watermark column are tracked by ORA_ROWSCN."
+)
+@click.option(
+    "--state-file",
+    type=str,
+    default=None,
+    required=False,
+    help=f"The path of the incremental export state file.  Defaults to: <output-directory>/{DEFAULT_STATE_FILE_NAME}."
+)
+@click.option(
+    "--resume/--no-resume",
+    type=bool,
+    default=False,
+    show_default=True,
+    required=True,
+    help=f"Controls whether to resume an interrupted run from its run manifest: <output-directory>/{RUN_MANIFEST_FILE_NAME} - at the same SCN, skipping the tables (and chunks) it completed - interrupted ones are restarted.  Every run records a manifest, and part files are only renamed into place once they are complete.  Runs with this option read as of an SCN (requires EXECUTE on DBMS_FLASHBACK), so that they can be resumed consistently."
+)
+@click.option(
+    "--partition-by",
+    type=str,
+    default=None,
+    required=False,
+    multiple=True,
+    help="Writes a table's parquet files into Hive-style partition directories (<column>=<value>/) - in the form: [SCHEMA.]TABLE=COLUMN[:year|month|day][,COLUMN[:year|month|day]...], may be specified more than once.  A date/timestamp column can be truncated to a year, month or day (the directory is then named <column>_<granularity>=<value>), otherwise the column's values are used as-is (and the column is represented by the directory name only)."
+)
+@click.option(
+    "--max-open-partition-writers",
+    type=click.IntRange(min=1),
+    default=int(os.getenv("MAX_OPEN_PARTITION_WRITERS", DEFAULT_MAX_OPEN_PARTITION_WRITERS)),
+    show_default=True,
+    required=True,
+    help=f"The maximum number of partition files to keep open at once per table (see: --partition-by) - the least recently used one is closed when the limit is reached.  Defaults to environment variable: MAX_OPEN_PARTITION_WRITERS if set, otherwise: {DEFAULT_MAX_OPEN_PARTITION_WRITERS}."
+)
+@click.option(
+    "--catalog-cache-file",
+    type=str,
+    default=os.getenv("CATALOG_CACHE_FILE"),
+    required=False,
+    help="A JSON file to cache the exported tables' column definitions in between runs - a cached table is re-used until its LAST_DDL_TIME changes, so repeat runs skip the column dictionary queries.  Should be outside of the output directory (which may be overwritten).  Defaults to environment variable: CATALOG_CACHE_FILE if set, otherwise: no cache."
+)
+@click.option(
+    "--type-mapping/--no-type-mapping",
+    type=bool,
+    default=False,
+    show_default=True,
+    required=True,
+    help="Controls whether to cast columns to the Arrow types mapped from their Oracle definitions - i.e. NUMBER(p,0) to the smallest integer type that fits, NUMBER(p,s) to decimal128(p,s), DATE to timestamp[s], and low-cardinality (per optimizer statistics) strings to dictionary.  NUMBER columns mapped to an exact type that the driver would fetch as doubles are fetched as text instead, so that no precision is lost.  Otherwise (the default) the types inferred by the driver are written (but for intervals - always written as durations, or int32 month counts) - as by previous versions, so existing output schemas do not change unless this is turned on."
+)
+@click.option(
+    "--column-type",
+    type=str,
+    default=None,
+    required=False,
+    multiple=True,
+    help="Overrides the mapped Arrow type of a column - in the form: [SCHEMA.]TABLE.COLUMN=TYPE, may be specified more than once.  TYPE is an Arrow type name (i.e. int32, float64, string, timestamp[ms]), decimal128(PRECISION,SCALE), dictionary, or inferred (the type inferred by the driver)."
+)
+@click.option(
+    "--lob-batch-memory-limit",
+    type=click.IntRange(min=1),
+    default=int(os.getenv("LOB_BATCH_MEMORY_LIMIT", DEFAULT_LOB_BATCH_MEMORY_LIMIT)),
+    show_default=True,
+    required=True,
+    help=f"The maximum number of bytes of LOB/LONG values to read into a single batch - tables with BLOB, CLOB, NCLOB, LONG or LONG RAW columns are fetched row-wise, and a batch is cut early once its values reach this size.  Defaults to environment variable: LOB_BATCH_MEMORY_LIMIT if set, otherwise: {DEFAULT_LOB_BATCH_MEMORY_LIMIT}."
+)
+@click.option(
+    "--max-lob-size",
+    type=click.IntRange(min=0),
+    default=os.getenv("MAX_LOB_SIZE"),
+    required=False,
+    help="The maximum size of a LOB/LONG value to export inline - in bytes for binary, and characters for text columns.  Longer values are handled per: --lob-overflow.  Defaults to environment variable: MAX_LOB_SIZE if set, otherwise: no limit."
+)
+@click.option(
+    "--lob-overflow",
+    type=click.Choice(LOB_OVERFLOW_ACTIONS, case_sensitive=False),
+    default=os.getenv("LOB_OVERFLOW", LOB_OVERFLOW_TRUNCATE).lower(),
+    show_default=True,
+    required=True,
+    help=f"What to do with a LOB/LONG value longer than --max-lob-size: truncate it, or stream it to a sidecar file (under the table's _lobs directory) - the value is then exported as null, and the relative path of the sidecar file is exported in a <column>_SIDECAR_FILE column.  Defaults to environment variable: LOB_OVERFLOW if set, otherwise: {LOB_OVERFLOW_TRUNCATE}."
+)
+@click.option(
+    "--writer-policy-file",
+    type=str,
+    default=os.getenv("WRITER_POLICY_FILE"),
+    required=False,
+    help="A JSON file of parquet writer policies - per table and per column: compression (and level), dictionary encoding, column encoding (i.e. BYTE_STREAM_SPLIT), statistics, data page size, page index and key (point lookup) columns - in the form: {\"default\": {<policy>}, \"tables\": {\"[SCHEMA.]TABLE\": {<policy>}}}.  Defaults to environment variable: WRITER_POLICY_FILE if set, otherwise: one compression method for all columns (see: --compression-method)."
+)
+@click.option(
+    "--writer-policy-auto/--no-writer-policy-auto",
+    type=bool,
+    default=False,
+    show_default=True,
+    required=True,
+    help="Controls whether to choose each column's parquet encoding automatically - from its Arrow type and the cardinality observed in the first row group (i.e. BYTE_STREAM_SPLIT for high-cardinality floats, DELTA_BINARY_PACKED for high-cardinality integers and timestamps, and dictionary encoding for low-cardinality columns).  Explicit column policies take precedence."
+)
+@click.option(
+    "--run-report-file",
+    type=str,
+    default=os.getenv("RUN_REPORT_FILE"),
+    required=False,
+    help=f"The JSON file to write the run report to - with per-table (and per-chunk) rows, batches, files, bytes, per-stage (fetch, convert, write) timings and throughput, and the peak memory allocated by Arrow.  Defaults to environment variable: RUN_REPORT_FILE if set, otherwise: {RUN_REPORT_FILE_NAME} in the output directory."
+)
+@click.option(
+    "--prometheus-textfile",
+    type=str,
+    default=os.getenv("PROMETHEUS_TEXTFILE"),
+    required=False,
+    help="A file to write the run's metrics to in the Prometheus text format - i.e. in the node exporter's textfile collector directory (the file name must end in .prom).  Defaults to environment variable: PROMETHEUS_TEXTFILE if set, otherwise: not written."
+)
+@click.option(
+    "--adaptive-batch-size/--no-adaptive-batch-size",
+    type=bool,
+    default=False,
+    show_default=True,
+    required=True,
+    help="Controls whether to size each table's fetched batches (and the matching fetch array and prefetch sizes) adaptively - aiming at --batch-bytes-target bytes of Arrow data per batch.  The first size is estimated from the table's AVG_ROW_LEN and column types, then refined from the observed batch sizes and fetch latency.  The driver fixes the batch size of a query when it is executed - so a refined size only applies to the table's later chunks (see: --table-chunk-count), and a table exported in one query is fetched at its estimated size throughout.  Overrides --batch-size."
+)
+@click.option(
+    "--batch-bytes-target",
+    type=int,
+    default=int(os.getenv("BATCH_BYTES_TARGET", DEFAULT_BATCH_BYTES_TARGET)),
+    show_default=True,
+    required=True,
+    help=f"The target in-memory (Arrow) size of each fetched batch, in bytes - with --adaptive-batch-size.  Defaults to environment variable: BATCH_BYTES_TARGET if set, otherwise: {DEFAULT_BATCH_BYTES_TARGET:,}."
+)
+@click.option(
+    "--memory-limit",
+    type=int,
+    default=int(os.getenv("MEMORY_LIMIT", NO_MEMORY_LIMIT)),
+    show_default=True,
+    required=True,
+    help=f"The memory budget of the export, in bytes - counting the Arrow memory pool and the fetched batches not yet written.  Once it is reached, fetches wait for memory to be released by the other workers, open writers flush their buffered rows as smaller row groups, and the batch size of subsequent queries is halved.  Defaults to environment variable: MEMORY_LIMIT if set, otherwise: {NO_MEMORY_LIMIT} - no limit."
+)
+@click.option(
+    "--work-queue-role",
+    type=click.Choice(WORK_QUEUE_ROLES),
+    default=os.getenv("WORK_QUEUE_ROLE"),
+    required=False,
+    help="Shards the export across any number of worker processes - on one or many hosts - through a work queue on shared storage.  The coordinator lists the tables to export (and the SCN to read them as of) into the work queue - and then, with --dataset-metadata, waits for the workers to export every table and records the dataset manifest (otherwise it exits).  Workers claim tables from it with leases, export them, and mark them done - a table whose worker stops renewing its lease is reclaimed by another worker.  The output directory must be on storage shared by all of the workers.  Defaults to environment variable: WORK_QUEUE_ROLE if set, otherwise: no work queue."
+)
+@click.option(
+    "--work-queue-directory",
+    type=str,
+    default=os.getenv("WORK_QUEUE_DIRECTORY"),
+    required=False,
+    help=f"The directory of the work queue - with --work-queue-role.  Defaults to environment variable: WORK_QUEUE_DIRECTORY if set, otherwise: {WORK_QUEUE_DIRECTORY_NAME} in the output directory."
+)
+@click.option(
+    "--worker-id",
+    type=str,
+    default=os.getenv("WORKER_ID"),
+    required=False,
+    help="The name of this worker in the work queue's leases - with --work-queue-role worker.  Defaults to environment variable: WORKER_ID if set, otherwise: <hostname>-<process id>."
+)
+@click.option(
+    "--lease-duration",
+    type=click.IntRange(min=1),
+    default=int(os.getenv("LEASE_DURATION", DEFAULT_LEASE_DURATION)),
+    show_default=True,
+    required=True,
+    help=f"How long a worker's claim on a table lasts without being renewed, in seconds - with --work-queue-role.  Workers renew their leases while they export, so this only bounds how long a table waits to be reclaimed after its worker is lost.  The hosts' clocks must be synchronized to well within this duration.  Defaults to environment variable: LEASE_DURATION if set, otherwise: {DEFAULT_LEASE_DURATION}."
+)
+@click.option(
+    "--output-format",
+    type=click.Choice(OUTPUT_FORMATS),
+    default=os.getenv("OUTPUT_FORMAT", OUTPUT_FORMAT_PARQUET),
+    show_default=True,
+    required=True,
+    help=f"The format to write the tables in: parquet files, Arrow IPC files (arrow), Feather (V2) files (feather), or an Arrow IPC stream to stdout (arrow-stream) - i.e. to pipe into GizmoSQL without staging files (one stream per table, one table after another - the log goes to stderr).  The Arrow formats support the compression methods: none and zstd.  Defaults to environment variable: OUTPUT_FORMAT if set, otherwise: {OUTPUT_FORMAT_PARQUET}."
+)
+@click.option(
+    "--metadata-directory",
+    type=str,
+    default=os.getenv("METADATA_DIRECTORY"),
+    required=False,
+    help="The local directory for the export's own files - the run manifest and run report, and (unless they are set explicitly) the incremental state file and the work queue.  Defaults to environment variable: METADATA_DIRECTORY if set, otherwise: the output directory - or the current directory, if the output directory is a filesystem URI."
+)
+@click.option(
+    "--dry-run/--no-dry-run",
+    type=bool,
+    default=False,
+    show_default=True,
+    required=True,
+    help="Prints the export plan and exits - without fetching any rows or writing anything.  The plan lists each table (longest first - the order a parallel or work queue export runs them in) with its estimated rows, bytes, files and export time - from the optimizer statistics and segment sizes in the data dictionary, and the throughput model calibrated from past run reports."
+)
+@click.option(
+    "--calibration-run-report",
+    type=str,
+    default=None,
+    required=False,
+    multiple=True,
+    help="A run report from a past export - to calibrate the throughput model that estimates (and orders) the tables' export times by, may be specified more than once.  Defaults to the run report file - the previous run's report, if there is one."
+)
+@click.option(
+    "--table-config-file",
+    type=str,
+    default=os.getenv("TABLE_CONFIG_FILE"),
+    required=False,
+    help="A TOML, YAML or JSON file of per-table export settings - pushed down into each table's export query: column include/exclude lists (include_columns, exclude_columns), a WHERE predicate (where) and block sampling (sample_percent, sample_seed) - and overriding the batch size (batch_size) and compression method (compression), in the form: {\"default\": {<config>}, \"tables\": {\"[SCHEMA.]TABLE\": {<config>}}}.  Defaults to environment variable: TABLE_CONFIG_FILE if set, otherwise: all supported columns of all rows of each table."
+)
+@click.option(
+    "--cluster-by",
+    type=str,
+    default=None,
+    required=False,
+    multiple=True,
+    help="Writes a table's parquet files sorted (clustered) by the given columns - so that the row group min/max statistics let readers skip the row groups outside of a range - in the form: [SCHEMA.]TABLE=COLUMN[:asc|desc][,COLUMN[:asc|desc]...], may be specified more than once.  NULLs sort last.  The sort columns are recorded in the sorting_columns metadata of each file.  A clustered table is not chunked."
+)
+@click.option(
+    "--cluster-method",
+    type=click.Choice(CLUSTER_METHODS, case_sensitive=False),
+    default=os.getenv("CLUSTER_METHOD", CLUSTER_METHOD_AUTO).lower(),
+    show_default=True,
+    required=True,
+    help=f"How to sort a clustered table: on the database with an ORDER BY ({CLUSTER_METHOD_SERVER}), with a local external merge sort that spills sorted runs to disk ({CLUSTER_METHOD_LOCAL}), or by the table's estimated size - see: --server-sort-max-bytes ({CLUSTER_METHOD_AUTO}).  Defaults to environment variable: CLUSTER_METHOD if set, otherwise: {CLUSTER_METHOD_AUTO}."
+)
+@click.option(
+    "--server-sort-max-bytes",
+    type=click.IntRange(min=0),
+    default=int(os.getenv("SERVER_SORT_MAX_BYTES", DEFAULT_SERVER_SORT_MAX_BYTES)),
+    show_default=True,
+    required=True,
+    help=f"The largest clustered table (by its estimated Arrow size, in bytes) to sort on the database with the {CLUSTER_METHOD_AUTO} cluster method - larger tables are sorted locally.  Defaults to environment variable: SERVER_SORT_MAX_BYTES if set, otherwise: {DEFAULT_SERVER_SORT_MAX_BYTES}."
+)
+@click.option(
+    "--sort-memory-limit",
+    type=click.IntRange(min=1),
+    default=int(os.getenv("SORT_MEMORY_LIMIT", DEFAULT_SORT_MEMORY_LIMIT)),
+    show_default=True,
+    required=True,
+    help=f"The Arrow bytes a local sort buffers before sorting them and spilling them to disk as a sorted run.  Defaults to environment variable: SORT_MEMORY_LIMIT if set, otherwise: {DEFAULT_SORT_MEMORY_LIMIT}."
+)
+@click.option(
+    "--sort-spill-directory",
+    type=str,
+    default=os.getenv("SORT_SPILL_DIRECTORY"),
+    required=False,
+    help="The local directory a local sort spills its sorted runs to.  Defaults to environment variable: SORT_SPILL_DIRECTORY if set, otherwise: the system temporary directory."
+)
+@click.option(
+    "--dataset-metadata/--no-dataset-metadata",
+    type=bool,
+    default=True,
+    show_default=True,
+    required=True,
+    help=f"Controls whether to write a consolidated _metadata file (the footers of all of its part files) and a _common_metadata file (its schema) to each exported table's directory - so that readers can plan a query without opening every part file - and a dataset manifest: {DATASET_MANIFEST_FILE_NAME} in the output directory, listing each table's part files, row counts, sizes, column statistics and export SCN.  With a work queue, the coordinator records the dataset manifest once the workers have exported every table.  Parquet output only."
+)
+@click.option(
+    "--engine",
+    type=click.Choice(ENGINES, case_sensitive=False),
+    default=os.getenv("EXPORT_ENGINE", ENGINE_SYNC).lower(),
+    show_default=True,
+    required=True,
+    help=f"The export engine: threads - see: --parallelism ({ENGINE_SYNC}), or asyncio - keeping the fetches of many tables in flight at once, for high-latency links and schemas of many small tables - see: --async-concurrency ({ENGINE_ASYNC}).  The {ENGINE_ASYNC} engine runs oracledb in thin mode, and can not be used with a work queue or the Arrow stream output format.  Defaults to environment variable: EXPORT_ENGINE if set, otherwise: {ENGINE_SYNC}."
+)
+@click.option(
+    "--async-concurrency",
+    type=click.IntRange(min=1),
+    default=int(os.getenv("ASYNC_CONCURRENCY", DEFAULT_ASYNC_CONCURRENCY)),
+    show_default=True,
+    required=True,
+    help=f"The number of tables (or chunks) the {ENGINE_ASYNC} engine exports at once - each with a connection from a pool of this size.  Defaults to environment variable: ASYNC_CONCURRENCY if set, otherwise: {DEFAULT_ASYNC_CONCURRENCY}."
+)
+@click.option(
+    "--compact/--no-compact",
+    type=bool,
+    default=False,
+    show_default=True,
+    required=True,
+    help=f"Controls whether to merge the undersized part files (under {DEFAULT_COMPACTION_MIN_FILE_SIZE_RATIO:.0%} of --parquet-max-file-size) of each exported table directory into files of up to --parquet-max-file-size, once the table is exported - i.e. the tail file of each chunk, or the files of small incremental runs.  Only the directories written by the run are compacted, and the compacted files are swapped in with a journal - so an interrupted compaction is completed (or discarded) by the next one.  Parquet output only."
+)
 def click_exporter(version: bool,
                    username: str,
                    password: str,
@@ -478,7 +2300,49 @@ def click_exporter(version: bool,
                    isolation_level: str,
                    lowercase_object_names: bool,
                    parquet_max_file_size: int,
-                   log_level: str
+                   parquet_row_group_size: int,
+                   log_level: str,
+                   parallelism: int,
+                   table_chunk_count: int,
+                   table_chunk_key: List[str],
+                   pipeline_queue_depth: int,
+                   incremental: bool,
+                   watermark_column: List[str],
+                   state_file: str,
+                   resume: bool,
+                   partition_by: List[str],
+                   max_open_partition_writers: int,
+                   catalog_cache_file: Optional[str],
+                   type_mapping: bool,
+                   column_type: List[str],
+                   lob_batch_memory_limit: int,
+                   max_lob_size: Optional[int],
+                   lob_overflow: str,
+                   writer_policy_file: Optional[str],
+                   writer_policy_auto: bool,
+                   run_report_file: Optional[str],
+                   prometheus_textfile: Optional[str],
+                   adaptive_batch_size: bool,
+                   batch_bytes_target: int,
+                   memory_limit: int,
+                   work_queue_role: Optional[str],
+                   work_queue_directory: Optional[str],
+                   worker_id: Optional[str],
+                   lease_duration: int,
+                   output_format: str,
+                   metadata_directory: Optional[str],
+                   dry_run: bool,
+                   calibration_run_report: Optional[List[str]],
+                   table_config_file: Optional[str],
+                   cluster_by: Optional[List[str]],
+                   cluster_method: str,
+                   server_sort_max_bytes: int,
+                   sort_memory_limit: int,
+                   sort_spill_directory: Optional[str],
+                   dataset_metadata: bool,
+                   engine: str,
+                   async_concurrency: int,
+                   compact: bool
                    ):
     exporter(**locals())
 
@@ -0,0 +1,166 @@
+import pyarrow
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Generator, Iterable, List, Optional
+
+# Constants
+NO_MEMORY_LIMIT: int = 0
+MEMORY_WAIT_POLL_INTERVAL: float = 0.1  # seconds - the Arrow memory pool is also freed without notice (i.e. by a writer)
+MAX_BATCH_SIZE_SHRINKS: int = 4  # Batch sizes are halved each time the limit is hit - down to 1/16th at most
+MIN_SHRUNK_BATCH_SIZE: int = 1_000
+
+
+@dataclass(eq=False)
+class TaskBatches:
+    """The outstanding batches of one task (i.e. one throttled fetch)"""
+    count: int = 0
+
+
+class MemoryAccountant:
+    """Keeps the memory of an export within a budget - shared by all of its tasks (thread-safe).
+
+       The memory in use is counted as the bytes allocated from the Arrow memory pool plus the bytes of the fetched
+       batches that are still alive (the driver allocates those outside of the pool).  A batch counts until it is
+       garbage collected - i.e. once written out of the writer's row group buffer.  Batches built (or cast) in the pool
+       are counted twice, so the count errs on the side of caution.
+
+       When the budget is reached (checked before each fetch):
+       - the open writer of the task flushes its buffered rows as a (smaller) row group - freeing the batches it holds
+       - if that is not enough, the batch size of subsequent queries is halved (MAX_BATCH_SIZE_SHRINKS times at most),
+         and the fetch blocks until memory is released by the other tasks.  It only blocks while tasks that are not
+         themselves waiting hold outstanding batches - a waiting task's last batch is held by its (suspended) fetch,
+         and waiting on nothing frees nothing.
+
+       With a pipeline, the writer is flushed by the write stage instead (it is not thread-safe)."""
+
+    def __init__(self, memory_limit: int = NO_MEMORY_LIMIT):
+        if memory_limit < 0:
+            raise ValueError(f"Memory limit must not be negative, got: {memory_limit}")
+
+        self.memory_limit = memory_limit
+        self._condition = threading.Condition()
+        self.outstanding_bytes: int = 0
+        self.outstanding_batches: int = 0
+        self._waiting_tasks: List[TaskBatches] = []
+        self.limit_hit_count: int = 0
+        self.wait_seconds: float = 0.0
+        self.batch_size_shrinks: int = 0
+
+    @property
+    def is_enabled(self) -> bool:
+        return self.memory_limit != NO_MEMORY_LIMIT
+
+    @property
+    def used_bytes(self) -> int:
+        return pyarrow.total_allocated_bytes() + self.outstanding_bytes
+
+    @property
+    def is_over_limit(self) -> bool:
+        return self.is_enabled and self.used_bytes >= self.memory_limit
+
+    def track(self,
+              pyarrow_table: pyarrow.Table,
+              task_batches: Optional[TaskBatches] = None
+              ) -> pyarrow.Table:
+        """Counts a batch as outstanding - until it is garbage collected"""
+        task_batches = task_batches if task_batches is not None else TaskBatches()
+        batch_bytes = pyarrow_table.nbytes
+        with self._condition:
+            self.outstanding_bytes += batch_bytes
+            self.outstanding_batches += 1
+            task_batches.count += 1
+        weakref.finalize(pyarrow_table, self._release, batch_bytes, task_batches)
+        return pyarrow_table
+
+    def _release(self,
+                 batch_bytes: int,
+                 task_batches: TaskBatches
+                 ):
+        with self._condition:
+            self.outstanding_bytes -= batch_bytes
+            self.outstanding_batches -= 1
+            task_batches.count -= 1
+            self._condition.notify_all()
+
+    def wait_for_memory(self,
+                        on_pressure: Optional[Callable[[], None]] = None,
+                        task_batches: Optional[TaskBatches] = None
+                        ):
+        """Blocks while the budget is used up and the running tasks have batches outstanding - calling on_pressure first
+           (i.e. to flush the caller's own writer, so that it does not hold up the other tasks while waiting on them)"""
+        task_batches = task_batches if task_batches is not None else TaskBatches()
+        if not self.is_over_limit:
+            return
+
+        with self._condition:
+            self.limit_hit_count += 1
+
+        if on_pressure:
+            on_pressure()
+            if not self.is_over_limit:
+                return
+
+        start_time = time.perf_counter()
+        with self._condition:
+            # Flushing did not free enough - so later queries fetch smaller batches
+            self.batch_size_shrinks = min(self.batch_size_shrinks + 1, MAX_BATCH_SIZE_SHRINKS)
+            self._waiting_tasks.append(task_batches)
+            try:
+                while self.is_over_limit and self.outstanding_batches > sum(waiting_task.count for waiting_task in self._waiting_tasks):
+                    self._condition.wait(timeout=MEMORY_WAIT_POLL_INTERVAL)
+            finally:
+                self._waiting_tasks.remove(task_batches)
+                self._condition.notify_all()
+            self.wait_seconds += time.perf_counter() - start_time
+
+    def throttle(self,
+                 iterable: Iterable[pyarrow.Table],
+                 on_pressure: Optional[Callable[[], None]] = None
+                 ) -> Iterable[pyarrow.Table]:
+        """Yields the batches of an iterable - waiting for memory before fetching each one, and tracking it after"""
+        if not self.is_enabled:
+            return iterable
+        return self._throttle(iterable=iterable,
+                              on_pressure=on_pressure
+                              )
+
+    def _throttle(self,
+                  iterable: Iterable[pyarrow.Table],
+                  on_pressure: Optional[Callable[[], None]] = None
+                  ) -> Generator[pyarrow.Table, None, None]:
+        task_batches = TaskBatches()
+        iterator = iter(iterable)
+        try:
+            while True:
+                self.wait_for_memory(on_pressure=on_pressure,
+                                     task_batches=task_batches
+                                     )
+                try:
+                    pyarrow_table = next(iterator)
+                except StopIteration:
+                    return
+                yield self.track(pyarrow_table=pyarrow_table,
+                                 task_batches=task_batches
+                                 )
+                # Drop our reference - so that the batch is released as soon as the writer is done with it
+                del pyarrow_table
+        finally:
+            # Release the underlying generator (and its cursor) along with this one
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+
+    def get_batch_size(self, batch_size: int) -> int:
+        """Returns the batch size shrunk for the memory pressure seen so far"""
+        if self.batch_size_shrinks == 0:
+            return batch_size
+        return max(batch_size >> self.batch_size_shrinks, min(batch_size, MIN_SHRUNK_BATCH_SIZE))
+
+    def to_dict(self) -> dict:
+        return dict(memory_limit=self.memory_limit,
+                    limit_hit_count=self.limit_hit_count,
+                    wait_seconds=self.wait_seconds,
+                    batch_size_shrinks=self.batch_size_shrinks
+                    )
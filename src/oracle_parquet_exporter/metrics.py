@@ -0,0 +1,253 @@
+import datetime
+import os
+import pyarrow
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterable, List, Optional, TypeVar
+
+from .serialization import write_json_file_atomically
+
+# Constants
+RUN_REPORT_FILE_NAME: str = "_run_report.json"
+RUN_REPORT_VERSION: int = 1
+PROMETHEUS_METRIC_PREFIX: str = "oracle_parquet_exporter"
+STAGE_FETCH: str = "fetch"  # Oracle fetch (and, for row-wise fetches of LOB/LONG columns, Arrow conversion)
+STAGE_CONVERT: str = "convert"  # Arrow conversion and type casting
+STAGE_WRITE: str = "write"  # Parquet encoding, compression and disk I/O
+STAGES: List[str] = [STAGE_FETCH, STAGE_CONVERT, STAGE_WRITE]
+STATUS_SUCCEEDED: str = "succeeded"
+STATUS_FAILED: str = "failed"
+
+T = TypeVar("T")
+
+
+def get_rate(amount: float, seconds: float) -> float:
+    return amount / seconds if seconds > 0 else 0.0
+
+
+@dataclass
+class TableMetrics:
+    """The metrics of one export task (a whole table, or one chunk of it).  The time spent in each stage is summed
+       over all batches - with a pipeline, the fetch and convert stages overlap the write stage."""
+    schema: str
+    table_name: str
+    chunk_number: Optional[int] = None
+    batch_size: Optional[int] = None
+    rows: int = 0
+    batches: int = 0
+    files: int = 0
+    row_groups: int = 0
+    uncompressed_bytes: int = 0
+    compressed_bytes: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=lambda: {stage: 0.0 for stage in STAGES})
+    pipeline_stall_seconds: Dict[str, float] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+    _start_time: float = field(default_factory=time.perf_counter, repr=False)
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Generator[None, None, None]:
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_seconds(stage=stage,
+                                   seconds=time.perf_counter() - start_time
+                                   )
+
+    def add_stage_seconds(self,
+                          stage: str,
+                          seconds: float
+                          ):
+        self.stage_seconds[stage] += seconds
+
+    def time_iteration(self,
+                       iterable: Iterable[T],
+                       stage: str
+                       ) -> Generator[T, None, None]:
+        """Yields the items of an iterable - adding the time spent producing each one to the stage"""
+        iterator = iter(iterable)
+        try:
+            while True:
+                with self.time_stage(stage=stage):
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                yield item
+                # Hold no reference to the item while producing the next one - so it is freed once consumed
+                del item
+        finally:
+            # Release the underlying generator (and its cursor) along with this one
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+
+    def record_batch(self):
+        self.batches += 1
+
+    def complete(self,
+                 part_writer,
+                 pipeline=None
+                 ):
+        self.rows = part_writer.rows_written
+        self.files = len(part_writer.file_names)
+        self.row_groups = part_writer.row_groups_written
+        self.uncompressed_bytes = part_writer.uncompressed_bytes_written
+        self.compressed_bytes = part_writer.compressed_bytes_written
+        if pipeline:
+            self.pipeline_stall_seconds = dict(producer=pipeline.producer_stall_seconds,
+                                               consumer=pipeline.consumer_stall_seconds
+                                               )
+        self.elapsed_seconds = time.perf_counter() - self._start_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(schema=self.schema,
+                    table_name=self.table_name,
+                    chunk_number=self.chunk_number,
+                    batch_size=self.batch_size,
+                    rows=self.rows,
+                    batches=self.batches,
+                    files=self.files,
+                    row_groups=self.row_groups,
+                    uncompressed_bytes=self.uncompressed_bytes,
+                    compressed_bytes=self.compressed_bytes,
+                    elapsed_seconds=self.elapsed_seconds,
+                    stage_seconds=self.stage_seconds,
+                    pipeline_stall_seconds=self.pipeline_stall_seconds,
+                    rows_per_second=get_rate(self.rows, self.elapsed_seconds),
+                    uncompressed_bytes_per_second=get_rate(self.uncompressed_bytes, self.elapsed_seconds),
+                    compressed_bytes_per_second=get_rate(self.compressed_bytes, self.elapsed_seconds)
+                    )
+
+
+class RunMetrics:
+    """The metrics of an export run - collected from the export tasks (thread-safe), along with the peak memory
+       allocated by Arrow, and written as a JSON run report and (optionally) a Prometheus textfile"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tables: List[TableMetrics] = []
+        self.started_at = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.completed_at: Optional[datetime.datetime] = None
+        self.status: Optional[str] = None
+        self.peak_arrow_memory_bytes: int = 0
+        self._start_time = time.perf_counter()
+        self.elapsed_seconds: float = 0.0
+
+    def start_table(self,
+                    schema: str,
+                    table_name: str,
+                    chunk_number: Optional[int] = None
+                    ) -> TableMetrics:
+        table_metrics = TableMetrics(schema=schema,
+                                     table_name=table_name,
+                                     chunk_number=chunk_number
+                                     )
+        with self._lock:
+            self.tables.append(table_metrics)
+        return table_metrics
+
+    def sample_memory(self):
+        # Arrow's allocations are what scale with the batch and row group sizes - sampled as each batch passes through
+        allocated_bytes = pyarrow.total_allocated_bytes()
+        with self._lock:
+            self.peak_arrow_memory_bytes = max(self.peak_arrow_memory_bytes, allocated_bytes)
+
+    def complete(self, status: str):
+        self.status = status
+        self.completed_at = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.elapsed_seconds = time.perf_counter() - self._start_time
+
+    def get_totals(self) -> Dict[str, Any]:
+        totals = dict(rows=sum(table.rows for table in self.tables),
+                      batches=sum(table.batches for table in self.tables),
+                      files=sum(table.files for table in self.tables),
+                      row_groups=sum(table.row_groups for table in self.tables),
+                      uncompressed_bytes=sum(table.uncompressed_bytes for table in self.tables),
+                      compressed_bytes=sum(table.compressed_bytes for table in self.tables),
+                      stage_seconds={stage: sum(table.stage_seconds[stage] for table in self.tables) for stage in STAGES}
+                      )
+        totals.update(rows_per_second=get_rate(totals["rows"], self.elapsed_seconds),
+                      uncompressed_bytes_per_second=get_rate(totals["uncompressed_bytes"], self.elapsed_seconds),
+                      compressed_bytes_per_second=get_rate(totals["compressed_bytes"], self.elapsed_seconds)
+                      )
+        return totals
+
+    def to_dict(self, **run_attributes) -> Dict[str, Any]:
+        return dict(version=RUN_REPORT_VERSION,
+                    status=self.status,
+                    started_at=self.started_at.isoformat(),
+                    completed_at=self.completed_at.isoformat() if self.completed_at else None,
+                    elapsed_seconds=self.elapsed_seconds,
+                    peak_arrow_memory_bytes=self.peak_arrow_memory_bytes,
+                    **run_attributes,
+                    totals=self.get_totals(),
+                    tables=[table.to_dict() for table in self.tables]
+                    )
+
+    def write_report(self,
+                     report_file: str,
+                     **run_attributes
+                     ):
+        write_json_file_atomically(file_path=Path(report_file),
+                                   contents=self.to_dict(**run_attributes)
+                                   )
+
+    def get_prometheus_text(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format - summed per table (over its chunks)"""
+        table_totals: Dict[tuple, Dict[str, float]] = {}
+        for table in self.tables:
+            totals = table_totals.setdefault((table.schema, table.table_name), dict(rows=0, batches=0, files=0,
+                                                                                    uncompressed_bytes=0,
+                                                                                    compressed_bytes=0,
+                                                                                    **{f"{stage}_seconds": 0.0 for stage in STAGES}))
+            for name in ("rows", "batches", "files", "uncompressed_bytes", "compressed_bytes"):
+                totals[name] += getattr(table, name)
+            for stage in STAGES:
+                totals[f"{stage}_seconds"] += table.stage_seconds[stage]
+
+        lines = []
+
+        def add_metric(name: str,
+                       help_text: str,
+                       samples: List[tuple]
+                       ):
+            lines.append(f"# HELP {PROMETHEUS_METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_METRIC_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f"{label}=\"{label_value}\"" for label, label_value in labels.items())
+                lines.append(f"{PROMETHEUS_METRIC_PREFIX}_{name}{{{label_text}}} {value}" if label_text
+                             else f"{PROMETHEUS_METRIC_PREFIX}_{name} {value}")
+
+        add_metric(name="run_success", help_text="Whether the last export run succeeded (1) or failed (0).",
+                   samples=[({}, int(self.status == STATUS_SUCCEEDED))])
+        add_metric(name="run_timestamp_seconds", help_text="When the last export run completed (Unix time).",
+                   samples=[({}, (self.completed_at or self.started_at).timestamp())])
+        add_metric(name="run_duration_seconds", help_text="The elapsed time of the last export run.",
+                   samples=[({}, self.elapsed_seconds)])
+        add_metric(name="run_peak_arrow_memory_bytes", help_text="The peak memory allocated by Arrow during the last export run.",
+                   samples=[({}, self.peak_arrow_memory_bytes)])
+        for name, help_text in [("rows", "Rows exported from the table."),
+                                ("batches", "Batches fetched from the table."),
+                                ("files", "Parquet files written for the table."),
+                                ("uncompressed_bytes", "Uncompressed (Arrow) bytes written for the table."),
+                                ("compressed_bytes", "Compressed (on-disk) bytes written for the table.")]:
+            add_metric(name=f"table_{name}", help_text=help_text,
+                       samples=[(dict(schema=schema, table=table_name), totals[name])
+                                for (schema, table_name), totals in table_totals.items()])
+        add_metric(name="table_stage_seconds", help_text="Time spent per stage (fetch, convert, write) for the table.",
+                   samples=[(dict(schema=schema, table=table_name, stage=stage), totals[f"{stage}_seconds"])
+                            for (schema, table_name), totals in table_totals.items() for stage in STAGES])
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_textfile(self, textfile: str):
+        # Written to a temporary name and renamed into place - so the node exporter never reads a partial file
+        textfile_path = Path(textfile)
+        textfile_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_file_path = textfile_path.with_name(f"{textfile_path.name}.tmp")
+        temporary_file_path.write_text(self.get_prometheus_text())
+        os.replace(temporary_file_path, textfile_path)
@@ -0,0 +1,227 @@
+import pyarrow
+import pyarrow.compute as pc
+import pyarrow.fs
+import pyarrow.parquet as pq
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from .sinks import OUTPUT_FORMAT_PARQUET
+from .sorting import SortKey
+from .writer import CompressionRatioEstimator, ParquetPartWriter, create_part_writer
+from .writer_policy import WriterPolicy
+
+# Constants
+DEFAULT_MAX_OPEN_PARTITION_WRITERS: int = 64
+HIVE_DEFAULT_PARTITION: str = "__HIVE_DEFAULT_PARTITION__"
+PARTITION_GRANULARITY_FORMATS = {"year": "%Y",
+                                 "month": "%Y-%m",
+                                 "day": "%Y-%m-%d"
+                                 }
+PARTITION_VALUE_SEPARATOR: str = "\x00"
+
+
+@dataclass
+class PartitionKey:
+    """A Hive-style partition key - a column value, or a date/timestamp column truncated to a year, month or day"""
+    column_name: str
+    granularity: Optional[str] = None
+
+    def get_partition_name(self, lowercase: bool) -> str:
+        partition_name = self.column_name if not self.granularity else f"{self.column_name}_{self.granularity}"
+        return partition_name.lower() if lowercase else partition_name
+
+    def resolve_column_name(self, schema: pyarrow.Schema) -> str:
+        # The exported column names may have been lower-cased
+        for field_name in schema.names:
+            if field_name == self.column_name or field_name.lower() == self.column_name.lower():
+                return field_name
+        raise ValueError(f"Partition column: {self.column_name} is not one of the exported columns: {schema.names}")
+
+    def get_partition_values(self, pyarrow_table: pyarrow.Table) -> pyarrow.ChunkedArray:
+        column = pyarrow_table.column(self.resolve_column_name(schema=pyarrow_table.schema))
+        if self.granularity:
+            if pyarrow.types.is_date(column.type):
+                column = column.cast(pyarrow.timestamp("s"))
+            values = pc.strftime(column, format=PARTITION_GRANULARITY_FORMATS[self.granularity])
+        else:
+            values = column.cast(pyarrow.string())
+        return pc.fill_null(values, HIVE_DEFAULT_PARTITION)
+
+
+def parse_partition_keys(partition_spec: str) -> List[PartitionKey]:
+    """Parses a partition specification of the form: COLUMN[:year|month|day][,COLUMN[:year|month|day]...]"""
+    partition_keys = []
+    for key_spec in partition_spec.split(","):
+        column_name, _, granularity = key_spec.strip().partition(":")
+        granularity = granularity.strip().lower() or None
+        if not column_name or (granularity and granularity not in PARTITION_GRANULARITY_FORMATS):
+            raise ValueError(f"Invalid partition key: '{key_spec}' - expected format: COLUMN[:{'|'.join(PARTITION_GRANULARITY_FORMATS)}]")
+        partition_keys.append(PartitionKey(column_name=column_name.strip(),
+                                           granularity=granularity
+                                           ))
+
+    return partition_keys
+
+
+def split_by_partition(pyarrow_table: pyarrow.Table,
+                       partition_keys: List[PartitionKey],
+                       lowercase: bool = False
+                       ) -> Iterator[Tuple[str, pyarrow.Table]]:
+    """Splits an Arrow table into one slice per distinct partition - yielding the partition's relative directory path
+       (i.e. "region=EAST/order_date_month=2024-01") and its rows.  The split is vectorized: the rows are sorted by
+       partition and sliced (zero-copy) at the partition boundaries."""
+    partition_values = [partition_key.get_partition_values(pyarrow_table=pyarrow_table) for partition_key in partition_keys]
+    if len(partition_values) == 1:
+        combined_values = partition_values[0]
+    else:
+        combined_values = pc.binary_join_element_wise(*partition_values, PARTITION_VALUE_SEPARATOR)
+    encoded_values = combined_values.combine_chunks().dictionary_encode()
+
+    # Columns used as-is for partitioning are represented by the directory names (the Hive convention)
+    data_table = pyarrow_table.drop_columns([partition_key.resolve_column_name(schema=pyarrow_table.schema)
+                                             for partition_key in partition_keys if not partition_key.granularity])
+
+    sort_indices = pc.sort_indices(encoded_values.indices)
+    sorted_table = data_table.take(sort_indices)
+    partition_runs = pc.run_end_encode(encoded_values.indices.take(sort_indices))
+
+    start = 0
+    for run_end, dictionary_index in zip(partition_runs.run_ends.to_pylist(), partition_runs.values.to_pylist()):
+        values = encoded_values.dictionary[dictionary_index].as_py().split(PARTITION_VALUE_SEPARATOR)
+        partition_path = "/".join(f"{partition_key.get_partition_name(lowercase=lowercase)}={quote(value, safe='')}"
+                                  for partition_key, value in zip(partition_keys, values))
+        yield partition_path, sorted_table.slice(offset=start, length=run_end - start)
+        start = run_end
+
+
+class PartitionedParquetWriter:
+    """Writes a stream of Arrow tables to Hive-style partition directories (<column>=<value>/), through a pool of
+       ParquetPartWriters - one per partition.  At most max_open_writers are kept open at once; the least recently
+       used one is closed (committing its part file) to make room for a new partition.  The buffered row group data
+       of all open writers is capped at a single row_group_size - the largest buffer is flushed first."""
+
+    def __init__(self,
+                 output_path_prefix: str,
+                 file_name_prefix: str,
+                 partition_keys: List[PartitionKey],
+                 compression: str,
+                 max_file_size: int,
+                 row_group_size: int,
+                 file_numbers: Iterator[int],
+                 lowercase: bool = False,
+                 max_open_writers: int = DEFAULT_MAX_OPEN_PARTITION_WRITERS,
+                 on_file_committed=None,
+                 writer_policy: Optional[WriterPolicy] = None,
+                 output_format: str = OUTPUT_FORMAT_PARQUET,
+                 filesystem: Optional[pyarrow.fs.FileSystem] = None,
+                 sort_keys: Optional[List[SortKey]] = None
+                 ):
+        self.output_path_prefix = output_path_prefix
+        self.file_name_prefix = file_name_prefix
+        self.partition_keys = partition_keys
+        self.compression = compression
+        self.max_file_size = max_file_size
+        self.row_group_size = row_group_size
+        self.file_numbers = file_numbers
+        self.lowercase = lowercase
+        self.max_open_writers = max_open_writers
+        self.on_file_committed = on_file_committed
+        self.writer_policy = writer_policy
+        self.output_format = output_format
+        self.filesystem = filesystem
+        self.sort_keys = sort_keys
+        self.compression_ratio_estimator = CompressionRatioEstimator()
+
+        self._open_writers: "OrderedDict[str, ParquetPartWriter]" = OrderedDict()
+        self._closed_writers: List[ParquetPartWriter] = []
+        self.writers_evicted: int = 0
+
+    def __enter__(self) -> "PartitionedParquetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        while self._open_writers:
+            _, part_writer = self._open_writers.popitem(last=False)
+            part_writer.__exit__(exc_type, exc_val, exc_tb)
+            self._closed_writers.append(part_writer)
+
+    def flush(self):
+        for part_writer in self._open_writers.values():
+            part_writer.flush()
+
+    def close(self):
+        while self._open_writers:
+            _, part_writer = self._open_writers.popitem(last=False)
+            part_writer.close()
+            self._closed_writers.append(part_writer)
+
+    @property
+    def _all_writers(self) -> List[ParquetPartWriter]:
+        return self._closed_writers + list(self._open_writers.values())
+
+    @property
+    def file_names(self) -> List[str]:
+        return [file_name for part_writer in self._all_writers for file_name in part_writer.file_names]
+
+    @property
+    def file_metadata(self) -> Dict[str, pq.FileMetaData]:
+        return {file_name: file_metadata for part_writer in self._all_writers
+                for file_name, file_metadata in part_writer.file_metadata.items()}
+
+    @property
+    def rows_written(self) -> int:
+        return sum(part_writer.rows_written for part_writer in self._all_writers)
+
+    @property
+    def row_groups_written(self) -> int:
+        return sum(part_writer.row_groups_written for part_writer in self._all_writers)
+
+    @property
+    def uncompressed_bytes_written(self) -> int:
+        return sum(part_writer.uncompressed_bytes_written for part_writer in self._all_writers)
+
+    @property
+    def compressed_bytes_written(self) -> int:
+        return sum(part_writer.compressed_bytes_written for part_writer in self._all_writers)
+
+    def _get_writer(self, partition_path: str) -> ParquetPartWriter:
+        part_writer = self._open_writers.get(partition_path)
+        if part_writer:
+            self._open_writers.move_to_end(partition_path)
+            return part_writer
+
+        if len(self._open_writers) >= self.max_open_writers:
+            _, evicted_writer = self._open_writers.popitem(last=False)
+            evicted_writer.close()
+            self._closed_writers.append(evicted_writer)
+            self.writers_evicted += 1
+
+        part_writer = create_part_writer(output_format=self.output_format,
+                                         output_path_prefix=f"{self.output_path_prefix}/{partition_path}",
+                                         file_name_prefix=self.file_name_prefix,
+                                         compression=self.compression,
+                                         max_file_size=self.max_file_size,
+                                         row_group_size=self.row_group_size,
+                                         file_numbers=self.file_numbers,
+                                         # All partitions of a table share what is learned about its compression ratio
+                                         compression_ratio_estimator=self.compression_ratio_estimator,
+                                         on_file_committed=self.on_file_committed,
+                                         writer_policy=self.writer_policy,
+                                         filesystem=self.filesystem,
+                                         sort_keys=self.sort_keys
+                                         )
+        self._open_writers[partition_path] = part_writer
+        return part_writer
+
+    def write(self, pyarrow_table: pyarrow.Table):
+        for partition_path, partition_table in split_by_partition(pyarrow_table=pyarrow_table,
+                                                                  partition_keys=self.partition_keys,
+                                                                  lowercase=self.lowercase
+                                                                  ):
+            self._get_writer(partition_path=partition_path).write(pyarrow_table=partition_table)
+
+        # Keep the memory held by partially filled row groups bounded - regardless of the number of open partitions
+        while sum(part_writer.buffered_bytes for part_writer in self._open_writers.values()) > self.row_group_size:
+            max(self._open_writers.values(), key=lambda part_writer: part_writer.buffered_bytes).flush()
@@ -0,0 +1,95 @@
+import queue
+import threading
+import time
+from typing import Generic, Iterable, Iterator, TypeVar
+
+# Constants
+NO_PIPELINE: int = 0
+QUEUE_POLL_INTERVAL: float = 0.1  # seconds
+
+T = TypeVar("T")
+
+
+class _EndOfStream:
+    pass
+
+
+class _ProducerFailure:
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+class PipelinedIterator(Generic[T]):
+    """Drains an iterable on a background thread into a bounded queue, so that producing the next item
+       (i.e. fetching from Oracle) overlaps with consuming the current one (i.e. compressing and writing).
+       A full queue blocks the producer - providing backpressure.  The time each side spends blocked on the
+       queue is recorded, to show which stage is the bottleneck."""
+
+    def __init__(self,
+                 iterable: Iterable[T],
+                 queue_depth: int,
+                 name: str = "pipeline"
+                 ):
+        if queue_depth < 1:
+            raise ValueError(f"Queue depth must be at least 1, got: {queue_depth}")
+
+        self._iterable = iterable
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._produce,
+                                        name=f"{name}_producer",
+                                        daemon=True
+                                        )
+        self.producer_stall_seconds: float = 0.0
+        self.consumer_stall_seconds: float = 0.0
+
+    def _put(self, item) -> bool:
+        start_time = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self._queue.put(item, timeout=QUEUE_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.producer_stall_seconds += time.perf_counter() - start_time
+
+    def _produce(self):
+        try:
+            for item in self._iterable:
+                if not self._put(item):
+                    return
+                # Hold no reference to a queued item while producing the next one - so it is freed once consumed
+                del item
+        except BaseException as e:
+            self._put(_ProducerFailure(exception=e))
+        else:
+            self._put(_EndOfStream())
+        finally:
+            # Release the underlying generator (and its cursor) on the producer thread
+            close = getattr(self._iterable, "close", None)
+            if close:
+                close()
+
+    def __enter__(self) -> "PipelinedIterator[T]":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop_event.set()
+        self._thread.join()
+
+    def __iter__(self) -> Iterator[T]:
+        while True:
+            start_time = time.perf_counter()
+            item = self._queue.get()
+            self.consumer_stall_seconds += time.perf_counter() - start_time
+
+            if isinstance(item, _EndOfStream):
+                return
+            if isinstance(item, _ProducerFailure):
+                raise item.exception
+            yield item
+            del item
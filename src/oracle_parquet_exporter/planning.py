@@ -0,0 +1,264 @@
+import heapq
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .batch_sizing import estimate_row_bytes
+from .catalog import TableMetadata
+from .serialization import read_json_file
+
+# Constants
+DEFAULT_BLOCK_SIZE: int = 8192  # Bytes - for tables sized by their BLOCKS statistic only
+DEFAULT_EXPORT_BYTES_PER_SECOND: float = 25_000_000.0  # Arrow bytes exported per second, per worker - until calibrated
+DEFAULT_COMPRESSION_RATIO: float = 0.3  # Output bytes per Arrow byte - until calibrated
+DEFAULT_TASK_OVERHEAD_SECONDS: float = 0.5  # Per task - i.e. executing the query, and opening and committing its files
+MEGABYTE: int = 1_000_000
+
+
+@dataclass
+class TableHistory:
+    """What exporting a table took in past runs - summed over its tasks (chunks)"""
+    rows: int = 0
+    compressed_bytes: int = 0
+    elapsed_seconds: float = 0.0
+
+
+@dataclass
+class ThroughputModel:
+    """Predicts how long exporting a number of (uncompressed) bytes takes a worker, and how many bytes it writes.  The
+       rates default to conservative guesses - and are calibrated from the tasks recorded in past run reports.  A table
+       exported before is predicted from its own history instead - per row, as it may have grown since."""
+    bytes_per_second: float = DEFAULT_EXPORT_BYTES_PER_SECOND
+    compression_ratio: float = DEFAULT_COMPRESSION_RATIO
+    task_overhead_seconds: float = DEFAULT_TASK_OVERHEAD_SECONDS
+    calibration_task_count: int = 0
+    table_histories: Dict[Tuple[str, str], TableHistory] = field(default_factory=dict)
+
+    @classmethod
+    def calibrate(cls,
+                  run_report_files: List[str],
+                  task_overhead_seconds: float = DEFAULT_TASK_OVERHEAD_SECONDS
+                  ) -> "ThroughputModel":
+        """Fits the rates to the tasks of the run reports that exist - falling back to the defaults without any"""
+        uncompressed_bytes = 0
+        compressed_bytes = 0
+        seconds = 0.0
+        task_count = 0
+        table_histories: Dict[Tuple[str, str], TableHistory] = {}
+        for run_report_file in run_report_files:
+            if not Path(run_report_file).exists():
+                continue
+            for task in read_json_file(file_path=Path(run_report_file)).get("tables", []):
+                if task["rows"] <= 0 or task["uncompressed_bytes"] <= 0 or task["elapsed_seconds"] <= 0:
+                    continue
+                uncompressed_bytes += task["uncompressed_bytes"]
+                compressed_bytes += task["compressed_bytes"]
+                seconds += max(task["elapsed_seconds"] - task_overhead_seconds, task["elapsed_seconds"] / 2)
+                task_count += 1
+
+                table_history = table_histories.setdefault((task["schema"], task["table_name"]), TableHistory())
+                table_history.rows += task["rows"]
+                table_history.compressed_bytes += task["compressed_bytes"]
+                table_history.elapsed_seconds += task["elapsed_seconds"]
+
+        if task_count == 0:
+            return cls(task_overhead_seconds=task_overhead_seconds)
+
+        return cls(bytes_per_second=uncompressed_bytes / seconds,
+                   compression_ratio=compressed_bytes / uncompressed_bytes,
+                   task_overhead_seconds=task_overhead_seconds,
+                   calibration_task_count=task_count,
+                   table_histories=table_histories
+                   )
+
+    def estimate_seconds(self,
+                         uncompressed_bytes: float,
+                         task_count: int = 1
+                         ) -> float:
+        return task_count * self.task_overhead_seconds + uncompressed_bytes / self.bytes_per_second
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(bytes_per_second=self.bytes_per_second,
+                    compression_ratio=self.compression_ratio,
+                    task_overhead_seconds=self.task_overhead_seconds,
+                    calibration_task_count=self.calibration_task_count,
+                    calibrated_table_count=len(self.table_histories)
+                    )
+
+
+@dataclass
+class TablePlan:
+    """The estimated cost of exporting a table - from its optimizer statistics and segment size"""
+    schema: str
+    table_name: str
+    estimated_rows: int
+    segment_bytes: Optional[int]
+    estimated_bytes: int  # In memory (Arrow)
+    estimated_output_bytes: int
+    estimated_files: int
+    estimated_seconds: float
+    task_count: int = 1
+    has_statistics: bool = True
+    has_history: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(schema=self.schema,
+                    table_name=self.table_name,
+                    estimated_rows=self.estimated_rows,
+                    segment_bytes=self.segment_bytes,
+                    estimated_bytes=self.estimated_bytes,
+                    estimated_output_bytes=self.estimated_output_bytes,
+                    estimated_files=self.estimated_files,
+                    estimated_seconds=self.estimated_seconds,
+                    task_count=self.task_count,
+                    has_statistics=self.has_statistics,
+                    has_history=self.has_history
+                    )
+
+
+def get_segment_bytes(table: TableMetadata) -> Optional[int]:
+    if table.segment_bytes is not None:
+        return table.segment_bytes
+    if table.blocks is not None:
+        return table.blocks * DEFAULT_BLOCK_SIZE
+    return None
+
+
+def plan_table(table: TableMetadata,
+               throughput_model: ThroughputModel,
+               max_file_size: int,
+               task_count: int = 1,
+               row_limit: Optional[int] = None,
+               sample_percent: Optional[float] = None
+               ) -> TablePlan:
+    row_bytes = estimate_row_bytes(table=table)
+    segment_bytes = get_segment_bytes(table=table)
+    has_statistics = table.num_rows is not None
+    if has_statistics:
+        estimated_rows = table.num_rows
+    elif segment_bytes is not None:
+        # Never analyzed - the rows that would fit in its segments
+        estimated_rows = segment_bytes // (table.avg_row_len or row_bytes)
+    else:
+        estimated_rows = 0
+    if sample_percent is not None:
+        estimated_rows = int(estimated_rows * sample_percent / 100)
+    if row_limit is not None:
+        estimated_rows = min(estimated_rows, row_limit)
+
+    estimated_bytes = estimated_rows * row_bytes
+    estimated_output_bytes = int(estimated_bytes * throughput_model.compression_ratio)
+    estimated_seconds = throughput_model.estimate_seconds(uncompressed_bytes=estimated_bytes,
+                                                          task_count=task_count
+                                                          )
+    table_history = throughput_model.table_histories.get((table.schema, table.table_name))
+    if table_history is not None:
+        estimated_output_bytes = estimated_rows * table_history.compressed_bytes // table_history.rows
+        estimated_seconds = estimated_rows * table_history.elapsed_seconds / table_history.rows
+
+    return TablePlan(schema=table.schema,
+                     table_name=table.table_name,
+                     estimated_rows=estimated_rows,
+                     segment_bytes=segment_bytes,
+                     estimated_bytes=estimated_bytes,
+                     estimated_output_bytes=estimated_output_bytes,
+                     estimated_files=max(math.ceil(estimated_output_bytes / max_file_size), 1),
+                     estimated_seconds=estimated_seconds,
+                     task_count=task_count,
+                     has_statistics=has_statistics,
+                     has_history=table_history is not None
+                     )
+
+
+def get_longest_first_elapsed_seconds(task_seconds: List[float],
+                                      parallelism: int
+                                      ) -> float:
+    """Simulates running the tasks longest-first on parallelism workers - each task goes to the first free worker"""
+    worker_finish_times = [0.0] * parallelism
+    for seconds in sorted(task_seconds, reverse=True):
+        heapq.heappush(worker_finish_times, heapq.heappop(worker_finish_times) + seconds)
+    return max(worker_finish_times)
+
+
+@dataclass
+class ExportPlan:
+    """The tables of an export - ordered longest-first.  Starting the longest tasks first keeps a long table from
+       starting last and running on alone, while the other workers sit idle (longest processing time scheduling)."""
+    throughput_model: ThroughputModel
+    parallelism: int
+    tables: List[TablePlan] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.tables.sort(key=lambda table_plan: table_plan.estimated_seconds, reverse=True)
+        self._table_plans: Dict[Tuple[str, str], TablePlan] = {(table_plan.schema, table_plan.table_name): table_plan
+                                                               for table_plan in self.tables}
+
+    def get_table_plan(self,
+                       schema: str,
+                       table_name: str
+                       ) -> Optional[TablePlan]:
+        return self._table_plans.get((schema, table_name))
+
+    def get_estimated_seconds(self,
+                              schema: str,
+                              table_name: str
+                              ) -> float:
+        table_plan = self.get_table_plan(schema=schema,
+                                         table_name=table_name
+                                         )
+        return table_plan.estimated_seconds if table_plan else 0.0
+
+    @property
+    def estimated_elapsed_seconds(self) -> float:
+        # The chunks of a table are separate tasks - of an equal share of its cost
+        return get_longest_first_elapsed_seconds(task_seconds=[table_plan.estimated_seconds / table_plan.task_count
+                                                               for table_plan in self.tables
+                                                               for _ in range(table_plan.task_count)],
+                                                 parallelism=self.parallelism
+                                                 )
+
+    def get_totals(self) -> Dict[str, Any]:
+        return dict(estimated_rows=sum(table_plan.estimated_rows for table_plan in self.tables),
+                    estimated_bytes=sum(table_plan.estimated_bytes for table_plan in self.tables),
+                    estimated_output_bytes=sum(table_plan.estimated_output_bytes for table_plan in self.tables),
+                    estimated_files=sum(table_plan.estimated_files for table_plan in self.tables),
+                    estimated_seconds=sum(table_plan.estimated_seconds for table_plan in self.tables),
+                    estimated_elapsed_seconds=self.estimated_elapsed_seconds
+                    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(parallelism=self.parallelism,
+                    throughput_model=self.throughput_model.to_dict(),
+                    totals=self.get_totals(),
+                    tables=[table_plan.to_dict() for table_plan in self.tables]
+                    )
+
+    def format(self) -> str:
+        throughput_model = self.throughput_model
+        calibration_text = (f"calibrated from: {throughput_model.calibration_task_count:,} past task(s),"
+                            f" of {len(throughput_model.table_histories):,} table(s)"
+                            if throughput_model.calibration_task_count else "default rates - no past run reports")
+        lines = [f"Export plan - {len(self.tables):,} table(s), longest first - with parallelism: {self.parallelism}",
+                 f"Throughput model: {throughput_model.bytes_per_second / MEGABYTE:,.1f} MB/sec per worker,"
+                 f" compression ratio: {throughput_model.compression_ratio:.3f} ({calibration_text})",
+                 f"{'Table':<50} {'Rows':>15} {'Segment MB':>12} {'Arrow MB':>12} {'Output MB':>12} {'Files':>7} {'Seconds':>10}"]
+        for table_plan in self.tables:
+            segment_megabytes = f"{table_plan.segment_bytes / MEGABYTE:,.1f}" if table_plan.segment_bytes is not None else "-"
+            lines.append(f"{table_plan.schema + '.' + table_plan.table_name:<50}"
+                         f" {table_plan.estimated_rows:>15,}{'' if table_plan.has_statistics else '*'}"
+                         f" {segment_megabytes:>12}"
+                         f" {table_plan.estimated_bytes / MEGABYTE:>12,.1f}"
+                         f" {table_plan.estimated_output_bytes / MEGABYTE:>12,.1f}"
+                         f" {table_plan.estimated_files:>7,}"
+                         f" {table_plan.estimated_seconds:>10,.1f}{'' if table_plan.has_history else ' ~'}")
+
+        totals = self.get_totals()
+        lines.append(f"Total: {totals['estimated_rows']:,} row(s), {totals['estimated_output_bytes'] / MEGABYTE:,.1f} MB"
+                     f" in {totals['estimated_files']:,} file(s) - estimated elapsed time:"
+                     f" {totals['estimated_elapsed_seconds']:,.1f} seconds ({totals['estimated_seconds']:,.1f} worker seconds)")
+        if not all(table_plan.has_statistics for table_plan in self.tables):
+            lines.append("* No optimizer statistics - rows estimated from the segment size")
+        if not all(table_plan.has_history for table_plan in self.tables):
+            lines.append("~ Not exported before - estimated from the throughput model, rather than the table's own history")
+        return "\n".join(lines)
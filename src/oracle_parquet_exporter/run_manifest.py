@@ -0,0 +1,192 @@
+import datetime
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .chunking import TableChunk
+from .serialization import deserialize_value, read_json_file, serialize_value, write_json_file_atomically
+
+# Constants
+RUN_MANIFEST_FILE_NAME: str = "_run_manifest.json"
+RUN_MANIFEST_VERSION: int = 1
+WHOLE_TABLE_TASK_KEY: str = "table"
+STATUS_IN_PROGRESS: str = "in_progress"
+STATUS_COMPLETE: str = "complete"
+
+
+def get_task_key(chunk: Optional[TableChunk]) -> str:
+    return WHOLE_TABLE_TASK_KEY if chunk is None else str(chunk.chunk_number)
+
+
+def serialize_chunk(chunk: Optional[TableChunk]) -> Optional[Dict[str, Any]]:
+    if chunk is None:
+        return None
+    return dict(chunk_number=chunk.chunk_number,
+                chunk_count=chunk.chunk_count,
+                predicate=chunk.predicate,
+                bind_vars={name: serialize_value(value=value) for name, value in chunk.bind_vars.items()}
+                )
+
+
+def deserialize_chunk(serialized_chunk: Optional[Dict[str, Any]]) -> Optional[TableChunk]:
+    if serialized_chunk is None:
+        return None
+    return TableChunk(chunk_number=serialized_chunk["chunk_number"],
+                      chunk_count=serialized_chunk["chunk_count"],
+                      predicate=serialized_chunk["predicate"],
+                      bind_vars={name: deserialize_value(serialized_value=value)
+                                 for name, value in serialized_chunk["bind_vars"].items()}
+                      )
+
+
+def get_timestamp() -> str:
+    return datetime.datetime.now(tz=datetime.timezone.utc).isoformat()
+
+
+class RunManifest:
+    """Records the progress of an export run - the SCN it reads as of, and each table, task (whole table or chunk)
+       and committed part file as it completes - so that an interrupted run can be resumed where it left off.
+       Updates are thread-safe, and the manifest is replaced atomically each time it is saved."""
+
+    def __init__(self, manifest_file: str):
+        self.manifest_file = Path(manifest_file)
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, Any] = {}
+
+        if self.manifest_file.exists():
+            self._manifest = read_json_file(file_path=self.manifest_file)
+
+    @property
+    def exists(self) -> bool:
+        return bool(self._manifest)
+
+    @property
+    def is_complete(self) -> bool:
+        return self._manifest.get("status") == STATUS_COMPLETE
+
+    @property
+    def scn(self) -> Optional[int]:
+        return self._manifest.get("scn")
+
+    def start_run(self, scn: Optional[int]):
+        with self._lock:
+            self._manifest = dict(version=RUN_MANIFEST_VERSION,
+                                  status=STATUS_IN_PROGRESS,
+                                  scn=scn,
+                                  started_at=get_timestamp(),
+                                  tables={}
+                                  )
+            self._save()
+
+    def complete_run(self):
+        with self._lock:
+            self._manifest["status"] = STATUS_COMPLETE
+            self._manifest["completed_at"] = get_timestamp()
+            self._save()
+
+    def _get_table(self,
+                   schema: str,
+                   table_name: str
+                   ) -> Optional[Dict[str, Any]]:
+        return self._manifest.get("tables", {}).get(f"{schema}.{table_name}")
+
+    def is_table_complete(self,
+                          schema: str,
+                          table_name: str
+                          ) -> bool:
+        with self._lock:
+            table = self._get_table(schema=schema, table_name=table_name)
+            return table is not None and table["status"] == STATUS_COMPLETE
+
+    def get_table_chunks(self,
+                         schema: str,
+                         table_name: str
+                         ) -> Optional[List[Optional[TableChunk]]]:
+        """Returns the chunks a table was split into by the interrupted run - so the resumed run uses the same ones"""
+        with self._lock:
+            table = self._get_table(schema=schema, table_name=table_name)
+            if table is None:
+                return None
+            return [deserialize_chunk(serialized_chunk=task["chunk"]) for task in table["tasks"].values()]
+
+    def start_table(self,
+                    schema: str,
+                    table_name: str,
+                    chunks: List[Optional[TableChunk]]
+                    ):
+        with self._lock:
+            if self._get_table(schema=schema, table_name=table_name) is None:
+                self._manifest["tables"][f"{schema}.{table_name}"] = dict(
+                    status=STATUS_IN_PROGRESS,
+                    started_at=get_timestamp(),
+                    tasks={get_task_key(chunk=chunk): dict(status=STATUS_IN_PROGRESS,
+                                                           chunk=serialize_chunk(chunk=chunk),
+                                                           files=[]
+                                                           )
+                           for chunk in chunks}
+                )
+                self._save()
+
+    def is_task_complete(self,
+                         schema: str,
+                         table_name: str,
+                         chunk: Optional[TableChunk]
+                         ) -> bool:
+        with self._lock:
+            task = self._get_table(schema=schema, table_name=table_name)["tasks"][get_task_key(chunk=chunk)]
+            return task["status"] == STATUS_COMPLETE
+
+    def record_file(self,
+                    schema: str,
+                    table_name: str,
+                    chunk: Optional[TableChunk],
+                    file_name: str,
+                    row_count: int
+                    ):
+        with self._lock:
+            task = self._get_table(schema=schema, table_name=table_name)["tasks"][get_task_key(chunk=chunk)]
+            task["files"].append(dict(file_name=os.path.relpath(file_name, start=self.manifest_file.parent),
+                                      row_count=row_count
+                                      ))
+            self._save()
+
+    def prepare_task(self,
+                     schema: str,
+                     table_name: str,
+                     chunk: Optional[TableChunk]
+                     ) -> List[str]:
+        """Prepares a task to be (re-)started - returning the part files to discard from the interrupted run.  The
+           rows of a scan come in no guaranteed order (even as of the same SCN), so a task can not be continued from a
+           row offset - it is restarted from scratch once its part files are removed."""
+        with self._lock:
+            task = self._get_table(schema=schema, table_name=table_name)["tasks"][get_task_key(chunk=chunk)]
+            file_names = [(self.manifest_file.parent / file["file_name"]).as_posix() for file in task["files"]]
+            task["files"] = []
+            self._save()
+            return file_names
+
+    def complete_task(self,
+                      schema: str,
+                      table_name: str,
+                      chunk: Optional[TableChunk]
+                      ):
+        with self._lock:
+            task = self._get_table(schema=schema, table_name=table_name)["tasks"][get_task_key(chunk=chunk)]
+            task["status"] = STATUS_COMPLETE
+            self._save()
+
+    def complete_table(self,
+                       schema: str,
+                       table_name: str
+                       ):
+        with self._lock:
+            table = self._get_table(schema=schema, table_name=table_name)
+            table["status"] = STATUS_COMPLETE
+            table["completed_at"] = get_timestamp()
+            self._save()
+
+    def _save(self):
+        write_json_file_atomically(file_path=self.manifest_file,
+                                   contents=self._manifest
+                                   )
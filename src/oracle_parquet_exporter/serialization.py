@@ -0,0 +1,51 @@
+import datetime
+import json
+import os
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def serialize_value(value: Any) -> Optional[Dict[str, Any]]:
+    """Serializes a scalar database value (i.e. a watermark or a chunk boundary) to JSON - preserving its type"""
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return dict(type="datetime", value=value.isoformat())
+    if isinstance(value, datetime.date):
+        return dict(type="date", value=value.isoformat())
+    if isinstance(value, Decimal):
+        return dict(type="decimal", value=str(value))
+    if isinstance(value, (int, float, str)):
+        return dict(type=type(value).__name__, value=value)
+    raise TypeError(f"Unsupported value type: {type(value).__name__}")
+
+
+def deserialize_value(serialized_value: Optional[Dict[str, Any]]) -> Any:
+    if serialized_value is None:
+        return None
+
+    value_type, value = serialized_value["type"], serialized_value["value"]
+    if value_type == "datetime":
+        return datetime.datetime.fromisoformat(value)
+    if value_type == "date":
+        return datetime.date.fromisoformat(value)
+    if value_type == "decimal":
+        return Decimal(value)
+    return value
+
+
+def read_json_file(file_path: Path) -> Dict[str, Any]:
+    with open(file_path, "r") as f:
+        return json.load(f)
+
+
+def write_json_file_atomically(file_path: Path,
+                               contents: Dict[str, Any]
+                               ):
+    """Writes a JSON file to a temporary name and renames it into place - so readers never see a partial file"""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_file_path = file_path.with_name(f"{file_path.name}.tmp")
+    with open(temporary_file_path, "w") as f:
+        json.dump(contents, f, indent=2)
+    os.replace(temporary_file_path, file_path)
@@ -0,0 +1,105 @@
+import pyarrow
+import pyarrow.fs
+import sys
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# Constants
+OUTPUT_FORMAT_PARQUET: str = "parquet"
+OUTPUT_FORMAT_ARROW: str = "arrow"  # Arrow IPC files
+OUTPUT_FORMAT_FEATHER: str = "feather"  # Feather (V2) files - Arrow IPC files, with the .feather extension
+OUTPUT_FORMAT_ARROW_STREAM: str = "arrow-stream"  # An Arrow IPC stream (per table) - to stdout
+OUTPUT_FORMATS: List[str] = [OUTPUT_FORMAT_PARQUET, OUTPUT_FORMAT_ARROW, OUTPUT_FORMAT_FEATHER, OUTPUT_FORMAT_ARROW_STREAM]
+FILE_OUTPUT_FORMATS: List[str] = [OUTPUT_FORMAT_PARQUET, OUTPUT_FORMAT_ARROW, OUTPUT_FORMAT_FEATHER]
+FILE_EXTENSIONS: Dict[str, str] = {OUTPUT_FORMAT_PARQUET: "parquet",
+                                   OUTPUT_FORMAT_ARROW: "arrow",
+                                   OUTPUT_FORMAT_FEATHER: "feather"
+                                   }
+# Arrow IPC only supports buffer compression with LZ4 (frame) and ZSTD
+ARROW_IPC_COMPRESSIONS: Dict[str, Optional[str]] = {"none": None,
+                                                    "zstd": "zstd"
+                                                    }
+URI_SCHEME_SEPARATOR: str = "://"
+
+
+def get_output_filesystem(output_directory: str) -> Tuple[pyarrow.fs.FileSystem, str]:
+    """Resolves an output directory to the filesystem to write to, and the path within it.  The output directory is a
+       local path, or any URI supported by pyarrow - i.e. s3://bucket/prefix?region=us-east-1, gs://bucket/prefix or
+       hdfs://host:port/path.  Files are streamed to object stores with multipart uploads - there is no local staging."""
+    if URI_SCHEME_SEPARATOR in output_directory:
+        return pyarrow.fs.FileSystem.from_uri(output_directory)
+    return pyarrow.fs.LocalFileSystem(), Path(output_directory).as_posix()
+
+
+def is_local_filesystem(filesystem: pyarrow.fs.FileSystem) -> bool:
+    return isinstance(filesystem, pyarrow.fs.LocalFileSystem)
+
+
+def path_exists(filesystem: pyarrow.fs.FileSystem,
+                path: str
+                ) -> bool:
+    return filesystem.get_file_info(path).type != pyarrow.fs.FileType.NotFound
+
+
+def create_directory(filesystem: pyarrow.fs.FileSystem,
+                     path: str
+                     ):
+    # Object stores have no directories - only key prefixes, which need not be created
+    if is_local_filesystem(filesystem=filesystem):
+        filesystem.create_dir(path, recursive=True)
+
+
+def list_files(filesystem: pyarrow.fs.FileSystem,
+               path: str
+               ) -> List[str]:
+    """Lists the files under a directory (recursively) - none if it does not exist"""
+    return [file_info.path for file_info in filesystem.get_file_info(pyarrow.fs.FileSelector(base_dir=path,
+                                                                                             allow_not_found=True,
+                                                                                             recursive=True
+                                                                                             ))
+            if file_info.type == pyarrow.fs.FileType.File]
+
+
+def get_arrow_ipc_compression(compression: str) -> Optional[str]:
+    if compression not in ARROW_IPC_COMPRESSIONS:
+        raise ValueError(f"Compression method: {compression} is not supported by the Arrow IPC format - use one of: {list(ARROW_IPC_COMPRESSIONS)}")
+    return ARROW_IPC_COMPRESSIONS[compression]
+
+
+class CountingStream:
+    """A write-only file object over a stream that can not tell its position (i.e. a pipe) - counting the bytes
+       written instead, so that the size of the output can be measured"""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.bytes_written: int = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        bytes_written = self.stream.write(data)
+        self.bytes_written += len(data) if bytes_written is None else bytes_written
+        return bytes_written
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    def flush(self):
+        self.stream.flush()
+
+    def writable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return False
+
+    def seekable(self) -> bool:
+        return False
+
+    def close(self):
+        # The underlying stream (i.e. stdout) is shared - it is flushed, but left open
+        self.flush()
+        self.closed = True
+
+
+def get_stdout_sink() -> pyarrow.NativeFile:
+    return pyarrow.PythonFile(CountingStream(stream=sys.stdout.buffer), mode="w")
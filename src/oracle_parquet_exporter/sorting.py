@@ -0,0 +1,272 @@
+import pyarrow
+import pyarrow.compute as pc
+import pyarrow.ipc
+import pyarrow.parquet as pq
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Constants
+CLUSTER_METHOD_AUTO: str = "auto"
+CLUSTER_METHOD_SERVER: str = "server"  # ORDER BY - sorted by the database
+CLUSTER_METHOD_LOCAL: str = "local"  # An external merge sort - spilling sorted runs to local disk
+CLUSTER_METHODS: List[str] = [CLUSTER_METHOD_AUTO, CLUSTER_METHOD_SERVER, CLUSTER_METHOD_LOCAL]
+SORT_DIRECTIONS: List[str] = ["asc", "desc"]
+DEFAULT_SERVER_SORT_MAX_BYTES: int = 1_000_000_000  # 1GB (estimated Arrow bytes) - larger tables are sorted locally
+DEFAULT_SORT_MEMORY_LIMIT: int = 256_000_000  # 256MB - of Arrow data buffered per sorted run
+MERGE_READ_BYTES: int = 8_000_000  # Per run - the size of the record batches the runs are spilled (and merged) in
+RUN_INDEX_COLUMN: str = "__run"
+ROW_INDEX_COLUMN: str = "__row"
+
+
+@dataclass
+class SortKey:
+    """A column to cluster (sort) a table's output by - ascending or descending, with NULLs last either way"""
+    column_name: str
+    descending: bool = False
+
+    @property
+    def order_by_sql(self) -> str:
+        return f"\"{self.column_name}\" {'DESC' if self.descending else 'ASC'} NULLS LAST"
+
+    def resolve_column_name(self, schema: pyarrow.Schema) -> Optional[str]:
+        # The exported column names may have been lower-cased
+        for field_name in schema.names:
+            if field_name == self.column_name or field_name.lower() == self.column_name.lower():
+                return field_name
+        return None
+
+
+def parse_sort_keys(cluster_spec: str) -> List[SortKey]:
+    """Parses a cluster specification of the form: COLUMN[:asc|desc][,COLUMN[:asc|desc]...]"""
+    sort_keys = []
+    for key_spec in cluster_spec.split(","):
+        column_name, _, direction = key_spec.strip().partition(":")
+        direction = direction.strip().lower() or "asc"
+        if not column_name.strip() or direction not in SORT_DIRECTIONS:
+            raise ValueError(f"Invalid cluster key: '{key_spec}' - expected format: COLUMN[:{'|'.join(SORT_DIRECTIONS)}]")
+        sort_keys.append(SortKey(column_name=column_name.strip(),
+                                 descending=direction == "desc"
+                                 ))
+
+    return sort_keys
+
+
+def get_order_by_sql(sort_keys: List[SortKey],
+                     table_name: Optional[str] = None
+                     ) -> str:
+    """The ORDER BY clause of a sorted export query - its columns qualified by the table name, so that they refer to
+       the table's columns rather than to the select list expressions of the same name (i.e. numbers fetched as text)"""
+    qualifier = f"\"{table_name}\"." if table_name else ""
+    return f" ORDER BY {', '.join(f'{qualifier}{sort_key.order_by_sql}' for sort_key in sort_keys)}"
+
+
+def get_sorting_columns(schema: pyarrow.Schema,
+                        sort_keys: List[SortKey]
+                        ) -> List[pq.SortingColumn]:
+    """The sorting_columns metadata of a file of the schema - so that readers can rely on its order.  Sort columns
+       missing from the schema (i.e. partition columns - constant within a file) are left out."""
+    sorting_columns = []
+    for sort_key in sort_keys:
+        column_name = sort_key.resolve_column_name(schema=schema)
+        if column_name is not None:
+            sorting_columns.append(pq.SortingColumn(column_index=schema.get_field_index(column_name),
+                                                    descending=sort_key.descending,
+                                                    nulls_first=False
+                                                    ))
+    return sorting_columns
+
+
+def get_arrow_sort_keys(schema: pyarrow.Schema,
+                        sort_keys: List[SortKey]
+                        ) -> List[Tuple[str, str]]:
+    arrow_sort_keys = []
+    for sort_key in sort_keys:
+        column_name = sort_key.resolve_column_name(schema=schema)
+        if column_name is None:
+            raise ValueError(f"Cluster column: {sort_key.column_name} is not one of the exported columns: {schema.names}")
+        arrow_sort_keys.append((column_name, "descending" if sort_key.descending else "ascending"))
+    return arrow_sort_keys
+
+
+def sort_table(pyarrow_table: pyarrow.Table,
+               arrow_sort_keys: List[Tuple[str, str]]
+               ) -> pyarrow.Table:
+    """Sorts a table - by the values of its dictionary-encoded sort columns (i.e. low-cardinality strings), which
+       Arrow can not sort by directly"""
+    key_table = pyarrow.table({column_name: pyarrow_table.column(column_name).cast(pyarrow_table.schema.field(column_name).type.value_type)
+                               if pyarrow.types.is_dictionary(pyarrow_table.schema.field(column_name).type)
+                               else pyarrow_table.column(column_name)
+                               for column_name, _ in arrow_sort_keys})
+    return pyarrow_table.take(pc.sort_indices(key_table, sort_keys=arrow_sort_keys, null_placement="at_end"))
+
+
+def get_slice_rows(pyarrow_table: pyarrow.Table) -> int:
+    return max(MERGE_READ_BYTES * pyarrow_table.num_rows // max(pyarrow_table.nbytes, 1), 1)
+
+
+def slice_table(pyarrow_table: pyarrow.Table) -> Iterator[pyarrow.Table]:
+    # Zero-copy slices - so that a large sorted table is written in row groups of the usual size
+    slice_rows = get_slice_rows(pyarrow_table=pyarrow_table)
+    for offset in range(0, pyarrow_table.num_rows, slice_rows):
+        yield pyarrow_table.slice(offset, slice_rows)
+
+
+class ExternalSorter:
+    """Sorts a stream of Arrow tables larger than memory - an external merge sort.  Tables are buffered up to
+       memory_limit bytes, and each buffer is sorted and spilled to disk as a run (an Arrow IPC file).  The sorted runs
+       are then merged - memory-mapped, a record batch of each at a time.
+
+       The merge is vectorized: the current batches of all runs are sorted together (ties broken by run and row, which
+       keeps the merge stable), and every row up to the smallest of the batches' last rows is emitted - no row still
+       on disk can sort before it.  The remaining rows are carried over to the next round.  A stream that fits in
+       memory is sorted in memory, without spilling."""
+
+    def __init__(self,
+                 sort_keys: List[SortKey],
+                 memory_limit: int = DEFAULT_SORT_MEMORY_LIMIT,
+                 spill_directory: Optional[str] = None
+                 ):
+        self.sort_keys = sort_keys
+        self.memory_limit = memory_limit
+        self.spill_directory = spill_directory
+
+        self._buffer: List[pyarrow.Table] = []
+        self._buffered_bytes: int = 0
+        self._arrow_sort_keys: Optional[List[Tuple[str, str]]] = None
+        self._run_directory: Optional[Path] = None
+        self.run_files: List[Path] = []
+        self.rows_sorted: int = 0
+        self.bytes_spilled: int = 0
+
+    def __enter__(self) -> "ExternalSorter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
+
+    def cleanup(self):
+        self._buffer = []
+        self._buffered_bytes = 0
+        if self._run_directory is not None:
+            shutil.rmtree(self._run_directory, ignore_errors=True)
+            self._run_directory = None
+
+    def sort(self, pyarrow_tables: Iterable[pyarrow.Table]) -> Iterator[pyarrow.Table]:
+        """Yields the rows of the tables - sorted.  Nothing is yielded until all of the tables have been read."""
+        schema = None
+        for pyarrow_table in pyarrow_tables:
+            schema = pyarrow_table.schema
+            if self._arrow_sort_keys is None:
+                self._arrow_sort_keys = get_arrow_sort_keys(schema=schema,
+                                                            sort_keys=self.sort_keys
+                                                            )
+            self._buffer.append(pyarrow_table)
+            self._buffered_bytes += pyarrow_table.nbytes
+            self.rows_sorted += pyarrow_table.num_rows
+            if self._buffered_bytes >= self.memory_limit:
+                self._spill_run()
+            del pyarrow_table
+
+        if schema is None:
+            return
+
+        if not self.run_files:
+            yield from slice_table(pyarrow_table=self._sort_buffer())
+            return
+
+        self._spill_run()
+        yield from self._merge_runs()
+
+    def _sort_buffer(self) -> pyarrow.Table:
+        sorted_table = sort_table(pyarrow_table=pyarrow.concat_tables(self._buffer),
+                                  arrow_sort_keys=self._arrow_sort_keys
+                                  )
+        self._buffer = []
+        self._buffered_bytes = 0
+        return sorted_table
+
+    def _spill_run(self):
+        if not self._buffer:
+            return
+        if self._run_directory is None:
+            self._run_directory = Path(tempfile.mkdtemp(prefix="sort_runs_", dir=self.spill_directory))
+
+        # The Arrow IPC file format allows a single dictionary per column
+        sorted_table = self._sort_buffer().unify_dictionaries()
+        run_file = self._run_directory / f"run_{len(self.run_files)}.arrow"
+        with pyarrow.OSFile(run_file.as_posix(), "wb") as sink:
+            with pyarrow.ipc.new_file(sink=sink, schema=sorted_table.schema) as run_writer:
+                run_writer.write_table(sorted_table, max_chunksize=get_slice_rows(pyarrow_table=sorted_table))
+        self.run_files.append(run_file)
+        self.bytes_spilled += run_file.stat().st_size
+
+    def _merge_runs(self) -> Iterator[pyarrow.Table]:
+        readers = [pyarrow.ipc.open_file(pyarrow.memory_map(run_file.as_posix(), "r")) for run_file in self.run_files]
+        next_batch_numbers = [0] * len(readers)
+        pending: List[Optional[pyarrow.Table]] = [None] * len(readers)
+        tie_breakers = [(RUN_INDEX_COLUMN, "ascending"), (ROW_INDEX_COLUMN, "ascending")]
+
+        while True:
+            # Refill the runs whose rows were all emitted - with their next record batch
+            for run_number, reader in enumerate(readers):
+                if pending[run_number] is None and next_batch_numbers[run_number] < reader.num_record_batches:
+                    pending[run_number] = pyarrow.Table.from_batches([reader.get_batch(next_batch_numbers[run_number])])
+                    next_batch_numbers[run_number] += 1
+
+            active_runs = [run_number for run_number, run_rows in enumerate(pending) if run_rows is not None]
+            if not active_runs:
+                return
+
+            candidates = pyarrow.concat_tables([self._tag_rows(pyarrow_table=pending[run_number], run_number=run_number)
+                                                for run_number in active_runs])
+            sorted_candidates = sort_table(pyarrow_table=candidates,
+                                           arrow_sort_keys=self._arrow_sort_keys + tie_breakers
+                                           )
+
+            # The smallest of the runs' last (pending) rows - every row up to it can be emitted, unless it is the last batch of each run
+            if all(next_batch_numbers[run_number] >= readers[run_number].num_record_batches for run_number in active_runs):
+                cutoff = sorted_candidates.num_rows
+            else:
+                last_rows = pyarrow.concat_tables([candidates.filter(pc.and_(pc.equal(candidates[RUN_INDEX_COLUMN], run_number),
+                                                                             pc.equal(candidates[ROW_INDEX_COLUMN], pending[run_number].num_rows - 1)))
+                                                   for run_number in active_runs
+                                                   if next_batch_numbers[run_number] < readers[run_number].num_record_batches])
+                bound = sort_table(pyarrow_table=last_rows,
+                                   arrow_sort_keys=self._arrow_sort_keys + tie_breakers
+                                   ).slice(0, 1)
+                cutoff = self._find_row(sorted_table=sorted_candidates,
+                                        run_number=bound[RUN_INDEX_COLUMN][0].as_py(),
+                                        row_number=bound[ROW_INDEX_COLUMN][0].as_py()
+                                        ) + 1
+
+            emitted = sorted_candidates.slice(0, cutoff)
+            yield from slice_table(pyarrow_table=emitted.drop_columns([RUN_INDEX_COLUMN, ROW_INDEX_COLUMN]))
+
+            # Carry the rest over - each run's remaining rows are a suffix of its pending rows (the sort is stable)
+            remaining = sorted_candidates.slice(cutoff)
+            for run_number in active_runs:
+                run_remaining = remaining.filter(pc.equal(remaining[RUN_INDEX_COLUMN], run_number))
+                if run_remaining.num_rows == 0:
+                    pending[run_number] = None
+                else:
+                    first_row_number = pc.min(run_remaining[ROW_INDEX_COLUMN]).as_py()
+                    pending[run_number] = pending[run_number].slice(first_row_number)
+
+    @staticmethod
+    def _tag_rows(pyarrow_table: pyarrow.Table,
+                  run_number: int
+                  ) -> pyarrow.Table:
+        return (pyarrow_table.append_column(RUN_INDEX_COLUMN, pyarrow.repeat(pyarrow.scalar(run_number, pyarrow.int32()), pyarrow_table.num_rows))
+                             .append_column(ROW_INDEX_COLUMN, pyarrow.array(range(pyarrow_table.num_rows), pyarrow.int64())))
+
+    @staticmethod
+    def _find_row(sorted_table: pyarrow.Table,
+                  run_number: int,
+                  row_number: int
+                  ) -> int:
+        mask = pc.and_(pc.equal(sorted_table[RUN_INDEX_COLUMN], run_number),
+                       pc.equal(sorted_table[ROW_INDEX_COLUMN], row_number))
+        return pc.index(mask, True).as_py()
@@ -0,0 +1,112 @@
+import json
+import sys
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .catalog import ColumnMetadata
+
+# Constants
+DEFAULT_TABLE_KEY: str = "default"
+TOML_FILE_SUFFIXES: List[str] = [".toml"]
+YAML_FILE_SUFFIXES: List[str] = [".yaml", ".yml"]
+
+
+@dataclass
+class TableConfig:
+    """Per-table export settings - pushed down into the export query (column projection, a WHERE predicate and block
+       sampling), or overriding the run's batch size and compression method.  None leaves a setting to the default."""
+    include_columns: Optional[List[str]] = None
+    exclude_columns: List[str] = field(default_factory=list)
+    where: Optional[str] = None
+    sample_percent: Optional[float] = None
+    sample_seed: Optional[int] = None
+    batch_size: Optional[int] = None
+    compression: Optional[str] = None
+
+    def __post_init__(self):
+        if self.include_columns is not None:
+            self.include_columns = [column_name.upper() for column_name in self.include_columns]
+        self.exclude_columns = [column_name.upper() for column_name in self.exclude_columns]
+        if self.sample_percent is not None and not 0.000001 <= self.sample_percent < 100:
+            raise ValueError(f"Sample percent must be at least 0.000001 and less than 100, got: {self.sample_percent}")
+        if self.batch_size is not None and self.batch_size < 1:
+            raise ValueError(f"Batch size must be at least 1, got: {self.batch_size}")
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "TableConfig":
+        setting_names = {config_field.name for config_field in fields(cls)}
+        for setting_name in config:
+            if setting_name not in setting_names:
+                raise ValueError(f"Invalid table config setting: '{setting_name}' - expected one of: {sorted(setting_names)}")
+        return cls(**config)
+
+    def merge(self, config: Dict[str, Any]) -> "TableConfig":
+        """Returns this config overlaid with a (table's) config dict - the settings it contains take precedence"""
+        table_config = TableConfig.from_dict(config=config)
+        return TableConfig(**{config_field.name: getattr(table_config if config_field.name in config else self, config_field.name)
+                              for config_field in fields(self)})
+
+    def select_columns(self, columns: List[ColumnMetadata]) -> List[ColumnMetadata]:
+        return [column for column in columns
+                if (self.include_columns is None or column.column_name in self.include_columns)
+                and column.column_name not in self.exclude_columns]
+
+    @property
+    def sample_sql(self) -> str:
+        if self.sample_percent is None:
+            return ""
+        # Block sampling reads a share of the table's blocks - rather than scanning all of them for a share of the rows
+        sample_sql = f" SAMPLE BLOCK ({self.sample_percent})"
+        if self.sample_seed is not None:
+            sample_sql += f" SEED ({self.sample_seed})"
+        return sample_sql
+
+
+def read_config_file(file_path: Path) -> Dict[str, Any]:
+    """Reads a TOML, YAML or JSON file - by its suffix"""
+    if file_path.suffix.lower() in TOML_FILE_SUFFIXES:
+        if sys.version_info >= (3, 11):
+            import tomllib
+        else:
+            import tomli as tomllib
+        with open(file_path, "rb") as f:
+            return tomllib.load(f)
+
+    if file_path.suffix.lower() in YAML_FILE_SUFFIXES:
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError(f"Reading the YAML file: {file_path.as_posix()} requires PyYAML - install it with:"
+                              f" pip install oracle-parquet-exporter[yaml]") from e
+        with open(file_path, "r") as f:
+            return yaml.safe_load(f) or {}
+
+    with open(file_path, "r") as f:
+        return json.load(f)
+
+
+class TableConfigs:
+    """The export settings of all tables - read from a TOML, YAML or JSON file of the form:
+       {"default": {<config>}, "tables": {"[SCHEMA.]TABLE": {<config>}, ...}}
+       where a table's config is overlaid on the default one (a schema-qualified entry takes precedence)."""
+
+    def __init__(self, config_file: Optional[str] = None):
+        configs = read_config_file(file_path=Path(config_file)) if config_file else {}
+        self.default_config = TableConfig().merge(config=configs.get(DEFAULT_TABLE_KEY, {}))
+        self.table_configs: Dict[str, Dict[str, Any]] = {table_key.upper(): table_config
+                                                         for table_key, table_config in configs.get("tables", {}).items()}
+
+        # Validate the table configs up front - rather than part-way through an export
+        self.configs = [self.default_config] + [self.default_config.merge(config=table_config)
+                                                for table_config in self.table_configs.values()]
+
+    def get_table_config(self,
+                         schema: str,
+                         table_name: str
+                         ) -> TableConfig:
+        config = self.default_config
+        for table_key in (table_name.upper(), f"{schema}.{table_name}".upper()):
+            if table_key in self.table_configs:
+                config = config.merge(config=self.table_configs[table_key])
+        return config
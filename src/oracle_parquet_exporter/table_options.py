@@ -0,0 +1,28 @@
+from typing import Dict, List, Optional, Tuple
+
+TableOptions = Dict[Tuple[Optional[str], str], str]
+
+
+def parse_table_column_options(option_values: Optional[List[str]],
+                               option_name: str
+                               ) -> TableOptions:
+    """Parses per-table column options of the form: [SCHEMA.]TABLE=COLUMN"""
+    table_options = {}
+    for option_value in option_values or []:
+        table_spec, separator, column_name = option_value.partition("=")
+        if not separator or not table_spec.strip() or not column_name.strip():
+            raise ValueError(f"Invalid {option_name} value: '{option_value}' - expected format: [SCHEMA.]TABLE=COLUMN")
+
+        schema, _, table_name = table_spec.strip().rpartition(".")
+        table_options[(schema or None, table_name)] = column_name.strip()
+
+    return table_options
+
+
+def get_table_option(table_options: TableOptions,
+                     schema: str,
+                     table_name: str,
+                     default: Optional[str] = None
+                     ) -> Optional[str]:
+    """Looks up a per-table option - a schema-qualified entry takes precedence over an unqualified one"""
+    return table_options.get((schema, table_name), table_options.get((None, table_name), default))
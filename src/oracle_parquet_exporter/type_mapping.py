@@ -0,0 +1,189 @@
+import pyarrow
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .catalog import ColumnMetadata
+
+# Constants
+DICTIONARY_MAX_DISTINCT_VALUES: int = 1_000  # String columns with at most this many distinct values (per optimizer statistics) are dictionary-encoded
+DICTIONARY_TYPE: pyarrow.DataType = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+DRIVER_INTEGER_MAX_DIGITS: int = 18  # The driver fetches NUMBER(p,0) columns of up to this precision (and NUMBER(*,0)) as int64 - any other NUMBER as a double
+INFERRED_TYPE_ALIAS: str = "inferred"
+MAX_DECIMAL_PRECISION: int = 38
+INTEGER_TYPES_BY_MAX_DIGITS: List[Tuple[int, pyarrow.DataType]] = [(2, pyarrow.int8()),
+                                                                   (4, pyarrow.int16()),
+                                                                   (9, pyarrow.int32()),
+                                                                   (18, pyarrow.int64())
+                                                                   ]
+STRING_DATA_TYPES: Tuple[str, ...] = ("VARCHAR2", "NVARCHAR2", "CHAR", "NCHAR")
+LARGE_BINARY_DATA_TYPES: Tuple[str, ...] = ("BLOB", "LONG RAW")
+LARGE_STRING_DATA_TYPES: Tuple[str, ...] = ("CLOB", "NCLOB", "LONG")
+TIMESTAMP_UNITS_BY_MAX_FRACTIONAL_DIGITS: List[Tuple[int, str]] = [(0, "s"), (3, "ms"), (6, "us"), (9, "ns")]
+
+ColumnTypeOverrides = Dict[Tuple[Optional[str], str, str], Optional[pyarrow.DataType]]
+
+
+def get_integer_type(max_digits: int) -> pyarrow.DataType:
+    """Returns the smallest integer type that holds any number of up to max_digits decimal digits"""
+    for type_max_digits, integer_type in INTEGER_TYPES_BY_MAX_DIGITS:
+        if max_digits <= type_max_digits:
+            return integer_type
+    return pyarrow.decimal128(min(max_digits, MAX_DECIMAL_PRECISION), 0)
+
+
+def get_arrow_type(column: ColumnMetadata) -> Optional[pyarrow.DataType]:
+    """Maps an Oracle column (per ALL_TAB_COLUMNS) to the Arrow type it is written as - None keeps the type inferred
+       by the driver (i.e. for an unconstrained NUMBER, which may hold any value)"""
+    data_type = column.data_type
+    if data_type == "NUMBER":
+        if column.data_scale is None:
+            return None
+        if column.data_precision is None:
+            # NUMBER(*,0) - i.e. INTEGER: values beyond the int64 range fail the (safe) cast, rather than lose precision
+            return pyarrow.int64() if column.data_scale == 0 else None
+        if column.data_scale <= 0:
+            # A negative scale rounds to the left of the decimal point - adding zeros to the precision
+            return get_integer_type(max_digits=column.data_precision - column.data_scale)
+        return pyarrow.decimal128(max(column.data_precision, column.data_scale), column.data_scale)
+    if data_type == "BINARY_FLOAT":
+        return pyarrow.float32()
+    if data_type in ("BINARY_DOUBLE", "FLOAT"):
+        return pyarrow.float64()
+    if data_type == "DATE":
+        return pyarrow.timestamp("s")
+    timestamp_match = re.fullmatch(r"TIMESTAMP\((\d)\)", data_type)
+    if timestamp_match:
+        fractional_digits = int(timestamp_match.group(1))
+        return pyarrow.timestamp(next(unit for max_fractional_digits, unit in TIMESTAMP_UNITS_BY_MAX_FRACTIONAL_DIGITS
+                                      if fractional_digits <= max_fractional_digits))
+    if data_type in LARGE_BINARY_DATA_TYPES:
+        return pyarrow.large_binary()
+    if data_type in LARGE_STRING_DATA_TYPES:
+        return pyarrow.large_string()
+    if data_type == "RAW":
+        return pyarrow.binary()
+    if data_type.startswith("INTERVAL"):
+        return get_interval_arrow_type(column=column)
+    if data_type in STRING_DATA_TYPES:
+        if column.num_distinct is not None and column.num_distinct <= DICTIONARY_MAX_DISTINCT_VALUES:
+            return DICTIONARY_TYPE
+        return pyarrow.string()
+    return None
+
+
+def get_interval_arrow_type(column: ColumnMetadata) -> Optional[pyarrow.DataType]:
+    """Returns the Arrow type of an interval column - which is fetched as a number of microseconds (DAY TO SECOND) or
+       months (YEAR TO MONTH), so it is cast whether or not types are mapped.  A month count is written as an int32,
+       as months have no fixed duration (and Parquet has no type for Arrow's month intervals)."""
+    if column.data_type.startswith("INTERVAL DAY"):
+        return pyarrow.duration("us")
+    if column.data_type.startswith("INTERVAL YEAR"):
+        return pyarrow.int32()
+    return None
+
+
+def is_fetched_as_text(column: ColumnMetadata,
+                       arrow_type: Optional[pyarrow.DataType]
+                       ) -> bool:
+    """Whether a column is fetched as text - a NUMBER column that the driver would fetch as a double (which can not
+       hold every value of an exact type) but that is mapped to a decimal or integer type, which the text casts to
+       without loss"""
+    if column.data_type != "NUMBER" or arrow_type is None:
+        return False
+    if column.data_scale == 0 and (column.data_precision is None or column.data_precision <= DRIVER_INTEGER_MAX_DIGITS):
+        return False
+    return pyarrow.types.is_decimal(arrow_type) or pyarrow.types.is_integer(arrow_type)
+
+
+def get_text_select_expression(column_sql: str) -> str:
+    """Returns the select list expression that fetches a NUMBER column as text - with a "." decimal separator,
+       whatever the session's NLS settings"""
+    return f"TO_CHAR({column_sql}, 'TM9', 'NLS_NUMERIC_CHARACTERS=''.,''')"
+
+
+def parse_arrow_type(type_name: str) -> Optional[pyarrow.DataType]:
+    """Parses an Arrow type name - i.e. int32, float64, string, timestamp[ms], decimal128(10,2), dictionary (of strings)
+       or inferred (the type inferred by the driver)"""
+    type_name = type_name.strip().lower()
+    if type_name == INFERRED_TYPE_ALIAS:
+        return None
+    if type_name == "dictionary":
+        return DICTIONARY_TYPE
+    decimal_match = re.fullmatch(r"decimal(?:128)?\((\d+)\s*,\s*(-?\d+)\)", type_name)
+    if decimal_match:
+        return pyarrow.decimal128(int(decimal_match.group(1)), int(decimal_match.group(2)))
+    try:
+        return pyarrow.type_for_alias(type_name)
+    except ValueError:
+        raise ValueError(f"Invalid column type: '{type_name}' - expected an Arrow type name (i.e. int32, string, timestamp[ms]),"
+                         f" decimal128(PRECISION,SCALE), dictionary or {INFERRED_TYPE_ALIAS}")
+
+
+def parse_column_type_overrides(option_values: Optional[List[str]]) -> ColumnTypeOverrides:
+    """Parses per-column type overrides of the form: [SCHEMA.]TABLE.COLUMN=TYPE"""
+    column_type_overrides = {}
+    for option_value in option_values or []:
+        column_spec, separator, type_name = option_value.partition("=")
+        table_spec, _, column_name = column_spec.strip().rpartition(".")
+        if not separator or not table_spec or not column_name:
+            raise ValueError(f"Invalid column type value: '{option_value}' - expected format: [SCHEMA.]TABLE.COLUMN=TYPE")
+
+        schema, _, table_name = table_spec.rpartition(".")
+        column_type_overrides[(schema or None, table_name, column_name.upper())] = parse_arrow_type(type_name=type_name)
+
+    return column_type_overrides
+
+
+def get_column_arrow_types(columns: List[ColumnMetadata],
+                           schema: str,
+                           table_name: str,
+                           column_type_overrides: Optional[ColumnTypeOverrides] = None,
+                           lowercase: bool = False,
+                           type_mapping: bool = True
+                           ) -> Dict[str, pyarrow.DataType]:
+    """Returns the Arrow type to cast each column to - keyed by the column's (exported) name.  Without type mapping,
+       only the intervals are cast."""
+    column_type_overrides = column_type_overrides or {}
+    column_types = {}
+    for column in columns:
+        column_key = column.column_name.upper()
+        if not type_mapping:
+            arrow_type = get_interval_arrow_type(column=column)
+        elif (schema, table_name, column_key) in column_type_overrides:
+            arrow_type = column_type_overrides[(schema, table_name, column_key)]
+        elif (None, table_name, column_key) in column_type_overrides:
+            arrow_type = column_type_overrides[(None, table_name, column_key)]
+        else:
+            arrow_type = get_arrow_type(column=column)
+
+        if arrow_type is not None:
+            column_types[column.column_name.lower() if lowercase else column.column_name] = arrow_type
+
+    return column_types
+
+
+def cast_column(column: pyarrow.ChunkedArray,
+                arrow_type: pyarrow.DataType
+                ) -> pyarrow.ChunkedArray:
+    if pyarrow.types.is_decimal(arrow_type) and pyarrow.types.is_integer(column.type):
+        # Integers only cast to decimals wide enough for any integer of their type - so go through the widest decimal,
+        # the narrowing cast then checks that the actual values fit
+        column = column.cast(pyarrow.decimal128(MAX_DECIMAL_PRECISION, max(arrow_type.scale, 0)))
+    elif pyarrow.types.is_duration(arrow_type) and not pyarrow.types.is_integer(column.type):
+        column = column.cast(pyarrow.int64())
+    return column.cast(arrow_type)
+
+
+def cast_table(pyarrow_table: pyarrow.Table,
+               column_types: Dict[str, pyarrow.DataType]
+               ) -> pyarrow.Table:
+    """Casts the columns of a fetched batch to their mapped types (a vectorized, safe cast - values that do not fit
+       raise an error rather than being truncated).  Exact types are cast from the text of NUMBER columns - never from
+       doubles, which would have rounded the values already (see: is_fetched_as_text)."""
+    for i, field in enumerate(pyarrow_table.schema):
+        arrow_type = column_types.get(field.name)
+        if arrow_type is not None and field.type != arrow_type:
+            pyarrow_table = pyarrow_table.set_column(i, field.name, cast_column(column=pyarrow_table.column(i),
+                                                                               arrow_type=arrow_type
+                                                                               ))
+    return pyarrow_table
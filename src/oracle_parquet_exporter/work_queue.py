@@ -0,0 +1,339 @@
+import datetime
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .serialization import read_json_file, write_json_file_atomically
+
+# Constants
+WORK_QUEUE_DIRECTORY_NAME: str = "_work_queue"
+WORK_QUEUE_MANIFEST_FILE_NAME: str = "manifest.json"
+WORK_QUEUE_VERSION: int = 1
+WORK_QUEUE_ROLE_COORDINATOR: str = "coordinator"
+WORK_QUEUE_ROLE_WORKER: str = "worker"
+WORK_QUEUE_ROLES: List[str] = [WORK_QUEUE_ROLE_COORDINATOR, WORK_QUEUE_ROLE_WORKER]
+DEFAULT_LEASE_DURATION: int = 300  # seconds
+LEASE_RENEWALS_PER_DURATION: int = 3  # So a lease survives a missed renewal or two
+LEASE_FILE_SUFFIX: str = ".lease"
+ATTEMPT_DIRECTORY_INFIX: str = ".attempt-"
+WORK_QUEUE_POLL_INTERVAL: float = 1.0  # seconds - between claims, while the remaining tables are leased by other workers
+DEFAULT_MANIFEST_WAIT_SECONDS: float = 600.0  # Workers may be started before the coordinator has published the queue
+
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def get_timestamp() -> str:
+    return datetime.datetime.now(tz=datetime.timezone.utc).isoformat()
+
+
+@dataclass
+class WorkQueueTask:
+    """A table to export - one entry of the work queue"""
+    schema: str
+    table_name: str
+
+    @property
+    def task_id(self) -> str:
+        return f"{self.schema}.{self.table_name}"
+
+
+@dataclass
+class Lease:
+    """A worker's claim on a task.  Each claim (or reclaim) of a task creates the lease file of its next generation -
+       with an exclusive create, so exactly one worker wins each generation."""
+    task: WorkQueueTask
+    worker_id: str
+    generation: int
+    lease_file: Path
+    expires_at: float
+
+
+class WorkQueue:
+    """A queue of tables to export, shared by any number of worker processes (on one or many hosts) through a
+       directory on shared storage.
+
+       The coordinator publishes the manifest - the tables to export and the SCN to read them as of.  Workers claim
+       tables with lease files, export them, and mark them done.  A worker renews its lease while it exports - a lease
+       that is not renewed in time (i.e. its worker crashed) expires, and the table is reclaimed by another worker.
+
+       Each attempt at a table is written to its own directory - only renamed into place if the attempt still holds
+       its lease once it completes, so a worker that lost its lease (i.e. it stalled) never publishes its output.
+
+       Lease expiry compares wall clock times across hosts - so their clocks must be synchronized (i.e. with NTP) to
+       well within the lease duration."""
+
+    def __init__(self,
+                 directory: str,
+                 lease_duration: float = DEFAULT_LEASE_DURATION
+                 ):
+        self.directory = Path(directory)
+        self.lease_duration = lease_duration
+        self.manifest_file = self.directory / WORK_QUEUE_MANIFEST_FILE_NAME
+        self._manifest: Dict[str, Any] = {}
+
+        if lease_duration <= 0:
+            raise ValueError(f"Lease duration must be positive, got: {lease_duration}")
+
+    @property
+    def exists(self) -> bool:
+        return self.manifest_file.exists()
+
+    @property
+    def scn(self) -> Optional[int]:
+        return self._manifest.get("scn")
+
+    @property
+    def schemas(self) -> List[str]:
+        return self._manifest.get("schemas", [])
+
+    @property
+    def table_name_include_pattern(self) -> Optional[str]:
+        return self._manifest.get("table_name_include_pattern")
+
+    @property
+    def table_name_exclude_pattern(self) -> Optional[str]:
+        return self._manifest.get("table_name_exclude_pattern")
+
+    @property
+    def tasks(self) -> List[WorkQueueTask]:
+        return [WorkQueueTask(**task) for task in self._manifest.get("tasks", [])]
+
+    def clear(self):
+        """Removes the manifest, leases and done markers of a previous export"""
+        shutil.rmtree(path=self.directory, ignore_errors=True)
+
+    def publish(self,
+                scn: int,
+                schemas: List[str],
+                table_name_include_pattern: Optional[str],
+                table_name_exclude_pattern: Optional[str],
+                tasks: List[WorkQueueTask]
+                ):
+        self._manifest = dict(version=WORK_QUEUE_VERSION,
+                              scn=scn,
+                              schemas=schemas,
+                              table_name_include_pattern=table_name_include_pattern,
+                              table_name_exclude_pattern=table_name_exclude_pattern,
+                              published_at=get_timestamp(),
+                              tasks=[dict(schema=task.schema, table_name=task.table_name) for task in tasks]
+                              )
+        write_json_file_atomically(file_path=self.manifest_file,
+                                   contents=self._manifest
+                                   )
+
+    def load(self,
+             timeout: float = DEFAULT_MANIFEST_WAIT_SECONDS,
+             poll_interval: float = WORK_QUEUE_POLL_INTERVAL
+             ):
+        """Loads the manifest - waiting for the coordinator to publish it"""
+        deadline = time.monotonic() + timeout
+        while not self.exists:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"The work queue manifest: {self.manifest_file.as_posix()} was not published within: {timeout} seconds.")
+            time.sleep(poll_interval)
+
+        self._manifest = read_json_file(file_path=self.manifest_file)
+
+    def get_done_file(self, task: WorkQueueTask) -> Path:
+        return self.directory / "done" / f"{task.task_id}.json"
+
+    def get_lease_directory(self, task: WorkQueueTask) -> Path:
+        return self.directory / "leases" / task.task_id
+
+    def is_task_done(self, task: WorkQueueTask) -> bool:
+        return self.get_done_file(task=task).exists()
+
+    def get_task_result(self, task: WorkQueueTask) -> Dict[str, Any]:
+        """Returns what the worker that completed a task recorded in its done marker"""
+        return read_json_file(file_path=self.get_done_file(task=task))
+
+    @property
+    def is_complete(self) -> bool:
+        return all(self.is_task_done(task=task) for task in self.tasks)
+
+    def wait_until_complete(self, poll_interval: float = WORK_QUEUE_POLL_INTERVAL):
+        """Waits for the workers to complete every task - for as long as it takes, as expired leases are reclaimed"""
+        while not self.is_complete:
+            time.sleep(poll_interval)
+
+    def get_current_lease(self, task: WorkQueueTask) -> Optional[Lease]:
+        """Returns the lease of the latest generation of a task - or None if it was never claimed"""
+        lease_files = sorted(self.get_lease_directory(task=task).glob(f"*{LEASE_FILE_SUFFIX}"))
+        if not lease_files:
+            return None
+
+        lease_file = lease_files[-1]
+        try:
+            lease = read_json_file(file_path=lease_file)
+        except json.JSONDecodeError:
+            # Created, but not yet written - or its worker crashed in between: it expires a lease duration after creation
+            lease = dict(worker_id=None,
+                         expires_at=lease_file.stat().st_mtime + self.lease_duration
+                         )
+
+        return Lease(task=task,
+                     worker_id=lease["worker_id"],
+                     generation=int(lease_file.name.removesuffix(LEASE_FILE_SUFFIX)),
+                     lease_file=lease_file,
+                     expires_at=lease["expires_at"]
+                     )
+
+    def claim(self,
+              task: WorkQueueTask,
+              worker_id: str
+              ) -> Optional[Lease]:
+        """Claims a task that was never claimed, or whose lease expired - returning None if it is held (or done)"""
+        if self.is_task_done(task=task):
+            return None
+
+        current_lease = self.get_current_lease(task=task)
+        if current_lease is not None and current_lease.expires_at > time.time():
+            return None
+
+        generation = current_lease.generation + 1 if current_lease is not None else 0
+        lease_directory = self.get_lease_directory(task=task)
+        lease_directory.mkdir(parents=True, exist_ok=True)
+        lease = Lease(task=task,
+                      worker_id=worker_id,
+                      generation=generation,
+                      lease_file=lease_directory / f"{generation:08d}{LEASE_FILE_SUFFIX}",
+                      expires_at=time.time() + self.lease_duration
+                      )
+        try:
+            file_descriptor = os.open(lease.lease_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # Another worker claimed this generation first
+            return None
+
+        with os.fdopen(file_descriptor, "w") as f:
+            json.dump(self._get_lease_contents(lease=lease), f)
+
+        if self.is_task_done(task=task):
+            # The previous holder completed the task just as its lease expired
+            self.release(lease=lease)
+            return None
+
+        return lease
+
+    def claim_next_task(self, worker_id: str) -> Optional[Lease]:
+        for task in self.tasks:
+            lease = self.claim(task=task,
+                               worker_id=worker_id
+                               )
+            if lease is not None:
+                return lease
+
+        return None
+
+    @staticmethod
+    def _get_lease_contents(lease: Lease) -> Dict[str, Any]:
+        return dict(worker_id=lease.worker_id,
+                    generation=lease.generation,
+                    expires_at=lease.expires_at,
+                    renewed_at=get_timestamp()
+                    )
+
+    def is_held(self, lease: Lease) -> bool:
+        """Whether a lease is still the latest generation of its task - i.e. it was not reclaimed by another worker"""
+        current_lease = self.get_current_lease(task=lease.task)
+        return current_lease is not None and current_lease.generation == lease.generation
+
+    def renew(self, lease: Lease) -> bool:
+        """Extends a lease by the lease duration - returning False if it was lost to another worker"""
+        if not self.is_held(lease=lease):
+            return False
+
+        lease.expires_at = time.time() + self.lease_duration
+        write_json_file_atomically(file_path=lease.lease_file,
+                                   contents=self._get_lease_contents(lease=lease)
+                                   )
+        return True
+
+    def release(self, lease: Lease):
+        """Expires a lease now - so that another worker can claim the task without waiting (i.e. after a failure)"""
+        if not self.is_held(lease=lease):
+            return
+
+        lease.expires_at = 0.0
+        write_json_file_atomically(file_path=lease.lease_file,
+                                   contents=self._get_lease_contents(lease=lease)
+                                   )
+
+    @staticmethod
+    def get_attempt_output_path(output_path: Path,
+                                lease: Lease
+                                ) -> Path:
+        return output_path.with_name(f"{output_path.name}{ATTEMPT_DIRECTORY_INFIX}{lease.generation}")
+
+    def complete(self,
+                 lease: Lease,
+                 output_path: Path,
+                 result: Optional[Dict[str, Any]] = None
+                 ) -> bool:
+        """Moves the output of a lease's attempt into place and marks its task done - returning False (and discarding
+           the output) if the lease was lost to another worker"""
+        attempt_output_path = self.get_attempt_output_path(output_path=output_path,
+                                                           lease=lease
+                                                           )
+        if not self.is_held(lease=lease):
+            shutil.rmtree(path=attempt_output_path, ignore_errors=True)
+            return False
+
+        # A previous holder may have moved its output into place, and crashed before marking the task done
+        if output_path.exists():
+            shutil.rmtree(path=output_path)
+        if attempt_output_path.exists():
+            attempt_output_path.rename(output_path)
+
+        # The output of attempts that lost their lease
+        for stale_attempt_output_path in output_path.parent.glob(f"{output_path.name}{ATTEMPT_DIRECTORY_INFIX}*"):
+            shutil.rmtree(path=stale_attempt_output_path, ignore_errors=True)
+
+        write_json_file_atomically(file_path=self.get_done_file(task=lease.task),
+                                   contents=dict(worker_id=lease.worker_id,
+                                                 generation=lease.generation,
+                                                 completed_at=get_timestamp(),
+                                                 **(result or {})
+                                                 )
+                                   )
+        return True
+
+
+class LeaseRenewer:
+    """Renews a lease on a background thread while its task runs - recording whether it was lost"""
+
+    def __init__(self,
+                 work_queue: WorkQueue,
+                 lease: Lease
+                 ):
+        self.work_queue = work_queue
+        self.lease = lease
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._renew,
+                                        name=f"lease_renewer_{lease.task.task_id}",
+                                        daemon=True
+                                        )
+
+    def _renew(self):
+        interval = self.work_queue.lease_duration / LEASE_RENEWALS_PER_DURATION
+        while not self._stopped.wait(timeout=interval):
+            if not self.work_queue.renew(lease=self.lease):
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stopped.set()
+        self._thread.join()
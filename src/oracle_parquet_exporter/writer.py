@@ -0,0 +1,417 @@
+import itertools
+import posixpath
+import pyarrow
+import pyarrow.fs
+import pyarrow.ipc
+import pyarrow.parquet as pq
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .sinks import (FILE_EXTENSIONS, OUTPUT_FORMAT_ARROW, OUTPUT_FORMAT_ARROW_STREAM, OUTPUT_FORMAT_PARQUET,
+                    create_directory, get_arrow_ipc_compression, get_stdout_sink, is_local_filesystem, list_files,
+                    path_exists)
+from .sorting import SortKey, get_sorting_columns
+from .writer_policy import WriterPolicy
+
+# Constants
+DEFAULT_PARQUET_ROW_GROUP_SIZE: int = 128_000_000  # 128MB (uncompressed)
+INITIAL_COMPRESSION_RATIO: float = 1.0
+MIN_COMPRESSION_RATIO: float = 0.001
+MIN_ROW_GROUP_FILE_FRACTION: float = 0.1  # A row group is not started in the last 10% of a file
+TEMPORARY_FILE_SUFFIX: str = ".tmp"
+
+
+class CompressionRatioEstimator:
+    """Learns the ratio of on-disk (compressed) bytes to in-memory (uncompressed) Arrow bytes from the row groups
+       written so far - so the on-disk size of the next row group can be predicted before it is written"""
+
+    def __init__(self):
+        self.uncompressed_bytes: int = 0
+        self.compressed_bytes: int = 0
+
+    def record(self,
+               uncompressed_bytes: int,
+               compressed_bytes: int
+               ):
+        self.uncompressed_bytes += uncompressed_bytes
+        self.compressed_bytes += compressed_bytes
+
+    @property
+    def ratio(self) -> float:
+        if self.uncompressed_bytes == 0:
+            return INITIAL_COMPRESSION_RATIO
+        return self.compressed_bytes / self.uncompressed_bytes
+
+    def estimate_compressed_bytes(self,
+                                  uncompressed_bytes: int
+                                  ) -> int:
+        return int(uncompressed_bytes * self.ratio)
+
+
+class ParquetPartWriter:
+    """Writes a stream of Arrow tables to a sequence of <prefix>_<n>.parquet part files - on the local filesystem, or
+       any pyarrow filesystem (i.e. S3, where each part file is streamed with a multipart upload).
+
+       Fetched batches are coalesced into row groups of (roughly) row_group_size uncompressed bytes - independent of
+       the fetch batch size.  Files are rolled over based upon the actual number of compressed bytes written to disk,
+       using the learned compression ratio to avoid starting a row group that would push a file past max_file_size.
+       Row groups are also capped at the uncompressed size predicted to fill a whole file - so a small max_file_size is
+       not overshot by a single (large) row group.
+
+       Each part file is written under a temporary name, and only renamed to its final name once it has been closed
+       successfully - so a crash never leaves a truncated part file behind.  Object stores have no (cheap) renames - but
+       an object only appears once its upload completes, so part files are written under their final name there (and
+       deleted if they fail).
+
+       The rows of a clustered table arrive sorted by its sort keys - which are recorded in the sorting_columns metadata
+       of each parquet file, so that readers can rely on the order."""
+    file_extension: str = FILE_EXTENSIONS[OUTPUT_FORMAT_PARQUET]
+
+    def __init__(self,
+                 output_path_prefix: str,
+                 file_name_prefix: str,
+                 compression: str,
+                 max_file_size: int,
+                 row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE,
+                 file_numbers: Optional[Iterator[int]] = None,
+                 compression_ratio_estimator: Optional[CompressionRatioEstimator] = None,
+                 on_file_committed: Optional[Callable[[str, int], None]] = None,
+                 writer_policy: Optional[WriterPolicy] = None,
+                 filesystem: Optional[pyarrow.fs.FileSystem] = None,
+                 sort_keys: Optional[List[SortKey]] = None
+                 ):
+        self.output_path_prefix = output_path_prefix
+        self.file_name_prefix = file_name_prefix
+        self.compression = compression
+        self.max_file_size = max_file_size
+        self.row_group_size = row_group_size
+        self.file_numbers = file_numbers if file_numbers is not None else itertools.count()
+        self.compression_ratio_estimator = compression_ratio_estimator or CompressionRatioEstimator()
+        self.on_file_committed = on_file_committed
+        self.writer_policy = writer_policy
+        self.filesystem = filesystem or pyarrow.fs.LocalFileSystem()
+        self.sort_keys = sort_keys
+
+        self._writer_options: Optional[Dict[str, Any]] = None
+        self._file_name: Optional[str] = None
+        self._file_rows: int = 0
+        self._sink: Optional[pyarrow.NativeFile] = None
+        self._format_writer = None
+        self._buffer: List[pyarrow.Table] = []
+        self._buffered_bytes: int = 0
+
+        self.file_names: List[str] = []
+        # The footers of the committed part files - for the table's consolidated _metadata file
+        self.file_metadata: Dict[str, pq.FileMetaData] = {}
+        self.rows_written: int = 0
+        self.row_groups_written: int = 0
+        self.uncompressed_bytes_written: int = 0
+        self.compressed_bytes_written: int = 0
+
+    def __enter__(self) -> "ParquetPartWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_file(commit=False)
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._buffered_bytes
+
+    @property
+    def current_file_size(self) -> int:
+        return self._sink.tell() if self._sink else 0
+
+    @property
+    def max_row_group_bytes(self) -> float:
+        """The uncompressed size of a row group - no larger than what is predicted to fill a whole file"""
+        return min(self.row_group_size, self.max_file_size / max(self.compression_ratio_estimator.ratio, MIN_COMPRESSION_RATIO))
+
+    def write(self,
+              pyarrow_table: pyarrow.Table
+              ):
+        self._buffer.append(pyarrow_table)
+        self._buffered_bytes += pyarrow_table.nbytes
+
+        if self._buffered_bytes >= self.max_row_group_bytes:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+
+        pyarrow_table = pyarrow.concat_tables(self._buffer)
+        self._buffer = []
+        self._buffered_bytes = 0
+
+        # A large buffer (or batch) is split - so that no row group outgrows a file
+        row_bytes = pyarrow_table.nbytes / max(pyarrow_table.num_rows, 1)
+        offset = 0
+        while offset < pyarrow_table.num_rows:
+            max_row_group_bytes = self.max_row_group_bytes
+            if self._format_writer:
+                # Fill the rest of the current file - or start the next one, if little room is left
+                remaining_file_size = self.max_file_size - self.current_file_size
+                if remaining_file_size < self.max_file_size * MIN_ROW_GROUP_FILE_FRACTION:
+                    self._close_file()
+                else:
+                    max_row_group_bytes = min(max_row_group_bytes,
+                                              remaining_file_size / max(self.compression_ratio_estimator.ratio, MIN_COMPRESSION_RATIO))
+            slice_rows = max(int(max_row_group_bytes / row_bytes), 1) if row_bytes else pyarrow_table.num_rows
+            self.write_buffered_row_group(row_group=pyarrow_table.slice(offset, slice_rows))
+            offset += slice_rows
+
+    def write_buffered_row_group(self, row_group: pyarrow.Table):
+        uncompressed_bytes = row_group.nbytes
+        # Roll over to a new file if this row group is predicted to push the current file past the target size
+        if self._format_writer and (self.current_file_size
+                                + self.compression_ratio_estimator.estimate_compressed_bytes(uncompressed_bytes)
+                                > self.max_file_size):
+            self._close_file()
+
+        if not self._format_writer:
+            self._open_file(schema=row_group.schema,
+                            sample=row_group
+                            )
+
+        file_size_before = self.current_file_size
+        self.write_row_group(row_group=row_group)
+        compressed_bytes = self.current_file_size - file_size_before
+
+        self.compression_ratio_estimator.record(uncompressed_bytes=uncompressed_bytes,
+                                                compressed_bytes=compressed_bytes
+                                                )
+        self._file_rows += row_group.num_rows
+        self.rows_written += row_group.num_rows
+        self.row_groups_written += 1
+        self.uncompressed_bytes_written += uncompressed_bytes
+        self.compressed_bytes_written += compressed_bytes
+
+        if self.current_file_size >= self.max_file_size:
+            self._close_file()
+
+    def close(self):
+        self.flush()
+        self._close_file()
+
+    def get_writer_options(self,
+                           schema: pyarrow.Schema,
+                           sample: Optional[pyarrow.Table] = None
+                           ) -> Dict[str, Any]:
+        # Resolved once (from the first row group) - so that all of the part files are encoded alike
+        if self._writer_options is None:
+            if self.writer_policy:
+                self._writer_options = self.writer_policy.get_writer_options(schema=schema,
+                                                                             default_compression=self.compression,
+                                                                             sample=sample
+                                                                             )
+            else:
+                self._writer_options = dict(compression=self.compression)
+            if self.sort_keys:
+                self._writer_options["sorting_columns"] = get_sorting_columns(schema=schema,
+                                                                              sort_keys=self.sort_keys
+                                                                              )
+        return self._writer_options
+
+    def open_format_writer(self,
+                           schema: pyarrow.Schema,
+                           sample: Optional[pyarrow.Table] = None
+                           ):
+        return pq.ParquetWriter(where=self._sink,
+                                schema=schema,
+                                **self.get_writer_options(schema=schema,
+                                                          sample=sample
+                                                          )
+                                )
+
+    def write_row_group(self, row_group: pyarrow.Table):
+        self._format_writer.write_table(table=row_group,
+                                        row_group_size=max(row_group.num_rows, 1)
+                                        )
+
+    def get_file_metadata(self) -> Optional[pq.FileMetaData]:
+        # Only available once the format writer is closed
+        return self._format_writer.writer.metadata
+
+    @property
+    def _uses_temporary_files(self) -> bool:
+        return is_local_filesystem(filesystem=self.filesystem)
+
+    @property
+    def _sink_file_name(self) -> str:
+        return f"{self._file_name}{TEMPORARY_FILE_SUFFIX}" if self._uses_temporary_files else self._file_name
+
+    def _open_file(self,
+                   schema: pyarrow.Schema,
+                   sample: Optional[pyarrow.Table] = None
+                   ):
+        create_directory(filesystem=self.filesystem,
+                         path=self.output_path_prefix
+                         )
+        self._file_name = f"{self.output_path_prefix}/{self.file_name_prefix}_{next(self.file_numbers)}.{self.file_extension}"
+        self._file_rows = 0
+        self._sink = self.filesystem.open_output_stream(self._sink_file_name)
+        self._format_writer = self.open_format_writer(schema=schema,
+                                                      sample=sample
+                                                      )
+
+    def _close_file(self,
+                    commit: bool = True
+                    ):
+        if not self._file_name:
+            return
+
+        sink_file_name = self._sink_file_name
+        try:
+            try:
+                if self._format_writer:
+                    self._format_writer.close()
+            finally:
+                if self._sink and not self._sink.closed:
+                    self._sink.close()
+
+            if commit:
+                if sink_file_name != self._file_name:
+                    self.filesystem.move(sink_file_name, self._file_name)
+                self.file_names.append(self._file_name)
+                file_metadata = self.get_file_metadata()
+                if file_metadata is not None:
+                    self.file_metadata[self._file_name] = file_metadata
+                if self.on_file_committed:
+                    self.on_file_committed(self._file_name, self._file_rows)
+        except BaseException:
+            commit = False
+            raise
+        finally:
+            if not commit and self._sink is not None and path_exists(filesystem=self.filesystem, path=sink_file_name):
+                self.filesystem.delete_file(sink_file_name)
+            self._format_writer = None
+            self._sink = None
+            self._file_name = None
+            self._file_rows = 0
+
+
+class ArrowIpcPartWriter(ParquetPartWriter):
+    """Writes a stream of Arrow tables to a sequence of Arrow IPC (or Feather) part files - each row group is written
+       as record batches, with the buffers compressed (with ZSTD) unless the compression is "none".  Parquet writer
+       policies do not apply.
+
+       Dictionary-encoded columns are written as their value type - as each batch has a dictionary of its own, and the
+       IPC file format does not allow a dictionary to be replaced within a file."""
+
+    def __init__(self,
+                 *args,
+                 output_format: str = OUTPUT_FORMAT_ARROW,
+                 **kwargs
+                 ):
+        super().__init__(*args, **kwargs)
+        self.file_extension = FILE_EXTENSIONS[output_format]
+        self.ipc_compression = get_arrow_ipc_compression(compression=self.compression)
+        self._schema = None
+
+    def open_format_writer(self,
+                           schema: pyarrow.Schema,
+                           sample: Optional[pyarrow.Table] = None
+                           ):
+        self._schema = get_dictionary_value_schema(schema=schema)
+        return pyarrow.ipc.new_file(sink=self._sink,
+                                    schema=self._schema,
+                                    options=pyarrow.ipc.IpcWriteOptions(compression=self.ipc_compression)
+                                    )
+
+    def write_row_group(self, row_group: pyarrow.Table):
+        self._format_writer.write_table(row_group.cast(self._schema))
+
+    def get_file_metadata(self) -> Optional[pq.FileMetaData]:
+        return None
+
+
+class ArrowStreamWriter(ArrowIpcPartWriter):
+    """Writes a stream of Arrow tables as one Arrow IPC stream to stdout - i.e. to be piped into a database (such as
+       GizmoSQL) without staging files.  Several tables are written as consecutive streams, each ending with its own
+       end-of-stream marker.  (Unlike files, streams may replace dictionaries - so dictionary-encoded columns are kept.)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The stream is never rolled over to a new "file"
+        self.max_file_size = float("inf")
+
+    def _open_file(self,
+                   schema: pyarrow.Schema,
+                   sample: Optional[pyarrow.Table] = None
+                   ):
+        self._file_name = OUTPUT_FORMAT_ARROW_STREAM
+        self._file_rows = 0
+        self._sink = get_stdout_sink()
+        self._schema = schema
+        self._format_writer = pyarrow.ipc.new_stream(sink=self._sink,
+                                                     schema=schema,
+                                                     options=pyarrow.ipc.IpcWriteOptions(compression=self.ipc_compression)
+                                                     )
+
+    def _close_file(self,
+                    commit: bool = True
+                    ):
+        if not self._file_name:
+            return
+
+        try:
+            # Writes the end-of-stream marker - and flushes stdout (leaving it open)
+            self._format_writer.close()
+            self._sink.close()
+        finally:
+            self._format_writer = None
+            self._sink = None
+            self._file_name = None
+            self._file_rows = 0
+
+
+def create_part_writer(output_format: str = OUTPUT_FORMAT_PARQUET,
+                       **kwargs
+                       ) -> ParquetPartWriter:
+    """Returns a part writer for an output format - taking the keyword arguments of ParquetPartWriter"""
+    if output_format == OUTPUT_FORMAT_PARQUET:
+        return ParquetPartWriter(**kwargs)
+    if output_format == OUTPUT_FORMAT_ARROW_STREAM:
+        return ArrowStreamWriter(output_format=OUTPUT_FORMAT_ARROW, **kwargs)
+    return ArrowIpcPartWriter(output_format=output_format, **kwargs)
+
+
+def get_dictionary_value_schema(schema: pyarrow.Schema) -> pyarrow.Schema:
+    """Returns a schema with the dictionary-encoded fields replaced by fields of their value type"""
+    return pyarrow.schema([field.with_type(field.type.value_type) if pyarrow.types.is_dictionary(field.type) else field
+                           for field in schema
+                           ], metadata=schema.metadata)
+
+
+def get_next_file_number(output_path_prefix: str,
+                         file_name_prefix: str,
+                         filesystem: Optional[pyarrow.fs.FileSystem] = None
+                         ) -> int:
+    """Returns the next unused part file number in a table's output directory (including any partition directories) -
+       so that new part files can be written next to the existing ones (i.e. for incremental exports)"""
+    file_numbers = []
+    for file_path in list_files(filesystem=filesystem or pyarrow.fs.LocalFileSystem(),
+                                path=output_path_prefix
+                                ):
+        file_stem, file_extension = posixpath.splitext(posixpath.basename(file_path))
+        file_number = file_stem[len(file_name_prefix) + 1:]
+        if (file_stem.startswith(f"{file_name_prefix}_") and file_extension.lstrip(".") in FILE_EXTENSIONS.values()
+                and file_number.isdigit()):
+            file_numbers.append(int(file_number))
+
+    return max(file_numbers) + 1 if file_numbers else 0
+
+
+def remove_temporary_files(output_path_prefix: str,
+                           filesystem: Optional[pyarrow.fs.FileSystem] = None
+                           ):
+    """Removes the uncommitted part files left behind by an interrupted run"""
+    filesystem = filesystem or pyarrow.fs.LocalFileSystem()
+    for file_path in list_files(filesystem=filesystem,
+                                path=output_path_prefix
+                                ):
+        if file_path.endswith(TEMPORARY_FILE_SUFFIX):
+            filesystem.delete_file(file_path)
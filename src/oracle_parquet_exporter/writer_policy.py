@@ -0,0 +1,176 @@
+import pyarrow
+import pyarrow.compute as pc
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .serialization import read_json_file
+
+# Constants
+COLUMN_ENCODINGS: List[str] = ["PLAIN", "BYTE_STREAM_SPLIT", "DELTA_BINARY_PACKED", "DELTA_LENGTH_BYTE_ARRAY", "DELTA_BYTE_ARRAY"]
+KEY_COLUMN_DATA_PAGE_SIZE: int = 128 * 1024  # Smaller pages let the page index narrow a point lookup down further
+AUTO_HIGH_CARDINALITY_RATIO: float = 0.5  # Distinct / non-null values in the sample above which dictionary encoding is not worthwhile
+DEFAULT_TABLE_KEY: str = "default"
+
+
+@dataclass
+class ColumnPolicy:
+    """Parquet writer settings for a single column - None leaves the setting to the table level (or pyarrow)"""
+    compression: Optional[str] = None
+    compression_level: Optional[int] = None
+    dictionary: Optional[bool] = None
+    encoding: Optional[str] = None
+    statistics: Optional[bool] = None
+
+    def __post_init__(self):
+        if self.encoding is not None:
+            self.encoding = self.encoding.upper()
+            if self.encoding not in COLUMN_ENCODINGS:
+                raise ValueError(f"Invalid column encoding: '{self.encoding}' - expected one of: {COLUMN_ENCODINGS}")
+
+    def merge(self, other: "ColumnPolicy") -> "ColumnPolicy":
+        """Returns this policy with the settings of other (where set) taking precedence"""
+        return ColumnPolicy(**{policy_field.name: getattr(other, policy_field.name)
+                                                  if getattr(other, policy_field.name) is not None
+                                                  else getattr(self, policy_field.name)
+                               for policy_field in fields(self)})
+
+
+@dataclass
+class WriterPolicy:
+    """Parquet writer settings for a table.  Key columns (i.e. those used for point lookups) get statistics and a page
+       index - written with smaller data pages.  In auto mode, column encodings are chosen from the Arrow column types
+       and the cardinality observed in the first row group - explicitly configured column settings take precedence."""
+    compression: Optional[str] = None
+    compression_level: Optional[int] = None
+    data_page_size: Optional[int] = None
+    dictionary_page_size_limit: Optional[int] = None
+    write_page_index: bool = False
+    key_columns: List[str] = field(default_factory=list)
+    columns: Dict[str, ColumnPolicy] = field(default_factory=dict)
+    auto: bool = False
+
+    @classmethod
+    def from_dict(cls, policy: Dict[str, Any]) -> "WriterPolicy":
+        policy = dict(policy)
+        policy["columns"] = {column_name.upper(): ColumnPolicy(**column_policy)
+                             for column_name, column_policy in policy.get("columns", {}).items()}
+        policy["key_columns"] = [column_name.upper() for column_name in policy.get("key_columns", [])]
+        return cls(**policy)
+
+    def merge(self, policy: Dict[str, Any]) -> "WriterPolicy":
+        """Returns this policy overlaid with a (table's) policy dict - column settings are merged per setting"""
+        table_policy = WriterPolicy.from_dict(policy=policy)
+        merged_policy = WriterPolicy(**{policy_field.name: getattr(self, policy_field.name) for policy_field in fields(self)})
+        for policy_field in fields(self):
+            if policy_field.name in policy and policy_field.name not in ("columns", "key_columns"):
+                setattr(merged_policy, policy_field.name, getattr(table_policy, policy_field.name))
+        merged_policy.key_columns = self.key_columns + [column_name for column_name in table_policy.key_columns
+                                                        if column_name not in self.key_columns]
+        merged_policy.columns = dict(self.columns)
+        for column_name, column_policy in table_policy.columns.items():
+            merged_policy.columns[column_name] = merged_policy.columns.get(column_name, ColumnPolicy()).merge(column_policy)
+        return merged_policy
+
+    def get_auto_column_policy(self,
+                               arrow_field: pyarrow.Field,
+                               sample: Optional[pyarrow.Table]
+                               ) -> ColumnPolicy:
+        arrow_type = arrow_field.type
+        if pyarrow.types.is_dictionary(arrow_type):
+            return ColumnPolicy(dictionary=True)
+        if pyarrow.types.is_large_binary(arrow_type) or pyarrow.types.is_large_string(arrow_type):
+            # LOB values - statistics (min/max) of large values are of no use for pruning
+            return ColumnPolicy(dictionary=False, statistics=False)
+
+        high_cardinality = False
+        if sample is not None and sample.num_rows > 0:
+            column = sample.column(arrow_field.name)
+            non_null_count = len(column) - column.null_count
+            if non_null_count > 0:
+                high_cardinality = pc.count_distinct(column).as_py() / non_null_count > AUTO_HIGH_CARDINALITY_RATIO
+
+        if not high_cardinality:
+            return ColumnPolicy(dictionary=True)
+        if pyarrow.types.is_floating(arrow_type):
+            return ColumnPolicy(dictionary=False, encoding="BYTE_STREAM_SPLIT")
+        if (pyarrow.types.is_integer(arrow_type) and arrow_type.bit_width >= 32) or pyarrow.types.is_timestamp(arrow_type):
+            return ColumnPolicy(dictionary=False, encoding="DELTA_BINARY_PACKED")
+        if pyarrow.types.is_string(arrow_type) or pyarrow.types.is_binary(arrow_type):
+            return ColumnPolicy(dictionary=False, encoding="DELTA_LENGTH_BYTE_ARRAY")
+        return ColumnPolicy(dictionary=False)
+
+    def get_writer_options(self,
+                           schema: pyarrow.Schema,
+                           default_compression: str,
+                           sample: Optional[pyarrow.Table] = None
+                           ) -> Dict[str, Any]:
+        """Returns the pq.ParquetWriter keyword arguments for a file with this schema"""
+        column_policies = {}
+        for arrow_field in schema:
+            column_policy = self.get_auto_column_policy(arrow_field=arrow_field, sample=sample) if self.auto else ColumnPolicy()
+            column_policy = column_policy.merge(self.columns.get(arrow_field.name.upper(), ColumnPolicy()))
+            if arrow_field.name.upper() in self.key_columns:
+                column_policy = column_policy.merge(ColumnPolicy(statistics=True))
+            if column_policy.encoding is not None:
+                # Dictionary encoding takes precedence over any other encoding - so it must be off for the encoding to apply
+                column_policy.dictionary = False
+            column_policies[arrow_field.name] = column_policy
+
+        compression = self.compression or default_compression
+        writer_options = dict(compression={column_name: column_policy.compression or compression
+                                           for column_name, column_policy in column_policies.items()},
+                              use_dictionary=[column_name for column_name, column_policy in column_policies.items()
+                                              if column_policy.dictionary is not False],
+                              write_statistics=[column_name for column_name, column_policy in column_policies.items()
+                                                if column_policy.statistics is not False],
+                              write_page_index=self.write_page_index or bool(self.key_columns)
+                              )
+
+        column_encodings = {column_name: column_policy.encoding for column_name, column_policy in column_policies.items()
+                            if column_policy.encoding is not None}
+        if column_encodings:
+            writer_options["column_encoding"] = column_encodings
+
+        compression_levels = {column_name: column_policy.compression_level or self.compression_level
+                              for column_name, column_policy in column_policies.items()
+                              if (column_policy.compression_level or self.compression_level) is not None}
+        if compression_levels:
+            writer_options["compression_level"] = compression_levels
+
+        data_page_size = self.data_page_size or (KEY_COLUMN_DATA_PAGE_SIZE if self.key_columns else None)
+        if data_page_size:
+            writer_options["data_page_size"] = data_page_size
+        if self.dictionary_page_size_limit:
+            writer_options["dictionary_pagesize_limit"] = self.dictionary_page_size_limit
+
+        return writer_options
+
+
+class WriterPolicies:
+    """The writer policies of all tables - read from a JSON file of the form:
+       {"default": {<policy>}, "tables": {"[SCHEMA.]TABLE": {<policy>}, ...}}
+       where a table's policy is overlaid on the default one (a schema-qualified entry takes precedence)."""
+
+    def __init__(self,
+                 policy_file: Optional[str] = None,
+                 auto: bool = False
+                 ):
+        policies = read_json_file(file_path=Path(policy_file)) if policy_file else {}
+        self.default_policy = WriterPolicy(auto=auto).merge(policy=policies.get(DEFAULT_TABLE_KEY, {}))
+        self.table_policies: Dict[str, Dict[str, Any]] = {table_key.upper(): table_policy
+                                                          for table_key, table_policy in policies.get("tables", {}).items()}
+
+        # Validate the table policies up front - rather than part-way through an export
+        for table_policy in self.table_policies.values():
+            self.default_policy.merge(policy=table_policy)
+
+    def get_table_policy(self,
+                         schema: str,
+                         table_name: str
+                         ) -> WriterPolicy:
+        policy = self.default_policy
+        for table_key in (table_name.upper(), f"{schema}.{table_name}".upper()):
+            if table_key in self.table_policies:
+                policy = policy.merge(policy=self.table_policies[table_key])
+        return policy
@@ -0,0 +1,134 @@
+import json
+import logging
+
+import pyarrow
+import pyarrow.parquet as pq
+import pytest
+
+from oracle_parquet_exporter.async_engine import ENGINE_ASYNC
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable, run_benchmark
+from oracle_parquet_exporter.dataset_metadata import DATASET_MANIFEST_FILE_NAME
+from oracle_parquet_exporter.sorting import CLUSTER_METHOD_LOCAL
+from oracle_parquet_exporter.work_queue import WORK_QUEUE_ROLE_COORDINATOR
+
+TABLES = [SyntheticTable(table_name=f"REFERENCE_{table_number}", row_count=200, column_count=1)
+          for table_number in range(16)]
+BATCH_LATENCY: float = 0.02
+
+
+class FetchOrderConnection(SyntheticConnection):
+    """Records the tables in the order their fetches start"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetched_table_names = []
+
+    def make_df_batches(self, statement, parameters=None, **kwargs):
+        self.fetched_table_names.append(self.get_table(statement=statement).table_name)
+        yield from super().make_df_batches(statement, parameters, **kwargs)
+
+
+def get_exporter(output_directory: str, connection: SyntheticConnection, **kwargs) -> BenchmarkExporter:
+    return BenchmarkExporter(connection=connection,
+                             table_name_include_pattern=".*",
+                             table_name_exclude_pattern=None,
+                             output_directory=output_directory,
+                             overwrite=True,
+                             compression_method="zstd",
+                             batch_size=100,
+                             row_limit=-1,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=True,
+                             parquet_max_file_size=1_000_000_000,
+                             logger=logging.getLogger(),
+                             **kwargs
+                             )
+
+
+def test_async_engine_keeps_fetches_in_flight(tmp_path):
+    connection = SyntheticConnection(tables=TABLES, batch_latency=BATCH_LATENCY)
+    output_directory = tmp_path / "output"
+    get_exporter(output_directory=output_directory.as_posix(),
+                 connection=connection,
+                 engine=ENGINE_ASYNC,
+                 async_concurrency=8
+                 ).export_tables()
+
+    assert connection.max_fetches_in_flight == 8
+    for table in TABLES:
+        exported_table = pq.read_table(output_directory / "benchmark" / table.table_name.lower())
+        assert sorted(exported_table.column("id").to_pylist()) == list(range(200))
+
+    run_report = json.loads((output_directory / "_run_report.json").read_text())
+    assert len(run_report["tables"]) == len(TABLES)
+    assert all(table["batches"] == 2 and table["rows"] == 200 for table in run_report["tables"])
+    dataset_manifest = json.loads((output_directory / DATASET_MANIFEST_FILE_NAME).read_text())
+    assert len(dataset_manifest["tables"]) == len(TABLES)
+
+
+def test_async_engine_exports_locally_sorted_tables_synchronously(tmp_path):
+    connection = SyntheticConnection(tables=TABLES[:4])
+    output_directory = tmp_path / "output"
+    exporter = get_exporter(output_directory=output_directory.as_posix(),
+                            connection=connection,
+                            engine=ENGINE_ASYNC,
+                            cluster_by=["REFERENCE_1=ID:desc"],
+                            cluster_method=CLUSTER_METHOD_LOCAL
+                            )
+    exporter.export_tables()
+
+    assert pq.read_table(output_directory / "benchmark" / "reference_1").column("id").to_pylist() == list(reversed(range(200)))
+    assert pyarrow.concat_tables([pq.read_table(output_directory / "benchmark" / f"reference_{table_number}")
+                                  for table_number in range(4)]).num_rows == 800
+
+
+def test_synchronous_tasks_do_not_hold_up_async_ones(tmp_path):
+    connection = FetchOrderConnection(tables=TABLES[:5], batch_latency=BATCH_LATENCY)
+    get_exporter(output_directory=(tmp_path / "output").as_posix(),
+                 connection=connection,
+                 engine=ENGINE_ASYNC,
+                 async_concurrency=2,
+                 cluster_by=[f"REFERENCE_{table_number}=ID:desc" for table_number in range(4)],
+                 cluster_method=CLUSTER_METHOD_LOCAL
+                 ).export_tables()
+
+    # The sorted tables queue for the synchronous connection without holding a slot - so the last table is not held up
+    # until they are all exported
+    assert connection.fetched_table_names.index("REFERENCE_4") < connection.fetched_table_names.index("REFERENCE_1")
+
+
+def test_async_engine_degrades_under_memory_pressure(tmp_path):
+    exporter = get_exporter(output_directory=(tmp_path / "output").as_posix(),
+                            connection=SyntheticConnection(tables=TABLES[:8]),
+                            engine=ENGINE_ASYNC,
+                            async_concurrency=4,
+                            memory_limit=pyarrow.total_allocated_bytes() + 10_000
+                            )
+    exporter.export_tables()
+
+    assert sum(table.rows for table in exporter.run_metrics.tables) == 8 * 200
+    assert exporter.memory_accountant.limit_hit_count > 0
+    assert exporter.memory_accountant.outstanding_batches == 0
+
+
+def test_async_engine_benchmark(tmp_path):
+    results = run_benchmark(tables=TABLES[:8],
+                            sweep=dict(engine=["sync", ENGINE_ASYNC], async_concurrency=[8]),
+                            batch_latency=BATCH_LATENCY,
+                            repeat_count=1,
+                            output_directory=(tmp_path / "output").as_posix()
+                            )
+    sync_result, async_result = results
+    assert sync_result.rows == async_result.rows == 8 * 200
+    assert async_result.elapsed_seconds < sync_result.elapsed_seconds
+
+
+@pytest.mark.parametrize("kwargs", [dict(engine="fibers"),
+                                    dict(engine=ENGINE_ASYNC, work_queue_role=WORK_QUEUE_ROLE_COORDINATOR),
+                                    dict(engine=ENGINE_ASYNC, async_concurrency=0)])
+def test_invalid_async_engine_settings(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        get_exporter(output_directory=(tmp_path / "output").as_posix(),
+                     connection=SyntheticConnection(tables=TABLES),
+                     **kwargs
+                     )
@@ -39,3 +39,35 @@ def test_basics(oracle_server):
 
         assert table.num_rows > 0
         print(table.to_pandas())
+
+
+def test_parallelism(oracle_server):
+    schema_name = "SYSTEM"
+    table_name_include_pattern = "^(HELP|REDO_DB|REDO_LOG)$"
+
+    with TemporaryDirectory(dir=THIS_DIR) as tmpdir:
+        exporter(version=False,
+                 username="SYSTEM",
+                 password=ORACLE_PWD,
+                 hostname="localhost",
+                 service_name="FREEPDB1",
+                 port=ORACLE_PORT,
+                 schema=[schema_name],
+                 table_name_include_pattern=table_name_include_pattern,
+                 table_name_exclude_pattern="",
+                 output_directory=tmpdir,
+                 overwrite=True,
+                 compression_method="zstd",
+                 batch_size=10_000,
+                 row_limit=-1,
+                 isolation_level="SERIALIZABLE",
+                 lowercase_object_names=False,
+                 parquet_max_file_size=1_000_000_000,
+                 log_level="INFO",
+                 parallelism=2
+                 )
+
+        # The output layout is the same as a serial export
+        table = pq.read_table(f"{tmpdir}/{schema_name}/HELP/HELP_0.parquet")
+
+        assert table.num_rows > 0
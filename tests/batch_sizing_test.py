@@ -0,0 +1,78 @@
+import logging
+
+from oracle_parquet_exporter.batch_sizing import (MAX_ADAPTIVE_BATCH_SIZE, MIN_ADAPTIVE_BATCH_SIZE, AdaptiveBatchSizer,
+                                                  estimate_row_bytes)
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.catalog import ColumnMetadata, TableMetadata
+
+LOOKUP_TABLE = TableMetadata(schema="REF", table_name="COUNTRIES", avg_row_len=20,
+                             columns=[ColumnMetadata(column_name="ID", data_type="NUMBER", data_precision=4, data_scale=0),
+                                      ColumnMetadata(column_name="CODE", data_type="CHAR", data_length=2),
+                                      ColumnMetadata(column_name="NAME", data_type="VARCHAR2", data_length=100)])
+WIDE_TABLE = TableMetadata(schema="DW", table_name="FACTS",
+                           columns=[ColumnMetadata(column_name=f"MEASURE_{i}", data_type="VARCHAR2", data_length=4000)
+                                    for i in range(400)])
+
+
+def test_row_bytes_estimate():
+    # int16 ID, the average row length for the strings and their offsets
+    assert estimate_row_bytes(table=LOOKUP_TABLE) == 2 + 20 + 2 * 4
+    # No statistics - half the declared length of each string
+    assert estimate_row_bytes(table=WIDE_TABLE) == 400 * (2_000 + 4)
+
+
+def test_batch_size_follows_the_observed_batches():
+    assert AdaptiveBatchSizer(table=LOOKUP_TABLE).batch_size == MAX_ADAPTIVE_BATCH_SIZE
+    assert AdaptiveBatchSizer(table=WIDE_TABLE).batch_size == MIN_ADAPTIVE_BATCH_SIZE
+
+    batch_sizer = AdaptiveBatchSizer(table=LOOKUP_TABLE, batch_bytes_target=1_000_000)
+    assert batch_sizer.batch_size == 1_000_000 // 30
+
+    # Rows are twice as wide as estimated
+    batch_sizer.record_batch(row_count=10_000, byte_count=600_000, fetch_seconds=0.1)
+    assert batch_sizer.batch_size == 1_000_000 // 60
+
+    # Narrower rows grow the batch - by a moving average of the bytes per row
+    batch_sizer.record_batch(row_count=10_000, byte_count=20_000, fetch_seconds=0.1)
+    assert batch_sizer.batch_size == 1_000_000 // 31
+
+    # A slow fetch caps the batch size to what fetches within the limit
+    batch_sizer.record_batch(row_count=10_000, byte_count=20_000, fetch_seconds=20.0)
+    assert batch_sizer.batch_size == 5_000
+
+    # ...and at most two-fold per batch
+    batch_sizer = AdaptiveBatchSizer(table=LOOKUP_TABLE, batch_bytes_target=1_000_000)
+    batch_sizer.record_batch(row_count=10_000, byte_count=10_000, fetch_seconds=0.1)
+    assert batch_sizer.batch_size == 2 * (1_000_000 // 30)
+
+
+def test_chunks_are_fetched_with_the_refined_batch_size(tmp_path):
+    connection = SyntheticConnection(tables=[SyntheticTable(table_name="EVENTS", row_count=60_000, column_count=4)])
+    benchmark_exporter = BenchmarkExporter(connection=connection,
+                                           table_name_include_pattern=".*",
+                                           table_name_exclude_pattern=None,
+                                           output_directory=tmp_path.as_posix(),
+                                           overwrite=True,
+                                           compression_method="zstd",
+                                           batch_size=10_000,
+                                           row_limit=-1,
+                                           isolation_level="SERIALIZABLE",
+                                           lowercase_object_names=False,
+                                           parquet_max_file_size=1_000_000_000,
+                                           logger=logging.getLogger(),
+                                           parallelism=2,
+                                           table_chunk_count=3,
+                                           table_chunk_keys=["EVENTS=ID"],
+                                           adaptive_batch_size=True,
+                                           batch_bytes_target=200_000
+                                           )
+    benchmark_exporter.export_tables()
+
+    batch_sizer = benchmark_exporter.get_batch_sizer(connection=connection, schema="BENCHMARK", table_name="EVENTS")
+    assert batch_sizer.batches_observed > 0
+    assert batch_sizer.estimated_row_bytes != round(batch_sizer.row_bytes)
+    assert sum(table.rows for table in benchmark_exporter.run_metrics.tables) == 60_000
+    # The first chunk is fetched with the estimated size - the last one with a size refined by the batches before it
+    batch_sizes = [table.batch_size for table in benchmark_exporter.run_metrics.tables]
+    assert min(batch_sizes) == 200_000 // batch_sizer.estimated_row_bytes
+    assert max(batch_sizes) > min(batch_sizes)
@@ -0,0 +1,60 @@
+import logging
+
+import pyarrow
+import pyarrow.parquet as pq
+
+from oracle_parquet_exporter.benchmark import (BenchmarkExporter, SyntheticConnection, SyntheticTable, get_benchmark_cases,
+                                               run_benchmark)
+
+TABLES = [SyntheticTable(table_name="ORDERS", row_count=70_000, column_count=7),
+          SyntheticTable(table_name="CUSTOMERS", row_count=500, column_count=2, column_kinds=["category"])]
+
+
+def test_export_of_synthetic_tables(tmp_path):
+    connection = SyntheticConnection(tables=TABLES)
+    benchmark_exporter = BenchmarkExporter(connection=connection,
+                                           table_name_include_pattern=".*",
+                                           table_name_exclude_pattern=None,
+                                           output_directory=tmp_path.as_posix(),
+                                           overwrite=True,
+                                           compression_method="zstd",
+                                           batch_size=20_000,
+                                           row_limit=-1,
+                                           isolation_level="SERIALIZABLE",
+                                           lowercase_object_names=True,
+                                           parquet_max_file_size=1_000_000_000,
+                                           logger=logging.getLogger(),
+                                           parallelism=2,
+                                           table_chunk_count=3,
+                                           table_chunk_keys=["ORDERS=ID"],
+                                           type_mapping=True
+                                           )
+    benchmark_exporter.export_tables()
+
+    orders = pq.read_table(tmp_path / "benchmark" / "orders").sort_by("id")
+    assert orders.num_rows == 70_000
+    assert orders.column("id").to_pylist() == list(range(70_000))
+    assert orders.schema.field("integer_1").type == pyarrow.int64()
+    assert orders.schema.field("decimal_2").type == pyarrow.decimal128(12, 2)
+    assert orders.schema.field("category_4").type == pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+    assert orders.schema.field("timestamp_7").type == pyarrow.timestamp("us")
+    # Three chunks (of ~23,333 rows) of two batches each - and one batch of CUSTOMERS
+    assert connection.fetch_count == 7
+    assert pq.read_table(tmp_path / "benchmark" / "customers").num_rows == 500
+
+
+def test_benchmark_sweep(tmp_path):
+    sweep = dict(batch_size=[10_000, 50_000], compression_method=["snappy", "zstd"])
+    assert len(get_benchmark_cases(sweep=sweep)) == 4
+
+    results = run_benchmark(tables=TABLES,
+                            sweep=sweep,
+                            repeat_count=1,
+                            output_directory=(tmp_path / "output").as_posix()
+                            )
+
+    assert [result.settings for result in results] == get_benchmark_cases(sweep=sweep)
+    for result in results:
+        assert result.rows == 70_500
+        assert result.rows_per_second > 0
+        assert 0 < result.compressed_bytes < result.uncompressed_bytes
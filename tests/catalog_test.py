@@ -0,0 +1,80 @@
+import datetime
+
+from oracle_parquet_exporter.catalog import Catalog
+
+LAST_DDL_TIME = datetime.datetime(2024, 1, 1)
+
+
+class DictionaryCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, statement, parameters=None):
+        schemas = [value for name, value in parameters.items() if name.startswith("schema_")]
+        if "FROM all_tables" in statement:
+            self.connection.queries.append("tables")
+            self.rows = [(schema, table_name, self.connection.last_ddl_times.get(table_name, LAST_DDL_TIME), 1_000, 10, 42, None, "NO")
+                         for schema in schemas for table_name in ["ORDERS", "ITEMS"]]
+        elif "FROM all_tab_columns" in statement:
+            self.connection.queries.append("columns")
+            self.rows = [(schema, table_name, column_name, data_type, 22, None, None, "Y", 10)
+                         for schema in schemas for table_name in ["ORDERS", "ITEMS"]
+                         for column_name, data_type in [("ID", "NUMBER"), ("DOCUMENT", "BLOB"), ("SCAN", "BFILE")]]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class DictionaryConnection:
+    def __init__(self):
+        self.queries = []
+        self.last_ddl_times = {}
+
+    def cursor(self):
+        return DictionaryCursor(connection=self)
+
+
+def load_catalog(connection: DictionaryConnection, cache_file=None) -> Catalog:
+    catalog = Catalog(cache_file=cache_file)
+    catalog.load(connection=connection,
+                 schemas=["SALES", "HR"],
+                 table_name_include_pattern=".*"
+                 )
+    return catalog
+
+
+def test_catalog_is_loaded_in_bulk():
+    connection = DictionaryConnection()
+    catalog = load_catalog(connection=connection)
+
+    # One query for all tables and one for all columns - regardless of the number of schemas and tables
+    assert connection.queries == ["tables", "columns"]
+    assert catalog.get_tables(schema="HR") == ["ORDERS", "ITEMS"]
+    table = catalog.get_table(schema="SALES", table_name="ORDERS")
+    assert table.avg_row_len == 42
+    assert [column.column_name for column in table.supported_columns] == ["ID", "DOCUMENT"]
+
+
+def test_catalog_cache_is_invalidated_by_last_ddl_time(tmp_path):
+    cache_file = (tmp_path / "catalog.json").as_posix()
+    connection = DictionaryConnection()
+    load_catalog(connection=connection, cache_file=cache_file)
+
+    connection.queries = []
+    catalog = load_catalog(connection=connection, cache_file=cache_file)
+    assert connection.queries == ["tables"]
+    assert catalog.cached_table_count == 4
+    assert [column.column_name for column in catalog.get_table(schema="HR", table_name="ITEMS").columns] == ["ID", "DOCUMENT", "SCAN"]
+
+    connection.queries = []
+    connection.last_ddl_times["ITEMS"] = datetime.datetime(2024, 6, 1)
+    catalog = load_catalog(connection=connection, cache_file=cache_file)
+    assert connection.queries == ["tables", "columns"]
+    assert (catalog.cached_table_count, catalog.loaded_table_count) == (2, 2)
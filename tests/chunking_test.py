@@ -0,0 +1,113 @@
+import logging
+
+import oracledb
+import pyarrow.parquet as pq
+import pytest
+
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticCursor, SyntheticTable
+from oracle_parquet_exporter.chunking import get_numeric_key_chunks
+from oracle_parquet_exporter.table_options import get_table_option, parse_table_column_options
+
+
+class MinMaxCursor:
+    def __init__(self, min_value, max_value):
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, statement, parameters=None):
+        pass
+
+    def fetchone(self):
+        return self.min_value, self.max_value
+
+
+class MinMaxConnection:
+    def __init__(self, min_value, max_value):
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def cursor(self):
+        return MinMaxCursor(min_value=self.min_value, max_value=self.max_value)
+
+
+class NoCatalogRoleCursor(SyntheticCursor):
+    """Answers as for a user without SELECT_CATALOG_ROLE - which can not query DBA_EXTENTS"""
+
+    def execute(self, statement, parameters=None, **keyword_parameters):
+        if "dba_extents" in statement.lower():
+            raise oracledb.DatabaseError("ORA-00942: table or view does not exist")
+        super().execute(statement, parameters, **keyword_parameters)
+
+
+class NoCatalogRoleConnection(SyntheticConnection):
+    def cursor(self):
+        return NoCatalogRoleCursor(connection=self)
+
+
+def test_parse_table_column_options():
+    table_options = parse_table_column_options(option_values=["SALES.ORDERS=ORDER_ID", "ITEMS=ITEM_ID"],
+                                               option_name="table chunk key"
+                                               )
+    assert table_options == {("SALES", "ORDERS"): "ORDER_ID",
+                             (None, "ITEMS"): "ITEM_ID"}
+    assert get_table_option(table_options=table_options, schema="SALES", table_name="ITEMS") == "ITEM_ID"
+    assert get_table_option(table_options=table_options, schema="HR", table_name="ORDERS") is None
+
+    with pytest.raises(ValueError):
+        parse_table_column_options(option_values=["ORDERS"], option_name="table chunk key")
+
+
+def test_numeric_key_chunks_cover_key_range():
+    chunks = get_numeric_key_chunks(connection=MinMaxConnection(min_value=1, max_value=100),
+                                    schema="SALES",
+                                    table_name="ORDERS",
+                                    column_name="ORDER_ID",
+                                    chunk_count=4,
+                                    scn=1234
+                                    )
+
+    assert [chunk.chunk_number for chunk in chunks] == [0, 1, 2, 3]
+    # Adjacent chunks share their boundary value, so no key is missed or exported twice
+    for previous_chunk, chunk in zip(chunks, chunks[1:]):
+        assert previous_chunk.bind_vars["chunk_high_value"] == chunk.bind_vars["chunk_low_value"]
+    assert "IS NULL" in chunks[-1].predicate
+
+
+def test_numeric_key_chunks_small_range():
+    chunks = get_numeric_key_chunks(connection=MinMaxConnection(min_value=7, max_value=7),
+                                    schema="SALES",
+                                    table_name="ORDERS",
+                                    column_name="ORDER_ID",
+                                    chunk_count=4
+                                    )
+
+    assert len(chunks) == 1
+
+
+def test_rowid_chunking_without_dba_extents(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING):
+        BenchmarkExporter(connection=NoCatalogRoleConnection(tables=[SyntheticTable(table_name="ORDERS", row_count=5_000, column_count=2)]),
+                          table_name_include_pattern=".*",
+                          table_name_exclude_pattern=None,
+                          output_directory=tmp_path.as_posix(),
+                          overwrite=True,
+                          compression_method="zstd",
+                          batch_size=1_000,
+                          row_limit=-1,
+                          isolation_level="SERIALIZABLE",
+                          lowercase_object_names=True,
+                          parquet_max_file_size=1_000_000_000,
+                          logger=logging.getLogger(),
+                          parallelism=2,
+                          table_chunk_count=4
+                          ).export_tables()
+
+    # The table is exported as a single unit instead
+    assert sorted(pq.read_table(tmp_path / "benchmark" / "orders").column("id").to_pylist()) == list(range(5_000))
+    assert any("can not be split into ROWID ranges" in message for message in caplog.messages)
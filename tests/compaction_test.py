@@ -0,0 +1,128 @@
+import json
+import logging
+
+import pyarrow
+import pyarrow.dataset
+import pyarrow.fs
+import pyarrow.parquet as pq
+
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.compaction import (COMPACTION_JOURNAL_FILE_NAME, COMPACTION_STAGING_DIRECTORY_NAME,
+                                                TableCompactor)
+from oracle_parquet_exporter.dataset_metadata import DATASET_MANIFEST_FILE_NAME, METADATA_FILE_NAME
+
+TABLES = [SyntheticTable(table_name="ORDERS", row_count=20_000, column_count=4),
+          SyntheticTable(table_name="CUSTOMERS", row_count=1_500, column_count=4)]
+
+
+def get_exporter(output_directory: str, **kwargs) -> BenchmarkExporter:
+    return BenchmarkExporter(connection=SyntheticConnection(tables=TABLES),
+                             table_name_include_pattern=".*",
+                             table_name_exclude_pattern=None,
+                             output_directory=output_directory,
+                             overwrite=True,
+                             compression_method="zstd",
+                             batch_size=1_000,
+                             row_limit=-1,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=True,
+                             parquet_max_file_size=10_000_000,
+                             logger=logging.getLogger(),
+                             **kwargs
+                             )
+
+
+def get_compactor(table_path) -> TableCompactor:
+    return TableCompactor(filesystem=pyarrow.fs.LocalFileSystem(),
+                          table_path=table_path.as_posix(),
+                          file_name_prefix="orders",
+                          compression="zstd",
+                          max_file_size=10_000_000
+                          )
+
+
+def write_part_files(directory, file_numbers, schema_names=("id",)):
+    directory.mkdir(parents=True, exist_ok=True)
+    for file_number in file_numbers:
+        pq.write_table(pyarrow.table({name: [file_number] for name in schema_names}), directory / f"orders_{file_number}.parquet")
+
+
+def get_values(directory):
+    return sorted(pq.read_table(directory).column("id").to_pylist())
+
+
+def test_export_compacts_chunk_tail_files(tmp_path):
+    output_directory = tmp_path / "output"
+    get_exporter(output_directory=output_directory.as_posix(),
+                 parallelism=2,
+                 table_chunk_count=4,
+                 table_chunk_keys=["ORDERS=ID", "CUSTOMERS=ID"],
+                 partition_by=["CUSTOMERS=CATEGORY_4"],
+                 compact=True
+                 ).export_tables()
+
+    # Each chunk wrote a file of its own - merged into one
+    orders_path = output_directory / "benchmark" / "orders"
+    assert [path.name for path in orders_path.glob("*.parquet")] == ["orders_4.parquet"]
+    assert get_values(orders_path) == list(range(20_000))
+    orders_metadata = pq.read_metadata(orders_path / METADATA_FILE_NAME)
+    assert orders_metadata.num_rows == 20_000
+    assert orders_metadata.row_group(0).column(0).file_path == "orders_4.parquet"
+
+    customers_path = output_directory / "benchmark" / "customers"
+    partition_paths = list(customers_path.glob("category_4=*"))
+    assert len(partition_paths) > 1
+    assert all(len(list(partition_path.glob("*.parquet"))) == 1 for partition_path in partition_paths)
+    customers = pyarrow.dataset.dataset(customers_path, format="parquet", partitioning="hive").to_table()
+    assert sorted(customers.column("id").to_pylist()) == list(range(1_500))
+
+    dataset_manifest = json.loads((output_directory / DATASET_MANIFEST_FILE_NAME).read_text())
+    assert [file["file_name"] for file in dataset_manifest["tables"]["BENCHMARK.ORDERS"]["files"]] == ["orders_4.parquet"]
+    assert dataset_manifest["tables"]["BENCHMARK.CUSTOMERS"]["row_count"] == 1_500
+    assert not list(output_directory.rglob(f"{COMPACTION_STAGING_DIRECTORY_NAME}*"))
+
+
+def test_compaction_only_touches_given_directories(tmp_path):
+    write_part_files(directory=tmp_path / "region=east", file_numbers=[0, 1, 2])
+    write_part_files(directory=tmp_path / "region=west", file_numbers=[3, 4])
+    compactor = get_compactor(table_path=tmp_path)
+    compactor.compact(directories=[(tmp_path / "region=east").as_posix()])
+
+    assert [path.name for path in (tmp_path / "region=east").iterdir()] == ["orders_5.parquet"]
+    assert get_values(tmp_path / "region=east") == [0, 1, 2]
+    assert sorted(path.name for path in (tmp_path / "region=west").iterdir()) == ["orders_3.parquet", "orders_4.parquet"]
+    assert compactor.files_compacted == 3
+    assert list(compactor.file_metadata) == [(tmp_path / "region=east" / "orders_5.parquet").as_posix()]
+
+
+def test_compaction_skips_files_of_another_schema(tmp_path):
+    write_part_files(directory=tmp_path, file_numbers=[0, 1])
+    # i.e. a column was added to the table since the previous runs
+    write_part_files(directory=tmp_path, file_numbers=[2], schema_names=("id", "status"))
+    get_compactor(table_path=tmp_path).compact()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["orders_2.parquet", "orders_3.parquet"]
+    assert get_values(tmp_path / "orders_3.parquet") == [0, 1]
+
+
+def test_interrupted_compaction_is_completed(tmp_path):
+    write_part_files(directory=tmp_path, file_numbers=[0, 1, 2])
+    # The merged file was staged, and the journal written - before the swap was interrupted
+    write_part_files(directory=tmp_path / COMPACTION_STAGING_DIRECTORY_NAME, file_numbers=[3])
+    (tmp_path / COMPACTION_JOURNAL_FILE_NAME).write_text(json.dumps(dict(input_file_names=["orders_0.parquet",
+                                                                                           "orders_1.parquet"],
+                                                                         output_file_names=["orders_3.parquet"])))
+    get_compactor(table_path=tmp_path).compact()
+
+    # The swap is completed - then the remaining undersized files are compacted
+    assert [path.name for path in tmp_path.iterdir()] == ["orders_4.parquet"]
+    assert get_values(tmp_path) == [2, 3]
+
+
+def test_unjournaled_compaction_is_discarded(tmp_path):
+    write_part_files(directory=tmp_path, file_numbers=[0, 1])
+    write_part_files(directory=tmp_path / COMPACTION_STAGING_DIRECTORY_NAME, file_numbers=[2])
+    get_compactor(table_path=tmp_path).compact()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["orders_2.parquet"]
+    assert get_values(tmp_path) == [0, 1]
@@ -0,0 +1,113 @@
+import json
+import logging
+
+import pyarrow
+import pyarrow.dataset
+import pyarrow.parquet as pq
+
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.dataset_metadata import (COMMON_METADATA_FILE_NAME, DATASET_MANIFEST_FILE_NAME,
+                                                      METADATA_FILE_NAME, get_column_statistics, write_table_metadata)
+
+TABLES = [SyntheticTable(table_name="ORDERS", row_count=20_000, column_count=4),
+          SyntheticTable(table_name="CUSTOMERS", row_count=1_500, column_count=4)]
+
+
+def get_exporter(output_directory: str, **kwargs) -> BenchmarkExporter:
+    return BenchmarkExporter(connection=SyntheticConnection(tables=TABLES),
+                             table_name_include_pattern=".*",
+                             table_name_exclude_pattern=None,
+                             output_directory=output_directory,
+                             overwrite=True,
+                             compression_method="zstd",
+                             batch_size=5_000,
+                             row_limit=-1,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=True,
+                             parquet_max_file_size=50_000,
+                             parquet_row_group_size=100_000,
+                             logger=logging.getLogger(),
+                             **kwargs
+                             )
+
+
+def test_get_column_statistics(tmp_path):
+    file_metadata = []
+    for file_number, values in enumerate([[3, None, 7], [None, None], [1, 5]]):
+        pq.write_table(pyarrow.table({"id": pyarrow.array(values, type=pyarrow.int64())}), tmp_path / f"t_{file_number}.parquet")
+        file_metadata.append(pq.read_metadata(tmp_path / f"t_{file_number}.parquet"))
+
+    # The all-null file has no bounds to combine
+    assert get_column_statistics(file_metadata=file_metadata) == {"id": dict(null_count=3,
+                                                                             min=dict(type="int", value=1),
+                                                                             max=dict(type="int", value=7)
+                                                                             )}
+
+
+def test_export_writes_consolidated_metadata(tmp_path, monkeypatch):
+    # The footers the writers collected are used - no part file is reopened
+    monkeypatch.setattr(pq, "read_metadata", None)
+    output_directory = tmp_path / "output"
+    get_exporter(output_directory=output_directory.as_posix(),
+                 parallelism=2,
+                 table_chunk_count=2,
+                 partition_by=["CUSTOMERS=CATEGORY_4"]
+                 ).export_tables()
+    monkeypatch.undo()
+
+    orders_path = output_directory / "benchmark" / "orders"
+    orders_metadata = pq.read_metadata(orders_path / METADATA_FILE_NAME)
+    assert orders_metadata.num_rows == 20_000
+    part_file_names = {orders_metadata.row_group(i).column(0).file_path for i in range(orders_metadata.num_row_groups)}
+    assert part_file_names == {path.name for path in orders_path.glob("*.parquet")}
+    assert len(part_file_names) > 1
+    assert pq.read_schema(orders_path / COMMON_METADATA_FILE_NAME).names == pq.read_schema(orders_path / "orders_0.parquet").names
+    # Readers can plan from the _metadata file alone
+    orders = pyarrow.dataset.parquet_dataset(orders_path / METADATA_FILE_NAME).to_table()
+    assert sorted(orders.column("id").to_pylist()) == list(range(20_000))
+
+    dataset_manifest = json.loads((output_directory / DATASET_MANIFEST_FILE_NAME).read_text())
+    assert dataset_manifest["scn"] == 1
+    orders_entry = dataset_manifest["tables"]["BENCHMARK.ORDERS"]
+    assert orders_entry["path"] == "benchmark/orders"
+    assert orders_entry["row_count"] == 20_000
+    assert orders_entry["size_bytes"] == sum(path.stat().st_size for path in orders_path.glob("*.parquet"))
+    assert orders_entry["column_statistics"]["id"] == dict(null_count=0,
+                                                           min=dict(type="int", value=0),
+                                                           max=dict(type="int", value=19_999)
+                                                           )
+
+    # The part files of partitioned tables are listed with their partition directories
+    customers_entry = dataset_manifest["tables"]["BENCHMARK.CUSTOMERS"]
+    assert customers_entry["row_count"] == 1_500
+    assert all(file["file_name"].startswith("category_4=") for file in customers_entry["files"])
+    assert pq.read_metadata(output_directory / "benchmark" / "customers" / METADATA_FILE_NAME).num_rows == 1_500
+
+
+def test_incremental_part_files_with_another_schema(tmp_path):
+    pq.write_table(pyarrow.table({"id": [1, 2]}), tmp_path / "orders_0.parquet")
+    table_entry = write_table_metadata(filesystem=pyarrow.fs.LocalFileSystem(),
+                                       table_path=tmp_path.as_posix()
+                                       )
+    assert table_entry["metadata_file"] == METADATA_FILE_NAME
+    assert (tmp_path / METADATA_FILE_NAME).exists()
+
+    # i.e. a column was added to the table since the previous run
+    pq.write_table(pyarrow.table({"id": [3], "status": ["OPEN"]}), tmp_path / "orders_1.parquet")
+    table_entry = write_table_metadata(filesystem=pyarrow.fs.LocalFileSystem(),
+                                       table_path=tmp_path.as_posix()
+                                       )
+    assert table_entry["metadata_file"] is None
+    assert table_entry["row_count"] == 3
+    assert not (tmp_path / METADATA_FILE_NAME).exists()
+    assert not (tmp_path / COMMON_METADATA_FILE_NAME).exists()
+
+
+def test_no_dataset_metadata(tmp_path):
+    output_directory = tmp_path / "output"
+    get_exporter(output_directory=output_directory.as_posix(),
+                 dataset_metadata=False
+                 ).export_tables()
+
+    assert not (output_directory / DATASET_MANIFEST_FILE_NAME).exists()
+    assert not (output_directory / "benchmark" / "orders" / METADATA_FILE_NAME).exists()
@@ -0,0 +1,73 @@
+import datetime
+import logging
+from decimal import Decimal
+
+import pytest
+
+from oracle_parquet_exporter import main
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.incremental import ORA_ROWSCN, ExportState, IncrementalRange
+
+
+def test_export_state_round_trip(tmp_path):
+    state_file = (tmp_path / "_export_state.json").as_posix()
+    high_watermark = datetime.datetime(2025, 1, 31, 23, 59, 59)
+
+    export_state = ExportState(state_file=state_file)
+    assert not export_state.exists
+    export_state.record_table_export(schema="SALES",
+                                     table_name="ORDERS",
+                                     incremental_range=IncrementalRange(watermark_column="UPDATED_AT",
+                                                                        low_watermark=None,
+                                                                        high_watermark=high_watermark
+                                                                        ),
+                                     scn=1234
+                                     )
+    export_state.record_table_export(schema="SALES",
+                                     table_name="ITEMS",
+                                     incremental_range=IncrementalRange(watermark_column="ITEM_ID",
+                                                                        low_watermark=None,
+                                                                        high_watermark=Decimal("1000.5")
+                                                                        ),
+                                     scn=1234
+                                     )
+
+    reloaded_export_state = ExportState(state_file=state_file)
+    assert reloaded_export_state.exists
+    assert reloaded_export_state.get_high_watermark(schema="SALES", table_name="ORDERS", watermark_column="UPDATED_AT") == high_watermark
+    assert reloaded_export_state.get_high_watermark(schema="SALES", table_name="ITEMS", watermark_column="ITEM_ID") == Decimal("1000.5")
+    # A different watermark column starts over with a full export
+    assert reloaded_export_state.get_high_watermark(schema="SALES", table_name="ORDERS", watermark_column="ORDER_ID") is None
+
+
+def test_incremental_range_predicate():
+    first_range = IncrementalRange(watermark_column="UPDATED_AT", low_watermark=None, high_watermark=10)
+    assert first_range.predicate == "\"UPDATED_AT\" <= :high_watermark"
+    assert first_range.bind_vars == {"high_watermark": 10}
+
+    next_range = IncrementalRange(watermark_column=ORA_ROWSCN, low_watermark=10, high_watermark=20)
+    assert next_range.predicate == "ORA_ROWSCN > :low_watermark AND ORA_ROWSCN <= :high_watermark"
+    assert not next_range.supports_flashback_query
+
+
+@pytest.mark.parametrize("modifications, expected_file_count", [(None, 2), (dict(inserts=10, updates=0, deletes=0), 1)])
+def test_unchanged_tables_are_skipped_by_modification_counters(tmp_path, monkeypatch, modifications, expected_file_count):
+    # None - i.e. the counters were reset by a statistics gather, so the table may have changed since the last run
+    monkeypatch.setattr(main, "get_table_modifications", lambda **kwargs: modifications)
+    for _ in range(2):
+        BenchmarkExporter(connection=SyntheticConnection(tables=[SyntheticTable(table_name="ORDERS", row_count=100, column_count=1)]),
+                          table_name_include_pattern=".*",
+                          table_name_exclude_pattern=None,
+                          output_directory=(tmp_path / "output").as_posix(),
+                          overwrite=False,
+                          compression_method="zstd",
+                          batch_size=1_000,
+                          row_limit=-1,
+                          isolation_level="SERIALIZABLE",
+                          lowercase_object_names=True,
+                          parquet_max_file_size=1_000_000_000,
+                          logger=logging.getLogger(),
+                          incremental=True
+                          ).export_tables()
+
+    assert len(list((tmp_path / "output" / "benchmark" / "orders").glob("*.parquet"))) == expected_file_count
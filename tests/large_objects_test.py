@@ -0,0 +1,142 @@
+import datetime
+import decimal
+
+import oracledb
+import pyarrow
+import pytest
+
+from oracle_parquet_exporter.catalog import ColumnMetadata
+from oracle_parquet_exporter.large_objects import (LOB_OVERFLOW_SIDECAR, LobOptions, StreamedValueReader,
+                                                   fetch_streamed_arrow_batches, get_select_expression)
+from oracle_parquet_exporter.type_mapping import get_column_arrow_types
+
+COLUMNS = [ColumnMetadata(column_name="ID", data_type="NUMBER", data_precision=9, data_scale=0),
+           ColumnMetadata(column_name="DOCUMENT", data_type="CLOB"),
+           ColumnMetadata(column_name="IMAGE", data_type="BLOB")]
+
+
+class FakeLob(oracledb.LOB):
+    def __init__(self, value):
+        self.value = value
+        self.reads = []
+
+    def __del__(self):
+        pass
+
+    @property
+    def type(self):
+        return oracledb.DB_TYPE_BLOB if isinstance(self.value, bytes) else oracledb.DB_TYPE_CLOB
+
+    def size(self):
+        return len(self.value)
+
+    def read(self, offset=1, amount=None):
+        self.reads.append(amount)
+        return self.value[offset - 1:offset - 1 + amount]
+
+
+class LobCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.arraysize = None
+        self.outputtypehandler = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, statement, parameters=None):
+        pass
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class LobConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return LobCursor(rows=self.rows)
+
+
+def fetch_batches(rows, lob_options: LobOptions, tmp_path, batch_size: int = 100):
+    value_reader = StreamedValueReader(lob_options=lob_options,
+                                       sidecar_path_prefix=tmp_path.as_posix(),
+                                       file_name_prefix="DOCS"
+                                       )
+    batches = list(fetch_streamed_arrow_batches(connection=LobConnection(rows=rows),
+                                                sql="SELECT ...",
+                                                bind_vars={},
+                                                columns=COLUMNS,
+                                                column_names=[column.column_name for column in COLUMNS],
+                                                column_types=None,
+                                                batch_size=batch_size,
+                                                value_reader=value_reader
+                                                ))
+    return batches, value_reader
+
+
+def test_batches_are_cut_at_the_memory_limit(tmp_path):
+    rows = [(decimal.Decimal(i), FakeLob("x" * 1_000), FakeLob(b"\x00" * 1_000)) for i in range(10)]
+    batches, _ = fetch_batches(rows=rows, lob_options=LobOptions(batch_memory_limit=4_000), tmp_path=tmp_path)
+
+    assert [batch.num_rows for batch in batches] == [2, 2, 2, 2, 2]
+    # Not mapped - so written as the driver would fetch them into data frames
+    assert batches[0].schema.types == [pyarrow.int64(), pyarrow.large_string(), pyarrow.large_binary()]
+
+
+def test_oversized_lobs_are_truncated_or_routed_to_sidecar_files(tmp_path):
+    large_lob = FakeLob("y" * 3_000_000)
+    rows = [(decimal.Decimal(1), FakeLob("small"), None), (decimal.Decimal(2), large_lob, None)]
+
+    batches, value_reader = fetch_batches(rows=rows, lob_options=LobOptions(max_lob_size=10), tmp_path=tmp_path)
+    assert batches[0].column("DOCUMENT").to_pylist() == ["small", "y" * 10]
+    assert value_reader.values_truncated == 1
+
+    batches, value_reader = fetch_batches(rows=rows,
+                                          lob_options=LobOptions(max_lob_size=10, overflow=LOB_OVERFLOW_SIDECAR),
+                                          tmp_path=tmp_path
+                                          )
+    assert batches[0].column("DOCUMENT").to_pylist() == ["small", None]
+    sidecar_file = batches[0].column("DOCUMENT_SIDECAR_FILE").to_pylist()[1]
+    assert (tmp_path / sidecar_file).read_text() == "y" * 3_000_000
+    # The value was streamed to the sidecar file in pieces - not read in full
+    assert max(amount for amount in large_lob.reads[-3:]) < 3_000_000
+
+
+def test_interval_select_expression():
+    column = ColumnMetadata(column_name="SPAN", data_type="INTERVAL DAY(2) TO SECOND(6)")
+    assert get_select_expression(column=column).startswith("CAST(EXTRACT(DAY FROM \"SPAN\")")
+    assert get_select_expression(column=COLUMNS[0]) == "\"ID\""
+
+
+@pytest.mark.parametrize("type_mapping, id_type", [(False, pyarrow.int64()), (True, pyarrow.int32())])
+def test_row_wise_fetches_are_only_mapped_with_type_mapping(tmp_path, type_mapping, id_type):
+    columns = COLUMNS[:2] + [ColumnMetadata(column_name="SPAN", data_type="INTERVAL DAY(2) TO SECOND(6)"),
+                             ColumnMetadata(column_name="TERM", data_type="INTERVAL YEAR(2) TO MONTH")]
+    column_types = get_column_arrow_types(columns=columns,
+                                          schema="SALES",
+                                          table_name="DOCS",
+                                          type_mapping=type_mapping
+                                          )
+    # Intervals are fetched as numbers (see: get_select_expression) - and cast either way
+    rows = [(decimal.Decimal(1), FakeLob("text"), decimal.Decimal(90_061_000_000), decimal.Decimal(14))]
+    batches = list(fetch_streamed_arrow_batches(connection=LobConnection(rows=rows),
+                                                sql="SELECT ...",
+                                                bind_vars={},
+                                                columns=columns,
+                                                column_names=[column.column_name for column in columns],
+                                                column_types=column_types,
+                                                batch_size=100,
+                                                value_reader=StreamedValueReader(lob_options=LobOptions(),
+                                                                                 sidecar_path_prefix=tmp_path.as_posix(),
+                                                                                 file_name_prefix="DOCS"
+                                                                                 )
+                                                ))
+
+    assert batches[0].schema.types == [id_type, pyarrow.large_string(), pyarrow.duration("us"), pyarrow.int32()]
+    assert batches[0].column("SPAN").to_pylist() == [datetime.timedelta(days=1, hours=1, minutes=1, seconds=1)]
+    assert batches[0].column("TERM").to_pylist() == [14]
@@ -0,0 +1,82 @@
+import logging
+import threading
+import time
+
+import pyarrow
+import pytest
+
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.memory import MemoryAccountant, TaskBatches
+
+
+def get_batch(row_count: int = 10_000) -> pyarrow.Table:
+    return pyarrow.table({"ID": pyarrow.array(range(row_count), pyarrow.int64())})
+
+
+def test_batches_are_outstanding_until_freed():
+    memory_accountant = MemoryAccountant(memory_limit=10_000_000_000)
+    batches = list(memory_accountant.throttle(iterable=[get_batch(), get_batch()]))
+    assert (memory_accountant.outstanding_batches, memory_accountant.outstanding_bytes) == (2, 160_000)
+
+    del batches
+    assert (memory_accountant.outstanding_batches, memory_accountant.outstanding_bytes) == (0, 0)
+
+
+def test_fetch_waits_for_memory_held_by_another_batch():
+    memory_accountant = MemoryAccountant(memory_limit=pyarrow.total_allocated_bytes() + 100_000)
+    batch = memory_accountant.track(pyarrow_table=get_batch(row_count=20_000))
+    assert memory_accountant.is_over_limit
+
+    pressure_calls = []
+    waiter = threading.Thread(target=memory_accountant.wait_for_memory,
+                              kwargs=dict(on_pressure=lambda: pressure_calls.append(1))
+                              )
+    waiter.start()
+    time.sleep(0.3)
+    assert waiter.is_alive()
+
+    del batch
+    waiter.join(timeout=5)
+    assert not waiter.is_alive()
+    assert pressure_calls == [1]
+    assert memory_accountant.limit_hit_count == 1
+    assert memory_accountant.wait_seconds >= 0.3
+    assert memory_accountant.get_batch_size(batch_size=10_000) == 5_000
+
+
+def test_fetch_does_not_wait_on_nothing():
+    # Only the caller's own batch is outstanding - so waiting could not free anything
+    memory_accountant = MemoryAccountant(memory_limit=1)
+    task_batches = TaskBatches()
+    batch = memory_accountant.track(pyarrow_table=get_batch(), task_batches=task_batches)
+    memory_accountant.wait_for_memory(task_batches=task_batches)
+    assert memory_accountant.limit_hit_count == 1
+    assert batch.num_rows == 10_000
+
+
+@pytest.mark.parametrize("pipeline_queue_depth", [0, 2])
+def test_export_degrades_under_memory_pressure(tmp_path, pipeline_queue_depth):
+    connection = SyntheticConnection(tables=[SyntheticTable(table_name=f"TABLE_{i}", row_count=40_000) for i in range(3)])
+    benchmark_exporter = BenchmarkExporter(connection=connection,
+                                           table_name_include_pattern=".*",
+                                           table_name_exclude_pattern=None,
+                                           output_directory=tmp_path.as_posix(),
+                                           overwrite=True,
+                                           compression_method="zstd",
+                                           batch_size=10_000,
+                                           row_limit=-1,
+                                           isolation_level="SERIALIZABLE",
+                                           lowercase_object_names=False,
+                                           parquet_max_file_size=1_000_000_000,
+                                           logger=logging.getLogger(),
+                                           parallelism=3,
+                                           pipeline_queue_depth=pipeline_queue_depth,
+                                           memory_limit=pyarrow.total_allocated_bytes() + 1_000_000
+                                           )
+    benchmark_exporter.export_tables()
+
+    assert sum(table.rows for table in benchmark_exporter.run_metrics.tables) == 120_000
+    assert benchmark_exporter.memory_accountant.limit_hit_count > 0
+    assert benchmark_exporter.memory_accountant.outstanding_batches == 0
+    # The limit was hit - so the writers flushed smaller row groups than the default 128MB would make
+    assert sum(table.row_groups for table in benchmark_exporter.run_metrics.tables) > 3
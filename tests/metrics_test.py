@@ -0,0 +1,58 @@
+import json
+import time
+
+from oracle_parquet_exporter.metrics import STAGE_FETCH, STAGE_WRITE, STATUS_SUCCEEDED, RunMetrics
+from oracle_parquet_exporter.writer import ParquetPartWriter
+
+from writer_test import get_batches
+
+
+def slow_batches():
+    for batch in get_batches(batch_count=3, batch_rows=1_000):
+        time.sleep(0.01)
+        yield batch
+
+
+def test_stage_timings_and_run_report(tmp_path):
+    run_metrics = RunMetrics()
+    table_metrics = run_metrics.start_table(schema="SALES", table_name="ORDERS")
+
+    with ParquetPartWriter(output_path_prefix=tmp_path.as_posix(),
+                           file_name_prefix="ORDERS",
+                           compression="zstd",
+                           max_file_size=1_000_000_000
+                           ) as part_writer:
+        for batch in table_metrics.time_iteration(iterable=slow_batches(), stage=STAGE_FETCH):
+            table_metrics.record_batch()
+            with table_metrics.time_stage(stage=STAGE_WRITE):
+                part_writer.write(pyarrow_table=batch)
+            run_metrics.sample_memory()
+
+    table_metrics.complete(part_writer=part_writer)
+    run_metrics.complete(status=STATUS_SUCCEEDED)
+
+    assert table_metrics.stage_seconds[STAGE_FETCH] >= 0.03
+    assert (table_metrics.rows, table_metrics.batches) == (3_000, 3)
+    assert run_metrics.peak_arrow_memory_bytes > 0
+
+    report_file = tmp_path / "report.json"
+    run_metrics.write_report(report_file=report_file.as_posix(), schemas=["SALES"])
+    report = json.loads(report_file.read_text())
+    assert report["status"] == STATUS_SUCCEEDED
+    assert report["schemas"] == ["SALES"]
+    assert report["totals"]["rows"] == 3_000
+    assert report["tables"][0]["compressed_bytes"] > 0
+
+
+def test_prometheus_text():
+    run_metrics = RunMetrics()
+    for chunk_number in range(2):
+        table_metrics = run_metrics.start_table(schema="SALES", table_name="ORDERS", chunk_number=chunk_number)
+        table_metrics.rows = 10
+    run_metrics.complete(status=STATUS_SUCCEEDED)
+
+    prometheus_text = run_metrics.get_prometheus_text()
+    assert "oracle_parquet_exporter_run_success 1\n" in prometheus_text
+    # Chunks are summed per table
+    assert 'oracle_parquet_exporter_table_rows{schema="SALES",table="ORDERS"} 20\n' in prometheus_text
+    assert 'oracle_parquet_exporter_table_stage_seconds{schema="SALES",table="ORDERS",stage="fetch"} 0.0\n' in prometheus_text
@@ -0,0 +1,65 @@
+import datetime
+
+import pyarrow
+import pyarrow.dataset as ds
+import pytest
+
+from oracle_parquet_exporter.partitioning import (HIVE_DEFAULT_PARTITION, PartitionKey, PartitionedParquetWriter,
+                                                  parse_partition_keys, split_by_partition)
+
+
+def get_orders(row_count: int) -> pyarrow.Table:
+    return pyarrow.table({"ORDER_ID": pyarrow.array(range(row_count), pyarrow.int64()),
+                          "REGION": pyarrow.array([["EAST", "WEST", None][i % 3] for i in range(row_count)]),
+                          "ORDER_DATE": pyarrow.array([datetime.datetime(2024, 1 + i % 2, 1 + i % 28) for i in range(row_count)],
+                                                      pyarrow.timestamp("s"))
+                          })
+
+
+def test_parse_partition_keys():
+    assert parse_partition_keys(partition_spec="REGION, ORDER_DATE:Month") == [PartitionKey(column_name="REGION"),
+                                                                               PartitionKey(column_name="ORDER_DATE",
+                                                                                            granularity="month")]
+    with pytest.raises(ValueError):
+        parse_partition_keys(partition_spec="ORDER_DATE:week")
+
+
+def test_split_by_partition():
+    partitions = dict(split_by_partition(pyarrow_table=get_orders(row_count=12),
+                                         partition_keys=parse_partition_keys(partition_spec="region,order_date:month"),
+                                         lowercase=True
+                                         ))
+
+    assert sorted(partitions) == sorted(f"region={region}/order_date_month=2024-{month:02d}"
+                                        for region in ["EAST", "WEST", HIVE_DEFAULT_PARTITION]
+                                        for month in [1, 2])
+    assert sum(partition.num_rows for partition in partitions.values()) == 12
+    # The raw partition column is represented by the directory name - the truncated date column is kept
+    assert partitions["region=EAST/order_date_month=2024-01"].column_names == ["ORDER_ID", "ORDER_DATE"]
+    assert partitions["region=EAST/order_date_month=2024-01"].column("ORDER_ID").to_pylist() == [0, 6]
+
+
+def test_least_recently_used_writers_are_evicted(tmp_path):
+    committed_files = []
+    with PartitionedParquetWriter(output_path_prefix=tmp_path.as_posix(),
+                                  file_name_prefix="ORDERS",
+                                  partition_keys=parse_partition_keys(partition_spec="REGION"),
+                                  compression="zstd",
+                                  max_file_size=1_000_000_000,
+                                  row_group_size=1_000_000_000,
+                                  file_numbers=iter(range(1_000)),
+                                  max_open_writers=2,
+                                  on_file_committed=lambda file_name, row_count: committed_files.append((file_name, row_count))
+                                  ) as partitioned_writer:
+        for _ in range(2):
+            partitioned_writer.write(pyarrow_table=get_orders(row_count=300))
+
+    # Three partitions through two open writers - every new partition evicts one
+    assert partitioned_writer.writers_evicted == 4
+    assert partitioned_writer.rows_written == 600
+    assert sum(row_count for _, row_count in committed_files) == 600
+    assert sorted(partitioned_writer.file_names) == sorted(file_name for file_name, _ in committed_files)
+
+    dataset = ds.dataset(tmp_path, partitioning="hive")
+    assert dataset.count_rows() == 600
+    assert dataset.count_rows(filter=ds.field("REGION") == "WEST") == 200
@@ -0,0 +1,25 @@
+import pytest
+
+from oracle_parquet_exporter.pipeline import PipelinedIterator
+
+
+def test_pipelined_iterator_preserves_order():
+    with PipelinedIterator(iterable=iter(range(100)), queue_depth=2) as items:
+        assert list(items) == list(range(100))
+
+
+def test_pipelined_iterator_propagates_producer_errors():
+    def failing_generator():
+        yield 1
+        raise RuntimeError("fetch failed")
+
+    with pytest.raises(RuntimeError, match="fetch failed"):
+        with PipelinedIterator(iterable=failing_generator(), queue_depth=1) as items:
+            list(items)
+
+
+def test_pipelined_iterator_stops_producer_on_consumer_error():
+    with pytest.raises(ValueError):
+        with PipelinedIterator(iterable=iter(range(1_000)), queue_depth=1) as items:
+            for _ in items:
+                raise ValueError("write failed")
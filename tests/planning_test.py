@@ -0,0 +1,99 @@
+import logging
+
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.catalog import ColumnMetadata, TableMetadata
+from oracle_parquet_exporter.planning import (ExportPlan, ThroughputModel, get_longest_first_elapsed_seconds,
+                                              plan_table)
+from oracle_parquet_exporter.work_queue import WORK_QUEUE_DIRECTORY_NAME, WORK_QUEUE_ROLE_COORDINATOR, WorkQueue
+
+TABLES = [SyntheticTable(table_name="CUSTOMERS", row_count=2_000, column_count=3),
+          SyntheticTable(table_name="ORDERS", row_count=40_000, column_count=6),
+          SyntheticTable(table_name="PRODUCTS", row_count=500, column_count=2)]
+
+
+def get_exporter(output_directory: str, **kwargs) -> BenchmarkExporter:
+    return BenchmarkExporter(connection=SyntheticConnection(tables=TABLES),
+                             table_name_include_pattern=".*",
+                             table_name_exclude_pattern=None,
+                             output_directory=output_directory,
+                             overwrite=True,
+                             compression_method="zstd",
+                             batch_size=5_000,
+                             row_limit=-1,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=True,
+                             parquet_max_file_size=1_000_000_000,
+                             logger=logging.getLogger(),
+                             **kwargs
+                             )
+
+
+def test_longest_first_elapsed_seconds():
+    assert get_longest_first_elapsed_seconds(task_seconds=[1, 2, 3, 4], parallelism=1) == 10
+    # 4 + 1 on one worker, 3 + 2 on the other
+    assert get_longest_first_elapsed_seconds(task_seconds=[1, 2, 3, 4], parallelism=2) == 5
+    assert get_longest_first_elapsed_seconds(task_seconds=[], parallelism=4) == 0
+
+
+def test_plan_without_statistics():
+    table = TableMetadata(schema="SALES",
+                          table_name="ORDERS",
+                          segment_bytes=8_000_000,
+                          avg_row_len=None,
+                          columns=[ColumnMetadata(column_name="ID", data_type="NUMBER", data_precision=18, data_scale=0)]
+                          )
+    table_plan = plan_table(table=table, throughput_model=ThroughputModel(), max_file_size=100_000)
+    assert not table_plan.has_statistics
+    assert table_plan.estimated_rows == 1_000_000
+    assert table_plan.estimated_files == 24  # 8MB of Arrow data, at the default compression ratio of 0.3
+
+    assert plan_table(table=table, throughput_model=ThroughputModel(), max_file_size=100_000, row_limit=10).estimated_rows == 10
+
+
+def test_dry_run_writes_nothing(tmp_path, capsys):
+    output_directory = tmp_path / "output"
+    exporter = get_exporter(output_directory=output_directory.as_posix(),
+                            dry_run=True
+                            )
+    exporter.export_tables()
+
+    assert not output_directory.exists()
+    assert exporter.synthetic_connection.fetch_count == 0
+    plan_text = capsys.readouterr().out
+    table_lines = [line for line in plan_text.splitlines() if line.startswith("BENCHMARK.")]
+    assert [line.split()[0] for line in table_lines] == ["BENCHMARK.ORDERS", "BENCHMARK.CUSTOMERS", "BENCHMARK.PRODUCTS"]
+
+
+def test_calibrated_plan_orders_tasks_longest_first(tmp_path):
+    output_directory = tmp_path / "output"
+    get_exporter(output_directory=output_directory.as_posix()).export_tables()
+
+    # The next run is calibrated from the previous run's report
+    exporter = get_exporter(output_directory=output_directory.as_posix(),
+                            parallelism=2
+                            )
+    throughput_model = exporter.throughput_model
+    assert throughput_model.calibration_task_count == len(TABLES)
+    assert set(throughput_model.table_histories) == {("BENCHMARK", table.table_name) for table in TABLES}
+
+    with exporter.get_db_connection() as connection:
+        export_plan = exporter.get_export_plan(connection=connection)
+    assert isinstance(export_plan, ExportPlan)
+    assert [table_plan.table_name for table_plan in export_plan.tables][0] == "ORDERS"
+    assert all(table_plan.has_history for table_plan in export_plan.tables)
+    assert export_plan.estimated_elapsed_seconds <= export_plan.get_totals()["estimated_seconds"]
+
+    # Workers claim the tables of a work queue in the order it lists them - the coordinator only publishes them, as
+    # it has no dataset manifest to wait for the workers to record
+    get_exporter(output_directory=output_directory.as_posix(),
+                 work_queue_role=WORK_QUEUE_ROLE_COORDINATOR,
+                 dataset_metadata=False
+                 ).export_tables()
+    work_queue = WorkQueue(directory=f"{output_directory.as_posix()}/{WORK_QUEUE_DIRECTORY_NAME}", lease_duration=60)
+    work_queue.load()
+    assert [task.table_name for task in work_queue.tasks] == [table_plan.table_name for table_plan in export_plan.tables]
+
+
+def test_calibration_skips_missing_reports(tmp_path):
+    throughput_model = ThroughputModel.calibrate(run_report_files=[(tmp_path / "missing.json").as_posix()])
+    assert throughput_model == ThroughputModel()
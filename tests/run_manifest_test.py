@@ -0,0 +1,74 @@
+import json
+import logging
+
+import pyarrow.parquet as pq
+import pytest
+
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.run_manifest import RUN_MANIFEST_FILE_NAME
+
+TABLES = [SyntheticTable(table_name="ORDERS", row_count=20_000, column_count=4, column_kinds=["integer", "category"]),
+          SyntheticTable(table_name="CUSTOMERS", row_count=2_000, column_count=4, column_kinds=["integer", "category"])]
+
+
+class InterruptingConnection(SyntheticConnection):
+    """Loses the connection while fetching the third batch of the third chunk of ORDERS"""
+
+    def make_df_batches(self, statement, parameters=None, **kwargs):
+        for batch_number, odf in enumerate(super().make_df_batches(statement, parameters, **kwargs)):
+            if '"ORDERS"' in statement and int((parameters or {}).get("chunk_low_value", 0)) >= 10_000 and batch_number == 2:
+                raise ConnectionError("Connection lost")
+            yield odf
+
+
+def get_exporter(output_directory: str, connection: SyntheticConnection, **kwargs) -> BenchmarkExporter:
+    return BenchmarkExporter(connection=connection,
+                             table_name_include_pattern=".*",
+                             table_name_exclude_pattern=None,
+                             output_directory=output_directory,
+                             overwrite=True,
+                             compression_method="zstd",
+                             batch_size=1_000,
+                             row_limit=-1,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=True,
+                             # A part file (or more) per batch - so the interrupted task has committed some
+                             parquet_max_file_size=20_000,
+                             parquet_row_group_size=20_000,
+                             logger=logging.getLogger(),
+                             parallelism=2,
+                             table_chunk_count=4,
+                             table_chunk_keys=["ORDERS=ID"],
+                             resume=True,
+                             **kwargs
+                             )
+
+
+# Partition writers are closed early (committing their files) - so the interrupted task has committed some
+@pytest.mark.parametrize("kwargs", [dict(), dict(partition_by=["ORDERS=CATEGORY_2"], max_open_partition_writers=2)])
+def test_interrupted_run_is_resumed(tmp_path, kwargs):
+    output_directory = tmp_path / "output"
+    with pytest.raises(ConnectionError):
+        get_exporter(output_directory=output_directory.as_posix(),
+                     connection=InterruptingConnection(tables=TABLES),
+                     **kwargs
+                     ).export_tables()
+
+    run_manifest = json.loads((output_directory / RUN_MANIFEST_FILE_NAME).read_text())
+    orders_tasks = run_manifest["tables"]["BENCHMARK.ORDERS"]["tasks"].values()
+    assert any(task["status"] == "complete" for task in orders_tasks)
+    assert any(task["status"] != "complete" and task["files"] for task in orders_tasks)
+
+    connection = SyntheticConnection(tables=TABLES)
+    get_exporter(output_directory=output_directory.as_posix(),
+                 connection=connection,
+                 **kwargs
+                 ).export_tables()
+
+    # The completed chunks are not exported again - the interrupted ones are restarted, without duplicating rows
+    assert connection.fetch_count < 22
+    orders = pq.read_table(output_directory / "benchmark" / "orders")
+    assert sorted(orders.column("id").to_pylist()) == list(range(20_000))
+    customers = pq.read_table(output_directory / "benchmark" / "customers")
+    assert sorted(customers.column("id").to_pylist()) == list(range(2_000))
+    assert json.loads((output_directory / RUN_MANIFEST_FILE_NAME).read_text())["status"] == "complete"
@@ -0,0 +1,148 @@
+import io
+import json
+import logging
+import sys
+
+import pyarrow
+import pyarrow.feather
+import pyarrow.fs
+import pyarrow.ipc
+import pyarrow.parquet as pq
+import pytest
+
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.dataset_metadata import DATASET_MANIFEST_FILE_NAME
+from oracle_parquet_exporter.sinks import (OUTPUT_FORMAT_ARROW, OUTPUT_FORMAT_ARROW_STREAM, OUTPUT_FORMAT_FEATHER,
+                                           OUTPUT_FORMAT_PARQUET, get_output_filesystem)
+from oracle_parquet_exporter.writer import create_part_writer, get_next_file_number
+
+from writer_test import get_batches
+
+TABLES = [SyntheticTable(table_name="ORDERS", row_count=20_000, column_count=5),
+          SyntheticTable(table_name="CUSTOMERS", row_count=500, column_count=2, column_kinds=["category"])]
+
+
+def get_exporter(output_directory: str, table_name_include_pattern: str = ".*", **kwargs) -> BenchmarkExporter:
+    return BenchmarkExporter(connection=SyntheticConnection(tables=TABLES),
+                             table_name_include_pattern=table_name_include_pattern,
+                             table_name_exclude_pattern=None,
+                             output_directory=output_directory,
+                             overwrite=True,
+                             compression_method="zstd",
+                             batch_size=5_000,
+                             row_limit=-1,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=True,
+                             parquet_max_file_size=1_000_000_000,
+                             logger=logging.getLogger(),
+                             **kwargs
+                             )
+
+
+@pytest.fixture
+def s3_uri():
+    moto_server = pytest.importorskip("moto.server")
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    uri = (f"s3://testing:testing@export-bucket/oracle?endpoint_override={host}%3A{port}&scheme=http"
+           f"&region=us-east-1&allow_bucket_creation=true")
+    filesystem, _ = get_output_filesystem(output_directory=uri)
+    filesystem.create_dir("export-bucket")
+    yield uri
+    server.stop()
+
+
+def test_feather_part_files(tmp_path):
+    with create_part_writer(output_format=OUTPUT_FORMAT_FEATHER,
+                            output_path_prefix=tmp_path.as_posix(),
+                            file_name_prefix="ORDERS",
+                            compression="zstd",
+                            max_file_size=5_000,
+                            row_group_size=10_000
+                            ) as part_writer:
+        for batch in get_batches(batch_count=5, batch_rows=1_000):
+            part_writer.write(pyarrow_table=batch)
+
+    assert len(part_writer.file_names) > 1
+    assert all(file_name.endswith(".feather") for file_name in part_writer.file_names)
+    assert sum(pyarrow.feather.read_table(file_name).num_rows for file_name in part_writer.file_names) == 5_000
+    # Feather part files are numbered alongside any parquet ones
+    assert get_next_file_number(output_path_prefix=tmp_path.as_posix(), file_name_prefix="ORDERS") == len(part_writer.file_names)
+
+
+@pytest.mark.parametrize("output_format", [OUTPUT_FORMAT_ARROW, OUTPUT_FORMAT_FEATHER])
+def test_arrow_ipc_files_of_dictionary_columns(tmp_path, output_format):
+    # Each of the (four) batches of ORDERS dictionary-encodes its category column with a dictionary of its own
+    get_exporter(output_directory=tmp_path.as_posix(),
+                 table_name_include_pattern="ORDERS",
+                 output_format=output_format,
+                 type_mapping=True
+                 ).export_tables()
+
+    file_paths = list((tmp_path / "benchmark" / "orders").glob(f"*.{output_format}"))
+    orders = pyarrow.concat_tables([pyarrow.ipc.open_file(file_path.as_posix()).read_all() for file_path in file_paths])
+    assert sorted(orders.column("id").to_pylist()) == list(range(20_000))
+    assert orders.schema.field("category_4").type == pyarrow.string()
+    assert all(value.startswith("category_") for value in orders.column("category_4").to_pylist())
+
+
+def test_arrow_ipc_rejects_parquet_only_compression(tmp_path):
+    with pytest.raises(ValueError):
+        create_part_writer(output_format=OUTPUT_FORMAT_FEATHER,
+                           output_path_prefix=tmp_path.as_posix(),
+                           file_name_prefix="ORDERS",
+                           compression="snappy",
+                           max_file_size=50_000
+                           )
+
+
+def test_export_to_s3(tmp_path, s3_uri):
+    get_exporter(output_directory=s3_uri,
+                 metadata_directory=tmp_path.as_posix(),
+                 output_format=OUTPUT_FORMAT_PARQUET,
+                 partition_by=["CUSTOMERS=CATEGORY_1"]
+                 ).export_tables()
+
+    filesystem, path = get_output_filesystem(output_directory=s3_uri)
+    orders = pq.read_table(f"{path}/benchmark/orders", filesystem=filesystem)
+    assert sorted(orders.column("id").to_pylist()) == list(range(20_000))
+    customers = pq.read_table(f"{path}/benchmark/customers", filesystem=filesystem, partitioning="hive")
+    assert customers.num_rows == 500
+    # Nothing is staged locally - but the run's own files are
+    assert not (tmp_path / "benchmark").exists()
+    assert (tmp_path / "_run_report.json").exists()
+    # The dataset manifest is written next to the tables
+    assert not (tmp_path / DATASET_MANIFEST_FILE_NAME).exists()
+    with filesystem.open_input_stream(f"{path}/{DATASET_MANIFEST_FILE_NAME}") as source:
+        assert json.loads(source.read())["tables"]["BENCHMARK.ORDERS"]["row_count"] == 20_000
+
+    # Overwriting removes the previous export's objects
+    get_exporter(output_directory=s3_uri,
+                 metadata_directory=tmp_path.as_posix(),
+                 table_name_include_pattern="ORDERS"
+                 ).export_tables()
+    assert not filesystem.get_file_info(pyarrow.fs.FileSelector(f"{path}/benchmark/customers", allow_not_found=True))
+
+
+def test_arrow_stream_to_stdout(tmp_path, monkeypatch):
+    stdout = io.TextIOWrapper(io.BytesIO())
+    monkeypatch.setattr(sys, "stdout", stdout)
+    get_exporter(output_directory=tmp_path.as_posix(),
+                 output_format=OUTPUT_FORMAT_ARROW_STREAM
+                 ).export_tables()
+
+    # One stream per table - one after another
+    stream = pyarrow.BufferReader(stdout.buffer.getvalue())
+    tables = [pyarrow.ipc.open_stream(stream).read_all() for _ in TABLES]
+    assert sorted(table.num_rows for table in tables) == [500, 20_000]
+    assert stream.tell() == stream.size()
+    assert not (tmp_path / "benchmark").exists()
+
+
+def test_arrow_stream_requires_serial_export(tmp_path):
+    with pytest.raises(ValueError):
+        get_exporter(output_directory=tmp_path.as_posix(),
+                     output_format=OUTPUT_FORMAT_ARROW_STREAM,
+                     parallelism=2
+                     )
@@ -0,0 +1,116 @@
+import logging
+import random
+
+import pyarrow
+import pyarrow.parquet as pq
+import pytest
+
+from oracle_parquet_exporter import sorting
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.sorting import (CLUSTER_METHOD_AUTO, CLUSTER_METHOD_SERVER, ExternalSorter, SortKey,
+                                             parse_sort_keys)
+
+TABLES = [SyntheticTable(table_name="ORDERS", row_count=30_000, column_count=5, column_kinds=["category", "integer", "date"]),
+          SyntheticTable(table_name="CUSTOMERS", row_count=2_000, column_count=2)]
+
+
+def get_exporter(output_directory: str, **kwargs) -> BenchmarkExporter:
+    return BenchmarkExporter(connection=SyntheticConnection(tables=TABLES),
+                             table_name_include_pattern=".*",
+                             table_name_exclude_pattern=None,
+                             output_directory=output_directory,
+                             overwrite=True,
+                             compression_method="zstd",
+                             batch_size=5_000,
+                             row_limit=-1,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=True,
+                             parquet_max_file_size=1_000_000_000,
+                             logger=logging.getLogger(),
+                             **kwargs
+                             )
+
+
+def get_batches(batch_count: int, batch_rows: int):
+    rng = random.Random(0)
+    for batch_number in range(batch_count):
+        yield pyarrow.table({"group": [rng.choice([None] + list(range(20))) for _ in range(batch_rows)],
+                             "amount": [rng.random() for _ in range(batch_rows)],
+                             "id": range(batch_number * batch_rows, (batch_number + 1) * batch_rows)})
+
+
+def test_parse_sort_keys():
+    assert parse_sort_keys(cluster_spec="ORDER_DATE, ID:desc") == [SortKey(column_name="ORDER_DATE"),
+                                                                   SortKey(column_name="ID", descending=True)]
+    with pytest.raises(ValueError):
+        parse_sort_keys(cluster_spec="ID:sideways")
+
+
+@pytest.mark.parametrize("memory_limit", [1_000_000_000, 50_000])
+def test_external_sort(tmp_path, memory_limit):
+    sort_keys = [SortKey(column_name="GROUP"), SortKey(column_name="AMOUNT", descending=True)]
+    with ExternalSorter(sort_keys=sort_keys, memory_limit=memory_limit, spill_directory=tmp_path.as_posix()) as sorter:
+        sorted_table = pyarrow.concat_tables(sorter.sort(pyarrow_tables=get_batches(batch_count=20, batch_rows=1_000)))
+        assert (len(sorter.run_files) > 1) == (memory_limit < 1_000_000_000)
+
+    expected_table = pyarrow.concat_tables(get_batches(batch_count=20, batch_rows=1_000)).sort_by([("group", "ascending"),
+                                                                                                   ("amount", "descending")])
+    assert sorted_table.select(["group", "amount"]).equals(expected_table.select(["group", "amount"]))
+    assert sorted(sorted_table.column("id").to_pylist()) == list(range(20_000))
+    # The spilled runs are removed
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_clustered_export_sorted_locally(tmp_path, monkeypatch):
+    # Merge the spilled runs a few rows at a time
+    monkeypatch.setattr(sorting, "MERGE_READ_BYTES", 20_000)
+    output_directory = tmp_path / "output"
+    get_exporter(output_directory=output_directory.as_posix(),
+                 cluster_by=["ORDERS=CATEGORY_1,INTEGER_2:desc"],
+                 cluster_method=CLUSTER_METHOD_AUTO,
+                 server_sort_max_bytes=0,
+                 sort_memory_limit=200_000,
+                 sort_spill_directory=tmp_path.as_posix(),
+                 parquet_row_group_size=100_000
+                 ).export_tables()
+
+    orders_file = pq.ParquetFile(next((output_directory / "benchmark" / "orders").glob("*.parquet")))
+    # The (low-cardinality) category column is dictionary-encoded - Arrow sorts by its values
+    orders = pyarrow.table({"category_1": orders_file.read().column("category_1").cast(pyarrow.string()),
+                            "integer_2": orders_file.read().column("integer_2")})
+    assert orders.num_rows == 30_000
+    assert orders.equals(orders.sort_by([("category_1", "ascending"), ("integer_2", "descending")]))
+    assert orders_file.metadata.row_group(0).sorting_columns == (pq.SortingColumn(column_index=1),
+                                                                 pq.SortingColumn(column_index=2, descending=True))
+    # Each row group covers a narrow range of the leading sort column
+    assert orders_file.num_row_groups > 1
+    assert orders_file.metadata.row_group(0).column(1).statistics.max <= orders_file.metadata.row_group(1).column(1).statistics.min
+
+    # Tables not clustered are written as fetched
+    customers_file = pq.ParquetFile(next((output_directory / "benchmark" / "customers").glob("*.parquet")))
+    assert not customers_file.metadata.row_group(0).sorting_columns
+    assert [path.name for path in tmp_path.iterdir()] == ["output"]
+
+
+# The ORDER BY quotes the column as the catalog spells it - whatever the case it was given in
+@pytest.mark.parametrize("column_name", ["DATE_3", "date_3"])
+def test_clustered_export_sorted_on_the_server(tmp_path, caplog, column_name):
+    with caplog.at_level(logging.INFO):
+        get_exporter(output_directory=(tmp_path / "output").as_posix(),
+                     cluster_by=[f"BENCHMARK.ORDERS={column_name}"],
+                     cluster_method=CLUSTER_METHOD_SERVER,
+                     parallelism=2,
+                     table_chunk_count=4
+                     ).export_tables()
+
+    orders_sql = [message for message in caplog.messages if message.startswith("Exporting table: BENCHMARK.ORDERS - SQL: ")]
+    # Clustered tables are not chunked
+    assert len(orders_sql) == 1
+    assert orders_sql[0].endswith(" AS OF SCN :scn ORDER BY \"ORDERS\".\"DATE_3\" ASC NULLS LAST - SCN: 1")
+
+
+def test_invalid_cluster_by(tmp_path):
+    with pytest.raises(ValueError):
+        get_exporter(output_directory=(tmp_path / "output").as_posix(),
+                     cluster_by=["ORDERS=STRING_1"]
+                     ).export_tables()
@@ -0,0 +1,111 @@
+import json
+import logging
+
+import pyarrow.parquet as pq
+import pytest
+
+from oracle_parquet_exporter.benchmark import BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.table_config import TableConfigs
+
+TABLES = [SyntheticTable(table_name="ORDERS", row_count=20_000, column_count=5),
+          SyntheticTable(table_name="CUSTOMERS", row_count=2_000, column_count=3)]
+
+TOML_CONFIG = """
+[default]
+exclude_columns = ["string_3"]
+
+[tables.ORDERS]
+where = "DATE_5 >= DATE '2021-01-01'"
+batch_size = 1_000
+compression = "snappy"
+
+[tables."BENCHMARK.CUSTOMERS"]
+include_columns = ["ID", "DECIMAL_2"]
+sample_percent = 10
+sample_seed = 42
+"""
+
+
+def get_exporter(output_directory: str, **kwargs) -> BenchmarkExporter:
+    return BenchmarkExporter(connection=SyntheticConnection(tables=TABLES),
+                             table_name_include_pattern=".*",
+                             table_name_exclude_pattern=None,
+                             output_directory=output_directory,
+                             overwrite=True,
+                             compression_method="zstd",
+                             batch_size=5_000,
+                             row_limit=-1,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=True,
+                             parquet_max_file_size=1_000_000_000,
+                             logger=logging.getLogger(),
+                             **kwargs
+                             )
+
+
+def test_table_configs_are_merged(tmp_path):
+    config_file = tmp_path / "tables.toml"
+    config_file.write_text(TOML_CONFIG)
+    table_configs = TableConfigs(config_file=config_file.as_posix())
+
+    orders_config = table_configs.get_table_config(schema="BENCHMARK", table_name="ORDERS")
+    assert orders_config.exclude_columns == ["STRING_3"]
+    assert orders_config.batch_size == 1_000
+    assert orders_config.sample_sql == ""
+
+    customers_config = table_configs.get_table_config(schema="BENCHMARK", table_name="CUSTOMERS")
+    assert customers_config.include_columns == ["ID", "DECIMAL_2"]
+    assert customers_config.sample_sql == " SAMPLE BLOCK (10) SEED (42)"
+    # The schema-qualified entry only applies to its own schema
+    assert table_configs.get_table_config(schema="SALES", table_name="CUSTOMERS").include_columns is None
+
+    # YAML and JSON files take the same form
+    yaml_file = tmp_path / "tables.yaml"
+    yaml_file.write_text("tables:\n  ORDERS:\n    where: STATUS = 'OPEN'\n")
+    assert TableConfigs(config_file=yaml_file.as_posix()).get_table_config(schema="BENCHMARK", table_name="ORDERS").where == "STATUS = 'OPEN'"
+
+
+@pytest.mark.parametrize("table_config", [{"sample_percent": 100}, {"batch_size": 0}, {"columns": ["ID"]}])
+def test_invalid_table_configs(tmp_path, table_config):
+    config_file = tmp_path / "tables.json"
+    config_file.write_text(json.dumps({"tables": {"ORDERS": table_config}}))
+    with pytest.raises(ValueError):
+        TableConfigs(config_file=config_file.as_posix())
+
+
+def test_table_configs_are_pushed_down(tmp_path, caplog):
+    config_file = tmp_path / "tables.toml"
+    config_file.write_text(TOML_CONFIG)
+    output_directory = tmp_path / "output"
+    with caplog.at_level(logging.INFO):
+        get_exporter(output_directory=output_directory.as_posix(),
+                     table_config_file=config_file.as_posix(),
+                     adaptive_batch_size=True
+                     ).export_tables()
+
+    export_sql = {message.split("Exporting table: ")[1].split(" ")[0]: message.split(" - SQL: ")[1]
+                  for message in caplog.messages if message.startswith("Exporting table: ") and " - SQL: " in message}
+    assert export_sql["BENCHMARK.ORDERS"].endswith("FROM \"BENCHMARK\".\"ORDERS\" WHERE (DATE_5 >= DATE '2021-01-01')")
+    assert "\"STRING_3\"" not in export_sql["BENCHMARK.ORDERS"]
+    assert export_sql["BENCHMARK.CUSTOMERS"] == ("SELECT \"ID\" AS \"id\", \"DECIMAL_2\" AS \"decimal_2\""
+                                                 " FROM \"BENCHMARK\".\"CUSTOMERS\" SAMPLE BLOCK (10) SEED (42)")
+
+    # Only the selected columns are exported - with the table's own batch size and compression method
+    orders_file = pq.ParquetFile(next((output_directory / "benchmark" / "orders").glob("*.parquet")))
+    assert orders_file.schema_arrow.names == ["id", "integer_1", "decimal_2", "category_4", "date_5"]
+    assert orders_file.metadata.row_group(0).column(0).compression == "SNAPPY"
+    customers = pq.read_table(output_directory / "benchmark" / "customers")
+    assert customers.column_names == ["id", "decimal_2"]
+
+    run_report = json.loads((output_directory / "_run_report.json").read_text())
+    assert {table["table_name"]: table["batch_size"] for table in run_report["tables"]}["ORDERS"] == 1_000
+
+
+def test_resume_samples_without_a_seed(tmp_path):
+    # An interrupted task is restarted from scratch - so its sample need not be read again
+    config_file = tmp_path / "tables.json"
+    config_file.write_text(json.dumps({"default": {"sample_percent": 5}}))
+    get_exporter(output_directory=(tmp_path / "output").as_posix(),
+                 table_config_file=config_file.as_posix(),
+                 resume=True
+                 )
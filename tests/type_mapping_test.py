@@ -0,0 +1,105 @@
+import decimal
+
+import pyarrow
+import pytest
+
+from oracle_parquet_exporter.catalog import ColumnMetadata
+from oracle_parquet_exporter.type_mapping import (DICTIONARY_TYPE, cast_table, get_arrow_type, get_column_arrow_types,
+                                                  is_fetched_as_text, parse_column_type_overrides)
+
+
+@pytest.mark.parametrize("column, arrow_type", [
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=2, data_scale=0), pyarrow.int8()),
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=9, data_scale=0), pyarrow.int32()),
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=16, data_scale=-2), pyarrow.int64()),
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=30, data_scale=0), pyarrow.decimal128(30, 0)),
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=10, data_scale=2), pyarrow.decimal128(10, 2)),
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=None, data_scale=0), pyarrow.int64()),
+    (ColumnMetadata(column_name="C", data_type="NUMBER"), None),
+    (ColumnMetadata(column_name="C", data_type="DATE"), pyarrow.timestamp("s")),
+    (ColumnMetadata(column_name="C", data_type="TIMESTAMP(3)"), pyarrow.timestamp("ms")),
+    (ColumnMetadata(column_name="C", data_type="TIMESTAMP(6) WITH TIME ZONE"), None),
+    (ColumnMetadata(column_name="C", data_type="VARCHAR2", num_distinct=12), DICTIONARY_TYPE),
+    (ColumnMetadata(column_name="C", data_type="VARCHAR2", num_distinct=1_000_000), pyarrow.string()),
+])
+def test_get_arrow_type(column, arrow_type):
+    assert get_arrow_type(column=column) == arrow_type
+
+
+def test_column_type_overrides():
+    column_type_overrides = parse_column_type_overrides(option_values=["SALES.ORDERS.AMOUNT=decimal128(18, 4)",
+                                                                       "ORDERS.status=string",
+                                                                       "ORDERS.ORDER_ID=inferred"])
+    column_types = get_column_arrow_types(columns=[ColumnMetadata(column_name="ORDER_ID", data_type="NUMBER", data_precision=9, data_scale=0),
+                                                   ColumnMetadata(column_name="AMOUNT", data_type="NUMBER", data_precision=10, data_scale=2),
+                                                   ColumnMetadata(column_name="STATUS", data_type="VARCHAR2", num_distinct=3)],
+                                          schema="SALES",
+                                          table_name="ORDERS",
+                                          column_type_overrides=column_type_overrides,
+                                          lowercase=True
+                                          )
+    assert column_types == {"amount": pyarrow.decimal128(18, 4), "status": pyarrow.string()}
+
+    with pytest.raises(ValueError):
+        parse_column_type_overrides(option_values=["ORDERS.AMOUNT=money"])
+
+
+def test_intervals_are_cast_without_type_mapping():
+    # Intervals are fetched as numbers of microseconds or months - which are cast to their types by default, too
+    column_types = get_column_arrow_types(columns=[ColumnMetadata(column_name="ID", data_type="NUMBER", data_precision=9, data_scale=0),
+                                                   ColumnMetadata(column_name="SPAN", data_type="INTERVAL DAY(2) TO SECOND(6)"),
+                                                   ColumnMetadata(column_name="TERM", data_type="INTERVAL YEAR(2) TO MONTH"),
+                                                   ColumnMetadata(column_name="STATUS", data_type="VARCHAR2", num_distinct=3)],
+                                          schema="SALES",
+                                          table_name="ORDERS",
+                                          type_mapping=False
+                                          )
+    assert column_types == {"SPAN": pyarrow.duration("us"), "TERM": pyarrow.int32()}
+
+
+@pytest.mark.parametrize("column, fetched_as_text", [
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=9, data_scale=0), False),
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=30, data_scale=0), True),
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=10, data_scale=2), True),
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=None, data_scale=0), False),
+    (ColumnMetadata(column_name="C", data_type="NUMBER", data_precision=16, data_scale=-2), True),
+    (ColumnMetadata(column_name="C", data_type="NUMBER"), False),
+    (ColumnMetadata(column_name="C", data_type="BINARY_DOUBLE"), False),
+])
+def test_numbers_mapped_to_exact_types_are_fetched_as_text(column, fetched_as_text):
+    assert is_fetched_as_text(column=column, arrow_type=get_arrow_type(column=column)) == fetched_as_text
+
+
+def test_cast_table():
+    # As fetched: NUMBER(2,0) and NUMBER(6,0) as int64, NUMBER(5,2), NUMBER(5,3) and NUMBER(20,0) as text
+    pyarrow_table = pyarrow.table({"ID": pyarrow.array([1, 2], pyarrow.int64()),
+                                   "AMOUNT": pyarrow.array(["1.25", "10.5"]),
+                                   "TOTAL": pyarrow.array([100, 200], pyarrow.int64()),
+                                   "RATE": pyarrow.array(["2.675", "-.001"]),
+                                   "SERIAL": pyarrow.array(["123456789012345678", "99999999999999999999"])
+                                   })
+    pyarrow_table = cast_table(pyarrow_table=pyarrow_table,
+                               column_types={"ID": pyarrow.int8(),
+                                             "AMOUNT": pyarrow.decimal128(5, 2),
+                                             "TOTAL": pyarrow.decimal128(6, 2),
+                                             "RATE": pyarrow.decimal128(5, 3),
+                                             "SERIAL": pyarrow.decimal128(20, 0)
+                                             })
+
+    assert pyarrow_table.schema.types == [pyarrow.int8(), pyarrow.decimal128(5, 2), pyarrow.decimal128(6, 2),
+                                          pyarrow.decimal128(5, 3), pyarrow.decimal128(20, 0)]
+    assert pyarrow_table.column("AMOUNT").to_pylist() == [decimal.Decimal("1.25"), decimal.Decimal("10.50")]
+    # No precision is lost - as it would be through a double
+    assert pyarrow_table.column("RATE").to_pylist() == [decimal.Decimal("2.675"), decimal.Decimal("-0.001")]
+    assert pyarrow_table.column("SERIAL").to_pylist() == [decimal.Decimal("123456789012345678"),
+                                                          decimal.Decimal("99999999999999999999")]
+
+    # Values that do not fit the mapped type are not silently truncated
+    with pytest.raises(pyarrow.ArrowInvalid):
+        cast_table(pyarrow_table=pyarrow.table({"ID": pyarrow.array([1_000], pyarrow.int64())}),
+                   column_types={"ID": pyarrow.int8()}
+                   )
+    with pytest.raises(pyarrow.ArrowInvalid):
+        cast_table(pyarrow_table=pyarrow.table({"RATE": pyarrow.array(["2.675"])}),
+                   column_types={"RATE": pyarrow.decimal128(5, 2)}
+                   )
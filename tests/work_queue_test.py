@@ -0,0 +1,132 @@
+import json
+import logging
+import multiprocessing
+import threading
+import time
+
+import pyarrow.parquet as pq
+
+from oracle_parquet_exporter.benchmark import SYNTHETIC_SCN, BenchmarkExporter, SyntheticConnection, SyntheticTable
+from oracle_parquet_exporter.dataset_metadata import DATASET_MANIFEST_FILE_NAME
+from oracle_parquet_exporter.work_queue import (WORK_QUEUE_DIRECTORY_NAME, WORK_QUEUE_ROLE_COORDINATOR,
+                                                WORK_QUEUE_ROLE_WORKER, WorkQueue, WorkQueueTask)
+
+TABLES = [SyntheticTable(table_name="ORDERS", row_count=30_000, column_count=4),
+          SyntheticTable(table_name="CUSTOMERS", row_count=2_000, column_count=3),
+          SyntheticTable(table_name="PRODUCTS", row_count=500, column_count=2),
+          SyntheticTable(table_name="SHIPMENTS", row_count=10_000, column_count=3)]
+
+
+def get_exporter(output_directory: str,
+                 work_queue_role: str,
+                 **kwargs
+                 ) -> BenchmarkExporter:
+    return BenchmarkExporter(connection=SyntheticConnection(tables=TABLES),
+                             table_name_include_pattern=".*",
+                             table_name_exclude_pattern=None,
+                             output_directory=output_directory,
+                             overwrite=True,
+                             compression_method="zstd",
+                             batch_size=5_000,
+                             row_limit=-1,
+                             isolation_level="SERIALIZABLE",
+                             lowercase_object_names=True,
+                             parquet_max_file_size=1_000_000_000,
+                             logger=logging.getLogger(),
+                             work_queue_role=work_queue_role,
+                             **kwargs
+                             )
+
+
+def run_worker(output_directory: str, worker_id: str):
+    get_exporter(output_directory=output_directory,
+                 work_queue_role=WORK_QUEUE_ROLE_WORKER,
+                 worker_id=worker_id,
+                 parallelism=2
+                 ).export_tables()
+
+
+def test_leases(tmp_path):
+    work_queue = WorkQueue(directory=tmp_path.as_posix(), lease_duration=60)
+    task = WorkQueueTask(schema="SALES", table_name="ORDERS")
+    work_queue.publish(scn=1, schemas=["SALES"], table_name_include_pattern=".*", table_name_exclude_pattern=None,
+                       tasks=[task])
+
+    lease = work_queue.claim(task=task, worker_id="a")
+    assert lease.generation == 0
+    assert work_queue.claim(task=task, worker_id="b") is None
+    assert work_queue.renew(lease=lease)
+
+    # Worker "a" stalls - its lease expires, and worker "b" reclaims the task
+    lease.expires_at = 0.0
+    work_queue.release(lease=lease)
+    reclaimed_lease = work_queue.claim(task=task, worker_id="b")
+    assert reclaimed_lease.generation == 1
+    assert not work_queue.is_held(lease=lease)
+    assert not work_queue.renew(lease=lease)
+
+    # The stalled worker's output is discarded - only the holder's is moved into place
+    output_path = tmp_path / "sales" / "orders"
+    for attempt_lease in (lease, reclaimed_lease):
+        attempt_output_path = work_queue.get_attempt_output_path(output_path=output_path, lease=attempt_lease)
+        attempt_output_path.mkdir(parents=True)
+        (attempt_output_path / "worker.txt").write_text(attempt_lease.worker_id)
+
+    assert not work_queue.complete(lease=lease, output_path=output_path)
+    assert not work_queue.is_complete
+    assert work_queue.complete(lease=reclaimed_lease, output_path=output_path)
+    assert work_queue.is_complete
+    assert (output_path / "worker.txt").read_text() == "b"
+    assert list((tmp_path / "sales").iterdir()) == [output_path]
+    assert work_queue.claim(task=task, worker_id="c") is None
+
+
+def test_export_by_several_worker_processes(tmp_path):
+    output_directory = (tmp_path / "output").as_posix()
+    # The coordinator waits for the workers - to record the dataset manifest
+    coordinator = threading.Thread(target=get_exporter(output_directory=output_directory,
+                                                       work_queue_role=WORK_QUEUE_ROLE_COORDINATOR
+                                                       ).export_tables)
+    coordinator.start()
+
+    work_queue = WorkQueue(directory=f"{output_directory}/{WORK_QUEUE_DIRECTORY_NAME}", lease_duration=1)
+    work_queue.load()
+    assert work_queue.scn == SYNTHETIC_SCN
+    assert sorted(task.table_name for task in work_queue.tasks) == sorted(table.table_name for table in TABLES)
+
+    # A worker that crashed while exporting ORDERS - leaving its lease and partial output behind
+    crashed_lease = work_queue.claim(task=next(task for task in work_queue.tasks if task.table_name == "ORDERS"),
+                                     worker_id="crashed")
+    crashed_output_path = work_queue.get_attempt_output_path(output_path=tmp_path / "output" / "benchmark" / "orders",
+                                                             lease=crashed_lease)
+    crashed_output_path.mkdir(parents=True)
+    (crashed_output_path / "orders_0.parquet.tmp").write_bytes(b"partial")
+    time.sleep(1.1)
+
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=run_worker, args=(output_directory, f"worker-{worker_number}"))
+               for worker_number in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=120)
+    assert [worker.exitcode for worker in workers] == [0, 0, 0]
+
+    assert work_queue.is_complete
+    for table in TABLES:
+        exported_table = pq.read_table(tmp_path / "output" / "benchmark" / table.table_name.lower())
+        assert exported_table.num_rows == table.row_count
+        assert sorted(exported_table.column("id").to_pylist()) == list(range(table.row_count))
+
+    orders_done = json.loads(work_queue.get_done_file(task=crashed_lease.task).read_text())
+    assert orders_done["generation"] == 1
+    assert not list((tmp_path / "output" / "benchmark").glob("*.attempt-*"))
+    assert len(list((work_queue.directory / "reports").glob("worker-*.json"))) == 3
+
+    coordinator.join(timeout=30)
+    assert not coordinator.is_alive()
+    dataset_manifest = json.loads((tmp_path / "output" / DATASET_MANIFEST_FILE_NAME).read_text())
+    assert dataset_manifest["scn"] == SYNTHETIC_SCN
+    assert {table_key: table_entry["row_count"] for table_key, table_entry in dataset_manifest["tables"].items()} == {
+        f"BENCHMARK.{table.table_name}": table.row_count for table in TABLES}
+    assert dataset_manifest["tables"]["BENCHMARK.ORDERS"]["path"] == "benchmark/orders"
@@ -0,0 +1,65 @@
+import json
+
+import pyarrow
+import pyarrow.parquet as pq
+import pytest
+
+from oracle_parquet_exporter.writer import ParquetPartWriter
+from oracle_parquet_exporter.writer_policy import WriterPolicies
+
+
+def get_readings(row_count: int) -> pyarrow.Table:
+    return pyarrow.table({"READING_ID": pyarrow.array(range(row_count), pyarrow.int64()),
+                          "SENSOR": pyarrow.array([f"sensor_{i % 4}" for i in range(row_count)]),
+                          "VALUE": pyarrow.array([i * 0.731 for i in range(row_count)]),
+                          "NOTES": pyarrow.array([f"note {i}" for i in range(row_count)])
+                          })
+
+
+def write_readings(tmp_path, writer_policies: WriterPolicies) -> pq.FileMetaData:
+    with ParquetPartWriter(output_path_prefix=tmp_path.as_posix(),
+                           file_name_prefix="READINGS",
+                           compression="zstd",
+                           max_file_size=1_000_000_000,
+                           writer_policy=writer_policies.get_table_policy(schema="IOT", table_name="READINGS")
+                           ) as part_writer:
+        part_writer.write(pyarrow_table=get_readings(row_count=10_000))
+
+    return pq.read_metadata(part_writer.file_names[0])
+
+
+def get_column_chunk(metadata: pq.FileMetaData, column_name: str) -> pq.ColumnChunkMetaData:
+    row_group = metadata.row_group(0)
+    return next(row_group.column(i) for i in range(row_group.num_columns) if row_group.column(i).path_in_schema == column_name)
+
+
+def test_table_and_column_policies(tmp_path):
+    policy_file = tmp_path / "policies.json"
+    policy_file.write_text(json.dumps({"default": {"compression_level": 3},
+                                       "tables": {"IOT.READINGS": {"key_columns": ["reading_id"],
+                                                                   "columns": {"NOTES": {"compression": "gzip",
+                                                                                         "statistics": False}}}}}))
+    metadata = write_readings(tmp_path=tmp_path / "output", writer_policies=WriterPolicies(policy_file=policy_file.as_posix()))
+
+    assert get_column_chunk(metadata=metadata, column_name="NOTES").compression == "GZIP"
+    assert not get_column_chunk(metadata=metadata, column_name="NOTES").is_stats_set
+    assert get_column_chunk(metadata=metadata, column_name="VALUE").compression == "ZSTD"
+    # Key columns get a page index
+    assert get_column_chunk(metadata=metadata, column_name="READING_ID").has_column_index
+
+
+def test_auto_policy_chooses_encodings_by_cardinality(tmp_path):
+    metadata = write_readings(tmp_path=tmp_path, writer_policies=WriterPolicies(auto=True))
+
+    assert "RLE_DICTIONARY" in get_column_chunk(metadata=metadata, column_name="SENSOR").encodings
+    assert "BYTE_STREAM_SPLIT" in get_column_chunk(metadata=metadata, column_name="VALUE").encodings
+    assert "DELTA_BINARY_PACKED" in get_column_chunk(metadata=metadata, column_name="READING_ID").encodings
+    assert "RLE_DICTIONARY" not in get_column_chunk(metadata=metadata, column_name="NOTES").encodings
+
+
+def test_invalid_column_encoding(tmp_path):
+    policy_file = tmp_path / "policies.json"
+    policy_file.write_text(json.dumps({"tables": {"READINGS": {"columns": {"VALUE": {"encoding": "ZIGZAG"}}}}}))
+
+    with pytest.raises(ValueError):
+        WriterPolicies(policy_file=policy_file.as_posix())
@@ -0,0 +1,91 @@
+import os
+
+import pyarrow
+import pyarrow.parquet as pq
+
+from oracle_parquet_exporter.writer import ParquetPartWriter
+
+
+def get_batches(batch_count: int, batch_rows: int):
+    for batch_number in range(batch_count):
+        start = batch_number * batch_rows
+        yield pyarrow.table({"ID": pyarrow.array(range(start, start + batch_rows), pyarrow.int64()),
+                             "NAME": pyarrow.array([f"name_{i % 100}" for i in range(batch_rows)])
+                             })
+
+
+def test_row_groups_are_coalesced_independent_of_batch_size(tmp_path):
+    with ParquetPartWriter(output_path_prefix=tmp_path.as_posix(),
+                           file_name_prefix="TEST",
+                           compression="zstd",
+                           max_file_size=1_000_000_000,
+                           row_group_size=1_000_000
+                           ) as part_writer:
+        for batch in get_batches(batch_count=50, batch_rows=1_000):
+            part_writer.write(pyarrow_table=batch)
+
+    assert part_writer.file_names == [f"{tmp_path.as_posix()}/TEST_0.parquet"]
+    metadata = pq.read_metadata(part_writer.file_names[0])
+    assert metadata.num_rows == 50_000
+    # Many small fetch batches end up in a few large row groups
+    assert metadata.num_row_groups < 10
+
+
+def test_files_roll_over_on_compressed_size(tmp_path):
+    max_file_size = 200_000
+    with ParquetPartWriter(output_path_prefix=tmp_path.as_posix(),
+                           file_name_prefix="TEST",
+                           compression="zstd",
+                           max_file_size=max_file_size,
+                           row_group_size=200_000
+                           ) as part_writer:
+        for batch in get_batches(batch_count=100, batch_rows=2_000):
+            part_writer.write(pyarrow_table=batch)
+
+    assert len(part_writer.file_names) > 1
+    assert sum(pq.read_metadata(file_name).num_rows for file_name in part_writer.file_names) == 200_000
+    # Files are filled close to the on-disk target - not to the uncompressed size
+    for file_name in part_writer.file_names[:-1]:
+        assert max_file_size / 2 < os.path.getsize(file_name) <= max_file_size * 1.1
+
+
+
+def test_row_groups_do_not_outgrow_small_files(tmp_path):
+    max_file_size = 200_000
+    # The default row group size (and each batch) is far larger than a whole file
+    with ParquetPartWriter(output_path_prefix=tmp_path.as_posix(),
+                           file_name_prefix="TEST",
+                           compression="zstd",
+                           max_file_size=max_file_size
+                           ) as part_writer:
+        for batch in get_batches(batch_count=4, batch_rows=100_000):
+            part_writer.write(pyarrow_table=batch)
+
+    assert len(part_writer.file_names) > 4
+    assert sum(pq.read_metadata(file_name).num_rows for file_name in part_writer.file_names) == 400_000
+    for file_name in part_writer.file_names:
+        assert os.path.getsize(file_name) <= max_file_size * 1.1
+
+
+def test_part_files_are_committed_atomically(tmp_path):
+    committed_files = []
+
+    try:
+        with ParquetPartWriter(output_path_prefix=tmp_path.as_posix(),
+                               file_name_prefix="TEST",
+                               compression="zstd",
+                               max_file_size=100_000,
+                               row_group_size=100_000,
+                               on_file_committed=lambda file_name, row_count: committed_files.append((file_name, row_count))
+                               ) as part_writer:
+            for batch in get_batches(batch_count=100, batch_rows=2_000):
+                part_writer.write(pyarrow_table=batch)
+                if part_writer.rows_written >= 100_000:
+                    raise RuntimeError("interrupted")
+    except RuntimeError:
+        pass
+
+    # Only the closed part files are left behind - under their final names
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(file_name) for file_name, _ in committed_files)
+    assert sum(row_count for _, row_count in committed_files) == sum(pq.read_metadata(file_name).num_rows
+                                                                    for file_name, _ in committed_files)